@@ -0,0 +1,92 @@
+"""
+End-to-end latency of one Samantha command, cold versus through the resident daemon.
+
+  cold         `python -m src.cli.samantha ...` in a fresh interpreter for every command
+  warm_client  `python -m src.cli.samantha_client ...` talking to a running daemon
+  warm_socket  the client's request/response exchange alone, without interpreter startup
+
+All runs use a throwaway HOME so session memory and the socket don't touch the real ones.
+
+Example:
+    python -m benchmarks.bench_daemon --runs 20 --prompt "list files in demo_data"
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import environment_info, latency_summary, write_json
+from src.cli.samantha_client import run_remote
+
+
+def _run(cmd, env, answer: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(cmd, input=answer, text=True, env=env, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - start
+
+
+def _wait_for_socket(path: str, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while not os.path.exists(path):
+        if time.time() > deadline:
+            raise RuntimeError(f"The daemon did not create its socket at '{path}'.")
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cold CLI runs with warm daemon requests.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--prompt", default="list files in demo_data")
+    parser.add_argument("--answer", default="y", help="Answer given to the confirmation question.")
+    parser.add_argument("--real-model", action="store_true",
+                        help="Plan with the configured model instead of --mock.")
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    mock_flag = [] if args.real_model else ["--mock"]
+    answer = args.answer + "\n"
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, SAMANTHA_SESSION="bench")
+        socket_path = os.path.join(home, "samantha.sock")
+
+        cold = [_run([sys.executable, "-m", "src.cli.samantha", args.prompt] + mock_flag, env, answer)
+                for _ in range(args.runs)]
+
+        daemon = subprocess.Popen([sys.executable, "-m", "src.cli.samantha", "--daemon", "--socket", socket_path],
+                                  env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_for_socket(socket_path)
+            client_cmd = [sys.executable, "-m", "src.cli.samantha_client", "--no-fallback",
+                          "--socket", socket_path, args.prompt] + mock_flag
+            warm_client = [_run(client_cmd, env, answer) for _ in range(args.runs)]
+
+            warm_socket = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                run_remote(args.prompt, socket_path, mock=not args.real_model, session="bench",
+                           out=io.StringIO(), ask=lambda prompt: args.answer)
+                warm_socket.append(time.perf_counter() - start)
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=10)
+
+    results = {
+        "environment": environment_info(),
+        "prompt": args.prompt,
+        "cold": latency_summary(cold),
+        "warm_client": latency_summary(warm_client),
+        "warm_socket": latency_summary(warm_socket),
+    }
+    for name in ("cold", "warm_client", "warm_socket"):
+        r = results[name]
+        print(f"{name:<12} p50={r['p50_ms']:>9}ms  p95={r['p95_ms']:>9}ms  max={r['max_ms']:>9}ms")
+    if args.output:
+        write_json(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
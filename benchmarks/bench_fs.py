@@ -0,0 +1,240 @@
+"""
+Filesystem benchmarks on a deterministic synthetic tree (see benchmarks/synthetic_tree.py).
+
+Scenarios, each timed over several interleaved rounds:
+  - find_files_glob      find_files("*.log") over the whole tree
+  - find_files_query     find_files with a query-language expression that needs stats
+  - search_in_files      search_in_files for the planted needle keyword
+  - find_best_match      fuzzy matches of misspelled names against the tree's file names
+  - cp_files             the cp command copying a list of files into a fresh directory
+  - cp_directory         the cp command copying one leaf directory
+  - create_mock_plan     the offline planner over a fixed corpus of prompts
+
+The tree is generated once per spec and kept (in the temp directory unless --tree-dir
+is given), so later runs measure the same files without paying for generation again.
+Results can be written with --output and used as a baseline: --compare BASELINE flags
+every scenario whose median got more than --threshold percent slower, and exits
+non-zero if there is any.
+
+Example:
+    python -m benchmarks.bench_fs --preset large --rounds 5 --output baseline.json
+    python -m benchmarks.bench_fs --preset large --rounds 5 --compare baseline.json --threshold 15
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_intent_parser import build_corpus
+from benchmarks.common import environment_info, latency_summary, write_json
+from benchmarks.synthetic_tree import NEEDLE, add_spec_arguments, ensure_tree, plan_tree, spec_from_args
+from src.core import executor, search
+from src.core.mock_planner import create_mock_plan
+
+DEFAULT_THRESHOLD_PCT = 10.0
+# Changes smaller than this are noise whatever their percentage (sub-millisecond scenarios).
+MIN_DELTA_MS = 0.5
+
+
+class Scenario:
+    def __init__(self, name, run, items, setup=None, teardown=None):
+        self.name = name
+        # Called once per round and timed; setup and teardown run around it, untimed.
+        self.run = run
+        self.setup = setup
+        self.teardown = teardown
+        # Units of work per run (files, queries, prompts), for the throughput figure.
+        self.items = items
+
+
+def _misspell(rng: random.Random, name: str) -> str:
+    chars = list(name)
+    i = rng.randrange(len(chars) - 1)
+    chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
+
+
+def _leaf_directories(paths):
+    directories = {os.path.dirname(path) for path in paths} - {""}
+    parents = set()
+    for directory in directories:
+        parent = os.path.dirname(directory)
+        while parent:
+            parents.add(parent)
+            parent = os.path.dirname(parent)
+    return sorted(directories - parents)
+
+
+def build_scenarios(root: str, spec, args) -> list:
+    rng = random.Random(spec.seed)
+    paths = [path for path, *_ in plan_tree(spec)]
+    ctx = executor.ExecutionContext(cwd=root, output=lambda text: None)
+    scratch = os.path.join(tempfile.gettempdir(), f"samantha-bench-cp-{os.getpid()}")
+
+    def fresh_scratch():
+        os.makedirs(scratch)
+
+    def remove_scratch():
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    copied = sorted(rng.sample(paths, min(args.cp_files, len(paths))))
+    leaves = _leaf_directories(paths)
+    leaf = leaves[len(leaves) // 2] if leaves else ""
+    leaf_files = sum(1 for path in paths if path.startswith(leaf + "/"))
+
+    names = sorted({os.path.basename(path) for path in paths})
+    candidates = rng.sample(names, min(args.match_candidates, len(names)))
+    queries = [_misspell(rng, rng.choice(candidates)) for _ in range(args.match_queries)]
+    prompts = build_corpus(args.prompts, spec.seed)
+
+    scenarios = [
+        Scenario("find_files_glob", lambda: search.find_files("*.log", root), spec.files),
+        Scenario("find_files_query",
+                 lambda: search.find_files(None, root, query="(ext:txt OR ext:md) size:>4KB modified:2023-01-01..2023-06-30"),
+                 spec.files),
+        Scenario("search_in_files", lambda: search.search_in_files(NEEDLE, root), spec.files),
+        Scenario("find_best_match", lambda: [search.find_best_match(q, candidates) for q in queries], len(queries)),
+        Scenario("cp_files", lambda: executor._execute_cp(copied + [scratch], ctx=ctx), len(copied),
+                 setup=fresh_scratch, teardown=remove_scratch),
+        Scenario("create_mock_plan", lambda: [create_mock_plan(p) for p in prompts], len(prompts)),
+    ]
+    if leaf:
+        scenarios.insert(5, Scenario("cp_directory", lambda: executor._execute_cp([leaf, scratch], ctx=ctx),
+                                     leaf_files, setup=fresh_scratch, teardown=remove_scratch))
+    return scenarios
+
+
+def run_scenarios(scenarios, rounds: int, warmup: int = 1) -> dict:
+    """Round-robins the scenarios so cache and frequency drift affect them all alike."""
+    samples = {scenario.name: [] for scenario in scenarios}
+    for round_index in range(warmup + rounds):
+        for scenario in scenarios:
+            if scenario.setup:
+                scenario.setup()
+            try:
+                start = time.perf_counter()
+                scenario.run()
+                elapsed = time.perf_counter() - start
+            finally:
+                if scenario.teardown:
+                    scenario.teardown()
+            if round_index >= warmup:
+                samples[scenario.name].append(elapsed)
+    results = {}
+    for scenario in scenarios:
+        summary = latency_summary(samples[scenario.name])
+        summary["items"] = scenario.items
+        summary["items_per_s"] = round(1000 * scenario.items / summary["p50_ms"], 1) if summary["p50_ms"] else None
+        results[scenario.name] = summary
+    return results
+
+
+def compare_results(baseline: dict, current: dict, threshold_pct: float = DEFAULT_THRESHOLD_PCT,
+                    min_delta_ms: float = MIN_DELTA_MS) -> list:
+    """
+    Compares the median of every scenario with the baseline's. Each row has a status:
+    "regression" (slower by more than threshold_pct and min_delta_ms), "improved",
+    "ok", or "new" / "missing" for scenarios only one side has.
+    """
+    rows = []
+    old_scenarios, new_scenarios = baseline.get("scenarios", {}), current.get("scenarios", {})
+    for name in list(old_scenarios) + [n for n in new_scenarios if n not in old_scenarios]:
+        old, new = old_scenarios.get(name), new_scenarios.get(name)
+        row = {"scenario": name, "baseline_ms": old and old["p50_ms"], "current_ms": new and new["p50_ms"],
+               "change_pct": None}
+        if old is None or new is None:
+            row["status"] = "new" if old is None else "missing"
+        else:
+            delta = new["p50_ms"] - old["p50_ms"]
+            row["change_pct"] = round(100 * delta / old["p50_ms"], 1) if old["p50_ms"] else 0.0
+            if abs(delta) < min_delta_ms or abs(row["change_pct"]) <= threshold_pct:
+                row["status"] = "ok"
+            else:
+                row["status"] = "regression" if delta > 0 else "improved"
+        rows.append(row)
+    return rows
+
+
+def _comparable(baseline: dict, current: dict) -> list:
+    """Reasons the two runs may not be comparable; empty if they are."""
+    warnings = []
+    if baseline.get("tree", {}).get("digest") != current["tree"]["digest"]:
+        warnings.append("the baseline was measured on a different tree")
+    old_env, new_env = baseline.get("environment", {}), current["environment"]
+    for key in ("python", "implementation", "platform", "cpu_count"):
+        if old_env.get(key) != new_env.get(key):
+            warnings.append(f"{key} differs ({old_env.get(key)} vs {new_env.get(key)})")
+    return warnings
+
+
+def _print_progress(files: int, elapsed: float):
+    print(f"  {files:,} files written ({files / elapsed:,.0f}/s)", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the filesystem commands on a synthetic tree.")
+    add_spec_arguments(parser)
+    parser.add_argument("--tree-dir", help="Where to keep the generated tree (default: the temp directory).")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per scenario.")
+    parser.add_argument("--scenarios", help="Comma-separated scenario names to run (default: all).")
+    parser.add_argument("--cp-files", type=int, default=200, help="Files copied by the cp_files scenario.")
+    parser.add_argument("--match-candidates", type=int, default=2000, help="File names find_best_match searches.")
+    parser.add_argument("--match-queries", type=int, default=10, help="Misspelled names looked up per round.")
+    parser.add_argument("--prompts", type=int, default=500, help="Prompts planned per round by create_mock_plan.")
+    parser.add_argument("--output", help="Write the results as JSON to this path (usable as a baseline).")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare with a saved result and fail on regressions.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT,
+                        help="Percent slowdown of a scenario's median that counts as a regression.")
+    args = parser.parse_args()
+
+    spec = spec_from_args(args)
+    root = args.tree_dir or os.path.join(tempfile.gettempdir(), f"samantha-bench-tree-{spec.key()}")
+    print(f"Preparing a tree of {spec.files:,} files in {root}")
+    manifest = ensure_tree(root, spec, progress=_print_progress)
+
+    scenarios = build_scenarios(root, spec, args)
+    if args.scenarios:
+        wanted = args.scenarios.split(",")
+        unknown = set(wanted) - {s.name for s in scenarios}
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = [s for s in scenarios if s.name in wanted]
+
+    results = {
+        "environment": environment_info(),
+        "tree": {"root": root, "spec": manifest["spec"], "summary": manifest["summary"], "digest": manifest["digest"]},
+        "config": {"rounds": args.rounds, "cp_files": args.cp_files, "match_candidates": args.match_candidates,
+                   "match_queries": args.match_queries, "prompts": args.prompts},
+        "scenarios": run_scenarios(scenarios, args.rounds),
+    }
+    for name, summary in results["scenarios"].items():
+        print(f"{name:18} p50={summary['p50_ms']:10.2f}ms  p95={summary['p95_ms']:10.2f}ms  "
+              f"{summary['items_per_s'] or 0:12,.0f} items/s")
+
+    if args.output:
+        write_json(args.output, results)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for warning in _comparable(baseline, results):
+            print(f"WARNING: {warning}")
+        rows = compare_results(baseline, results, args.threshold)
+        for row in rows:
+            change = f"{row['change_pct']:+.1f}%" if row["change_pct"] is not None else "-"
+            print(f"{row['scenario']:18} {row['baseline_ms'] or '-':>10} -> {row['current_ms'] or '-':>10} ms  "
+                  f"{change:>8}  {row['status']}")
+        regressions = [row["scenario"] for row in rows if row["status"] == "regression"]
+        if regressions:
+            print(f"FAIL: {', '.join(regressions)} slower than the baseline by more than {args.threshold}%")
+            sys.exit(1)
+        print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Throughput benchmark for the mock planner's intent parser.
+
+Compares the table-driven `mock_planner._parse_single_command` with the original
+keyword if/elif chain (kept verbatim below as `legacy_parse_single_command`) over a
+deterministic corpus of prompts, and checks that both produce the same steps.
+
+Example:
+    python -m benchmarks.bench_intent_parser --prompts 100000
+"""
+import argparse
+import random
+import re
+import time
+from typing import Dict, Optional
+
+from benchmarks.common import environment_info, write_json
+from src.core import mock_planner
+from src.core.mock_planner import _parse_single_command
+
+TEMPLATES = [
+    "find pdf files in {dir}",
+    "find files larger than {size} in {dir}",
+    "find files smaller than {size} in {dir}",
+    "find images older than {days} days in {dir}",
+    "find documents newer than {days} days",
+    "find files named {name} in {dir}",
+    "find files modified yesterday in {dir}",
+    "search for {word} in {dir}",
+    "search for {word} {word2}",
+    "copy {name} to {dir}",
+    "copy them to {dir}",
+    "cp {name} to {dir}",
+    "move {name} to {dir}",
+    "move those to {dir}",
+    "delete {dir}/{name}",
+    "remove them",
+    "rm {name}",
+    "make directory called {dir}",
+    "mkdir {dir}",
+    "cd {dir}",
+    "go to {dir}",
+    "change directory {dir}",
+    "create file called {name}",
+    "touch {name}",
+    "list files in {dir}",
+    "list {dir}",
+    "ls",
+    "what is the weather like today",
+    "please tidy up my {dir} folder when you get a chance",
+]
+DIRS = ["demo_data", "backup", "docs", "reports/2024", "~/downloads", "projects/samantha/src"]
+NAMES = ["report.pdf", "notes.txt", "q1-budget.txt", "slides.pdf", "photo.png", "data.csv"]
+WORDS = ["budget", "invoice", "meeting", "kernel", "error", "todo"]
+SIZES = ["1mb", "10 kb", "2gb", "500b"]
+
+
+def build_corpus(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        corpus.append(template.format(
+            dir=rng.choice(DIRS), name=rng.choice(NAMES), word=rng.choice(WORDS),
+            word2=rng.choice(WORDS), size=rng.choice(SIZES), days=rng.randint(1, 90)))
+    return corpus
+
+
+def _throughput(func, corpus):
+    start = time.perf_counter()
+    for prompt in corpus:
+        func(prompt)
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 4), "prompts_per_s": round(len(corpus) / elapsed, 1)}
+
+
+def _with_extra_intents(count: int):
+    """
+    Builds parse functions for both designs with `count` more intents that never match.
+    New if/elif branches are modeled as one keyword membership check each, ahead of the
+    original chain; the table-driven parser gets real registrations on a copy of its table.
+    """
+    keywords = [f"verb{i}" for i in range(count)]
+
+    def legacy(prompt):
+        words = prompt.strip().split()
+        for keyword in keywords:
+            if keyword in words:
+                return None
+        return legacy_parse_single_command(prompt)
+
+    parser = mock_planner.IntentParser()
+    for intent in mock_planner.DEFAULT_PARSER.intents.values():
+        parser.register(intent.name, intent.triggers, intent.handler, intent.priority, intent.condition)
+    for keyword in keywords:
+        parser.register(keyword, [keyword], lambda scan: None)
+    return legacy, parser.parse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the table-driven intent parser with the legacy if-chain.")
+    parser.add_argument("--prompts", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--extra-intents", type=int, nargs="*", default=[25, 100],
+                        help="Also measure with this many additional registered intents.")
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.prompts, args.seed)
+    mismatches = [p for p in set(corpus) if legacy_parse_single_command(p) != _parse_single_command(p)]
+
+    results = {
+        "environment": environment_info(),
+        "prompts": len(corpus),
+        "legacy": _throughput(legacy_parse_single_command, corpus),
+        "table_driven": _throughput(_parse_single_command, corpus),
+        "mismatches": sorted(mismatches),
+    }
+    speedup = results["legacy"]["seconds"] / results["table_driven"]["seconds"]
+    results["speedup"] = round(speedup, 2)
+
+    print(f"legacy       {results['legacy']['prompts_per_s']:>12,.0f} prompts/s")
+    print(f"table-driven {results['table_driven']['prompts_per_s']:>12,.0f} prompts/s  ({speedup:.2f}x)")
+    print(f"mismatching distinct prompts: {len(mismatches)}")
+
+    results["scaling"] = {}
+    for extra in args.extra_intents:
+        legacy, table_driven = _with_extra_intents(extra)
+        row = {"legacy": _throughput(legacy, corpus), "table_driven": _throughput(table_driven, corpus)}
+        row["speedup"] = round(row["legacy"]["seconds"] / row["table_driven"]["seconds"], 2)
+        results["scaling"][str(extra)] = row
+        print(f"+{extra:<4} intents: legacy {row['legacy']['prompts_per_s']:>10,.0f}/s  "
+              f"table-driven {row['table_driven']['prompts_per_s']:>10,.0f}/s  ({row['speedup']:.2f}x)")
+    if args.output:
+        write_json(args.output, results)
+
+
+# --- The original keyword chain, kept as the reference implementation ---
+
+def legacy_parse_single_command(user_intent: str) -> Optional[Dict]:
+    """
+    Parses a single command phrase into a plan step.
+    Handles pronoun resolution for commands like 'mv' and 'cp'.
+    """
+    words = user_intent.strip().split()
+    pronouns = ["them", "it", "those", "the files"]
+
+    # Command matching logic (ordered by likely specificity)
+    file_types = ["images", "documents", "videos", "audio", "archives"]
+    is_find_query = "find" in words
+    has_file_type_keyword = any(ft in user_intent for ft in file_types)
+
+    if is_find_query and ("files" in user_intent or has_file_type_keyword):
+        args = ["*", "."]
+        kwargs = {}
+        path_match = re.search(r"\s+in\s+((?:[a-zA-Z0-9._~-]+/)*[a-zA-Z0-9._~-]+)", user_intent)
+        if path_match:
+            args[1] = path_match.group(1).strip("'\"")
+        name_match = re.search(r"\s+named\s+(['\"]?[\w*.-]+['\"]?)", user_intent)
+        if name_match:
+            args[0] = name_match.group(1).strip("'\"")
+        size_larger_match = re.search(r"larger than\s+((?:\d+\.?\d*)\s*(?:kb|mb|gb|tb|b))", user_intent, re.IGNORECASE)
+        if size_larger_match:
+            kwargs["size"] = f">{size_larger_match.group(1).replace(' ', '').lower()}"
+        size_smaller_match = re.search(r"smaller than\s+((?:\d+\.?\d*)\s*(?:kb|mb|gb|tb|b))", user_intent, re.IGNORECASE)
+        if size_smaller_match:
+            kwargs["size"] = f"<{size_smaller_match.group(1).replace(' ', '').lower()}"
+        if "modified yesterday" in user_intent:
+            kwargs["modified"] = "<1d"
+        else:
+            older_match = re.search(r"older than\s+(\d+)\s*days?", user_intent)
+            if older_match:
+                kwargs["modified"] = f">{older_match.group(1)}d"
+            newer_match = re.search(r"newer than\s+(\d+)\s*days?", user_intent)
+            if newer_match:
+                kwargs["modified"] = f"<{newer_match.group(1)}d"
+        for ft in file_types:
+            if ft in user_intent:
+                kwargs["file_type"] = ft
+                break
+        step = {"cmd": "find_files", "args": args, "why": "To find files based on advanced search criteria."}
+        if kwargs:
+            step["kwargs"] = kwargs
+        return step
+
+    elif "search for" in user_intent:
+        try:
+            for_index = words.index("for")
+            content_start_index = for_index + 1
+            path = "."
+            content_end_index = len(words)
+            if "in" in words[content_start_index:]:
+                in_index = words.index("in", content_start_index)
+                content_end_index = in_index
+                path_start_index = in_index + 1
+                if path_start_index < len(words):
+                    path = " ".join(words[path_start_index:]).strip("'\"")
+            content_pattern = " ".join(words[content_start_index:content_end_index]).strip("'\"")
+            return {"cmd": "search_in_files", "args": [content_pattern, path], "why": "To search for content in files."}
+        except (ValueError, IndexError):
+            return None
+
+    elif "copy" in words or "cp" in words:
+        try:
+            to_index = words.index("to")
+            cp_index = words.index("copy") if "copy" in words else words.index("cp")
+            src = " ".join(words[cp_index + 1:to_index]).strip("'\"")
+            dest = " ".join(words[to_index + 1:]).strip("'\"")
+            if src.lower() in pronouns:
+                src = "$results.last"
+            return {"cmd": "cp", "args": [src, dest], "why": "To copy files or directories."}
+        except (ValueError, IndexError):
+            return None
+
+    elif "move" in words or "mv" in words:
+        try:
+            to_index = words.index("to")
+            mv_index = words.index("move") if "move" in words else words.index("mv")
+            src = " ".join(words[mv_index + 1:to_index]).strip("'\"")
+            dest = " ".join(words[to_index + 1:]).strip("'\"")
+            if src.lower() in pronouns:
+                src = "$results.last"
+            return {"cmd": "mv", "args": [src, dest], "why": "To move files or directories."}
+        except (ValueError, IndexError):
+            return None
+
+    elif "remove" in words or "delete" in words or "rm" in words:
+        try:
+            cmd_index = -1
+            if "remove" in words: cmd_index = words.index("remove")
+            elif "delete" in words: cmd_index = words.index("delete")
+            else: cmd_index = words.index("rm")
+            path = " ".join(words[cmd_index + 1:]).strip("'\"")
+            if path.lower() in pronouns:
+                path = "$results.last"
+            return {"cmd": "rm", "args": [path], "why": "To remove files or directories."}
+        except (ValueError, IndexError):
+            return None
+
+    elif ("make" in words and "directory" in words) or "mkdir" in words:
+        try:
+            path = ""
+            if "mkdir" in words:
+                path_index = words.index("mkdir") + 1
+                if path_index < len(words):
+                    path = " ".join(words[path_index:]).strip("'\"")
+            elif "make" in words and "directory" in words:
+                # Handle "make directory called 'name'" or "make directory name"
+                if "called" in words:
+                    path_index = words.index("called") + 1
+                    if path_index < len(words):
+                        path = " ".join(words[path_index:]).strip("'\"")
+                else:
+                    dir_index = words.index("directory")
+                    if dir_index + 1 < len(words):
+                        path = " ".join(words[dir_index + 1:]).strip("'\"")
+            
+            if path:
+                return {"cmd": "mkdir", "args": [path], "why": "To create a directory."}
+        except (ValueError, IndexError):
+            return None
+
+    elif "cd" in words or "go to" in user_intent or "change directory" in user_intent:
+        try:
+            path = ""
+            if "cd" in words:
+                path_index = words.index("cd") + 1
+                if path_index < len(words):
+                    path = " ".join(words[path_index:]).strip("'\"")
+            elif "go to" in user_intent:
+                to_index = words.index("to") + 1
+                if to_index < len(words):
+                    path = " ".join(words[to_index:]).strip("'\"")
+            elif "change directory" in user_intent:
+                dir_index = words.index("directory") + 1
+                if dir_index < len(words):
+                    path = " ".join(words[dir_index:]).strip("'\"")
+            
+            if path:
+                return {"cmd": "cd", "args": [path], "why": "To change the current directory."}
+        except (ValueError, IndexError):
+            return None
+
+    elif ("create" in words and "file" in words) or "touch" in words:
+        try:
+            path = ""
+            if "touch" in words:
+                path_index = words.index("touch") + 1
+                if path_index < len(words):
+                    path = " ".join(words[path_index:]).strip("'\"")
+            elif "create" in words and "file" in words:
+                # Handle "create file called 'name'" or "create file name"
+                if "called" in words:
+                    path_index = words.index("called") + 1
+                    if path_index < len(words):
+                        path = " ".join(words[path_index:]).strip("'\"")
+                else:
+                    file_index = words.index("file")
+                    if file_index + 1 < len(words):
+                        path = " ".join(words[file_index + 1:]).strip("'\"")
+            
+            if path:
+                return {"cmd": "touch", "args": [path], "why": "To create a file."}
+        except (ValueError, IndexError):
+            return None
+
+    elif "list" in words or "ls" in words:
+        path = "."
+        cmd_index = -1
+        if "ls" in words: cmd_index = words.index("ls")
+        elif "list" in words: cmd_index = words.index("list")
+
+        # If 'in' is present, path is what follows
+        if 'in' in words:
+            try:
+                path_index = words.index('in') + 1
+                if path_index < len(words):
+                    path = " ".join(words[path_index:]).strip("'\"")
+            except (ValueError, IndexError):
+                pass
+        # else if there's text after the command itself
+        elif cmd_index != -1 and cmd_index + 1 < len(words):
+            # what if it's "list files"? then path becomes "files" which is wrong.
+            # so we check if the word after the command is "files"
+            if words[cmd_index+1] == 'files':
+                # if there is something after 'files', it's the path
+                if cmd_index + 2 < len(words):
+                    path = " ".join(words[cmd_index+2:]).strip("'\"")
+                # else path is "."
+            else: # it is the path
+                path = " ".join(words[cmd_index+1:]).strip("'\"")
+
+        return {"cmd": "ls", "args": [path], "why": "To list files in a directory."}
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
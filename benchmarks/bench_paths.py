@@ -0,0 +1,112 @@
+"""
+Memory benchmark for find_files results: lists of str against PathSet (src/core/pathset.py).
+
+The paths are those of a synthetic tree (benchmarks/synthetic_tree.py), computed without
+writing it to disk and placed under a realistic absolute root. Two measurements, with
+tracemalloc:
+  - the result alone: a list of the paths against a PathSet of them,
+  - the result as a plan used to hold it: the list, the "Found files:" output string and
+    the lists parsed back from it for later steps and for the session memory, against a
+    PathSet shared by reference through a FileListing.
+Build and iteration times are measured separately, without tracemalloc.
+
+Example:
+    python -m benchmarks.bench_paths --files 1000000 --depth 6
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from benchmarks.common import environment_info, write_json
+from benchmarks.synthetic_tree import add_spec_arguments, plan_tree, spec_from_args
+from src.core import memory
+from src.core.pathset import FOUND_FILES_HEADER, FileListing, PathSet
+
+DEFAULT_ROOT = "/home/samantha/projects/benchmark-data/"
+
+
+def as_list(paths, root):
+    return [root + path for path in paths]
+
+
+def as_path_set(paths, root):
+    return PathSet(root + path for path in paths)
+
+
+def plan_with_lists(paths, root):
+    """What a find_files step left behind before PathSet: the list, its output text and two parsed copies."""
+    matches = as_list(paths, root)
+    output = FOUND_FILES_HEADER + "\n".join(matches)
+    step_files = [f for f in output.strip().split('\n')[1:] if f]
+    memory_files = [line.strip() for line in output[len(FOUND_FILES_HEADER):].split('\n') if line.strip()]
+    return matches, output, step_files, memory_files
+
+
+def plan_with_path_set(paths, root):
+    listing = FileListing(as_path_set(paths, root))
+    results = [{"status": "success", "output": listing}]
+    return listing, listing.paths, memory.files_from_results(results)
+
+
+def retained_bytes(build, paths, root) -> int:
+    """Bytes still allocated once `build` has returned, while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    result = build(paths, root)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def build_and_iterate_seconds(build, paths, root):
+    gc.collect()
+    start = time.perf_counter()
+    result = build(paths, root)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in result:
+        pass
+    return built, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory a find_files result takes as a list and as a PathSet.")
+    add_spec_arguments(parser)
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="Prefix put before every relative path.")
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    spec = spec_from_args(args)
+    paths = [path for path, *_ in plan_tree(spec)]
+    average_length = len(args.root) + sum(map(len, paths)) / max(1, len(paths))
+    results = {"environment": environment_info(), "files": len(paths), "average_path_chars": round(average_length, 1)}
+
+    for label, build in (("list", as_list), ("path_set", as_path_set),
+                         ("plan_lists", plan_with_lists), ("plan_path_set", plan_with_path_set)):
+        size = retained_bytes(build, paths, args.root)
+        results[f"{label}_bytes"] = size
+        results[f"{label}_bytes_per_path"] = round(size / max(1, len(paths)), 1)
+    for label, build in (("list", as_list), ("path_set", as_path_set)):
+        built, iterated = build_and_iterate_seconds(build, paths, args.root)
+        results[f"{label}_build_s"] = round(built, 4)
+        results[f"{label}_iterate_s"] = round(iterated, 4)
+
+    print(f"{results['files']:,} paths, {results['average_path_chars']} characters on average")
+    for label, title in (("list", "list of str"), ("path_set", "PathSet"),
+                         ("plan_lists", "plan, lists + text"), ("plan_path_set", "plan, shared PathSet")):
+        print(f"{title:22} {results[f'{label}_bytes'] / 1e6:10.1f} MB  "
+              f"{results[f'{label}_bytes_per_path']:8.1f} B/path")
+    print(f"result alone: {results['list_bytes'] / max(1, results['path_set_bytes']):.1f}x smaller; "
+          f"whole plan: {results['plan_lists_bytes'] / max(1, results['plan_path_set_bytes']):.1f}x smaller")
+    print(f"build   list={results['list_build_s'] * 1000:.1f}ms  PathSet={results['path_set_build_s'] * 1000:.1f}ms")
+    print(f"iterate list={results['list_iterate_s'] * 1000:.1f}ms  PathSet={results['path_set_iterate_s'] * 1000:.1f}ms")
+
+    if args.output:
+        write_json(args.output, results)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
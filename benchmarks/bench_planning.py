@@ -0,0 +1,140 @@
+"""
+Planning latency benchmark for `nl2cmd.nl_to_plan`.
+
+Starts the fake OpenAI-compatible server (unless --base-url points somewhere else),
+points CODER_BASE_URL at it, and drives the real `nl_to_plan` code path to measure:
+  - p50/p95/p99 latency of sequential planning calls
+  - throughput with several concurrent callers
+  - retry behaviour (server requests per plan, failed plans) under injected errors
+
+Example:
+    python -m benchmarks.bench_planning --requests 200 --concurrency 8 --latency 0.05 --error-rate 0.1
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import environment_info, latency_summary, write_json
+from benchmarks.fake_openai_server import FakeOpenAIServer, FakeServerConfig
+from src.core import nl2cmd
+
+DEFAULT_PROMPTS = [
+    "list files in demo_data",
+    "find pdf files in demo_data",
+    "find files larger than 1mb in demo_data",
+    "search for budget in demo_data",
+    "find pdf files in demo_data then copy them to backup",
+    "make directory called reports",
+    "delete demo_data/newfile.txt",
+]
+
+
+def _plan_once(prompt: str):
+    """Runs one `nl_to_plan` call and returns (elapsed_seconds, succeeded)."""
+    start = time.perf_counter()
+    try:
+        nl2cmd.nl_to_plan(prompt)
+        ok = True
+    except nl2cmd.InvalidPlanError:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+@contextlib.contextmanager
+def _maybe_quiet(quiet: bool):
+    """nl_to_plan prints tracebacks on every failed attempt; keep the report readable."""
+    if not quiet:
+        yield
+        return
+    sink = io.StringIO()
+    # Redirect once around a whole phase: nesting redirects per worker thread would race.
+    with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+        yield
+
+
+def run_sequential(prompts, count: int, quiet: bool = True) -> dict:
+    samples, failures = [], 0
+    with _maybe_quiet(quiet):
+        for i in range(count):
+            elapsed, ok = _plan_once(prompts[i % len(prompts)])
+            samples.append(elapsed)
+            failures += 0 if ok else 1
+    summary = latency_summary(samples)
+    summary["failed_plans"] = failures
+    return summary
+
+
+def run_concurrent(prompts, count: int, concurrency: int, quiet: bool = True) -> dict:
+    start = time.perf_counter()
+    with _maybe_quiet(quiet), ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(lambda i: _plan_once(prompts[i % len(prompts)]), range(count)))
+    wall = time.perf_counter() - start
+    summary = latency_summary([elapsed for elapsed, _ in outcomes])
+    summary["failed_plans"] = sum(1 for _, ok in outcomes if not ok)
+    summary["concurrency"] = concurrency
+    summary["wall_s"] = round(wall, 3)
+    summary["throughput_per_s"] = round(count / wall, 2) if wall > 0 else None
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark nl_to_plan against a local fake model endpoint.")
+    parser.add_argument("--requests", type=int, default=100, help="Planning calls per phase.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent callers in the throughput phase.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake server base latency (s).")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Fake server latency jitter (s).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected HTTP 500.")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Probability of a non-JSON completion.")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--base-url", help="Benchmark an existing endpoint instead of starting the fake server.")
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    parser.add_argument("--verbose", action="store_true", help="Show nl_to_plan's own error output.")
+    args = parser.parse_args()
+
+    server = None
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        config = FakeServerConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                  malformed_rate=args.malformed_rate, seed=args.seed)
+        server = FakeOpenAIServer(config).start()
+        base_url = server.base_url
+
+    os.environ["CODER_BASE_URL"] = base_url
+    os.environ.setdefault("CODER_MODEL_NAME", "fake-coder")
+    os.environ.setdefault("OPENAI_API_KEY", "EMPTY")
+
+    quiet = not args.verbose
+    results = {"environment": environment_info(), "base_url": base_url, "config": vars(args)}
+    try:
+        results["sequential"] = run_sequential(DEFAULT_PROMPTS, args.requests, quiet)
+        if server:
+            results["sequential"]["server"] = server.stats.as_dict()
+            server.stats.reset()
+        results["concurrent"] = run_concurrent(DEFAULT_PROMPTS, args.requests, args.concurrency, quiet)
+        if server:
+            results["concurrent"]["server"] = server.stats.as_dict()
+    finally:
+        if server:
+            server.stop()
+
+    for phase in ("sequential", "concurrent"):
+        r = results[phase]
+        line = (f"{phase:<11} n={r['count']} p50={r['p50_ms']}ms p95={r['p95_ms']}ms "
+                f"p99={r['p99_ms']}ms failed={r['failed_plans']}")
+        if "throughput_per_s" in r:
+            line += f" throughput={r['throughput_per_s']}/s"
+        if "server" in r:
+            line += f" server_requests_per_plan={r['server']['requests'] / max(1, r['count']):.2f}"
+        print(line)
+
+    if args.output:
+        write_json(args.output, results)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Cold-start cost of the CLI's mock path, measured with `python -X importtime`.
+
+Each run starts a fresh interpreter for `python -m src.cli.samantha --mock <prompt>`,
+declines the plan, and parses the import-time report from stderr. The script reports
+total import time, wall time and the heaviest top-level imports, and exits non-zero if
+the median import time goes over `--budget-ms` or if a module that only the model path
+needs (openai, dotenv, ...) was imported at all.
+
+Example:
+    python -m benchmarks.bench_startup --runs 10 --budget-ms 150
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import environment_info, latency_summary, write_json
+
+DEFAULT_BUDGET_MS = 150.0
+# Modules the mock path must never import.
+FORBIDDEN_MODULES = ("openai", "dotenv", "httpx", "pydantic", "src.core.nl2cmd", "src.core.batch")
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Parses `-X importtime` output into {module: cumulative_us} for every imported module,
+    plus the names of the top-level ones (imported directly rather than by another module).
+    """
+    cumulative, top_level = {}, []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        _, total_us, indent, name = match.groups()
+        cumulative[name] = int(total_us)
+        # The report indents dependencies by two spaces per level under a single leading space.
+        if len(indent) == 1:
+            top_level.append(name)
+    return {"cumulative_us": cumulative, "top_level": top_level}
+
+
+def measure_once(prompt: str, env: dict) -> dict:
+    """Runs the mock path once in a fresh interpreter and returns its import report and wall time."""
+    cmd = [sys.executable, "-X", "importtime", "-m", "src.cli.samantha", "--mock", prompt]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, input="n\n", text=True, env=env, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE, check=False)
+    wall = time.perf_counter() - start
+    report = parse_importtime(proc.stderr)
+    total_us = sum(report["cumulative_us"][name] for name in report["top_level"])
+    return {"wall": wall, "imports": total_us / 1e6, "returncode": proc.returncode, **report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and budget the CLI's cold start on the mock path.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--prompt", default="list files in demo_data")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum median total import time, in milliseconds.")
+    parser.add_argument("--top", type=int, default=10, help="How many of the heaviest imports to list.")
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        # A throwaway HOME keeps session memory and .samantha files out of the measurement.
+        env = dict(os.environ, HOME=home, SAMANTHA_SESSION="bench")
+        runs = [measure_once(args.prompt, env) for _ in range(args.runs)]
+
+    failed = [r for r in runs if r["returncode"] != 0]
+    last = runs[-1]
+    heaviest = sorted(last["top_level"], key=lambda name: last["cumulative_us"][name], reverse=True)[:args.top]
+    forbidden = sorted({name for r in runs for name in r["cumulative_us"]
+                        if name.split(".")[0] in FORBIDDEN_MODULES or name in FORBIDDEN_MODULES})
+    imports = latency_summary([r["imports"] for r in runs])
+    results = {
+        "environment": environment_info(),
+        "prompt": args.prompt,
+        "budget_ms": args.budget_ms,
+        "imports": imports,
+        "wall": latency_summary([r["wall"] for r in runs]),
+        "heaviest_imports_ms": {name: round(last["cumulative_us"][name] / 1000, 3) for name in heaviest},
+        "forbidden_imports": forbidden,
+        "failed_runs": len(failed),
+    }
+
+    print(f"imports p50={imports['p50_ms']}ms  max={imports['max_ms']}ms  (budget {args.budget_ms}ms)")
+    print(f"wall    p50={results['wall']['p50_ms']}ms  max={results['wall']['max_ms']}ms")
+    for name, ms in results["heaviest_imports_ms"].items():
+        print(f"  {ms:>9.3f}ms  {name}")
+    if args.output:
+        write_json(args.output, results)
+
+    problems = []
+    if failed:
+        problems.append(f"{len(failed)} run(s) exited with an error")
+    if forbidden:
+        problems.append("the mock path imported " + ", ".join(forbidden))
+    if imports["p50_ms"] > args.budget_ms:
+        problems.append(f"median import time {imports['p50_ms']}ms is over the {args.budget_ms}ms budget")
+    if problems:
+        print("FAIL: " + "; ".join(problems))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Small helpers shared by the benchmark scripts.
+"""
+import json
+import math
+import os
+import platform
+import time
+from datetime import datetime
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Returns the `pct` percentile (0-100) of an already sorted list, using linear interpolation."""
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return float(sorted_values[0])
+    rank = (pct / 100.0) * (len(sorted_values) - 1)
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return float(sorted_values[low])
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def latency_summary(samples) -> dict:
+    """Summarizes a list of durations (seconds) into count, mean and p50/p95/p99 in milliseconds."""
+    values = sorted(samples)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(1000 * sum(values) / len(values), 3),
+        "min_ms": round(1000 * values[0], 3),
+        "p50_ms": round(1000 * percentile(values, 50), 3),
+        "p95_ms": round(1000 * percentile(values, 95), 3),
+        "p99_ms": round(1000 * percentile(values, 99), 3),
+        "max_ms": round(1000 * values[-1], 3),
+    }
+
+
+def timed(func, *args, **kwargs):
+    """Calls `func` and returns (elapsed_seconds, result)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def environment_info() -> dict:
+    """Describes the machine a benchmark ran on, so saved results can be compared sensibly."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+def write_json(path: str, data: dict):
+    """Writes benchmark results to a JSON file, creating the parent directory if needed."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
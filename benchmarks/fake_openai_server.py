@@ -0,0 +1,296 @@
+"""
+A small local stand-in for an OpenAI-compatible `/v1/chat/completions` endpoint.
+
+It lets us benchmark and regression-test `nl2cmd.nl_to_plan` without the real
+GPU endpoint. Plans are served from a canned table (substring of the request ->
+plan) and fall back to the mock planner, so responses look like real plans.
+Latency, jitter, streaming and error injection are all configurable.
+
+Run it standalone:
+    python -m benchmarks.fake_openai_server --port 8000 --latency 0.2 --error-rate 0.1
+
+Then point Samantha at it:
+    export CODER_BASE_URL=http://127.0.0.1:8000/v1
+    export CODER_MODEL_NAME=fake-coder
+    export OPENAI_API_KEY=EMPTY
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.core.mock_planner import create_mock_plan
+
+CURRENT_REQUEST_MARKER = "--- Current Request ---\n"
+
+
+class FakeServerConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500,
+                 malformed_rate=0.0, stream_chunk_delay=0.0, canned_plans=None, seed=None):
+        # Base latency in seconds added to every completion, plus uniform jitter in [0, jitter].
+        self.latency = latency
+        self.jitter = jitter
+        # Probability of answering with an HTTP error instead of a completion.
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # Probability of answering 200 with content that is not valid JSON (exercises plan retries).
+        self.malformed_rate = malformed_rate
+        # Delay between SSE chunks when the client asks for `stream: true`.
+        self.stream_chunk_delay = stream_chunk_delay
+        # Maps a lowercase substring of the user request to the plan to serve.
+        self.canned_plans = canned_plans or {}
+        self.random = random.Random(seed)
+
+
+class FakeServerStats:
+    """Thread-safe counters describing what the server has answered so far."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.completions = 0
+        self.errors = 0
+        self.malformed = 0
+        self.streams = 0
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def reset(self):
+        with self._lock:
+            self.requests = self.completions = self.errors = self.malformed = self.streams = 0
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "completions": self.completions,
+                "errors": self.errors,
+                "malformed": self.malformed,
+                "streams": self.streams,
+            }
+
+
+def _extract_request_text(messages) -> str:
+    """Returns the user's current request from the chat messages sent by `nl_to_plan`."""
+    for message in reversed(messages or []):
+        if message.get("role") == "user":
+            content = message.get("content") or ""
+            if CURRENT_REQUEST_MARKER in content:
+                return content.split(CURRENT_REQUEST_MARKER, 1)[1].strip()
+            return content.strip()
+    return ""
+
+
+def _plan_for(request_text: str, config: FakeServerConfig) -> dict:
+    """Picks a canned plan for the request, falling back to the mock planner."""
+    lowered = request_text.lower()
+    for key, plan in config.canned_plans.items():
+        if key.lower() in lowered:
+            return plan
+    return create_mock_plan(request_text)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Silence the default per-request stderr logging.
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self) -> FakeServerConfig:
+        return self.server.config
+
+    @property
+    def stats(self) -> FakeServerStats:
+        return self.server.stats
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [
+                {"id": "fake-coder", "object": "model", "owned_by": "samantha"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path '{self.path}'."}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path '{self.path}'."}})
+            return
+
+        self.stats.incr("requests")
+        try:
+            body = json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Request body is not valid JSON."}})
+            return
+
+        config = self.config
+        rng = config.random
+        delay = config.latency + (rng.uniform(0, config.jitter) if config.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if config.error_rate and rng.random() < config.error_rate:
+            self.stats.incr("errors")
+            self._send_json(config.error_status, {"error": {
+                "message": "Injected failure from the fake server.",
+                "type": "server_error",
+                "code": config.error_status,
+            }})
+            return
+
+        request_text = _extract_request_text(body.get("messages"))
+        if config.malformed_rate and rng.random() < config.malformed_rate:
+            self.stats.incr("malformed")
+            content = "Sure! Here is your plan: (this is not JSON)"
+        else:
+            content = json.dumps(_plan_for(request_text, config))
+
+        model = body.get("model", "fake-coder")
+        if body.get("stream"):
+            self.stats.incr("streams")
+            self._send_stream(model, content)
+        else:
+            self.stats.incr("completions")
+            self._send_json(200, _completion(model, content))
+
+    def _send_stream(self, model: str, content: str):
+        """Streams the content as server-sent events in a handful of chunks."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        chunk_size = max(1, len(content) // 8)
+        pieces = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+        for i, piece in enumerate(pieces):
+            delta = {"content": piece}
+            if i == 0:
+                delta["role"] = "assistant"
+            self._write_event(_chunk(completion_id, model, delta, None))
+            if self.config.stream_chunk_delay:
+                time.sleep(self.config.stream_chunk_delay)
+        self._write_event(_chunk(completion_id, model, {}, "stop"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _write_event(self, body: dict):
+        self.wfile.write(f"data: {json.dumps(body)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def _completion(model: str, content: str) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason) -> dict:
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+class FakeOpenAIServer:
+    """
+    Runs the fake endpoint on a background thread.
+    Usable as a context manager; `base_url` is what CODER_BASE_URL should be set to.
+    """
+
+    def __init__(self, config: FakeServerConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeServerConfig()
+        self.stats = FakeServerStats()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.config = self.config
+        self._httpd.stats = self.stats
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in for Samantha's planner.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base latency per completion, in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random latency, in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected HTTP error.")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status used for injected errors.")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Probability of a non-JSON completion.")
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.0, help="Delay between streamed chunks.")
+    parser.add_argument("--plans", help="JSON file mapping request substrings to canned plans.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    canned_plans = {}
+    if args.plans:
+        with open(args.plans, "r", encoding="utf-8") as f:
+            canned_plans = json.load(f)
+
+    config = FakeServerConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        error_status=args.error_status, malformed_rate=args.malformed_rate,
+        stream_chunk_delay=args.stream_chunk_delay, canned_plans=canned_plans, seed=args.seed)
+    server = FakeOpenAIServer(config, host=args.host, port=args.port)
+    print(f"Fake OpenAI server listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
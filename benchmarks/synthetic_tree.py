@@ -0,0 +1,218 @@
+"""
+Deterministic synthetic directory trees for the filesystem benchmarks.
+
+The same TreeSpec always produces the same tree: the same directories, file names,
+sizes, contents and modification times. Runs on different days or machines therefore
+measure the same work. File contents are slices of two pools generated once per tree,
+one of words and one of random bytes, so writing a million files costs little more
+than the system calls. A few text files carry NEEDLE, for content-search scenarios.
+
+A manifest next to the tree records the spec it was built from. `ensure_tree` reuses
+a matching tree instead of generating it again, which matters at 1M files.
+
+Example:
+    python -m benchmarks.synthetic_tree /tmp/tree --files 100000 --depth 6
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import time
+
+NEEDLE = "quasarneedle"
+EPOCH = 1_700_000_000  # fixed "now" for modification times, so date filters select the same files
+TEXT_EXTENSIONS = [".txt", ".md", ".log", ".csv", ".py", ".json"]
+BINARY_EXTENSIONS = [".pdf", ".jpg", ".png", ".zip", ".bin", ".mp3"]
+WORDS = ["alpha", "budget", "report", "draft", "invoice", "notes", "summary", "project", "photo",
+         "backup", "config", "server", "client", "meeting", "plan", "data", "archive", "music",
+         "video", "release", "kernel", "package", "review", "travel", "family", "design"]
+POOL_BYTES = 1 << 20
+MANIFEST_SUFFIX = ".manifest.json"
+
+PRESETS = {
+    "small": {"files": 1_000, "depth": 3},
+    "medium": {"files": 10_000, "depth": 4},
+    "large": {"files": 100_000, "depth": 5},
+    "huge": {"files": 1_000_000, "depth": 6},
+}
+
+
+class TreeSpec:
+    def __init__(self, files=10_000, depth=4, files_per_dir=50, text_ratio=0.7, median_size=2048,
+                 size_sigma=1.5, max_size=256 * 1024, needle_ratio=0.01, max_age_days=730, seed=42):
+        self.files = files
+        # Deepest directory level below the root, and the average number of files per directory.
+        self.depth = depth
+        self.files_per_dir = files_per_dir
+        # Share of text files (the rest are binary) and of text files that contain NEEDLE.
+        self.text_ratio = text_ratio
+        self.needle_ratio = needle_ratio
+        # File sizes are lognormal around median_size, capped at max_size.
+        self.median_size = median_size
+        self.size_sigma = size_sigma
+        self.max_size = max_size
+        # Modification times are spread uniformly over the max_age_days before EPOCH.
+        self.max_age_days = max_age_days
+        self.seed = seed
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TreeSpec":
+        return cls(**data)
+
+    def key(self) -> str:
+        """Short stable digest of the spec, for naming cached trees."""
+        return hashlib.sha256(json.dumps(self.as_dict(), sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _pools(rng: random.Random, size: int):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word + ("\n" if rng.random() < 0.1 else " "))
+        length += len(words[-1])
+    return "".join(words).encode()[:size], rng.randbytes(size)
+
+
+def _directories(rng: random.Random, spec: TreeSpec):
+    """Relative directory paths (the root is ''), grown one random child at a time up to spec.depth."""
+    target = max(1, math.ceil(spec.files / max(1, spec.files_per_dir)))
+    directories = [("", 0)]
+    growable = [0] if spec.depth > 0 else []
+    while len(directories) < target and growable:
+        parent_index = growable[rng.randrange(len(growable))]
+        parent, level = directories[parent_index]
+        name = f"{rng.choice(WORDS)}_{len(directories)}"
+        path = f"{parent}/{name}" if parent else name
+        directories.append((path, level + 1))
+        if level + 1 < spec.depth:
+            growable.append(len(directories) - 1)
+    return [path for path, _ in directories]
+
+
+def plan_tree(spec: TreeSpec):
+    """
+    Yields (relative_path, kind, size, pool_offset, has_needle, mtime) for every file,
+    then nothing else; the same spec always yields the same sequence.
+    """
+    rng = random.Random(spec.seed)
+    directories = _directories(rng, spec)
+    pool_size = max(POOL_BYTES, 2 * spec.max_size)
+    log_median = math.log(max(1, spec.median_size))
+    for index in range(spec.files):
+        directory = directories[rng.randrange(len(directories))]
+        is_text = rng.random() < spec.text_ratio
+        extension = rng.choice(TEXT_EXTENSIONS if is_text else BINARY_EXTENSIONS)
+        name = f"{rng.choice(WORDS)}_{index:07d}{extension}"
+        size = min(spec.max_size, int(rng.lognormvariate(log_median, spec.size_sigma)))
+        offset = rng.randrange(pool_size - size + 1)
+        needle = is_text and rng.random() < spec.needle_ratio
+        mtime = EPOCH - rng.randrange(spec.max_age_days * 86400)
+        yield (f"{directory}/{name}" if directory else name), ("text" if is_text else "binary"), size, offset, needle, mtime
+
+
+def generate_tree(root: str, spec: TreeSpec, progress=None) -> dict:
+    """Writes the tree under `root` (which must not exist yet) and returns its manifest."""
+    os.makedirs(root)
+    pools_rng = random.Random(spec.seed ^ 0x5EED)
+    text_pool, binary_pool = _pools(pools_rng, max(POOL_BYTES, 2 * spec.max_size))
+    needle = NEEDLE.encode()
+    summary = {"files": 0, "text_files": 0, "binary_files": 0, "needle_files": 0, "bytes": 0}
+    made = set()
+    digest = hashlib.sha256()
+    started = time.perf_counter()
+    for path, kind, size, offset, has_needle, mtime in plan_tree(spec):
+        full_path = os.path.join(root, path)
+        directory = os.path.dirname(full_path)
+        if directory not in made:
+            os.makedirs(directory, exist_ok=True)
+            made.add(directory)
+        data = (text_pool if kind == "text" else binary_pool)[offset:offset + size]
+        if has_needle:
+            at = size // 2
+            data = data[:at] + b" " + needle + b" " + data[at:]
+        with open(full_path, "wb") as f:
+            f.write(data)
+        os.utime(full_path, (mtime, mtime))
+        summary["files"] += 1
+        summary[f"{kind}_files"] += 1
+        summary["needle_files"] += has_needle
+        summary["bytes"] += len(data)
+        digest.update(f"{path}\0{len(data)}\0{mtime}\n".encode())
+        if progress and summary["files"] % 100_000 == 0:
+            progress(summary["files"], time.perf_counter() - started)
+    summary["directories"] = len(made | {root})
+    manifest = {"spec": spec.as_dict(), "summary": summary, "digest": digest.hexdigest(),
+                "generation_s": round(time.perf_counter() - started, 3)}
+    with open(root.rstrip(os.sep) + MANIFEST_SUFFIX, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(root: str):
+    try:
+        with open(root.rstrip(os.sep) + MANIFEST_SUFFIX, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ensure_tree(root: str, spec: TreeSpec, progress=None) -> dict:
+    """The manifest of the tree at `root`, generating (or regenerating) it unless it already matches `spec`."""
+    manifest = load_manifest(root)
+    if manifest is not None and manifest.get("spec") == spec.as_dict() and os.path.isdir(root):
+        return manifest
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    return generate_tree(root, spec, progress)
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser):
+    defaults = TreeSpec()
+    parser.add_argument("--preset", choices=sorted(PRESETS), help="Start from a preset size (files and depth).")
+    parser.add_argument("--files", type=int, help=f"Number of files (default {defaults.files}).")
+    parser.add_argument("--depth", type=int, help=f"Deepest directory level (default {defaults.depth}).")
+    parser.add_argument("--files-per-dir", type=int, default=defaults.files_per_dir)
+    parser.add_argument("--text-ratio", type=float, default=defaults.text_ratio, help="Share of text files.")
+    parser.add_argument("--median-size", type=int, default=defaults.median_size, help="Median file size in bytes.")
+    parser.add_argument("--size-sigma", type=float, default=defaults.size_sigma, help="Lognormal spread of sizes.")
+    parser.add_argument("--max-size", type=int, default=defaults.max_size, help="Largest file size in bytes.")
+    parser.add_argument("--needle-ratio", type=float, default=defaults.needle_ratio,
+                        help=f"Share of text files containing '{NEEDLE}'.")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args) -> TreeSpec:
+    preset = PRESETS.get(args.preset or "", {})
+    defaults = TreeSpec()
+    return TreeSpec(files=args.files or preset.get("files", defaults.files),
+                    depth=args.depth if args.depth is not None else preset.get("depth", defaults.depth),
+                    files_per_dir=args.files_per_dir, text_ratio=args.text_ratio, median_size=args.median_size,
+                    size_sigma=args.size_sigma, max_size=args.max_size, needle_ratio=args.needle_ratio,
+                    seed=args.seed)
+
+
+def _print_progress(files: int, elapsed: float):
+    print(f"  {files:,} files written ({files / elapsed:,.0f}/s)", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic directory tree.")
+    parser.add_argument("root", help="Directory to create (replaced if it holds a tree from another spec).")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    manifest = ensure_tree(args.root, spec_from_args(args), progress=_print_progress)
+    summary = manifest["summary"]
+    print(f"{summary['files']:,} files ({summary['text_files']:,} text, {summary['binary_files']:,} binary, "
+          f"{summary['needle_files']:,} with '{NEEDLE}') in {summary['directories']:,} directories, "
+          f"{summary['bytes'] / 1e6:,.1f} MB; digest {manifest['digest'][:16]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Resident Samantha daemon.
+
+`python -m src.cli.samantha --daemon` loads everything once (the model client, the
+intent tables, session memories) and then serves prompts from `samantha_client` over a
+Unix domain socket. Each request runs in its own thread with its own execution context:
+everything Samantha prints is streamed to that client, every question (plan
+confirmation, deletion prompts) is asked on that client's terminal, and commands run
+in that client's working directory. Requests for the same session are handled one at
+a time; different sessions run concurrently.
+"""
+import os
+import signal
+import socket
+import socketserver
+import threading
+
+from src.cli import samantha
+from src.cli.samantha_client import read_message, send_message
+from src.core import executor, memory, nl2cmd, session_store
+from src.core.output import OutputSink
+from src.osint import snapshot
+
+
+class _RemoteOutput:
+    """Streams everything written to it to the client."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.disconnected = False
+
+    def write(self, text: str) -> int:
+        if text and not self.disconnected:
+            try:
+                send_message(self.wfile, {"type": "output", "text": text})
+            except OSError:
+                self.disconnected = True
+        return len(text)
+
+
+def _remote_input(rfile, wfile):
+    """Returns a function that asks a question on the client's terminal and returns the answer."""
+    def ask(prompt=""):
+        try:
+            send_message(wfile, {"type": "input", "prompt": str(prompt)})
+            message = read_message(rfile)
+        except OSError:
+            message = None
+        if not message or message.get("type") != "input":
+            # The client went away; behave like a closed stdin.
+            raise EOFError("The client disconnected.")
+        return message.get("text", "")
+    return ask
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = read_message(self.rfile)
+        except ValueError:
+            request = None
+        if request is None:
+            # A connection probe (e.g. another daemon checking the socket) with no request.
+            return
+        if request.get("type") != "request" or not request.get("prompt"):
+            try:
+                send_message(self.wfile, {"type": "done", "status": "bad_request"})
+            except OSError:
+                pass
+            return
+
+        server = self.server
+        session_id = request.get("session") or session_store.default_session_id()
+        memory_instance = server.memory_for(session_id, forget=bool(request.get("forget")))
+
+        output = _RemoteOutput(self.wfile)
+        cwd = request.get("cwd")
+        # Long outputs reach the client shortened; with "full" they are also written to that file.
+        ctx = executor.ExecutionContext(cwd=cwd if cwd and os.path.isdir(cwd) else None,
+                                        ask=_remote_input(self.rfile, self.wfile),
+                                        sink=OutputSink(output.write, spill_path=request.get("full")))
+        try:
+            with server.session_lock(session_id):
+                samantha.process_prompt(request["prompt"], memory_instance, mock=bool(request.get("mock")), ctx=ctx)
+            status = "ok"
+        except EOFError:
+            status = "disconnected"
+        finally:
+            ctx.close()
+        if not output.disconnected:
+            try:
+                send_message(self.wfile, {"type": "done", "status": status})
+            except OSError:
+                pass
+
+
+class SamanthaDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, store: session_store.SessionStore = None):
+        self.socket_path = socket_path
+        self.store = store or session_store.SessionStore()
+        self.memories = {}
+        self._session_locks = {}
+        self._memories_lock = threading.Lock()
+        _claim_socket_path(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+        # Anyone who can connect can run commands as this user.
+        os.chmod(socket_path, 0o600)
+
+    def memory_for(self, session_id: str, forget: bool = False) -> memory.Memory:
+        """Returns the session's memory, loading it from the store only the first time."""
+        with self._memories_lock:
+            if forget:
+                self.store.clear(session_id)
+                self.memories.pop(session_id, None)
+            if session_id not in self.memories:
+                self.memories[session_id] = memory.Memory(store=self.store, session_id=session_id)
+            return self.memories[session_id]
+
+    def session_lock(self, session_id: str) -> threading.Lock:
+        """The lock that makes requests of one session run one after another."""
+        with self._memories_lock:
+            return self._session_locks.setdefault(session_id, threading.Lock())
+
+    def server_close(self):
+        super().server_close()
+        self.store.close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def _claim_socket_path(socket_path: str):
+    """Removes a stale socket left by a daemon that died; refuses if one is still listening."""
+    directory = os.path.dirname(socket_path)
+    if directory:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A Samantha daemon is already running at '{socket_path}'.")
+
+
+def _warm_up():
+    """Builds the things every request would otherwise pay for on its first use."""
+    if samantha.has_api_config():
+        base_url, _, api_key = nl2cmd._get_model_config()
+        nl2cmd._get_client(base_url, api_key)
+        snapshot.host_context()
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(socket_path: str):
+    """Runs the daemon until it is interrupted or receives SIGTERM."""
+    _warm_up()
+    server = SamanthaDaemon(socket_path)
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    print(f"Samantha daemon listening on {socket_path}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,13 +1,19 @@
 import argparse
 import os
-from dotenv import load_dotenv
-import openai
+import sqlite3
+import sys
 
 # It's good practice to structure imports, especially in a larger project.
-from src.core import nl2cmd, executor, memory, safety, suggestions
+# Only what every request needs is imported here. The model client (openai, dotenv,
+# nl2cmd), batch mode, suggestions and the daemon are imported where they are used,
+# so `--mock` and `--help` don't pay for them at startup.
+from src.core import executor, memory, metrics, output, session_store, tracing
 from src.core.mock_planner import create_mock_plan
 from src.ui import persona, colors
 
+API_ERROR_MESSAGE = ("I'm having trouble connecting to the AI model. "
+                     "Please check your connection and API settings. Details: {}")
+
 def has_api_config():
     """Checks if the required API environment variables are set."""
     return all([
@@ -16,92 +22,257 @@ def has_api_config():
         os.environ.get("OPENAI_API_KEY")
     ])
 
-def handle_suggestion(suggestion):
+def is_api_error(e: Exception) -> bool:
+    """Checks for an openai API error without importing openai when it was never used."""
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(e, openai.APIError)
+
+def handle_suggestion(suggestion, ctx: executor.ExecutionContext = None):
     """Handles displaying and potentially acting on a suggestion."""
     if not suggestion:
         return
+    ctx = ctx or executor.DEFAULT_CONTEXT
 
-    print(persona.inform_suggestion(suggestion['title'], suggestion['message']))
-    choice = input("Would you like me to perform this action? (y/n): ").lower().strip()
+    ctx.print(persona.inform_suggestion(suggestion['title'], suggestion['message']))
+    choice = ctx.ask("Would you like me to perform this action? (y/n): ").lower().strip()
 
     if choice == 'y':
-        print(persona.inform("Great! I'll take care of that for you."))
+        ctx.print(persona.inform("Great! I'll take care of that for you."))
         # The suggestion contains a pre-made plan to execute
         plan = suggestion['actionable_plan']
-        results = executor.run(plan)
-        executor.summarize(results)
+        results = executor.run(plan, ctx=ctx)
+        executor.summarize(results, ctx)
     else:
-        print(persona.inform("No problem. I won't do anything."))
+        ctx.print(persona.inform("No problem. I won't do anything."))
 
-def main():
+def open_memory(args):
+    """Opens the persistent session memory, falling back to a fresh in-process memory on failure."""
+    session_id = args.session or session_store.default_session_id()
+    try:
+        store = session_store.SessionStore()
+        if args.forget:
+            store.clear(session_id)
+        return memory.Memory(store=store, session_id=session_id)
+    except (sqlite3.Error, OSError) as e:
+        print(persona.inform(f"I couldn't open my session memory, so I'll start fresh this time. ({e})"))
+        return memory.Memory()
+
+def run_batch_mode(args):
+    """Plans every prompt in the batch file concurrently, then executes them one by one."""
+    from src.core import batch
+
+    prompts = batch.read_prompts(args.batch)
+    if not prompts:
+        print(persona.inform_error("The batch input didn't contain any prompts."))
+        return
+
+    execute = not args.plan_only
+    if execute and args.batch == "-" and not batch._reattach_terminal():
+        print(persona.inform_error("Prompts were read from stdin and there is no terminal left to confirm plans with. "
+                                   "Use --plan-only, or pass the prompts as a file."))
+        return
+
+    planner = None
+    if args.mock or not has_api_config():
+        if not has_api_config() and not args.mock:
+            print(persona.inform("AI model configuration not found. Falling back to mock mode."))
+        planner = create_mock_plan
+
+    unique_count = len(batch.dedupe_prompts(prompts))
+    print(persona.inform(f"Planning {unique_count} distinct request(s) out of {len(prompts)}..."))
+    try:
+        records = batch.run_batch(prompts, args.batch_output,
+                                  concurrency=args.concurrency or batch.DEFAULT_CONCURRENCY,
+                                  planner=planner, execute=execute, memory_instance=open_memory(args))
+    except Exception as e:
+        if not is_api_error(e):
+            raise
+        print(persona.inform_error(API_ERROR_MESSAGE.format(e)))
+        return
+
+    counts = {}
+    for record in records:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+    breakdown = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(persona.inform(f"Batch finished: {breakdown}. Results written to '{args.batch_output}'."))
+
+def process_prompt(user_intent: str, memory_instance, mock: bool = False,
+                   ctx: executor.ExecutionContext = None):
     """
-    Main entry point for the Samantha CLI.
-    Orchestrates the conversion of a natural language prompt into an executable plan.
+    Handles one natural language request end to end: suggestions, planning, preview and
+    confirmation, execution, memory update and summary. Output, questions and the working
+    directory go through `ctx`, the session the prompt belongs to.
     """
-    # Load environment variables from .env file for local development
-    load_dotenv()
+    from src.core import suggestions
 
-    # Setup argument parser
-    parser = argparse.ArgumentParser(
-        description=f"{colors.CYAN}Samantha - An AI terminal assistant for openEuler.{colors.RESET}",
-        epilog="Example: python -m src.cli.samantha \"copy all pdfs from downloads to documents\""
-    )
-    parser.add_argument("prompt", nargs="+", help="The natural language command you want Samantha to execute.")
-    parser.add_argument("--mock", action="store_true", help="Run in mock mode without calling the AI model.")
-    args = parser.parse_args()
+    ctx = ctx or executor.DEFAULT_CONTEXT
+    ctx.print(persona.greet(user_intent))
 
-    # Combine arguments into a single user prompt
-    user_intent = " ".join(args.prompt)
-    print(persona.greet(user_intent))
+    # --- Proactive Suggestion Check ---
+    # Analyzers run in the background while the request is handled.
+    engine = suggestions.default_engine()
+    engine.refresh()
 
-    # Initialize memory
-    memory_instance = memory.Memory()
+    with tracing.span("request", "request", prompt=user_intent):
+        plan_and_run(user_intent, memory_instance, mock, ctx)
 
-    # --- Proactive Suggestion Check ---
-    # Before processing the user's request, check for any proactive suggestions.
-    desktop_suggestion = suggestions.suggest_desktop_cleanup()
-    if desktop_suggestion:
-        handle_suggestion(desktop_suggestion)
-        # We'll continue to process the user's original request after handling the suggestion.
+    # Only suggestions that are already available are offered; scans still running never hold up the user.
+    for suggestion in engine.ready():
+        handle_suggestion(suggestion, ctx)
+    ctx.flush()
 
+def plan_and_run(user_intent: str, memory_instance, mock: bool, ctx: executor.ExecutionContext):
+    """Plans the request, then previews, confirms and executes the plan, reporting any error to the user."""
     try:
         plan = None
         # 1. Convert natural language to a structured plan
-        if args.mock or not has_api_config():
-            if not has_api_config() and not args.mock:
-                print(persona.inform("AI model configuration not found. Falling back to mock mode."))
+        if mock or not has_api_config():
+            if not has_api_config() and not mock:
+                ctx.print(persona.inform("AI model configuration not found. Falling back to mock mode."))
             else:
-                print(persona.inform("Running in mock mode."))
-            plan = create_mock_plan(user_intent)
+                ctx.print(persona.inform("Running in mock mode."))
+            ctx.flush()
+            with tracing.span("plan (mock)", "planning"):
+                plan = create_mock_plan(user_intent)
         else:
-            # Pass conversation history to the planner for context
-            history = memory_instance.get_history()
-            plan = nl2cmd.nl_to_plan(user_intent, history=history)
+            from src.core import nl2cmd
+            from src.osint import snapshot
+            # Planning can take a while; what was said so far is shown before it starts.
+            ctx.flush()
+            with tracing.span("plan", "planning"):
+                # Pass the most relevant conversation history and a snapshot of the host to the planner for context
+                with tracing.span("history retrieval", "planning"):
+                    history = memory_instance.get_history(query=user_intent)
+                with tracing.span("host snapshot", "planning"):
+                    host = snapshot.host_context()
+                plan = nl2cmd.nl_to_plan(user_intent, history=history, host=host)
 
         if not plan or not plan.get("steps"):
-            print(persona.inform_error("I couldn't create a plan for that request. Could you be more specific?"))
+            ctx.print(persona.inform_error("I couldn't create a plan for that request. Could you be more specific?"))
             return
 
-        # 2. (Future) Sanitize and validate the plan for safety
-        # plan = safety.sanitize_plan(plan)
+        # 2. Execute the plan
+        # The executor will preview, check it against the safety policy, ask for confirmation,
+        # and then run the commands.
+        # Pronouns like "them" can refer to the files found by the previous command.
+        results = executor.run(plan, last_files=memory_instance.last_files, ctx=ctx)
 
-        # 3. Execute the plan
-        # The executor will preview, ask for confirmation, and then run the commands.
-        results = executor.run(plan)
+        # 3. Update memory with the context of this interaction
+        with tracing.span("memory update", "memory"):
+            memory_instance.set_last_working_directory(ctx.cwd)
+            memory_instance.update(plan=plan, results=results.get("results", []), user_request=user_intent)
 
-        # 4. Update memory with the context of this interaction
-        memory_instance.update(plan=plan, results=results, user_request=user_intent)
+        # 4. Summarize the results for the user
+        with tracing.span("summary", "execution"):
+            executor.summarize(results, ctx)
 
-        # 5. Summarize the results for the user
-        executor.summarize(results)
-
-    except (nl2cmd.InvalidPlanError, ValueError) as e:
-        print(persona.inform_error(str(e)))
-    except openai.APIError as e:
-        print(persona.inform_error(f"I'm having trouble connecting to the AI model. Please check your connection and API settings. Details: {e}"))
+    except ValueError as e:
+        # Includes nl2cmd.InvalidPlanError
+        ctx.print(persona.inform_error(str(e)))
     except Exception as e:
-        # Catch-all for any other unexpected errors
-        print(persona.inform_error(f"An unexpected error occurred: {e}"))
+        if is_api_error(e):
+            ctx.print(persona.inform_error(API_ERROR_MESSAGE.format(e)))
+        else:
+            # Catch-all for any other unexpected errors
+            ctx.print(persona.inform_error(f"An unexpected error occurred: {e}"))
+
+def write_metrics(directory: str):
+    """Exports the session's metrics; failing to write them never fails the session."""
+    try:
+        metrics.write_reports(os.path.expanduser(directory))
+    except OSError as e:
+        print(persona.inform_error(f"I couldn't write the metrics to '{directory}': {e}"))
+
+def write_trace(path: str):
+    """Stops tracing and writes the timeline; failing to write it never fails the session."""
+    try:
+        tracing.TRACER.write(os.path.expanduser(path))
+    except OSError as e:
+        print(persona.inform_error(f"I couldn't write the trace to '{path}': {e}"))
+
+def run_session(args, parser):
+    """Runs the daemon, a batch or a single prompt, as the arguments ask."""
+    if not args.mock:
+        # Load environment variables from .env file for local development
+        from dotenv import load_dotenv
+        load_dotenv()
+
+    if args.daemon:
+        from src.cli import daemon
+        from src.cli.samantha_client import default_socket_path
+        try:
+            daemon.serve(args.socket or default_socket_path())
+        except (RuntimeError, OSError) as e:
+            print(persona.inform_error(str(e)))
+        return
+    if args.batch:
+        run_batch_mode(args)
+        return
+    if not args.prompt:
+        parser.error("a prompt is required unless --batch or --daemon is given")
+
+    # Combine arguments into a single user prompt
+    user_intent = " ".join(args.prompt)
+
+    # Load the persistent session memory, so follow-up requests can refer to earlier ones
+    memory_instance = open_memory(args)
+    process_prompt(user_intent, memory_instance, mock=args.mock)
+
+def main():
+    """
+    Main entry point for the Samantha CLI.
+    Orchestrates the conversion of a natural language prompt into an executable plan.
+    """
+    # Setup argument parser
+    parser = argparse.ArgumentParser(
+        description=f"{colors.CYAN}Samantha - An AI terminal assistant for openEuler.{colors.RESET}",
+        epilog="Example: python -m src.cli.samantha \"copy all pdfs from downloads to documents\""
+    )
+    parser.add_argument("prompt", nargs="*", help="The natural language command you want Samantha to execute.")
+    parser.add_argument("--mock", action="store_true", help="Run in mock mode without calling the AI model.")
+    parser.add_argument("--batch", metavar="FILE", help="Read one prompt per line from FILE ('-' for stdin) and process them all.")
+    parser.add_argument("--batch-output", metavar="FILE", default="samantha_batch.jsonl", help="Where batch mode writes its JSONL plans and results.")
+    parser.add_argument("--concurrency", type=int, help="How many prompts batch mode plans at once.")
+    parser.add_argument("--plan-only", action="store_true", help="In batch mode, only plan the prompts without executing them.")
+    parser.add_argument("--session", help="Name of the conversation session to continue (defaults to one per terminal).")
+    parser.add_argument("--forget", action="store_true", help="Clear the session's memory before handling the request.")
+    parser.add_argument("--daemon", action="store_true", help="Run as a resident daemon that serves prompts over a Unix socket.")
+    parser.add_argument("--socket", help="Unix socket path for --daemon (defaults to ~/.samantha/samantha.sock).")
+    parser.add_argument("--metrics", nargs="?", const=metrics.DEFAULT_REPORT_DIR, metavar="DIR",
+                        help="Record timings and counts, and write metrics.prom and metrics.json to DIR when done "
+                             "(defaults to ~/.samantha/metrics; SAMANTHA_METRICS=DIR does the same).")
+    parser.add_argument("--full", nargs="?", const=output.DEFAULT_SPILL_FILE, metavar="FILE",
+                        help="Write every command's complete output to FILE (defaults to ~/.samantha/output.txt); "
+                             "the terminal still shows long outputs as their first and last lines.")
+    parser.add_argument("--pager", action="store_true",
+                        help="Show long outputs in $PAGER (default 'less -FRX') instead of shortening them.")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Write a timeline of planning and execution to FILE in Chrome trace format "
+                             "(open it in ui.perfetto.dev or chrome://tracing).")
+    parser.add_argument("--trace-sample", nargs="?", type=float, const=1.0, metavar="MS",
+                        help="With --trace, also sample the Python stack every MS milliseconds (default 1).")
+    args = parser.parse_args()
+    if args.trace_sample is not None and not args.trace:
+        parser.error("--trace-sample requires --trace")
+
+    sink = executor.DEFAULT_CONTEXT.sink
+    if args.full:
+        sink.spill_path = os.path.abspath(os.path.expanduser(args.full))
+    if args.pager:
+        sink.pager = os.environ.get("PAGER") or output.DEFAULT_PAGER
+    metrics_dir = args.metrics or os.environ.get("SAMANTHA_METRICS")
+    if metrics_dir:
+        metrics.enable()
+    if args.trace:
+        tracing.TRACER.start(sample_interval=args.trace_sample / 1000 if args.trace_sample else None)
+    try:
+        run_session(args, parser)
+    finally:
+        sink.close()
+        if args.trace:
+            write_trace(args.trace)
+        if metrics_dir:
+            write_metrics(metrics_dir)
 
 if __name__ == "__main__":
     # To run this from the root directory:
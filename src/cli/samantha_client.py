@@ -0,0 +1,132 @@
+"""
+Thin client for the resident Samantha daemon (`python -m src.cli.samantha --daemon`).
+
+It only imports the standard library, sends the prompt over a Unix domain socket and
+relays the daemon's output and confirmation questions to this terminal, so each command
+skips interpreter-heavy imports, model client setup and memory loading. If no daemon is
+running it falls back to handling the prompt in-process.
+
+Usage:
+    python -m src.cli.samantha_client "find pdf files in demo_data"
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+
+# Newline-delimited JSON messages:
+#   client -> daemon: {"type": "request", "prompt", "mock", "session", "forget", "cwd", "full"}
+#                     {"type": "input", "text"}             (answer to a question)
+#   daemon -> client: {"type": "output", "text"}            (stream of printed text)
+#                     {"type": "input", "prompt"}           (the daemon is waiting for an answer)
+#                     {"type": "done", "status"}
+
+
+class DaemonUnavailable(ConnectionError):
+    """No daemon accepted the connection, so nothing was sent and the prompt can run elsewhere."""
+
+
+def default_socket_path() -> str:
+    return os.environ.get("SAMANTHA_SOCKET") or os.path.expanduser("~/.samantha/samantha.sock")
+
+
+def send_message(wfile, message: dict):
+    wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+    wfile.flush()
+
+
+def read_message(rfile):
+    """Reads one message; returns None when the other side has closed the connection."""
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line.decode("utf-8"))
+
+
+def session_id() -> str:
+    # Same default as session_store.default_session_id(), computed here so the daemon
+    # continues the session of the terminal the client was started from.
+    return os.environ.get("SAMANTHA_SESSION") or f"shell-{os.getppid()}"
+
+
+def run_remote(prompt: str, socket_path: str, mock: bool = False, session: str = None,
+               forget: bool = False, out=None, ask=input, full: str = None) -> str:
+    """
+    Sends one prompt to the daemon and relays the conversation until it is done.
+    `full` is a file for the daemon to write complete command outputs to.
+    Returns the final status. Raises DaemonUnavailable if the daemon can't be reached, and
+    OSError if the connection fails once the prompt may have been sent.
+    """
+    out = out or sys.stdout
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError as e:
+        sock.close()
+        raise DaemonUnavailable(str(e)) from e
+    with sock, sock.makefile("rb") as rfile, sock.makefile("wb") as wfile:
+        send_message(wfile, {
+            "type": "request",
+            "prompt": prompt,
+            "mock": mock,
+            "session": session or session_id(),
+            "forget": forget,
+            "cwd": os.getcwd(),
+            "full": os.path.abspath(os.path.expanduser(full)) if full else None,
+        })
+        while True:
+            message = read_message(rfile)
+            if message is None:
+                return "disconnected"
+            kind = message.get("type")
+            if kind == "output":
+                out.write(message.get("text", ""))
+                out.flush()
+            elif kind == "input":
+                try:
+                    answer = ask(message.get("prompt", ""))
+                except EOFError:
+                    answer = ""
+                send_message(wfile, {"type": "input", "text": answer})
+            elif kind == "done":
+                return message.get("status", "ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send a request to the running Samantha daemon.")
+    parser.add_argument("prompt", nargs="+", help="The natural language command you want Samantha to execute.")
+    parser.add_argument("--mock", action="store_true", help="Run in mock mode without calling the AI model.")
+    parser.add_argument("--session", help="Name of the conversation session to continue.")
+    parser.add_argument("--forget", action="store_true", help="Clear the session's memory before handling the request.")
+    parser.add_argument("--full", nargs="?", const=os.path.expanduser("~/.samantha/output.txt"), metavar="FILE",
+                        help="Write every command's complete output to FILE (defaults to ~/.samantha/output.txt).")
+    parser.add_argument("--socket", default=default_socket_path(), help="The daemon's Unix socket path.")
+    parser.add_argument("--no-fallback", action="store_true", help="Fail instead of running in-process when no daemon is up.")
+    args = parser.parse_args()
+
+    prompt = " ".join(args.prompt)
+    try:
+        status = run_remote(prompt, args.socket, mock=args.mock, session=args.session, forget=args.forget,
+                            full=args.full)
+    except DaemonUnavailable:
+        if args.no_fallback:
+            print(f"Samantha's daemon isn't running at '{args.socket}'. Start it with: python -m src.cli.samantha --daemon",
+                  file=sys.stderr)
+            sys.exit(1)
+        # No daemon: do the work in this process instead.
+        from src.cli import samantha
+        sys.argv = [sys.argv[0]] + args.prompt + (["--mock"] if args.mock else []) \
+            + (["--session", args.session] if args.session else []) + (["--forget"] if args.forget else []) \
+            + (["--full", args.full] if args.full else [])
+        samantha.main()
+        return
+    except OSError as e:
+        # The daemon may already be running the prompt; running it here too could do it twice.
+        print(f"Lost the connection to Samantha's daemon at '{args.socket}': {e}", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(0 if status == "ok" else 1)
+
+
+if __name__ == "__main__":
+    main()
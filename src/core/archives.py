@@ -0,0 +1,186 @@
+"""
+Content search inside compressed files and archives.
+
+search_in_files hands every .gz, .bz2, .xz/.lzma, .zip and .tar(.gz/.bz2/.xz) file it
+finds to an `ArchiveSearch`. Each member is decompressed as a stream and scanned
+SCAN_BYTES at a time: nothing is extracted to disk, no member is read whole into memory,
+and the scan of a member stops as soon as every keyword and the first matching line have
+been seen. A match reads `archive!member:line:text`, like `path:line:text` for a plain
+file; a .gz, .bz2 or .xz file holds one member, named after the file without its suffix.
+
+Archives are searched on a thread pool while the walk goes on (zlib, bz2 and lzma release
+the GIL as they decompress). A zip archive can be read at any member, so a big one is split
+into units of about UNIT_BYTES of members, each searched by its own worker; a tar or a
+compressed stream can only be read from the start and is one unit.
+"""
+import os
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from .metrics import REGISTRY as METRICS, record_file_read
+
+DEFAULT_WORKERS = 8
+SCAN_BYTES = 1024 * 1024
+# A zip archive is split into units of members adding up to about this many (uncompressed) bytes.
+UNIT_BYTES = 32 * 1024 * 1024
+# Members never worth decompressing: binaries, and archives nested in the archive.
+SKIPPED_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.pdf', '.zip', '.gz', '.tgz', '.bz2',
+                    '.xz', '.lzma', '.tar', '.rar', '.exe', '.dll', '.so', '.pyc')
+
+_TAR_SUFFIXES = ('.tar', '.tgz', '.tbz2', '.txz', '.tar.gz', '.tar.bz2', '.tar.xz')
+_STREAM_SUFFIXES = {'.gz': 'gz', '.bz2': 'bz2', '.xz': 'xz', '.lzma': 'xz'}
+ARCHIVE_SUFFIXES = _TAR_SUFFIXES + ('.zip',) + tuple(_STREAM_SUFFIXES)
+
+
+def archive_kind(path: str) -> Optional[str]:
+    """'tar', 'zip', 'gz', 'bz2' or 'xz' by the file's suffix; None for anything else."""
+    name = path.lower()
+    if name.endswith(_TAR_SUFFIXES):
+        return 'tar'
+    if name.endswith('.zip'):
+        return 'zip'
+    return _STREAM_SUFFIXES.get(os.path.splitext(name)[1])
+
+
+def scan_text(stream, search_terms: List[str]) -> Optional[Tuple[int, str]]:
+    """
+    (line number, line) of the first line with any of the terms in a binary stream, if
+    the stream contains all of them; else None. The stream is decoded as UTF-8 and
+    scanned in blocks of whole lines, so a term is found wherever it is on a line.
+    """
+    import codecs
+
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    missing = set(search_terms)
+    first = None
+    line_no = 1  # the number of the first line in `pending`
+    pending = ''
+    while True:
+        data = stream.read(SCAN_BYTES)
+        chunk = decoder.decode(data, final=not data)
+        text = pending + chunk
+        cut = text.rfind('\n') + 1 if data else len(text)
+        if data and cut == 0:
+            if len(text) < SCAN_BYTES:
+                pending = text
+                continue
+            cut = len(text)  # a very long line is scanned in pieces
+        block, pending = text[:cut], text[cut:]
+        lowered = block.lower()
+        if missing:
+            missing = {term for term in missing if term not in lowered}
+        if first is None:
+            hits = [position for position in (lowered.find(term) for term in search_terms) if position != -1]
+            if hits:
+                index = lowered.count('\n', 0, min(hits))
+                first = (line_no + index, block.split('\n', index + 1)[index].strip())
+        line_no += block.count('\n')
+        if (first is not None and not missing) or not data:
+            break
+    return first if not missing else None
+
+
+def _wanted(name: str) -> bool:
+    return not name.lower().endswith(SKIPPED_SUFFIXES)
+
+
+def plan_units(path: str, kind: str) -> List[Tuple[str, str, Optional[List[str]]]]:
+    """The units an archive is searched in: (path, kind, zip member names or None for all members)."""
+    if kind != 'zip':
+        return [(path, kind, None)]
+    import zipfile
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir() and _wanted(info.filename)]
+    except (OSError, zipfile.BadZipFile):
+        return []
+    units, names, size = [], [], 0
+    for info in members:
+        names.append(info.filename)
+        size += info.file_size
+        if size >= UNIT_BYTES:
+            units.append((path, kind, names))
+            names, size = [], 0
+    if names:
+        units.append((path, kind, names))
+    return units
+
+
+def _members(path: str, kind: str, names: Optional[List[str]]) -> Iterable[Tuple[str, object]]:
+    """(member name, binary stream) for each member of a unit, opened one at a time."""
+    if kind == 'zip':
+        import zipfile
+
+        with zipfile.ZipFile(path) as archive:
+            for name in names:
+                with archive.open(name) as stream:
+                    yield name, stream
+    elif kind == 'tar':
+        import tarfile
+
+        # Stream mode reads the archive front to back, decompressing once, without seeking.
+        with tarfile.open(path, mode='r|*') as archive:
+            for member in archive:
+                if member.isfile() and _wanted(member.name):
+                    yield member.name, archive.extractfile(member)
+    else:
+        import bz2
+        import gzip
+        import lzma
+
+        opener = {'gz': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}[kind]
+        with opener(path, 'rb') as stream:
+            yield os.path.splitext(os.path.basename(path))[0], stream
+
+
+def search_unit(unit, search_terms: List[str]) -> List[str]:
+    """Matches in one unit of an archive as 'archive!member:line:text'; a damaged archive has none from there on."""
+    import lzma
+    import tarfile
+    import zipfile
+    import zlib
+
+    path, kind, names = unit
+    matches = []
+    started = time.perf_counter() if METRICS.enabled else 0
+    try:
+        for name, stream in _members(path, kind, names):
+            found = scan_text(stream, search_terms)
+            if found:
+                matches.append(f"{path}!{name}:{found[0]}:{found[1]}")
+    except (OSError, EOFError, ValueError, zlib.error, lzma.LZMAError, zipfile.BadZipFile, tarfile.TarError):
+        pass
+    if started:
+        record_file_read("search_archive", started, os.path.getsize(path) if os.path.exists(path) else 0)
+    return matches
+
+
+class ArchiveSearch:
+    """Archives found by a content search, searched on a thread pool and merged back in walk order."""
+
+    def __init__(self, search_terms: List[str], workers: int = DEFAULT_WORKERS):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.search_terms = search_terms
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._jobs = []  # (position among the plain matches, futures of the archive's units)
+
+    def submit(self, position: int, path: str):
+        """Starts searching the archive at `path`, whose matches go before plain match number `position`."""
+        units = plan_units(path, archive_kind(path))
+        self._jobs.append((position, [self._pool.submit(search_unit, unit, self.search_terms) for unit in units]))
+
+    def merge(self, matches: List[str]) -> List[str]:
+        """The plain matches with each archive's matches put where the walk found the archive."""
+        merged, taken = [], 0
+        try:
+            for position, futures in self._jobs:
+                merged.extend(matches[taken:position])
+                taken = position
+                for future in futures:
+                    merged.extend(future.result())
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+        merged.extend(matches[taken:])
+        return merged
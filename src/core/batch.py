@@ -0,0 +1,147 @@
+"""
+Batch mode: plan many natural-language requests concurrently, then execute them one at a time.
+
+Planning is the slow, I/O-bound part (one model round trip per prompt), so it runs
+concurrently under a concurrency limit with a single shared async client. Identical
+prompts are planned and executed only once. Execution stays serialized and goes through
+`executor.run`, so every plan is previewed and confirmed exactly like a single command.
+"""
+import asyncio
+import json
+import os
+import sys
+from typing import Callable, Dict, List, Optional
+
+from src.core import executor, nl2cmd
+
+DEFAULT_CONCURRENCY = 8
+
+
+def read_prompts(source: str) -> List[str]:
+    """
+    Reads one prompt per line from a file, or from stdin when `source` is '-'.
+    Blank lines and lines starting with '#' are ignored.
+    """
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(os.path.expanduser(source), "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def dedupe_prompts(prompts: List[str]) -> Dict[str, int]:
+    """Maps each distinct prompt to the index of its first occurrence, preserving order."""
+    first_seen = {}
+    for i, prompt in enumerate(prompts):
+        first_seen.setdefault(prompt, i)
+    return first_seen
+
+
+async def _plan_all_async(prompts: List[str], concurrency: int, history=None, host=None) -> Dict[str, Dict]:
+    client = nl2cmd.create_async_client()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def plan_one(prompt):
+        async with semaphore:
+            try:
+                return prompt, {"plan": await nl2cmd.nl_to_plan_async(prompt, history=history, client=client, host=host)}
+            except (nl2cmd.InvalidPlanError, ValueError) as e:
+                return prompt, {"error": str(e)}
+
+    try:
+        outcomes = await asyncio.gather(*(plan_one(p) for p in prompts))
+    finally:
+        await client.close()
+    return dict(outcomes)
+
+
+def plan_prompts(prompts: List[str], concurrency: int = DEFAULT_CONCURRENCY,
+                 planner: Optional[Callable[[str], Dict]] = None, history=None, host=None) -> Dict[str, Dict]:
+    """
+    Plans every distinct prompt and returns {prompt: {"plan": ...} or {"error": ...}}.
+    With a synchronous `planner` (e.g. the mock planner) prompts are planned in order;
+    otherwise they are planned concurrently against the model endpoint, all sharing the
+    `host` description.
+    """
+    unique = list(dedupe_prompts(prompts))
+    if planner is not None:
+        outcomes = {}
+        for prompt in unique:
+            try:
+                outcomes[prompt] = {"plan": planner(prompt)}
+            except (nl2cmd.InvalidPlanError, ValueError) as e:
+                outcomes[prompt] = {"error": str(e)}
+        return outcomes
+    if host is None:
+        from src.osint import snapshot
+        host = snapshot.host_context()
+    return asyncio.run(_plan_all_async(unique, concurrency, history=history, host=host))
+
+
+def _reattach_terminal() -> bool:
+    """
+    When prompts were piped in on stdin, confirmations still need a keyboard.
+    Reopens the controlling terminal as stdin; returns False if there is none.
+    """
+    if sys.stdin is not None and not sys.stdin.closed and sys.stdin.isatty():
+        return True
+    try:
+        sys.stdin = open("/dev/tty", "r")
+        return True
+    except OSError:
+        return False
+
+
+def run_batch(prompts: List[str], output_path: str, concurrency: int = DEFAULT_CONCURRENCY,
+              planner: Optional[Callable[[str], Dict]] = None, execute: bool = True,
+              memory_instance=None) -> List[Dict]:
+    """
+    Plans all prompts concurrently, then executes each distinct plan in order, writing one
+    JSON record per input prompt to `output_path` as soon as it is known.
+    """
+    history = memory_instance.get_history() if memory_instance else None
+    outcomes = plan_prompts(prompts, concurrency=concurrency, planner=planner, history=history)
+    first_seen = dedupe_prompts(prompts)
+
+    records = []
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as out:
+        for index, prompt in enumerate(prompts):
+            record = {"index": index, "prompt": prompt}
+            outcome = outcomes[prompt]
+            if first_seen[prompt] != index:
+                record["status"] = "duplicate"
+                record["duplicate_of"] = first_seen[prompt]
+            elif "error" in outcome:
+                record["status"] = "planning_failed"
+                record["error"] = outcome["error"]
+            else:
+                plan = outcome["plan"]
+                record["plan"] = plan
+                if not plan.get("steps"):
+                    record["status"] = "planning_failed"
+                    record["error"] = "The plan has no steps."
+                elif not execute:
+                    record["status"] = "planned"
+                else:
+                    print(f"\n=== [{index + 1}/{len(prompts)}] {prompt} ===")
+                    last_files = memory_instance.last_files if memory_instance is not None else None
+                    execution = executor.run(plan, last_files=last_files)
+                    results = execution.get("results", [])
+                    record["results"] = results
+                    if execution.get("summary") == "User cancelled.":
+                        record["status"] = "cancelled"
+                    elif results and all(r.get("status") == "success" for r in results):
+                        record["status"] = "executed"
+                    else:
+                        record["status"] = "failed"
+                    if memory_instance is not None:
+                        memory_instance.update(plan=plan, results=results, user_request=prompt)
+            # find_files outputs are FileListings; their text goes into the record.
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            records.append(record)
+    return records
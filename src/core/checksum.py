@@ -0,0 +1,178 @@
+"""
+File checksums and sha256sum-style manifests, for verifying copies and backups.
+
+Files are hashed on a thread pool in large chunks (hashlib releases the GIL while it
+hashes, so the threads really run in parallel). Digests go into the same persistent
+DigestCache that duplicate detection uses, keyed by (device, inode) and checked against
+size and mtime_ns, so checking an unchanged tree again costs one stat per file.
+
+Manifests use the `sha256sum` format ("<digest>  <path>", paths relative to the
+manifest's directory), so `sha256sum -c` can read them too.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .duplicates import DigestCache
+from .metrics import REGISTRY as METRICS, record_file_read
+from .search import iter_files
+
+DEFAULT_ALGORITHM = "sha256"
+DEFAULT_WORKERS = 8
+CHUNK_BYTES = 4 * 1024 * 1024
+# Manifests don't name their algorithm; the digest length does.
+_ALGORITHM_BY_LENGTH = {32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+
+
+def file_digest(path: str, algorithm: str = DEFAULT_ALGORITHM) -> str:
+    h = hashlib.new(algorithm)
+    # One buffer reused for every chunk: no per-chunk allocation for multi-GB files.
+    buffer = bytearray(CHUNK_BYTES)
+    view = memoryview(buffer)
+    started = time.perf_counter() if METRICS.enabled else 0
+    num_bytes = 0
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            h.update(view[:n])
+            num_bytes += n
+    if started:
+        record_file_read("checksum", started, num_bytes)
+    return h.hexdigest()
+
+
+def _collect(paths: Iterable[str], exclude: Iterable[str] = ()) -> List[Tuple[str, os.stat_result]]:
+    """(path, stat) of every regular file named in or under `paths`, in path order."""
+    skip = {os.path.abspath(p) for p in exclude}
+    files = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            files.update(iter_files([path]))
+        else:
+            files[path] = os.stat(path)
+    return sorted((p, st) for p, st in files.items() if p not in skip)
+
+
+def checksum_files(paths: Iterable[str], algorithm: str = DEFAULT_ALGORITHM, workers: int = DEFAULT_WORKERS,
+                   cache: Optional[DigestCache] = None, exclude: Iterable[str] = ()) -> Dict:
+    """
+    Hashes every file named in or under `paths`. Returns {"digests": [(path, digest)],
+    "hashed": int, "cached": int, "errors": [(path, message)]}, digests in path order.
+    """
+    if algorithm not in hashlib.algorithms_available:
+        raise ValueError(f"Unknown hash algorithm '{algorithm}'.")
+    files = _collect(paths, exclude)
+    cached = cache.get_many((st for _, st in files), algorithm) if cache else {}
+    missing = [(path, st) for path, st in files if (st.st_dev, st.st_ino) not in cached]
+
+    def compute(item):
+        try:
+            return file_digest(item[0], algorithm), None
+        except OSError as e:
+            return None, e.strerror or str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        computed = list(pool.map(compute, missing))
+    if cache:
+        cache.put_many([(st, digest) for (_, st), (digest, _) in zip(missing, computed) if digest], algorithm)
+
+    digests = dict(cached)
+    errors = []
+    for (path, st), (digest, error) in zip(missing, computed):
+        if digest:
+            digests[(st.st_dev, st.st_ino)] = digest
+        else:
+            errors.append((path, error))
+    return {
+        "digests": [(path, digests[(st.st_dev, st.st_ino)]) for path, st in files if (st.st_dev, st.st_ino) in digests],
+        "hashed": len(missing) - len(errors),
+        "cached": len(cached),
+        "errors": errors,
+    }
+
+
+def _escape(path: str) -> Tuple[str, str]:
+    # sha256sum marks lines whose name contains a backslash or newline with a leading backslash.
+    if "\\" in path or "\n" in path:
+        return "\\", path.replace("\\", "\\\\").replace("\n", "\\n")
+    return "", path
+
+
+def _unescape(path: str) -> str:
+    return path.replace("\\n", "\n").replace("\\\\", "\\")
+
+
+def write_manifest(manifest_path: str, paths: Iterable[str], algorithm: str = DEFAULT_ALGORITHM,
+                   workers: int = DEFAULT_WORKERS, cache: Optional[DigestCache] = None) -> Dict:
+    """Writes the checksums of the files under `paths` to `manifest_path`; returns checksum_files' result."""
+    manifest_path = os.path.abspath(manifest_path)
+    base = os.path.dirname(manifest_path)
+    result = checksum_files(paths, algorithm, workers, cache, exclude=[manifest_path])
+    lines = []
+    for path, digest in result["digests"]:
+        prefix, name = _escape(os.path.relpath(path, base))
+        lines.append(f"{prefix}{digest}  {name}\n")
+    # Written next to the target and renamed into place, so a reader never sees half a manifest.
+    fd, tmp_path = tempfile.mkstemp(dir=base, prefix=".manifest-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, manifest_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return result
+
+
+def read_manifest(manifest_path: str) -> List[Tuple[str, str]]:
+    """[(absolute path, digest)] from a sha256sum-style manifest."""
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            escaped = line.startswith("\\")
+            if escaped:
+                line = line[1:]
+            digest, sep, name = line.partition(" ")
+            if not sep or not name or name[0] not in " *":
+                raise ValueError(f"{manifest_path}:{number}: not a '<digest>  <path>' line.")
+            name = _unescape(name[1:]) if escaped else name[1:]
+            entries.append((os.path.join(base, name), digest.lower()))
+    return entries
+
+
+def verify_manifest(manifest_path: str, algorithm: Optional[str] = None, workers: int = DEFAULT_WORKERS,
+                    cache: Optional[DigestCache] = None) -> Dict:
+    """
+    Checks the files listed in a manifest. Returns {"ok": [path], "failed": [path],
+    "missing": [path], "hashed": int, "cached": int}.
+    """
+    entries = read_manifest(manifest_path)
+    if not entries:
+        return {"ok": [], "failed": [], "missing": [], "hashed": 0, "cached": 0}
+    if algorithm is None:
+        algorithm = _ALGORITHM_BY_LENGTH.get(len(entries[0][1]))
+        if algorithm is None:
+            raise ValueError(f"Can't tell the hash algorithm of '{manifest_path}'; pass it explicitly.")
+    present = [path for path, _ in entries if os.path.isfile(path)]
+    result = checksum_files(present, algorithm, workers, cache)
+    actual = dict(result["digests"])
+    report = {"ok": [], "failed": [], "missing": [], "hashed": result["hashed"], "cached": result["cached"]}
+    for path, expected in entries:
+        digest = actual.get(os.path.abspath(path))
+        if digest is None:
+            report["missing"].append(path)
+        elif digest == expected:
+            report["ok"].append(path)
+        else:
+            report["failed"].append(path)
+    return report
@@ -0,0 +1,252 @@
+"""
+Disk usage analysis: what is taking up the space under a directory.
+
+Directories are scanned in parallel, one `os.scandir` per directory on a thread pool,
+and every directory's own files are summed by size and by file type in that single
+pass. Those per-directory results are cached in ~/.samantha/disk_usage.db together
+with the directory's mtime. On the next scan a directory whose mtime is unchanged is
+only stat'ed, not listed again, and subtree totals are rebuilt from the cached parts.
+
+A directory's mtime changes when entries are added, removed or renamed in it, not when
+an existing file grows in place; `refresh=True` rescans everything.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from src.vision.ascii_art import draw_bar_chart, draw_directory_tree
+from .metrics import REGISTRY as METRICS, record_directory_read
+from .utils import FILE_TYPE_MAPPINGS, format_size
+
+DISK_USAGE_DB_PATH = os.path.expanduser("~/.samantha/disk_usage.db")
+DEFAULT_WORKERS = 8
+DEFAULT_DEPTH = 2
+DEFAULT_TOP = 10
+
+_CATEGORY_BY_EXTENSION = {ext: category for category, exts in FILE_TYPE_MAPPINGS.items() for ext in exts}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    own_bytes INTEGER NOT NULL,
+    own_files INTEGER NOT NULL,
+    by_type TEXT NOT NULL,
+    subdirs TEXT NOT NULL
+);
+"""
+
+
+def file_category(name: str) -> str:
+    return _CATEGORY_BY_EXTENSION.get(os.path.splitext(name)[1].lower(), "other")
+
+
+class DirectoryEntry:
+    """What one scandir of a directory found: its own files (not its subdirectories') and its subdirectories."""
+
+    __slots__ = ("path", "mtime_ns", "own_bytes", "own_files", "by_type", "subdirs")
+
+    def __init__(self, path: str, mtime_ns: int, own_bytes: int = 0, own_files: int = 0,
+                 by_type: Optional[Dict[str, int]] = None, subdirs: Optional[List[str]] = None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.own_bytes = own_bytes
+        self.own_files = own_files
+        self.by_type = by_type or {}
+        self.subdirs = subdirs or []
+
+
+class UsageCache:
+    """Per-directory scan results, valid while the directory's mtime is unchanged."""
+
+    def __init__(self, db_path: str = DISK_USAGE_DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def load_tree(self, root: str) -> Dict[str, DirectoryEntry]:
+        """Every cached directory at or below `root`."""
+        prefix = root.rstrip(os.sep) + os.sep
+        with self._lock:
+            # Paths below root sort between "root/" and "root0" ('0' follows '/').
+            rows = self._connect().execute(
+                "SELECT path, mtime_ns, own_bytes, own_files, by_type, subdirs FROM directories "
+                "WHERE path = ? OR (path >= ? AND path < ?)",
+                (root, prefix, prefix[:-1] + chr(ord(os.sep) + 1))).fetchall()
+        return {path: DirectoryEntry(path, mtime_ns, own_bytes, own_files, json.loads(by_type), json.loads(subdirs))
+                for path, mtime_ns, own_bytes, own_files, by_type, subdirs in rows}
+
+    def save_tree(self, root: str, entries: Dict[str, DirectoryEntry], stale: List[str]):
+        """Stores the rescanned directories and forgets the ones that no longer exist."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany("DELETE FROM directories WHERE path = ?", [(path,) for path in stale])
+                conn.executemany(
+                    "INSERT OR REPLACE INTO directories (path, mtime_ns, own_bytes, own_files, by_type, subdirs) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(e.path, e.mtime_ns, e.own_bytes, e.own_files, json.dumps(e.by_type), json.dumps(e.subdirs))
+                     for e in entries.values()])
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_DEFAULT_CACHE = None
+
+
+def default_usage_cache() -> Optional[UsageCache]:
+    """The user's persistent cache, or None if it can't be opened (every scan is then a full one)."""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        try:
+            cache = UsageCache()
+            cache._connect()
+            _DEFAULT_CACHE = cache
+        except (sqlite3.Error, OSError):
+            return None
+    return _DEFAULT_CACHE
+
+
+def _scan_directory(path: str, cached: Optional[DirectoryEntry]):
+    """Returns (entry, rescanned). Reuses `cached` when the directory's mtime is unchanged."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, False
+    if cached is not None and cached.mtime_ns == mtime_ns:
+        return cached, False
+    entry = DirectoryEntry(path, mtime_ns)
+    started = time.perf_counter() if METRICS.enabled else 0
+    try:
+        with os.scandir(path) as it:
+            for item in it:
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        entry.subdirs.append(item.name)
+                    elif item.is_file(follow_symlinks=False):
+                        size = item.stat(follow_symlinks=False).st_size
+                        entry.own_bytes += size
+                        entry.own_files += 1
+                        category = file_category(item.name)
+                        entry.by_type[category] = entry.by_type.get(category, 0) + size
+                except OSError:
+                    continue
+    except OSError:
+        # Unreadable directory: count it as empty rather than failing the whole scan.
+        pass
+    if started:
+        record_directory_read("disk_usage", started, entry.own_files + len(entry.subdirs))
+    return entry, True
+
+
+class UsageNode:
+    """Totals of one directory's subtree."""
+
+    __slots__ = ("path", "total_bytes", "total_files", "children")
+
+    def __init__(self, path: str, total_bytes: int, total_files: int, children: List["UsageNode"]):
+        self.path = path
+        self.total_bytes = total_bytes
+        self.total_files = total_files
+        self.children = children
+
+
+def analyze(path: str, workers: int = DEFAULT_WORKERS, cache: Optional[UsageCache] = None,
+            refresh: bool = False) -> Dict:
+    """
+    Scans `path` and returns {"root": UsageNode, "by_type": {category: bytes},
+    "directories": int, "rescanned": int}.
+    """
+    root = os.path.abspath(path)
+    cached = cache.load_tree(root) if cache and not refresh else {}
+    entries: Dict[str, DirectoryEntry] = {}
+    rescanned: Dict[str, DirectoryEntry] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = {pool.submit(_scan_directory, root, cached.get(root))}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry, was_rescanned = future.result()
+                if entry is None:
+                    continue
+                entries[entry.path] = entry
+                if was_rescanned:
+                    rescanned[entry.path] = entry
+                for name in entry.subdirs:
+                    child = os.path.join(entry.path, name)
+                    pending.add(pool.submit(_scan_directory, child, cached.get(child)))
+
+    if cache:
+        cache.save_tree(root, rescanned, [p for p in cached if p not in entries])
+
+    by_type: Dict[str, int] = {}
+    for entry in entries.values():
+        for category, size in entry.by_type.items():
+            by_type[category] = by_type.get(category, 0) + size
+
+    # Build subtree totals bottom-up: deeper paths first.
+    nodes: Dict[str, UsageNode] = {}
+    for dir_path in sorted(entries, key=lambda p: p.count(os.sep), reverse=True):
+        entry = entries[dir_path]
+        children = [nodes[c] for c in (os.path.join(dir_path, n) for n in entry.subdirs) if c in nodes]
+        nodes[dir_path] = UsageNode(
+            dir_path,
+            entry.own_bytes + sum(c.total_bytes for c in children),
+            entry.own_files + sum(c.total_files for c in children),
+            sorted(children, key=lambda c: (-c.total_bytes, c.path)))
+
+    return {"root": nodes.get(root), "by_type": by_type, "directories": len(entries), "rescanned": len(rescanned)}
+
+
+def _tree_structure(node: UsageNode, depth: int, top: int) -> Dict:
+    structure = {}
+    for child in node.children[:top]:
+        label = f"{os.path.basename(child.path)}/ ({format_size(child.total_bytes)})"
+        structure[label] = _tree_structure(child, depth - 1, top) if depth > 1 and child.children else None
+    if len(node.children) > top:
+        structure[f"… {len(node.children) - top} more"] = None
+    return structure
+
+
+def render(result: Dict, depth: int = DEFAULT_DEPTH, top: int = DEFAULT_TOP) -> str:
+    """Summary line, bar charts of the largest subdirectories and file types, and a size-annotated tree."""
+    root = result["root"]
+    lines = [f"Disk usage of '{root.path}': {format_size(root.total_bytes)} in {root.total_files} files "
+             f"({result['directories']} directories)."]
+
+    largest = {f"{os.path.basename(c.path)}/": c.total_bytes for c in root.children[:top]}
+    own_bytes = root.total_bytes - sum(c.total_bytes for c in root.children)
+    if own_bytes:
+        largest["(files here)"] = own_bytes
+    if largest:
+        largest = dict(sorted(largest.items(), key=lambda item: -item[1])[:top])
+        lines += ["", "Largest items:", draw_bar_chart(largest, max_width=30, value_format=format_size)]
+
+    by_type = dict(sorted(((k, v) for k, v in result["by_type"].items() if v), key=lambda item: -item[1])[:top])
+    if by_type:
+        lines += ["", "By file type:", draw_bar_chart(by_type, max_width=30, value_format=format_size)]
+
+    if depth > 0 and root.children:
+        tree = draw_directory_tree(_tree_structure(root, depth, top))
+        lines += ["", f"{os.path.basename(root.path) or root.path}/ ({format_size(root.total_bytes)})", tree]
+    return "\n".join(lines)
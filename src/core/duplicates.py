@@ -0,0 +1,293 @@
+"""
+Duplicate file detection.
+
+Files are compared in stages, each one only for the files the previous stage could not
+tell apart:
+
+  1. size        files with a unique size can't have a duplicate
+  2. partial     hash of the first and last 64KB
+  3. full        hash of the whole content
+
+Hashing runs on a thread pool (hashlib releases the GIL while it hashes). Digests are
+kept in a small SQLite cache keyed by (device, inode) and checked against the file's
+size and mtime, so scanning the same tree again only hashes files that changed.
+Hard links to the same inode count as one file: they already share their storage.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .metrics import REGISTRY as METRICS, record_file_read
+from .search import iter_files
+from .utils import format_size
+
+DIGEST_DB_PATH = os.path.expanduser("~/.samantha/digests.db")
+EDGE_BYTES = 64 * 1024
+FULL_CHUNK_BYTES = 1024 * 1024
+DEFAULT_WORKERS = 8
+KEEP_PREFIX = "  keep: "
+COPY_PREFIX = "  copy: "
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    dev INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (dev, inode, kind)
+);
+"""
+
+
+class DigestCache:
+    """File digests keyed by (device, inode, kind), valid while size and mtime are unchanged."""
+
+    def __init__(self, db_path: str = DIGEST_DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def get_many(self, stats: Iterable[os.stat_result], kind: str) -> Dict[Tuple[int, int], str]:
+        """Returns {(dev, inode): digest} for the files whose cached digest is still valid."""
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            for st in stats:
+                row = conn.execute(
+                    "SELECT digest FROM digests WHERE dev = ? AND inode = ? AND kind = ? AND size = ? AND mtime_ns = ?",
+                    (st.st_dev, st.st_ino, kind, st.st_size, st.st_mtime_ns)).fetchone()
+                if row:
+                    found[(st.st_dev, st.st_ino)] = row[0]
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[os.stat_result, str]], kind: str):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO digests (dev, inode, kind, size, mtime_ns, digest) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(st.st_dev, st.st_ino, kind, st.st_size, st.st_mtime_ns, digest) for st, digest in entries])
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_DEFAULT_CACHE = None
+
+
+def default_digest_cache() -> Optional[DigestCache]:
+    """The user's persistent digest cache, or None if it can't be opened (scans then just hash everything)."""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        try:
+            cache = DigestCache()
+            cache._connect()
+            _DEFAULT_CACHE = cache
+        except (sqlite3.Error, OSError):
+            return None
+    return _DEFAULT_CACHE
+
+
+def partial_digest(path: str, size: int) -> str:
+    """Hash of the first and last EDGE_BYTES of a file (the whole file if it is small)."""
+    h = hashlib.blake2b(digest_size=20)
+    started = time.perf_counter() if METRICS.enabled else 0
+    with open(path, "rb") as f:
+        h.update(f.read(EDGE_BYTES))
+        if size > EDGE_BYTES:
+            f.seek(max(EDGE_BYTES, size - EDGE_BYTES))
+            h.update(f.read(EDGE_BYTES))
+    if started:
+        record_file_read("duplicates_partial", started, min(size, 2 * EDGE_BYTES))
+    return h.hexdigest()
+
+
+def full_digest(path: str, size: int = None) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    started = time.perf_counter() if METRICS.enabled else 0
+    num_bytes = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(FULL_CHUNK_BYTES), b""):
+            h.update(chunk)
+            num_bytes += len(chunk)
+    if started:
+        record_file_read("duplicates_full", started, num_bytes)
+    return h.hexdigest()
+
+
+def _refine(groups: List[List[Tuple[str, os.stat_result]]], kind: str, digest_func, cache: Optional[DigestCache],
+            pool: ThreadPoolExecutor) -> List[Tuple[str, List[Tuple[str, os.stat_result]]]]:
+    """Splits each group of candidate files by digest; only (digest, group) pairs of two or more files survive."""
+    files = [item for group in groups for item in group]
+    cached = cache.get_many((st for _, st in files), kind) if cache else {}
+    missing = [(path, st) for path, st in files if (st.st_dev, st.st_ino) not in cached]
+
+    def compute(item):
+        path, st = item
+        try:
+            return digest_func(path, st.st_size)
+        except OSError:
+            # Unreadable or vanished since the walk; it simply isn't reported.
+            return None
+
+    computed = list(pool.map(compute, missing))
+    if cache:
+        cache.put_many([(st, digest) for (_, st), digest in zip(missing, computed) if digest], kind)
+    digests = dict(cached)
+    for (_, st), digest in zip(missing, computed):
+        digests[(st.st_dev, st.st_ino)] = digest
+
+    refined = []
+    for group in groups:
+        by_digest: Dict[str, list] = {}
+        for path, st in group:
+            digest = digests.get((st.st_dev, st.st_ino))
+            if digest:
+                by_digest.setdefault(digest, []).append((path, st))
+        refined.extend((digest, g) for digest, g in by_digest.items() if len(g) > 1)
+    return refined
+
+
+def _keep_order(path: str):
+    # The copy nearest the top of the tree (then alphabetically first) is the one kept.
+    return path.count(os.sep), path
+
+
+def find_duplicates(paths: List[str], size_filter: Tuple[Optional[str], Optional[int]] = (None, None),
+                    workers: int = DEFAULT_WORKERS, cache: Optional[DigestCache] = None) -> List[Dict]:
+    """
+    Finds groups of files with identical content under `paths`. Empty files are ignored.
+    `size_filter` is an (operator, bytes) pair as returned by utils.parse_size_filter.
+
+    Returns [{"size", "paths", "reclaimable", "digest", "mtimes"}], largest reclaimable first.
+    The first path of each group is the one to keep; "digest" is the full_digest of the content
+    and "mtimes" the st_mtime_ns of each path, as the scan saw them.
+    """
+    op, limit = size_filter
+    by_size: Dict[int, Dict[Tuple[int, int], Tuple[str, os.stat_result]]] = {}
+    for path, st in iter_files([os.path.abspath(p) for p in paths]):
+        size = st.st_size
+        if size == 0:
+            continue
+        if op and not ((op == ">" and size > limit) or (op == "<" and size < limit) or (op == "=" and size == limit)):
+            continue
+        inodes = by_size.setdefault(size, {})
+        key = (st.st_dev, st.st_ino)
+        # Several hard links to one inode are one file; keep the path that sorts first.
+        if key not in inodes or _keep_order(path) < _keep_order(inodes[key][0]):
+            inodes[key] = (path, st)
+
+    groups = [list(inodes.values()) for inodes in by_size.values() if len(inodes) > 1]
+    if not groups:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        refined = _refine(groups, "partial", partial_digest, cache, pool)
+        # The partial hash already covers the whole content of files up to 2 * EDGE_BYTES,
+        # so for them it is the same as the full digest.
+        small = [(d, g) for d, g in refined if g[0][1].st_size <= 2 * EDGE_BYTES]
+        large = [g for _, g in refined if g[0][1].st_size > 2 * EDGE_BYTES]
+        if large:
+            large = _refine(large, "full", full_digest, cache, pool)
+
+    results = []
+    for digest, group in small + large:
+        size = group[0][1].st_size
+        members = sorted((path for path, _ in group), key=_keep_order)
+        results.append({"size": size, "paths": members, "reclaimable": size * (len(members) - 1), "digest": digest,
+                        "mtimes": {path: st.st_mtime_ns for path, st in group}})
+    results.sort(key=lambda g: (-g["reclaimable"], g["paths"][0]))
+    return results
+
+
+def format_report(groups: List[Dict], limit: Optional[int] = None) -> str:
+    """Human-readable report; every redundant copy is listed on a line starting with COPY_PREFIX."""
+    total = sum(g["reclaimable"] for g in groups)
+    lines = [f"Found {len(groups)} group(s) of duplicate files; {format_size(total)} reclaimable:"]
+    for i, group in enumerate(groups[:limit] if limit else groups, 1):
+        name = os.path.basename(group["paths"][0])
+        lines.append(f"[{i}] {len(group['paths'])} copies of {name} "
+                     f"({format_size(group['size'])} each, {format_size(group['reclaimable'])} reclaimable)")
+        lines.append(KEEP_PREFIX + group["paths"][0])
+        lines.extend(COPY_PREFIX + path for path in group["paths"][1:])
+    if limit and len(groups) > limit:
+        lines.append(f"... and {len(groups) - limit} more group(s).")
+    return "\n".join(lines)
+
+
+def redundant_copies(groups: List[Dict]) -> List[str]:
+    """Every group's paths but the one kept, for pronouns like 'them'."""
+    return [path for group in groups for path in group["paths"][1:]]
+
+
+def unchanged_since_scan(paths: List[str], expect: Dict) -> bool:
+    """Whether files still have the size and mtimes in an ln step's `expect`; cheap, no hashing."""
+    try:
+        stats = [os.stat(path) for path in paths]
+    except OSError:
+        return False
+    return all(st.st_size == expect["size"] for st in stats) and [st.st_mtime_ns for st in stats] == expect["mtimes"]
+
+
+def plan_is_current(plan: Optional[Dict]) -> bool:
+    """Whether every file a hardlink plan replaces is as the scan saw it, e.g. before reusing a cached plan."""
+    for step in (plan or {}).get("steps", []):
+        expect = step.get("kwargs", {}).get("expect")
+        if step.get("cmd") == "ln" and expect and not unchanged_since_scan(step["args"], expect):
+            return False
+    return True
+
+
+def dedupe_plan(groups: List[Dict], action: str = "hardlink") -> Dict:
+    """
+    A plan that frees the space taken by the redundant copies, keeping the first path of
+    each group. "hardlink" replaces every copy by a hard link to the kept file, so all
+    paths keep working; "remove" deletes the copies.
+    """
+    if action not in ("hardlink", "remove"):
+        raise ValueError(f"Unknown dedupe action '{action}'.")
+    total = format_size(sum(g["reclaimable"] for g in groups))
+    plan = {
+        "assumptions": [
+            "Files with identical content are interchangeable.",
+            "In each group, the copy nearest the top of the folder tree is kept.",
+        ],
+        "steps": [],
+    }
+    if action == "remove":
+        copies = [path for group in groups for path in group["paths"][1:]]
+        plan["steps"].append({"cmd": "rm", "args": copies,
+                              "why": f"To delete {len(copies)} redundant copies and free {total}."})
+        return plan
+    for group in groups:
+        keep = group["paths"][0]
+        for copy in group["paths"][1:]:
+            kwargs = {"force": True}
+            if "digest" in group:
+                # ln replaces the copy only if neither file changed since the scan.
+                kwargs["expect"] = {"size": group["size"], "digest": group["digest"],
+                                    "mtimes": [group["mtimes"][keep], group["mtimes"][copy]]}
+            plan["steps"].append({"cmd": "ln", "args": [keep, copy], "kwargs": kwargs,
+                                  "why": f"To replace a copy of '{os.path.basename(keep)}' with a hard link to it."})
+    plan["assumptions"].append(f"Hard links free {total} while every path keeps working (same filesystem only).")
+    return plan
@@ -1,34 +1,138 @@
+import atexit
 import os
 import shutil
+import threading
+from collections.abc import Sequence
 from datetime import datetime
 
-from src.core import safety, search
+from src.core import metrics, safety, search, tracing
+from src.core.output import OutputSink
+from src.core.pathset import FileListing, FileReport, PathArgs
 
 UNDO_LOG_FILE = os.path.expanduser("~/.samantha/undo.log")
 # Keep track of the current working directory for the session, start with process CWD
 SESSION_CWD = os.getcwd()
 
+# Defaults of the `tree` command.
+TREE_DEPTH = 3
+TREE_MAX_ENTRIES = 50
+TREE_IGNORE = [".git", "__pycache__", "node_modules", ".venv"]
 
-def _ensure_log_directory_exists():
+# Sessions in one process may share a journal file; serialize their appends per path.
+_JOURNAL_LOCKS = {}
+_JOURNAL_LOCKS_GUARD = threading.Lock()
+
+
+def _journal_lock(path: str) -> threading.Lock:
+    with _JOURNAL_LOCKS_GUARD:
+        return _JOURNAL_LOCKS.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def _ensure_log_directory_exists(log_file: str = None):
     """Ensures that the directory for the undo log exists."""
-    log_dir = os.path.dirname(UNDO_LOG_FILE)
+    log_dir = os.path.dirname(log_file or UNDO_LOG_FILE)
     if log_dir and not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+        os.makedirs(log_dir, exist_ok=True)
 
 
 def log_command(command_str: str):
     """Logs a command to the undo log file."""
     _ensure_log_directory_exists()
     timestamp = datetime.now().isoformat()
-    with open(UNDO_LOG_FILE, "a", encoding="utf-8") as f:
+    with _journal_lock(UNDO_LOG_FILE), open(UNDO_LOG_FILE, "a", encoding="utf-8") as f:
         f.write(f"{timestamp} - {command_str}\n")
 
+
+class ExecutionContext:
+    """
+    Everything a plan needs from its session: the working directory, how to talk to the
+    user (output and confirmation questions) and the undo journal.
+
+    Commands never touch process-wide state through a context, so one process can run
+    many sessions at once, each in its own thread.
+    """
+
+    def __init__(self, cwd: str = None, output=None, ask=None, undo_log_file: str = None,
+                 sink: OutputSink = None):
+        self.cwd = os.path.abspath(cwd or os.getcwd())
+        # `output(text)` shows text to the user; `ask(prompt)` asks a question and returns the answer.
+        # Text goes through `sink`, which buffers it and bounds long command outputs.
+        self.sink = sink or OutputSink(output)
+        self._ask = ask
+        self.undo_log_file = undo_log_file or UNDO_LOG_FILE
+        self._journal = None
+
+    def print(self, text: str = ""):
+        self.sink.write(f"{text}\n")
+
+    def show(self, output, label: str = "output"):
+        """Shows a command's output, bounded to its first and last lines when it is long."""
+        self.sink.show(output, label)
+
+    def flush(self):
+        self.sink.flush()
+
+    def ask(self, prompt: str) -> str:
+        self.sink.flush()
+        return input(prompt) if self._ask is None else self._ask(prompt)
+
+    def log_command(self, command_str: str):
+        """Appends a command to this session's undo journal, keeping the file open between commands."""
+        timestamp = datetime.now().isoformat()
+        with _journal_lock(self.undo_log_file):
+            if self._journal is None:
+                _ensure_log_directory_exists(self.undo_log_file)
+                self._journal = open(self.undo_log_file, "a", encoding="utf-8")
+            self._journal.write(f"{timestamp} - {command_str}\n")
+            self._journal.flush()
+
+    def close(self):
+        self.sink.close()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class _ProcessContext(ExecutionContext):
+    """
+    The context used when none is given: the single-user CLI session. Its working
+    directory and journal are the module-level SESSION_CWD and UNDO_LOG_FILE.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    @property
+    def cwd(self):
+        return SESSION_CWD
+
+    @cwd.setter
+    def cwd(self, value):
+        global SESSION_CWD
+        SESSION_CWD = value
+
+    @property
+    def undo_log_file(self):
+        return UNDO_LOG_FILE
+
+    @undo_log_file.setter
+    def undo_log_file(self, value):
+        pass
+
+    def log_command(self, command_str: str):
+        log_command(command_str)
+
+
+DEFAULT_CONTEXT = _ProcessContext()
+# Whatever the CLI session buffered is written out even if it ends without a flush.
+atexit.register(DEFAULT_CONTEXT.sink.close)
+
 # --- Core Command Implementations ---
 
 
-def _resolve_path(path: str) -> str:
+def _resolve_path(path: str, ctx: ExecutionContext = None) -> str:
     """Resolves a path relative to the session's CWD."""
-    return os.path.join(SESSION_CWD, os.path.expanduser(path))
+    return os.path.join((ctx or DEFAULT_CONTEXT).cwd, os.path.expanduser(path))
 
 
 def _suggest_best_match(path_not_found: str, match_type: str = 'any') -> str:
@@ -53,9 +157,10 @@ def _suggest_best_match(path_not_found: str, match_type: str = 'any') -> str:
         return ""
 
 
-def _execute_ls(args, kwargs=None):
+def _execute_ls(args, kwargs=None, ctx: ExecutionContext = None):
     """Lists files and directories."""
-    path = _resolve_path(args[0]) if args else SESSION_CWD
+    ctx = ctx or DEFAULT_CONTEXT
+    path = _resolve_path(args[0], ctx) if args else ctx.cwd
     if not os.path.isdir(path):
         suggestion = _suggest_best_match(path, match_type='dir')
         return f"Error: Directory not found at '{path}'.{suggestion}"
@@ -73,36 +178,37 @@ def _execute_ls(args, kwargs=None):
         return f"Error listing directory '{path}': {e}"
 
 
-def _execute_cd(args, kwargs=None):
+def _execute_cd(args, kwargs=None, ctx: ExecutionContext = None):
     """Changes the current working directory for the session."""
-    global SESSION_CWD
+    ctx = ctx or DEFAULT_CONTEXT
     if not args:
         return "Error: 'cd' requires a destination directory."
 
-    path = _resolve_path(args[0])
+    path = _resolve_path(args[0], ctx)
     if not os.path.isdir(path):
         suggestion = _suggest_best_match(path, match_type='dir')
         return f"Error: Directory not found at '{path}'.{suggestion}"
 
-    try:
-        os.chdir(path)
-        SESSION_CWD = os.getcwd()
-        return f"Current directory is now: {SESSION_CWD}"
-    except OSError as e:
-        return f"Error changing directory to '{path}': {e}"
+    if not os.access(path, os.X_OK):
+        return f"Error changing directory to '{path}': Permission denied"
+    # Only the session moves; the process working directory never changes.
+    ctx.cwd = os.path.realpath(path)
+    return f"Current directory is now: {ctx.cwd}"
 
 
-def _execute_pwd(args, kwargs=None):
+def _execute_pwd(args, kwargs=None, ctx: ExecutionContext = None):
     """Prints the current working directory."""
-    return f"Current directory: {SESSION_CWD}"
+    ctx = ctx or DEFAULT_CONTEXT
+    return f"Current directory: {ctx.cwd}"
 
 
-def _execute_mkdir(args, kwargs=None):
+def _execute_mkdir(args, kwargs=None, ctx: ExecutionContext = None):
     """Creates a new directory."""
+    ctx = ctx or DEFAULT_CONTEXT
     if not args:
         return "Error: 'mkdir' requires a directory name."
 
-    path = _resolve_path(args[0])
+    path = _resolve_path(args[0], ctx)
 
     if os.path.exists(path):
         if os.path.isdir(path):
@@ -117,12 +223,13 @@ def _execute_mkdir(args, kwargs=None):
         return f"Error creating directory '{path}': {e}"
 
 
-def _execute_touch(args, kwargs=None):
+def _execute_touch(args, kwargs=None, ctx: ExecutionContext = None):
     """Creates an empty file or updates its timestamp."""
+    ctx = ctx or DEFAULT_CONTEXT
     if not args:
         return "Error: 'touch' requires a filename."
 
-    path = _resolve_path(args[0])
+    path = _resolve_path(args[0], ctx)
     try:
         with open(path, 'a'):
             os.utime(path, None)
@@ -131,12 +238,13 @@ def _execute_touch(args, kwargs=None):
         return f"Error touching file '{path}': {e}"
 
 
-def _execute_cp(args, kwargs=None):
+def _execute_cp(args, kwargs=None, ctx: ExecutionContext = None):
     """Copies one or more files or directories to a destination."""
+    ctx = ctx or DEFAULT_CONTEXT
     if len(args) < 2:
         return "Error: 'cp' requires at least one source and a destination."
-    dest_path = _resolve_path(args[-1])
-    source_paths = [_resolve_path(arg) for arg in args[:-1]]
+    dest_path = _resolve_path(args[-1], ctx)
+    source_paths = [_resolve_path(arg, ctx) for arg in args[:-1]]
     if len(source_paths) > 1 and not os.path.isdir(dest_path):
         return f"Error: Destination '{dest_path}' is not a directory, which is required for copying multiple items."
     successes = []
@@ -147,11 +255,12 @@ def _execute_cp(args, kwargs=None):
             errors.append(f"Source '{src_path}' not found.{suggestion}")
             continue
         try:
-            if os.path.isdir(src_path):
-                shutil.copytree(src_path, os.path.join(
-                    dest_path, os.path.basename(src_path)))
-            else:
-                shutil.copy2(src_path, dest_path)
+            with tracing.span("copy", "io", source=src_path):
+                if os.path.isdir(src_path):
+                    shutil.copytree(src_path, os.path.join(
+                        dest_path, os.path.basename(src_path)))
+                else:
+                    shutil.copy2(src_path, dest_path)
             successes.append(src_path)
         except (shutil.Error, OSError) as e:
             errors.append(f"Failed to copy '{src_path}': {e}")
@@ -164,12 +273,13 @@ def _execute_cp(args, kwargs=None):
     return "\n".join(output) if output else "No items were copied."
 
 
-def _execute_mv(args, kwargs=None):
+def _execute_mv(args, kwargs=None, ctx: ExecutionContext = None):
     """Moves/renames one or more files or directories to a destination."""
+    ctx = ctx or DEFAULT_CONTEXT
     if len(args) < 2:
         return "Error: 'mv' requires at least one source and a destination."
-    dest_path = _resolve_path(args[-1])
-    source_paths = [_resolve_path(arg) for arg in args[:-1]]
+    dest_path = _resolve_path(args[-1], ctx)
+    source_paths = [_resolve_path(arg, ctx) for arg in args[:-1]]
     if len(source_paths) > 1 and not os.path.isdir(dest_path):
         return f"Error: Destination '{dest_path}' is not a directory, which is required for moving multiple items."
     successes = []
@@ -193,11 +303,12 @@ def _execute_mv(args, kwargs=None):
     return "\n".join(output) if output else "No items were moved."
 
 
-def _execute_rm(args, kwargs=None):
+def _execute_rm(args, kwargs=None, ctx: ExecutionContext = None):
     """Removes one or more files or directories."""
+    ctx = ctx or DEFAULT_CONTEXT
     if not args:
         return "Error: 'rm' requires at least one target path."
-    paths_to_delete = [_resolve_path(arg) for arg in args]
+    paths_to_delete = [_resolve_path(arg, ctx) for arg in args]
     existing_paths = []
     errors = []
     for path in paths_to_delete:
@@ -210,8 +321,8 @@ def _execute_rm(args, kwargs=None):
     if not existing_paths:
         return "Errors occurred:\n" + "\n".join(errors)
     abs_paths_to_delete = [os.path.abspath(p) for p in existing_paths]
-    confirm = input(f"Are you sure you want to permanently delete:\n" +
-                    "\n".join(abs_paths_to_delete) + "\n(y/n): ").lower().strip()
+    confirm = ctx.ask(f"Are you sure you want to permanently delete:\n" +
+                      "\n".join(abs_paths_to_delete) + "\n(y/n): ").lower().strip()
     if confirm != 'y':
         return f"Deletion of {len(existing_paths)} item(s) cancelled."
     successes = []
@@ -233,14 +344,15 @@ def _execute_rm(args, kwargs=None):
     return "\n".join(output) if output else "No items were removed."
 
 
-def _execute_find_files(args, kwargs=None):
+def _execute_find_files(args, kwargs=None, ctx: ExecutionContext = None):
     """Finds files by name pattern, with optional advanced filters."""
+    ctx = ctx or DEFAULT_CONTEXT
     if kwargs is None:
         kwargs = {}
-    if not args:
-        return "Error: 'find_files' requires at least a name pattern."
-    name_pattern = args[0]
-    path = _resolve_path(args[1]) if len(args) > 1 else SESSION_CWD
+    if not args and not kwargs.get("query"):
+        return "Error: 'find_files' requires at least a name pattern or a query."
+    name_pattern = args[0] if args else "*"
+    path = _resolve_path(args[1], ctx) if len(args) > 1 else ctx.cwd
     try:
         matches = search.find_files(name_pattern, path, **kwargs)
         if not matches:
@@ -248,19 +360,23 @@ def _execute_find_files(args, kwargs=None):
                 filters = ", ".join([f"{k}='{v}'" for k, v in kwargs.items()])
                 return f"No files found matching '{name_pattern}' in '{path}' with filters: {filters}."
             return f"No files found matching '{name_pattern}' in '{path}'."
-        return "Found files:\n" + "\n".join(matches)
+        return FileListing(matches)
+    except search.QuerySyntaxError as e:
+        return f"Error: Invalid query: {e}"
     except Exception as e:
         return f"Error finding files: {e}"
 
 
-def _execute_search_in_files(args, kwargs=None):
+def _execute_search_in_files(args, kwargs=None, ctx: ExecutionContext = None):
     """Searches for content within files."""
+    ctx = ctx or DEFAULT_CONTEXT
     if len(args) < 1:
         return "Error: 'search_in_files' requires a content pattern."
+    from src.core import pdf_text
     content_pattern = args[0]
-    path = _resolve_path(args[1]) if len(args) > 1 else SESSION_CWD
+    path = _resolve_path(args[1], ctx) if len(args) > 1 else ctx.cwd
     try:
-        matches = search.search_in_files(content_pattern, path)
+        matches = search.search_in_files(content_pattern, path, pdf_cache=pdf_text.default_pdf_text_cache())
         if not matches:
             return f"No content matching '{content_pattern}' found in files in '{path}'."
         return f"Found content:\n" + "\n".join(matches)
@@ -268,8 +384,230 @@ def _execute_search_in_files(args, kwargs=None):
         return f"Error searching in files: {e}"
 
 
-def _execute_bash(args, kwargs=None):
+def _execute_find_duplicates(args, kwargs=None, ctx: ExecutionContext = None):
+    """Finds files with identical content and reports the space they waste."""
+    ctx = ctx or DEFAULT_CONTEXT
+    from src.core import duplicates
+    from src.core.utils import parse_size_filter
+    kwargs = kwargs or {}
+    paths = [_resolve_path(arg, ctx) for arg in args] or [ctx.cwd]
+    for path in paths:
+        if not os.path.isdir(path):
+            suggestion = _suggest_best_match(path, match_type='dir')
+            return f"Error: Directory not found at '{path}'.{suggestion}"
+    try:
+        groups = duplicates.find_duplicates(paths, size_filter=parse_size_filter(kwargs.get("size")),
+                                            cache=duplicates.default_digest_cache())
+    except Exception as e:
+        return f"Error finding duplicates: {e}"
+    if not groups:
+        return f"No duplicate files found in {', '.join(repr(p) for p in paths)}."
+    # 'them' refers to the redundant copies, never to the files being kept.
+    return FileReport(duplicates.format_report(groups), duplicates.redundant_copies(groups))
+
+
+def _execute_checksum(args, kwargs=None, ctx: ExecutionContext = None):
+    """Checksums files, writes them to a manifest, or verifies files against one."""
+    ctx = ctx or DEFAULT_CONTEXT
+    from src.core import checksum, duplicates
+    kwargs = kwargs or {}
+    cache = duplicates.default_digest_cache()
+    algorithm = kwargs.get("algorithm")
+    try:
+        if kwargs.get("verify"):
+            manifest = _resolve_path(kwargs["verify"], ctx)
+            if not os.path.isfile(manifest):
+                return f"Error: Manifest not found at '{manifest}'."
+            report = checksum.verify_manifest(manifest, algorithm=algorithm, cache=cache)
+            lines = [f"Verified {len(report['ok']) + len(report['failed']) + len(report['missing'])} file(s) "
+                     f"against '{manifest}': {len(report['ok'])} OK, {len(report['failed'])} FAILED, "
+                     f"{len(report['missing'])} missing ({report['hashed']} hashed, {report['cached']} unchanged)."]
+            lines += [f"FAILED: {path}" for path in report["failed"]]
+            lines += [f"MISSING: {path}" for path in report["missing"]]
+            return "\n".join(lines)
+
+        paths = [_resolve_path(arg, ctx) for arg in args] or [ctx.cwd]
+        for path in paths:
+            if not os.path.exists(path):
+                suggestion = _suggest_best_match(path)
+                return f"Error: Path not found at '{path}'.{suggestion}"
+        algorithm = algorithm or checksum.DEFAULT_ALGORITHM
+        if kwargs.get("manifest"):
+            manifest = _resolve_path(kwargs["manifest"], ctx)
+            result = checksum.write_manifest(manifest, paths, algorithm=algorithm, cache=cache)
+            lines = [f"Wrote {len(result['digests'])} {algorithm} checksum(s) to '{manifest}' "
+                     f"({result['hashed']} hashed, {result['cached']} unchanged)."]
+        else:
+            result = checksum.checksum_files(paths, algorithm=algorithm, cache=cache)
+            lines = [f"{digest}  {path}" for path, digest in result["digests"]]
+        lines += [f"Error reading '{path}': {message}" for path, message in result["errors"]]
+        return "\n".join(lines) or "No files to checksum."
+    except Exception as e:
+        return f"Error computing checksums: {e}"
+
+
+def _execute_package_info(args, kwargs=None, ctx: ExecutionContext = None):
+    """Shows whether packages are installed, their versions and the versions the repositories offer."""
+    ctx = ctx or DEFAULT_CONTEXT
+    from src.osint import packages
+    if not args:
+        return "Error: 'package_info' requires at least one package name."
+    try:
+        info = packages.PackageInfo(cache=packages.default_package_cache()).info(list(args))
+        return packages.format_info(info)
+    except packages.PackageQueryError as e:
+        return f"Error: {e}"
+    except Exception as e:
+        return f"Error querying packages: {e}"
+
+
+def _execute_package_search(args, kwargs=None, ctx: ExecutionContext = None):
+    """Searches the repositories for packages by name or summary."""
+    ctx = ctx or DEFAULT_CONTEXT
+    from src.osint import packages
+    if not args:
+        return "Error: 'package_search' requires a search term."
+    term = " ".join(args)
+    try:
+        results = packages.PackageInfo(cache=packages.default_package_cache()).search(term)
+        return packages.format_search(term, results)
+    except packages.PackageQueryError as e:
+        return f"Error: {e}"
+    except Exception as e:
+        return f"Error searching packages: {e}"
+
+
+def _execute_disk_usage(args, kwargs=None, ctx: ExecutionContext = None):
+    """Shows what takes up the space under a directory, by subdirectory and by file type."""
+    ctx = ctx or DEFAULT_CONTEXT
+    from src.core import disk_usage
+    kwargs = kwargs or {}
+    path = _resolve_path(args[0], ctx) if args else ctx.cwd
+    if not os.path.isdir(path):
+        suggestion = _suggest_best_match(path, match_type='dir')
+        return f"Error: Directory not found at '{path}'.{suggestion}"
+    try:
+        depth = int(kwargs.get("depth", disk_usage.DEFAULT_DEPTH))
+        top = int(kwargs.get("top", disk_usage.DEFAULT_TOP))
+        result = disk_usage.analyze(path, cache=disk_usage.default_usage_cache(),
+                                    refresh=bool(kwargs.get("refresh")))
+        return disk_usage.render(result, depth=depth, top=top)
+    except Exception as e:
+        return f"Error analyzing disk usage: {e}"
+
+
+def _execute_top_files(args, kwargs=None, ctx: ExecutionContext = None):
+    """Lists the N largest, smallest, newest or oldest files under a directory."""
+    ctx = ctx or DEFAULT_CONTEXT
+    from src.core import file_stats
+    kwargs = kwargs or {}
+    path = _resolve_path(args[0], ctx) if args else ctx.cwd
+    if not os.path.isdir(path):
+        suggestion = _suggest_best_match(path, match_type='dir')
+        return f"Error: Directory not found at '{path}'.{suggestion}"
+    order = kwargs.get("order", "largest")
+    if order not in file_stats.ORDERS:
+        return f"Error: Unknown order '{order}'. Use one of: {', '.join(file_stats.ORDERS)}."
+    try:
+        entries = file_stats.top_files(path, n=int(kwargs.get("n", file_stats.DEFAULT_TOP)), order=order,
+                                       pattern=kwargs.get("pattern"), file_type=kwargs.get("file_type"))
+    except Exception as e:
+        return f"Error finding top files: {e}"
+    if not entries:
+        return f"No files found in '{path}'."
+    return FileReport(file_stats.format_top(entries, order, os.path.abspath(path)), [entry[0] for entry in entries])
+
+
+def _execute_summarize_files(args, kwargs=None, ctx: ExecutionContext = None):
+    """Counts files under a directory by type, with total size and size percentiles."""
+    ctx = ctx or DEFAULT_CONTEXT
+    from src.core import file_stats
+    kwargs = kwargs or {}
+    path = _resolve_path(args[0], ctx) if args else ctx.cwd
+    if not os.path.isdir(path):
+        suggestion = _suggest_best_match(path, match_type='dir')
+        return f"Error: Directory not found at '{path}'.{suggestion}"
+    try:
+        stats = file_stats.summarize_files(path, pattern=kwargs.get("pattern"), file_type=kwargs.get("file_type"))
+    except Exception as e:
+        return f"Error summarizing files: {e}"
+    if not stats:
+        return f"No files found in '{path}'."
+    return file_stats.format_summary(stats, os.path.abspath(path))
+
+
+def _execute_tree(args, kwargs=None, ctx: ExecutionContext = None):
+    """Prints a directory tree line by line as it is walked, and returns its totals."""
+    ctx = ctx or DEFAULT_CONTEXT
+    from src.vision import ascii_art
+    kwargs = kwargs or {}
+    path = _resolve_path(args[0], ctx) if args else ctx.cwd
+    if not os.path.isdir(path):
+        suggestion = _suggest_best_match(path, match_type='dir')
+        return f"Error: Directory not found at '{path}'.{suggestion}"
+    ignore = kwargs.get("ignore", TREE_IGNORE)
+    if isinstance(ignore, str):
+        ignore = [pattern.strip() for pattern in ignore.split(",") if pattern.strip()]
+    try:
+        depth = kwargs.get("depth", TREE_DEPTH)
+        max_entries = kwargs.get("max_entries", TREE_MAX_ENTRIES)
+        counts = {}
+        # Lines go straight to the user as the walk produces them; huge trees never sit in memory.
+        for line in ascii_art.iter_directory_tree(
+                path, max_depth=int(depth) if depth is not None else None,
+                max_entries=int(max_entries) if max_entries is not None else None,
+                ignore=ignore, show_hidden=bool(kwargs.get("hidden")), counts=counts):
+            ctx.print(line)
+    except Exception as e:
+        return f"Error drawing tree for '{path}': {e}"
+    return f"{counts['directories']} directories, {counts['files']} files shown."
+
+
+def _execute_ln(args, kwargs=None, ctx: ExecutionContext = None):
+    """
+    Creates a hard link; with force=True an existing file at the link path is replaced.
+    With `expect` (size, digest and the two files' mtimes from find_duplicates) it is replaced
+    only if both files still have exactly the content the scan saw.
+    """
+    ctx = ctx or DEFAULT_CONTEXT
+    kwargs = kwargs or {}
+    if len(args) != 2:
+        return "Error: 'ln' requires a target file and a link path."
+    target = _resolve_path(args[0], ctx)
+    link = _resolve_path(args[1], ctx)
+    if not os.path.isfile(target):
+        suggestion = _suggest_best_match(target)
+        return f"Error: File not found at '{target}'.{suggestion}"
+    if os.path.exists(link) and not kwargs.get("force"):
+        return f"Error: '{link}' already exists."
+    if os.path.exists(link) and os.path.samefile(target, link):
+        return f"'{link}' is already a hard link to '{target}'."
+    expect = kwargs.get("expect")
+    if expect and os.path.exists(link):
+        # A plan from a duplicate scan: replace the copy only if both files are still what the scan saw.
+        from src.core import duplicates
+        try:
+            same = (duplicates.unchanged_since_scan([target, link], expect)
+                    and duplicates.full_digest(target) == expect["digest"] == duplicates.full_digest(link))
+        except (OSError, KeyError):
+            same = False
+        if not same:
+            return f"Error: '{link}' or '{target}' changed since the duplicate scan; '{link}' was left as it is."
+    # Link under a temporary name and rename over the old file, so the path never goes missing.
+    tmp_link = f"{link}.samantha-ln-{os.getpid()}-{threading.get_ident()}"
+    try:
+        os.link(target, tmp_link)
+        os.replace(tmp_link, link)
+    except OSError as e:
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        return f"Error linking '{link}' to '{target}': {e}"
+    return f"Linked '{link}' to '{target}'."
+
+
+def _execute_bash(args, kwargs=None, ctx: ExecutionContext = None):
     """Executes a bash command."""
+    ctx = ctx or DEFAULT_CONTEXT
     import subprocess
     if not args:
         return "Error: 'execute_bash' requires a command to run."
@@ -277,7 +615,7 @@ def _execute_bash(args, kwargs=None):
     try:
         # Using shell=True for simplicity, but be aware of security implications.
         result = subprocess.run(
-            command, capture_output=True, text=True, check=False, shell=True)
+            command, capture_output=True, text=True, check=False, shell=True, cwd=ctx.cwd)
         output = result.stdout.strip()
         error = result.stderr.strip()
         if result.returncode != 0:
@@ -300,20 +638,40 @@ COMMAND_MAP = {
     "rm": _execute_rm,
     "find_files": _execute_find_files,
     "search_in_files": _execute_search_in_files,
+    "find_duplicates": _execute_find_duplicates,
+    "checksum": _execute_checksum,
+    "disk_usage": _execute_disk_usage,
+    "package_info": _execute_package_info,
+    "package_search": _execute_package_search,
+    "top_files": _execute_top_files,
+    "summarize_files": _execute_summarize_files,
+    "tree": _execute_tree,
+    "ln": _execute_ln,
     "execute_bash": _execute_bash,
 }
 
 
-def execute_with_recovery(command_name, args, kwargs):
+def execute_with_recovery(command_name, args, kwargs, ctx: ExecutionContext = None):
     """
     Executes a command with error handling and recovery suggestions.
+    With metrics enabled, records its duration and outcome per command.
     """
+    if not metrics.REGISTRY.enabled:
+        return _execute_with_recovery(command_name, args, kwargs, ctx)
+    with metrics.timer("samantha_command_seconds", "Time spent executing each command.", command=command_name):
+        result = _execute_with_recovery(command_name, args, kwargs, ctx)
+    metrics.inc("samantha_commands_total", "Commands executed, by outcome.", command=command_name, status=result["status"])
+    return result
+
+
+def _execute_with_recovery(command_name, args, kwargs, ctx: ExecutionContext = None):
+    ctx = ctx or DEFAULT_CONTEXT
     try:
         if command_name not in COMMAND_MAP:
             return {"status": "error", "output": f"Unknown command: '{command_name}'."}
 
         # Initial execution attempt
-        output = COMMAND_MAP[command_name](args, kwargs)
+        output = COMMAND_MAP[command_name](args, kwargs, ctx)
 
         # Basic error detection based on string output
         if isinstance(output, str) and output.strip().lower().startswith("error:"):
@@ -330,7 +688,7 @@ def execute_with_recovery(command_name, args, kwargs):
 
                 if path_to_check:
                     suggestion = _suggest_best_match(
-                        _resolve_path(path_to_check))
+                        _resolve_path(path_to_check, ctx))
                     if suggestion:
                         # In a more advanced agent, it might auto-apply this or ask the user.
                         # For now, we'll just add it to the error output.
@@ -361,90 +719,135 @@ def execute_with_recovery(command_name, args, kwargs):
         return {"status": "error", "output": error_message}
 
 
-def preview(plan: dict):
+def preview(plan: dict, ctx: ExecutionContext = None):
     """Prints a human-readable preview of the execution plan."""
-    print("I understand. Here is the plan:")
+    ctx = ctx or DEFAULT_CONTEXT
+    ctx.print("I understand. Here is the plan:")
     if plan.get("assumptions"):
-        print("Based on these assumptions:")
+        ctx.print("Based on these assumptions:")
         for assumption in plan["assumptions"]:
-            print(f"  - {assumption}")
+            ctx.print(f"  - {assumption}")
 
-    print("\nI will perform the following steps:")
+    ctx.print("\nI will perform the following steps:")
     for i, step in enumerate(plan.get("steps", []), 1):
         cmd = step.get('cmd', 'N/A')
         args = " ".join(f'"{arg}"' for arg in step.get('args', []))
         why = step.get('why', 'No reason provided.')
-        print(f"{i}. {cmd} {args}")
-        print(f"   Reason: {why}")
+        ctx.print(f"{i}. {cmd} {args}")
+        ctx.print(f"   Reason: {why}")
+    ctx.flush()
 
 
-def confirm():
+def confirm(ctx: ExecutionContext = None):
     """Asks the user to confirm (y/n) before proceeding."""
-    response = input(
+    response = (ctx or DEFAULT_CONTEXT).ask(
         "\nShould I proceed with this plan? (y/n): ").lower().strip()
     return response == 'y'
 
 
-def run(plan: dict):
+def _check_step_policy(policy, step_no, command_name, args, kwargs, ctx: ExecutionContext, realdirs):
+    """An error message if the safety policy stops this step, else None."""
+    findings = policy.check_step(step_no, command_name, args, ctx.cwd, realdirs, kwargs)
+    if not findings:
+        return None
+    report = safety.PolicyReport()
+    report.findings = findings
+    if report.denied:
+        return report.describe(safety.DENY)
+    ctx.print(report.describe(safety.CONFIRM))
+    if ctx.ask(f"Proceed with step {step_no} anyway? (y/n): ").lower().strip() != 'y':
+        return f"Step {step_no} cancelled by user."
+    return None
+
+
+def _expand_args(args, step_outputs, last_files):
+    """
+    Replaces {result_of_step_N} with that step's output and '$results.last' with the files
+    of the previous step. Sequences of paths are passed by reference in a PathArgs rather
+    than copied. Returns (args, error).
+    """
+    if not any(isinstance(arg, str) and (arg == "$results.last" or arg.startswith("{result_of_step_"))
+               for arg in args):
+        return args, None
+    expanded = PathArgs()
+    for arg in args:
+        if isinstance(arg, str) and arg.startswith("{result_of_step_") and arg.endswith("}"):
+            try:
+                ref_idx = int(arg[len("{result_of_step_"):-1]) - 1
+            except ValueError:
+                expanded.append(arg)
+                continue
+            if not 0 <= ref_idx < len(step_outputs):
+                expanded.append(arg)  # fallback: leave as is
+                continue
+            # If the referenced output is a list of paths, expand it; else, use as is
+            ref_output = step_outputs[ref_idx]
+            if isinstance(ref_output, Sequence) and not isinstance(ref_output, str):
+                expanded.extend(ref_output)
+            else:
+                expanded.append(ref_output)
+        elif arg == "$results.last":
+            if not last_files:
+                return args, "Used a pronoun like 'them' but the previous step produced no files."
+            expanded.extend(last_files)
+        else:
+            expanded.append(arg)
+    return expanded, None
+
+
+def run(plan: dict, last_files=None, ctx: ExecutionContext = None):
     """
     Runs a plan dictionary after safety checks, confirmation, and logging.
     This function replaces the old subprocess-based command execution.
+    `last_files` seeds pronoun resolution ('$results.last') with the files found by a previous command.
+    `ctx` is the session the plan runs in; without one it runs in the process-wide CLI session.
     """
-    preview(plan)
-    if not confirm():
-        print("Execution cancelled by user.")
+    ctx = ctx or DEFAULT_CONTEXT
+    with tracing.span("preview", "execution", steps=len(plan.get("steps", []))):
+        preview(plan, ctx)
+    # Every path the plan would modify is checked before the user is asked to confirm it.
+    with tracing.span("safety policy check", "execution") as span:
+        policy = safety.default_policy()
+        if policy.warning:
+            ctx.print(policy.warning)
+        report = policy.check_plan(plan, ctx.cwd, last_files)
+        span.set(findings=len(report.findings))
+    if report.denied:
+        ctx.print(report.describe(safety.DENY))
+        ctx.flush()
+        return {"summary": "Blocked by the safety policy.", "results": []}
+    if report.to_confirm:
+        ctx.print(report.describe(safety.CONFIRM))
+    with tracing.span("confirmation", "user") as span:
+        confirmed = confirm(ctx)
+        span.set(confirmed=confirmed)
+    if not confirmed:
+        ctx.print("Execution cancelled by user.")
+        ctx.flush()
         return {"summary": "User cancelled.", "results": []}
 
+    realdirs = {}
     results = []
     step_outputs = []  # Store outputs of each step for substitution
-    last_step_output_files = []
+    last_step_output_files = last_files or []
 
     for step_idx, step in enumerate(plan.get("steps", [])):
         command_name = step.get("cmd")
         args = step.get("args", [])
         kwargs = step.get("kwargs", {})
 
-        # --- Placeholder Substitution: {result_of_step_#} ---
-        substituted_args = []
-        for arg in args:
-            if isinstance(arg, str) and arg.startswith("{result_of_step_") and arg.endswith("}"):
-                # Extract step number
-                try:
-                    ref_idx = int(arg[len("{result_of_step_"):-1]) - 1
-                    if 0 <= ref_idx < len(step_outputs):
-                        # If the referenced output is a list, expand it; else, use as is
-                        ref_output = step_outputs[ref_idx]
-                        if isinstance(ref_output, list):
-                            substituted_args.extend(ref_output)
-                        else:
-                            substituted_args.append(ref_output)
-                    else:
-                        substituted_args.append(arg)  # fallback: leave as is
-                except Exception:
-                    substituted_args.append(arg)
-            else:
-                substituted_args.append(arg)
-        args = substituted_args
-        # --- End Placeholder Substitution ---
-
-        # --- Pronoun Resolution ---
-        resolved_args = []
-        pronoun_error = None
-        for arg in args:
-            if arg == "$results.last":
-                if not last_step_output_files:
-                    pronoun_error = "Used a pronoun like 'them' but the previous step produced no files."
-                    break
-                resolved_args.extend(last_step_output_files)
-            else:
-                resolved_args.append(arg)
-
+        args, pronoun_error = _expand_args(args, step_outputs, last_step_output_files)
         if pronoun_error:
             results.append({"status": "error", "output": pronoun_error})
             break
 
-        args = resolved_args
-        # --- End Pronoun Resolution ---
+        # Paths that only exist now (outputs of earlier steps) get the same policy check.
+        if step_idx + 1 in report.dynamic_steps:
+            policy_error = _check_step_policy(policy, step_idx + 1, command_name, args, kwargs, ctx, realdirs)
+            if policy_error:
+                results.append({"status": "error", "output": policy_error})
+                ctx.print(policy_error)
+                break
 
         if not command_name:
             results.append(
@@ -452,8 +855,12 @@ def run(plan: dict):
             step_outputs.append(None)
             continue
 
-        execution_result = execute_with_recovery(command_name, args, kwargs)
-        print(execution_result["output"])
+        ctx.flush()
+        with tracing.span(f"step {step_idx + 1}: {command_name}", "step", args=len(args)) as span:
+            execution_result = execute_with_recovery(command_name, args, kwargs, ctx)
+            ctx.show(execution_result["output"], f"step {step_idx + 1}: {command_name}")
+            ctx.flush()
+            span.set(status=execution_result["status"])
         results.append(execution_result)
 
         # Store output for future step reference
@@ -462,30 +869,33 @@ def run(plan: dict):
 
         if execution_result["status"] == "success":
             output = execution_result["output"]
-            if command_name == "find_files" and isinstance(output, str) and output.startswith("Found files:\n"):
-                file_list = output.strip().split('\n')[1:]
-                last_step_output_files = [f for f in file_list if f]
-                # Also update step_outputs for this step to be the file list
+            if isinstance(output, (FileListing, FileReport)):
+                # Later steps get the files themselves, by reference, not the printed text.
+                last_step_output_files = output.paths
                 step_outputs[-1] = last_step_output_files
             else:
                 last_step_output_files = []
 
             log_args = ' '.join(map(str, args))
             log_kwargs = ' '.join([f"--{k}={v}" for k, v in kwargs.items()])
-            log_command(f"{command_name} {log_args} {log_kwargs}".strip())
+            ctx.log_command(f"{command_name} {log_args} {log_kwargs}".strip())
         else:
             # Stop execution on any error
-            print("Stopping execution due to error.")
+            ctx.print("Stopping execution due to error.")
             break
 
+    ctx.flush()
     return {"summary": "Plan execution finished.", "results": results}
 
 
-def summarize(execution_results: dict):
+def summarize(execution_results: dict, ctx: ExecutionContext = None):
     """Prints a summary of the execution results."""
-    print("\n--- Execution Summary ---")
-    print(execution_results.get("summary", "No summary provided."))
+    ctx = ctx or DEFAULT_CONTEXT
+    ctx.print("\n--- Execution Summary ---")
+    ctx.print(execution_results.get("summary", "No summary provided."))
     for i, result in enumerate(execution_results.get("results", []), 1):
         status = result.get('status', 'N/A').upper()
         output = result.get('output', 'No output.')
-        print(f"Step {i} [{status}]: {output}")
\ No newline at end of file
+        # Long outputs were shown as their step ran; the summary points back to them.
+        ctx.print(f"Step {i} [{status}]: {ctx.sink.summary_line(output, i)}")
+    ctx.flush()
\ No newline at end of file
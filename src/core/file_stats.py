@@ -0,0 +1,153 @@
+"""
+Top-N and aggregate queries over file metadata ("the 10 largest files", "oldest logs",
+"how much space do my images take").
+
+Both run over a single streaming walk. Top-N keeps a bounded heap of N entries, and the
+per-category summaries keep a fixed-size log-scale histogram instead of every size, so
+memory stays O(N) (plus a constant per category) however many files are walked.
+"""
+import fnmatch
+import heapq
+import math
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .disk_usage import file_category
+from .search import iter_files
+from .utils import format_size
+
+# Size histogram resolution: buckets per power of two. 8 keeps percentile estimates within ~6%.
+BUCKETS_PER_OCTAVE = 8
+PERCENTILES = (50, 90, 99)
+DEFAULT_TOP = 10
+
+# Orders for top_files: the metadata field and whether bigger values come first.
+ORDERS = {
+    "largest": ("size", True),
+    "smallest": ("size", False),
+    "newest": ("mtime", True),
+    "oldest": ("mtime", False),
+}
+
+
+def _matches(path: str, pattern: Optional[str], file_type: Optional[str]) -> bool:
+    name = os.path.basename(path)
+    if pattern and pattern != "*" and not fnmatch.fnmatch(name, pattern):
+        return False
+    return not file_type or file_category(name) == file_type
+
+
+def top_files(path: str, n: int = 10, order: str = "largest", pattern: Optional[str] = None,
+              file_type: Optional[str] = None) -> List[Tuple[str, int, float]]:
+    """
+    Returns up to `n` (path, size, mtime) tuples under `path`, ordered by `order`
+    ("largest", "smallest", "newest" or "oldest"), optionally limited to names matching the
+    glob `pattern` and to a FILE_TYPE_MAPPINGS category.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"Unknown order '{order}'. Use one of: {', '.join(ORDERS)}.")
+    if n <= 0:
+        return []
+    field, descending = ORDERS[order]
+    sign = 1 if descending else -1
+    # A min-heap of the best n so far: its root is the entry the next candidate has to beat.
+    heap: List[Tuple[float, str, int, float]] = []
+    for file_path, st in iter_files([os.path.abspath(path)]):
+        if not _matches(file_path, pattern, file_type):
+            continue
+        value = st.st_size if field == "size" else st.st_mtime
+        item = (sign * value, file_path, st.st_size, st.st_mtime)
+        if len(heap) < n:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+    return [(p, size, mtime) for _, p, size, mtime in sorted(heap, key=lambda item: (-item[0], item[1]))]
+
+
+class SizeHistogram:
+    """Count, total, min, max and approximate percentiles of a stream of sizes, in constant memory."""
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.buckets: Dict[int, int] = {}
+
+    @staticmethod
+    def _bucket(size: int) -> int:
+        if size <= 0:
+            return -1
+        mantissa, exponent = math.frexp(size)  # size = mantissa * 2**exponent, 0.5 <= mantissa < 1
+        return exponent * BUCKETS_PER_OCTAVE + int((mantissa - 0.5) * 2 * BUCKETS_PER_OCTAVE)
+
+    @staticmethod
+    def _bucket_bounds(bucket: int) -> Tuple[float, float]:
+        if bucket < 0:
+            return 0.0, 0.0
+        exponent, step = divmod(bucket, BUCKETS_PER_OCTAVE)
+        low = 2.0 ** (exponent - 1) * (1 + step / BUCKETS_PER_OCTAVE)
+        return low, low + 2.0 ** (exponent - 1) / BUCKETS_PER_OCTAVE
+
+    def add(self, size: int):
+        self.count += 1
+        self.total += size
+        self.min = size if self.min is None or size < self.min else self.min
+        self.max = size if self.max is None or size > self.max else self.max
+        bucket = self._bucket(size)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, pct: float) -> int:
+        """Estimate of the `pct` percentile: the middle of the bucket it falls in, clamped to min/max."""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                low, high = self._bucket_bounds(bucket)
+                return int(min(max((low + high) / 2, self.min), self.max))
+        return self.max
+
+
+def summarize_files(path: str, pattern: Optional[str] = None, file_type: Optional[str] = None) -> Dict[str, SizeHistogram]:
+    """One pass over `path`: a SizeHistogram per FILE_TYPE_MAPPINGS category ("other" for the rest)."""
+    stats: Dict[str, SizeHistogram] = {}
+    for file_path, st in iter_files([os.path.abspath(path)]):
+        if not _matches(file_path, pattern, file_type):
+            continue
+        category = file_category(os.path.basename(file_path))
+        histogram = stats.get(category)
+        if histogram is None:
+            histogram = stats[category] = SizeHistogram()
+        histogram.add(st.st_size)
+    return stats
+
+
+def format_top(entries: List[Tuple[str, int, float]], order: str, root: str) -> str:
+    lines = [f"{len(entries)} {order} file(s) in '{root}':"]
+    for path, size, mtime in entries:
+        modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime))
+        lines.append(f"  {format_size(size):>10}  {modified}  {path}")
+    return "\n".join(lines)
+
+
+def format_summary(stats: Dict[str, SizeHistogram], root: str) -> str:
+    count = sum(h.count for h in stats.values())
+    total = sum(h.total for h in stats.values())
+    lines = [f"{count} file(s), {format_size(total)} in '{root}':"]
+    header = ["type", "files", "total", "min", "max"] + [f"p{p}" for p in PERCENTILES]
+    rows = [header]
+    for category, h in sorted(stats.items(), key=lambda item: (-item[1].total, item[0])):
+        rows.append([category, str(h.count), format_size(h.total), format_size(h.min), format_size(h.max)]
+                    + [format_size(h.percentile(p)) for p in PERCENTILES])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    for row in rows:
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        lines.append("  " + "  ".join(cells))
+    lines.append("(percentiles are approximate, within ~6%)")
+    return "\n".join(lines)
@@ -1,13 +1,77 @@
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence
+
+from src.core import retrieval
+from src.core.pathset import FOUND_FILES_HEADER, TRUNCATED_MARKER, FileListing, FileReport
+# How many files of a result are spelled out in the assistant's history turn.
+MAX_FILES_IN_SUMMARY = 10
+
+
+def files_from_results(results: List[Dict[str, Any]]) -> Sequence[str]:
+    """
+    Returns the file list of the last successful output in the results that names files:
+    a find_files listing's own PathSet (or for results loaded from the session store, its
+    parsed text), or the paths of a FileReport.
+    """
+    for result in reversed(results or []):
+        output = result.get("output")
+        if result.get("status") != "success":
+            continue
+        if isinstance(output, (FileListing, FileReport)):
+            return output.paths
+        if isinstance(output, str) and output.startswith(FOUND_FILES_HEADER):
+            return [line.strip() for line in output[len(FOUND_FILES_HEADER):].split('\n')
+                    if line.strip() and not line.startswith(TRUNCATED_MARKER)]
+    return []
+
+
+def describe_outcome(plan: Dict[str, Any], results: List[Dict[str, Any]]) -> str:
+    """A compact description of what was run and what it produced, for the conversation history."""
+    parts = []
+    for step, result in zip(plan.get("steps", []), results or []):
+        args = " ".join(str(a) for a in step.get("args", []))
+        parts.append(f"{step.get('cmd')} {args}".strip() + f" [{result.get('status')}]")
+    description = "Ran: " + "; ".join(parts) if parts else "Nothing was run."
+    files = files_from_results(results)
+    if files:
+        shown = ", ".join(files[:MAX_FILES_IN_SUMMARY])
+        more = f" and {len(files) - MAX_FILES_IN_SUMMARY} more" if len(files) > MAX_FILES_IN_SUMMARY else ""
+        description += f". Found {len(files)} file(s): {shown}{more}"
+    return description
+
 
 class Memory:
-    def __init__(self, max_history_size=10):
+    def __init__(self, max_history_size=10, store=None, session_id: str = None,
+                 max_stored_history=50, history_token_budget=1000):
         self.last_plan: Dict[str, Any] = None
         self.last_results: List[Dict[str, Any]] = []
+        self.last_files: Sequence[str] = []
         self.last_working_directory: str = os.getcwd()
         self.conversation_history: List[Dict[str, str]] = []
+        # At most this many turns are sent to the model with a request...
         self.max_history_size = max_history_size
+        # ...chosen by relevance from this many retained turns, within this many prompt tokens.
+        self.max_stored_history = max(max_stored_history, max_history_size)
+        self.history_token_budget = history_token_budget
+        self._turn_ids: List[int] = []
+        self._next_turn_id = 0
+        self._index = retrieval.BM25Index()
+        # Optional `session_store.SessionStore`; when set, memory survives across invocations.
+        self.store = store
+        self.session_id = session_id
+        if store is not None:
+            self._load_from_store()
+
+    def _load_from_store(self):
+        """Loads only the most recent turns and the last structured results of the session."""
+        for turn in self.store.load_history(self.session_id, limit=self.max_stored_history):
+            self.add_to_history(turn["role"], turn["content"])
+        state = self.store.load_state(self.session_id)
+        self.last_plan = state["last_plan"]
+        self.last_results = state["last_results"]
+        self.last_files = state["last_files"]
+        if state["cwd"]:
+            self.last_working_directory = state["cwd"]
 
     def add_to_history(self, role: str, content: str):
         """Adds a new entry to the conversation history."""
@@ -16,19 +80,35 @@ class Memory:
             raise ValueError("Role must be 'user' or 'assistant'")
 
         self.conversation_history.append({"role": role, "content": content})
+        turn_id = self._next_turn_id
+        self._next_turn_id += 1
+        self._turn_ids.append(turn_id)
+        self._index.add(turn_id, content)
 
-        # Trim history if it exceeds the max size
-        if len(self.conversation_history) > self.max_history_size:
-            # Keep the last `max_history_size` items
-            self.conversation_history = self.conversation_history[-self.max_history_size:]
+        # Evict the oldest turns once the retained pool is full
+        while len(self.conversation_history) > self.max_stored_history:
+            self.conversation_history.pop(0)
+            self._index.remove(self._turn_ids.pop(0))
 
-    def get_history(self) -> List[Dict[str, str]]:
-        """Returns the current conversation history."""
-        return self.conversation_history
+    def get_history(self, query: str = None) -> List[Dict[str, str]]:
+        """
+        Returns the conversation history to send with a request: the newest exchange plus the
+        older turns most relevant to `query`, at most `max_history_size` turns within the
+        token budget, in chronological order. Without a query, relevance is ignored.
+        """
+        texts = {turn_id: turn["content"] for turn_id, turn in zip(self._turn_ids, self.conversation_history)}
+        scores = self._index.scores(query) if query else {}
+        if not query:
+            # No request to rank against: prefer the newest turns.
+            count = len(self._turn_ids)
+            scores = {turn_id: (i + 1) / count for i, turn_id in enumerate(self._turn_ids)}
+        chosen = set(retrieval.select_turns(self._turn_ids, texts, scores, k=self.max_history_size,
+                                            token_budget=self.history_token_budget))
+        return [turn for turn_id, turn in zip(self._turn_ids, self.conversation_history) if turn_id in chosen]
 
-    def get_history_as_text(self) -> str:
+    def get_history_as_text(self, query: str = None) -> str:
         """Returns the conversation history formatted as a single string."""
-        return "\n".join([f"{item['role'].capitalize()}: {item['content']}" for item in self.conversation_history])
+        return "\n".join([f"{item['role'].capitalize()}: {item['content']}" for item in self.get_history(query)])
 
     def set_last_plan(self, plan: Dict[str, Any]):
         self.last_plan = plan
@@ -53,25 +133,28 @@ class Memory:
         Resolves a pronoun to the file paths from the last successful 'find_files' command.
         """
         if pronoun.lower() in ['them', 'those', 'those files', 'it']:
-            # Find the last successful find_files result
-            for result in reversed(self.last_results):
-                if result.get("status") == "success" and "find_files" in result.get("output", ""):
-                    # This is a bit brittle; assumes a specific output format.
-                    # A better approach would be to have structured output from commands.
-                    try:
-                        lines = result["output"].strip().split('\n')
-                        if lines and lines[0].startswith("Found files:"):
-                            return [line.strip() for line in lines[1:] if line.strip()]
-                    except (IndexError, AttributeError):
-                        continue
+            files = files_from_results(self.last_results) or self.last_files
+            if files:
+                return files
         return None
 
     def update(self, plan: Dict[str, Any], results: List[Dict[str, Any]], user_request: str):
         """
-        Updates the memory with the latest plan, results, and conversation history.
+        Updates the memory with the latest plan, results, and conversation history,
+        and persists them if the memory has a session store.
         """
         self.set_last_plan(plan)
         self.set_last_results(results)
-        self.add_to_history("user", user_request)
-        # We could add the assistant's response (plan) here too, if desired
-        # self.add_to_history("assistant", json.dumps(plan))
\ No newline at end of file
+        # 'them' means what the latest command produced; one that produced no files leaves nothing to refer to.
+        self.last_files = files_from_results(results)
+        turns = [
+            {"role": "user", "content": user_request},
+            {"role": "assistant", "content": describe_outcome(plan, results)},
+        ]
+        for turn in turns:
+            self.add_to_history(turn["role"], turn["content"])
+
+        if self.store is not None:
+            self.store.append_turns(self.session_id, turns)
+            self.store.save_state(self.session_id, last_plan=plan, last_results=results,
+                                  last_files=self.last_files, cwd=self.last_working_directory)
\ No newline at end of file
@@ -0,0 +1,309 @@
+"""
+Lightweight in-process metrics: counters, histograms and timers.
+
+Metrics are off by default. Every instrumentation point first reads `REGISTRY.enabled`,
+so while they are off the hot paths (one check per directory listed or file read) pay
+a single attribute lookup. `enable()` turns them on (the CLI does so for `--metrics` or
+SAMANTHA_METRICS), and `write_reports()` exports everything recorded when the session
+ends: metrics.prom in the Prometheus text format (e.g. for node_exporter's textfile
+collector) and metrics.json with counts, means and percentiles.
+
+Names follow Prometheus conventions: `samantha_` prefix, `_total` for counters, base
+units (`_seconds`, `_bytes`). Labels are keyword arguments:
+
+    with metrics.timer("samantha_command_seconds", "Time spent in command handlers.", command="ls"):
+        ...
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+DEFAULT_REPORT_DIR = os.path.expanduser("~/.samantha/metrics")
+# Upper bounds in seconds, from sub-millisecond directory reads to model round trips.
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Counts of observations per bucket (the last one unbounded), plus their sum and maximum."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max", "_lock")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate of the q-quantile (0-1), interpolated within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.buckets[index - 1] if index > 0 else 0.0
+                high = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(low + (high - low) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+
+class Timer:
+    """Context manager that observes its block's duration in a histogram."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+def _label_key(labels: Dict) -> Tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Registry:
+    """Metric families by name, each holding one metric per set of label values."""
+
+    def __init__(self):
+        self.enabled = False
+        self._families = {}
+        self._bound = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, help_text: str, labels: Dict, factory):
+        family = self._families.get(name)
+        if family is None:
+            with self._lock:
+                family = self._families.setdefault(name, {"kind": kind, "help": help_text, "metrics": {}})
+        if family["kind"] != kind:
+            raise ValueError(f"Metric '{name}' is a {family['kind']}, not a {kind}.")
+        key = _label_key(labels)
+        metric = family["metrics"].get(key)
+        if metric is None:
+            with self._lock:
+                metric = family["metrics"].setdefault(key, factory())
+        return metric
+
+    def counter(self, name: str, help_text: str = "", **labels) -> Counter:
+        return self._get(COUNTER, name, help_text, labels, Counter)
+
+    def histogram(self, name: str, help_text: str = "", buckets=DEFAULT_BUCKETS, **labels) -> Histogram:
+        return self._get(HISTOGRAM, name, help_text, labels, lambda: Histogram(buckets))
+
+    def bound(self, key, factory):
+        """`factory()`, memoized under `key` until reset(): lets hot paths skip the name and label lookups."""
+        metrics = self._bound.get(key)
+        if metrics is None:
+            metrics = self._bound[key] = factory()
+        return metrics
+
+    def reset(self):
+        with self._lock:
+            self._families = {}
+            self._bound = {}
+
+    def _sorted_families(self):
+        with self._lock:
+            families = sorted(self._families.items())
+        for name, family in families:
+            yield name, family, sorted(family["metrics"].items())
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for name, family, metrics in self._sorted_families():
+            if family["help"]:
+                lines.append(f"# HELP {name} {_escape_help(family['help'])}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for key, metric in metrics:
+                if family["kind"] == COUNTER:
+                    lines.append(f"{name}{_format_labels(key)} {_format_number(metric.value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), metric.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_number(bound)
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_number(metric.sum)}")
+                lines.append(f"{name}_count{_format_labels(key)} {metric.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def summary(self) -> Dict:
+        counters, histograms = [], []
+        for name, family, metrics in self._sorted_families():
+            for key, metric in metrics:
+                if family["kind"] == COUNTER:
+                    counters.append({"name": name, "labels": dict(key), "value": metric.value})
+                elif metric.count:
+                    histograms.append({
+                        "name": name, "labels": dict(key), "count": metric.count,
+                        "sum": round(metric.sum, 6), "mean": round(metric.sum / metric.count, 6),
+                        "p50": round(metric.quantile(0.5), 6), "p95": round(metric.quantile(0.95), 6),
+                        "p99": round(metric.quantile(0.99), 6), "max": round(metric.max, 6),
+                    })
+        return {"generated": datetime.now().isoformat(), "counters": counters, "histograms": histograms}
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(key: Tuple) -> str:
+    if not key:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+
+def _format_number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+
+
+def enable():
+    REGISTRY.enabled = True
+
+
+def disable():
+    REGISTRY.enabled = False
+
+
+def is_enabled() -> bool:
+    return REGISTRY.enabled
+
+
+def inc(name: str, help_text: str = "", amount=1, **labels):
+    """Adds `amount` to a counter, if metrics are enabled."""
+    if REGISTRY.enabled:
+        REGISTRY.counter(name, help_text, **labels).inc(amount)
+
+
+def observe(name: str, value: float, help_text: str = "", **labels):
+    """Records one observation in a histogram, if metrics are enabled."""
+    if REGISTRY.enabled:
+        REGISTRY.histogram(name, help_text, **labels).observe(value)
+
+
+def timer(name: str, help_text: str = "", **labels):
+    """Times a `with` block into a histogram; a shared no-op while metrics are disabled."""
+    if not REGISTRY.enabled:
+        return NULL_TIMER
+    return Timer(REGISTRY.histogram(name, help_text, **labels))
+
+
+def timed(name: str, help_text: str = "", **labels):
+    """Decorator form of `timer`, for plain and async functions."""
+    import inspect
+
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not REGISTRY.enabled:
+                    return await func(*args, **kwargs)
+                with Timer(REGISTRY.histogram(name, help_text, **labels)):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return func(*args, **kwargs)
+            with Timer(REGISTRY.histogram(name, help_text, **labels)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_directory_read(walker: str, started: float, entries: int):
+    """Records one directory listing by `walker`; `started` is the perf_counter() taken before it."""
+    elapsed = time.perf_counter() - started
+    seconds, count = REGISTRY.bound(("directory_read", walker), lambda: (
+        REGISTRY.histogram("samantha_directory_read_seconds", "Time to list one directory.", walker=walker),
+        REGISTRY.counter("samantha_directory_entries_total", "Directory entries listed.", walker=walker)))
+    seconds.observe(elapsed)
+    count.inc(entries)
+
+
+def record_file_read(reader: str, started: float, num_bytes: int):
+    """Records one whole-file read by `reader`; `started` is the perf_counter() taken before it."""
+    elapsed = time.perf_counter() - started
+    seconds, count = REGISTRY.bound(("file_read", reader), lambda: (
+        REGISTRY.histogram("samantha_file_read_seconds", "Time to read (and process) one file.", reader=reader),
+        REGISTRY.counter("samantha_file_read_bytes_total", "Bytes read from files.", reader=reader)))
+    seconds.observe(elapsed)
+    count.inc(num_bytes)
+
+
+def _write_atomic(path: str, text: str):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def write_reports(directory: Optional[str] = None) -> Tuple[str, str]:
+    """Writes metrics.prom and metrics.json into `directory` and returns their paths."""
+    directory = directory or DEFAULT_REPORT_DIR
+    os.makedirs(directory, exist_ok=True)
+    prom_path = os.path.join(directory, "metrics.prom")
+    json_path = os.path.join(directory, "metrics.json")
+    _write_atomic(prom_path, REGISTRY.to_prometheus())
+    _write_atomic(json_path, json.dumps(REGISTRY.summary(), indent=2) + "\n")
+    return prom_path, json_path
@@ -1,205 +1,537 @@
 import json
 import re
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 
-def _parse_single_command(user_intent: str) -> Optional[Dict]:
+# --- Precompiled patterns ---
+_THEN_RE = re.compile(r'\s+then\s+')
+_PATH_IN_RE = re.compile(r"\s+in\s+((?:[a-zA-Z0-9._~-]+/)*[a-zA-Z0-9._~-]+)")
+_PATH_OF_RE = re.compile(r"\s+(?:in|of|under)\s+((?:[a-zA-Z0-9._~-]+/)*[a-zA-Z0-9._~-]+)")
+_NAMED_RE = re.compile(r"\s+named\s+(['\"]?[\w*.-]+['\"]?)")
+_LARGER_RE = re.compile(r"larger than\s+((?:\d+\.?\d*)\s*(?:kb|mb|gb|tb|b))", re.IGNORECASE)
+_SMALLER_RE = re.compile(r"smaller than\s+((?:\d+\.?\d*)\s*(?:kb|mb|gb|tb|b))", re.IGNORECASE)
+_OLDER_RE = re.compile(r"older than\s+(\d+)\s*days?")
+_NEWER_RE = re.compile(r"newer than\s+(\d+)\s*days?")
+_BETWEEN_RE = re.compile(r"between\s+(\d+\.?\d*\s*(?:kb|mb|gb|tb|b))\s+and\s+(\d+\.?\d*\s*(?:kb|mb|gb|tb|b))",
+                         re.IGNORECASE)
+_DATE_BOUND_RE = re.compile(r"(after|since|before)\s+(\d{4}-\d{2}-\d{2})")
+_MANIFEST_RE = re.compile(r"([\w./~-]+\.(?:sha256|sha512|sha1|md5|sums?))\b")
+_COUNT_RE = re.compile(r"\b(\d+)\b")
+
+PRONOUNS = ["them", "it", "those", "the files"]
+FILE_TYPES = ["images", "documents", "videos", "audio", "archives"]
+# Words for top_files orders, and FILE_TYPE_MAPPINGS categories as people say them.
+TOP_ORDERS = {"largest": "largest", "biggest": "largest", "smallest": "smallest",
+              "newest": "newest", "latest": "newest", "oldest": "oldest"}
+CATEGORY_WORDS = {"images": "images", "documents": "documents", "spreadsheets": "spreadsheets",
+                  "archives": "archives", "audio": "audio", "videos": "video", "logs": "logs"}
+
+
+class TokenScan:
     """
-    Parses a single command phrase into a plan step.
-    Handles pronoun resolution for commands like 'mv' and 'cp'.
+    The result of a single pass over the words of a command phrase.
+    Records the first position of every token, so handlers never need repeated `words.index`.
     """
-    words = user_intent.strip().split()
-    pronouns = ["them", "it", "those", "the files"]
-
-    # Command matching logic (ordered by likely specificity)
-    file_types = ["images", "documents", "videos", "audio", "archives"]
-    is_find_query = "find" in words
-    has_file_type_keyword = any(ft in user_intent for ft in file_types)
-
-    if is_find_query and ("files" in user_intent or has_file_type_keyword):
-        args = ["*", "."]
-        kwargs = {}
-        path_match = re.search(r"\s+in\s+((?:[a-zA-Z0-9._~-]+/)*[a-zA-Z0-9._~-]+)", user_intent)
-        if path_match:
-            args[1] = path_match.group(1).strip("'\"")
-        name_match = re.search(r"\s+named\s+(['\"]?[\w*.-]+['\"]?)", user_intent)
-        if name_match:
-            args[0] = name_match.group(1).strip("'\"")
-        size_larger_match = re.search(r"larger than\s+((?:\d+\.?\d*)\s*(?:kb|mb|gb|tb|b))", user_intent, re.IGNORECASE)
-        if size_larger_match:
-            kwargs["size"] = f">{size_larger_match.group(1).replace(' ', '').lower()}"
-        size_smaller_match = re.search(r"smaller than\s+((?:\d+\.?\d*)\s*(?:kb|mb|gb|tb|b))", user_intent, re.IGNORECASE)
-        if size_smaller_match:
-            kwargs["size"] = f"<{size_smaller_match.group(1).replace(' ', '').lower()}"
-        if "modified yesterday" in user_intent:
-            kwargs["modified"] = "<1d"
-        else:
-            older_match = re.search(r"older than\s+(\d+)\s*days?", user_intent)
-            if older_match:
-                kwargs["modified"] = f">{older_match.group(1)}d"
-            newer_match = re.search(r"newer than\s+(\d+)\s*days?", user_intent)
-            if newer_match:
-                kwargs["modified"] = f"<{newer_match.group(1)}d"
-        for ft in file_types:
+
+    __slots__ = ("text", "words", "positions")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.words = words = text.split()
+        # Iterating in reverse lets earlier occurrences overwrite later ones, all in C.
+        self.positions: Dict[str, int] = dict(zip(reversed(words), range(len(words) - 1, -1, -1)))
+
+    def has(self, token: str) -> bool:
+        return token in self.positions
+
+    def first(self, token: str) -> int:
+        """Index of the first occurrence of `token`; raises ValueError like `list.index`."""
+        try:
+            return self.positions[token]
+        except KeyError:
+            raise ValueError(f"'{token}' is not in the command")
+
+    def first_after(self, token: str, start: int) -> Optional[int]:
+        """Index of the first occurrence of `token` at or after `start`, or None if there is none."""
+        first = self.positions.get(token)
+        if first is None or first >= start:
+            return first
+        return start + self.words[start:].index(token) if token in self.words[start:] else None
+
+    def occurrences(self, token: str) -> List[int]:
+        """Every position of `token`, in order."""
+        first = self.positions.get(token)
+        if first is None:
+            return []
+        if self.words.count(token) == 1:
+            return [first]
+        return [i for i, word in enumerate(self.words) if word == token]
+
+    def rest(self, start: int) -> str:
+        """The words from `start` onwards, joined and stripped of quotes."""
+        return " ".join(self.words[start:]).strip("'\"")
+
+
+class Intent:
+    def __init__(self, name: str, triggers: List[str], handler: Callable[[TokenScan], Optional[Dict]],
+                 priority: int, condition: Optional[Callable[[TokenScan], bool]] = None):
+        self.name = name
+        # Each trigger is a keyword or a space-separated phrase, e.g. "copy" or "go to".
+        self.triggers = triggers
+        self.handler = handler
+        self.priority = priority
+        # Extra check run after a trigger matched, e.g. "make" also needs "directory".
+        self.condition = condition
+
+
+def _by_priority(intent: Intent) -> int:
+    return intent.priority
+
+
+class IntentParser:
+    """
+    Table-driven parser for single command phrases.
+
+    Intents register keyword/phrase triggers into a token trie. Parsing scans the words
+    once, matching trigger head words against the trie's first level and walking further
+    only for phrase triggers, then tries the candidate intents in priority order. The
+    first candidate whose condition holds decides the result, even if its handler
+    returns None.
+    """
+
+    _END = object()
+
+    def __init__(self):
+        self.intents: Dict[str, Intent] = {}
+        self._trie: Dict = {}
+        # Candidate lists already sorted by priority, keyed by the set of matched intent names.
+        self._ordered_cache: Dict[frozenset, List[Intent]] = {}
+        self._heads = None
+
+    def register(self, name: str, triggers: List[str], handler: Callable[[TokenScan], Optional[Dict]],
+                 priority: Optional[int] = None, condition: Optional[Callable[[TokenScan], bool]] = None) -> Intent:
+        """
+        Registers an intent. Lower `priority` values are tried first; by default a new
+        intent is tried after all existing ones. Re-registering a name replaces it.
+        """
+        if name in self.intents:
+            self.unregister(name)
+        if priority is None:
+            priority = max((i.priority for i in self.intents.values()), default=0) + 10
+        intent = Intent(name, list(triggers), handler, priority, condition)
+        self.intents[name] = intent
+        for trigger in intent.triggers:
+            node = self._trie
+            for token in trigger.split():
+                node = node.setdefault(token, {})
+            node.setdefault(self._END, set()).add(name)
+        self._ordered_cache.clear()
+        self._heads = None
+        return intent
+
+    def unregister(self, name: str):
+        intent = self.intents.pop(name)
+        for trigger in intent.triggers:
+            node = self._trie
+            for token in trigger.split():
+                node = node.get(token)
+                if node is None:
+                    break
+            else:
+                node.get(self._END, set()).discard(name)
+        self._ordered_cache.clear()
+        self._heads = None
+
+    def _index_heads(self):
+        """
+        Precomputes, for every trigger head word, its priority-ordered intents and whether
+        it also starts longer phrases. Rebuilt lazily after registrations change.
+        """
+        end = self._END
+        index = {}
+        for head, node in self._trie.items():
+            names = node.get(end) or set()
+            ordered = sorted((self.intents[n] for n in names), key=_by_priority)
+            index[head] = (frozenset(names), ordered, len(node) > (1 if end in node else 0))
+        self._heads = index
+        return index
+
+    def candidates(self, scan: TokenScan) -> List[Intent]:
+        """Returns the intents whose triggers occur in the phrase, by priority."""
+        heads_index = self._heads if self._heads is not None else self._index_heads()
+        heads = scan.positions.keys() & heads_index.keys()
+        if not heads:
+            return []
+        if len(heads) == 1:
+            names, ordered, has_phrases = heads_index[next(iter(heads))]
+            if not has_phrases:
+                # Common case: a single keyword, no phrase to check.
+                return ordered
+
+        found = set()
+        end = self._END
+        words = scan.words
+        for head in heads:
+            names, _, has_phrases = heads_index[head]
+            found.update(names)
+            if not has_phrases:
+                continue
+            # The head starts at least one longer phrase; walk the trie from each occurrence.
+            for i in scan.occurrences(head):
+                node, j = self._trie[head], i + 1
+                while j < len(words):
+                    node = node.get(words[j])
+                    if node is None:
+                        break
+                    names = node.get(end)
+                    if names:
+                        found.update(names)
+                    j += 1
+
+        found = frozenset(found)
+        ordered = self._ordered_cache.get(found)
+        if ordered is None:
+            ordered = sorted((self.intents[n] for n in found), key=_by_priority)
+            self._ordered_cache[found] = ordered
+        return ordered
+
+    def parse(self, user_intent: str) -> Optional[Dict]:
+        scan = TokenScan(user_intent)
+        for intent in self.candidates(scan):
+            if intent.condition is not None and not intent.condition(scan):
+                continue
+            try:
+                return intent.handler(scan)
+            except (ValueError, IndexError):
+                return None
+        return None
+
+
+# --- Intent handlers ---
+
+def _resolve_pronoun(path: str) -> str:
+    return "$results.last" if path.lower() in PRONOUNS else path
+
+
+def _is_find_query(scan: TokenScan) -> bool:
+    return "files" in scan.text or any(ft in scan.text for ft in FILE_TYPES)
+
+
+# The commands the planner started with. Intents added since yield to them, so a phrase
+# that planned one of them ("search for duplicate entries in logs") still does.
+ORIGINAL_INTENTS = ("search_in_files", "cp", "mv", "rm", "mkdir", "cd", "touch")
+# The original listing commands. Intents whose phrases are not themselves listings ("find
+# duplicate files", "find the largest files" are) yield to these too.
+LISTING_INTENTS = ("find_files", "ls")
+
+
+def _yields_to(names) -> Callable[[TokenScan], bool]:
+    """A condition that holds unless one of the intents `names` matches the phrase too."""
+    def condition(scan: TokenScan) -> bool:
+        return not any(intent.name in names and (intent.condition is None or intent.condition(scan))
+                       for intent in DEFAULT_PARSER.candidates(scan))
+    return condition
+
+
+def _handle_find(scan: TokenScan) -> Dict:
+    user_intent = scan.text
+    args = ["*", "."]
+    kwargs = {}
+    path_match = _PATH_IN_RE.search(user_intent)
+    if path_match:
+        args[1] = path_match.group(1).strip("'\"")
+    name_match = _NAMED_RE.search(user_intent)
+    if name_match:
+        args[0] = name_match.group(1).strip("'\"")
+    size_larger_match = _LARGER_RE.search(user_intent)
+    if size_larger_match:
+        kwargs["size"] = f">{size_larger_match.group(1).replace(' ', '').lower()}"
+    size_smaller_match = _SMALLER_RE.search(user_intent)
+    if size_smaller_match:
+        kwargs["size"] = f"<{size_smaller_match.group(1).replace(' ', '').lower()}"
+    if "modified yesterday" in user_intent:
+        kwargs["modified"] = "<1d"
+    else:
+        older_match = _OLDER_RE.search(user_intent)
+        if older_match:
+            kwargs["modified"] = f">{older_match.group(1)}d"
+        newer_match = _NEWER_RE.search(user_intent)
+        if newer_match:
+            kwargs["modified"] = f"<{newer_match.group(1)}d"
+    # What the single-value filters can't say goes into a find-files query.
+    query = []
+    categories = [category for word, category in CATEGORY_WORDS.items() if scan.has(word)]
+    if len(categories) > 1:
+        query.append("(" + " OR ".join(f"type:{category}" for category in categories) + ")")
+    else:
+        for ft in FILE_TYPES:
             if ft in user_intent:
                 kwargs["file_type"] = ft
                 break
-        step = {"cmd": "find_files", "args": args, "why": "To find files based on advanced search criteria."}
-        if kwargs:
-            step["kwargs"] = kwargs
-        return step
+    between_match = _BETWEEN_RE.search(user_intent)
+    if between_match:
+        low, high = (size.replace(" ", "").upper() for size in between_match.groups())
+        query.append(f"size:{low}..{high}")
+    for bound, date in _DATE_BOUND_RE.findall(user_intent):
+        query.append(f"modified:<{date}" if bound == "before" else f"modified:>={date}")
+    if query:
+        kwargs["query"] = " AND ".join(query)
+    step = {"cmd": "find_files", "args": args, "why": "To find files based on advanced search criteria."}
+    if kwargs:
+        step["kwargs"] = kwargs
+    return step
 
-    elif "search for" in user_intent:
-        try:
-            for_index = words.index("for")
-            content_start_index = for_index + 1
-            path = "."
-            content_end_index = len(words)
-            if "in" in words[content_start_index:]:
-                in_index = words.index("in", content_start_index)
-                content_end_index = in_index
-                path_start_index = in_index + 1
-                if path_start_index < len(words):
-                    path = " ".join(words[path_start_index:]).strip("'\"")
-            content_pattern = " ".join(words[content_start_index:content_end_index]).strip("'\"")
-            return {"cmd": "search_in_files", "args": [content_pattern, path], "why": "To search for content in files."}
-        except (ValueError, IndexError):
-            return None
-
-    elif "copy" in words or "cp" in words:
-        try:
-            to_index = words.index("to")
-            cp_index = words.index("copy") if "copy" in words else words.index("cp")
-            src = " ".join(words[cp_index + 1:to_index]).strip("'\"")
-            dest = " ".join(words[to_index + 1:]).strip("'\"")
-            if src.lower() in pronouns:
-                src = "$results.last"
-            return {"cmd": "cp", "args": [src, dest], "why": "To copy files or directories."}
-        except (ValueError, IndexError):
-            return None
-
-    elif "move" in words or "mv" in words:
-        try:
-            to_index = words.index("to")
-            mv_index = words.index("move") if "move" in words else words.index("mv")
-            src = " ".join(words[mv_index + 1:to_index]).strip("'\"")
-            dest = " ".join(words[to_index + 1:]).strip("'\"")
-            if src.lower() in pronouns:
-                src = "$results.last"
-            return {"cmd": "mv", "args": [src, dest], "why": "To move files or directories."}
-        except (ValueError, IndexError):
-            return None
-
-    elif "remove" in words or "delete" in words or "rm" in words:
-        try:
-            cmd_index = -1
-            if "remove" in words: cmd_index = words.index("remove")
-            elif "delete" in words: cmd_index = words.index("delete")
-            else: cmd_index = words.index("rm")
-            path = " ".join(words[cmd_index + 1:]).strip("'\"")
-            if path.lower() in pronouns:
-                path = "$results.last"
-            return {"cmd": "rm", "args": [path], "why": "To remove files or directories."}
-        except (ValueError, IndexError):
-            return None
-
-    elif ("make" in words and "directory" in words) or "mkdir" in words:
-        try:
-            path = ""
-            if "mkdir" in words:
-                path_index = words.index("mkdir") + 1
-                if path_index < len(words):
-                    path = " ".join(words[path_index:]).strip("'\"")
-            elif "make" in words and "directory" in words:
-                # Handle "make directory called 'name'" or "make directory name"
-                if "called" in words:
-                    path_index = words.index("called") + 1
-                    if path_index < len(words):
-                        path = " ".join(words[path_index:]).strip("'\"")
-                else:
-                    dir_index = words.index("directory")
-                    if dir_index + 1 < len(words):
-                        path = " ".join(words[dir_index + 1:]).strip("'\"")
-            
-            if path:
-                return {"cmd": "mkdir", "args": [path], "why": "To create a directory."}
-        except (ValueError, IndexError):
-            return None
-
-    elif "cd" in words or "go to" in user_intent or "change directory" in user_intent:
-        try:
-            path = ""
-            if "cd" in words:
-                path_index = words.index("cd") + 1
-                if path_index < len(words):
-                    path = " ".join(words[path_index:]).strip("'\"")
-            elif "go to" in user_intent:
-                to_index = words.index("to") + 1
-                if to_index < len(words):
-                    path = " ".join(words[to_index:]).strip("'\"")
-            elif "change directory" in user_intent:
-                dir_index = words.index("directory") + 1
-                if dir_index < len(words):
-                    path = " ".join(words[dir_index:]).strip("'\"")
-            
-            if path:
-                return {"cmd": "cd", "args": [path], "why": "To change the current directory."}
-        except (ValueError, IndexError):
-            return None
-
-    elif ("create" in words and "file" in words) or "touch" in words:
-        try:
-            path = ""
-            if "touch" in words:
-                path_index = words.index("touch") + 1
-                if path_index < len(words):
-                    path = " ".join(words[path_index:]).strip("'\"")
-            elif "create" in words and "file" in words:
-                # Handle "create file called 'name'" or "create file name"
-                if "called" in words:
-                    path_index = words.index("called") + 1
-                    if path_index < len(words):
-                        path = " ".join(words[path_index:]).strip("'\"")
-                else:
-                    file_index = words.index("file")
-                    if file_index + 1 < len(words):
-                        path = " ".join(words[file_index + 1:]).strip("'\"")
-            
-            if path:
-                return {"cmd": "touch", "args": [path], "why": "To create a file."}
-        except (ValueError, IndexError):
-            return None
-
-    elif "list" in words or "ls" in words:
+
+def _handle_duplicates(scan: TokenScan) -> Dict:
+    path_match = _PATH_IN_RE.search(scan.text)
+    path = path_match.group(1).strip("'\"") if path_match else "."
+    return {"cmd": "find_duplicates", "args": [path], "why": "To find files with identical content."}
+
+
+def _handle_disk_usage(scan: TokenScan) -> Dict:
+    path_match = _PATH_OF_RE.search(scan.text)
+    path = path_match.group(1).strip("'\"") if path_match else "."
+    return {"cmd": "disk_usage", "args": [path], "why": "To show what takes up the disk space."}
+
+
+def _handle_tree(scan: TokenScan) -> Dict:
+    path_match = _PATH_OF_RE.search(scan.text)
+    path = path_match.group(1).strip("'\"") if path_match else "."
+    return {"cmd": "tree", "args": [path], "why": "To show the directory structure as a tree."}
+
+
+def _file_stats_kwargs(scan: TokenScan) -> Dict:
+    kwargs = {}
+    for word, category in CATEGORY_WORDS.items():
+        if scan.has(word):
+            kwargs["file_type"] = category
+            break
+    return kwargs
+
+
+def _handle_top_files(scan: TokenScan) -> Dict:
+    path_match = _PATH_IN_RE.search(scan.text)
+    path = path_match.group(1).strip("'\"") if path_match else "."
+    kwargs = _file_stats_kwargs(scan)
+    kwargs["order"] = next(TOP_ORDERS[word] for word in scan.words if word in TOP_ORDERS)
+    count_match = _COUNT_RE.search(scan.text)
+    if count_match:
+        kwargs["n"] = int(count_match.group(1))
+    return {"cmd": "top_files", "args": [path], "kwargs": kwargs,
+            "why": f"To list the {kwargs['order']} files."}
+
+
+def _handle_summarize_files(scan: TokenScan) -> Dict:
+    path_match = _PATH_OF_RE.search(scan.text)
+    path = path_match.group(1).strip("'\"") if path_match else "."
+    if path in CATEGORY_WORDS:
+        # "stats of images" names a file type, not a folder.
         path = "."
-        cmd_index = -1
-        if "ls" in words: cmd_index = words.index("ls")
-        elif "list" in words: cmd_index = words.index("list")
+    step = {"cmd": "summarize_files", "args": [path], "why": "To count the files by type and size."}
+    kwargs = _file_stats_kwargs(scan)
+    if kwargs:
+        step["kwargs"] = kwargs
+    return step
 
-        # If 'in' is present, path is what follows
-        if 'in' in words:
-            try:
-                path_index = words.index('in') + 1
-                if path_index < len(words):
-                    path = " ".join(words[path_index:]).strip("'\"")
-            except (ValueError, IndexError):
-                pass
-        # else if there's text after the command itself
-        elif cmd_index != -1 and cmd_index + 1 < len(words):
-            # what if it's "list files"? then path becomes "files" which is wrong.
-            # so we check if the word after the command is "files"
-            if words[cmd_index+1] == 'files':
-                # if there is something after 'files', it's the path
-                if cmd_index + 2 < len(words):
-                    path = " ".join(words[cmd_index+2:]).strip("'\"")
-                # else path is "."
-            else: # it is the path
-                path = " ".join(words[cmd_index+1:]).strip("'\"")
-
-        return {"cmd": "ls", "args": [path], "why": "To list files in a directory."}
 
+def _is_checksum_request(scan: TokenScan) -> bool:
+    """A checksum word or a manifest name; a bare "verify" is too common to plan a checksum on its own."""
+    return ((scan.has("checksum") or scan.has("checksums") or bool(_MANIFEST_RE.search(scan.text)))
+            and _yields_to(ORIGINAL_INTENTS)(scan))
+
+
+def _handle_checksum(scan: TokenScan) -> Dict:
+    manifest_match = _MANIFEST_RE.search(scan.text)
+    manifest = manifest_match.group(1) if manifest_match else None
+    if scan.has("verify") and manifest:
+        return {"cmd": "checksum", "args": [], "kwargs": {"verify": manifest},
+                "why": "To check the files against their recorded checksums."}
+    path_match = _PATH_OF_RE.search(scan.text)
+    if path_match and path_match.group(1) != manifest:
+        path = path_match.group(1).strip("'\"")
+    else:
+        # "checksum demo_data": the word right after the verb.
+        verb_index = _first_verb(scan, ["checksum", "checksums", "verify"])
+        following = scan.words[verb_index + 1] if verb_index + 1 < len(scan.words) else "."
+        path = "." if following in ("to", "into", manifest) else following.strip("'\"")
+    step = {"cmd": "checksum", "args": [_resolve_pronoun(path)], "why": "To compute the checksums of the files."}
+    if manifest:
+        step["kwargs"] = {"manifest": manifest}
+        step["why"] = "To record the checksums of the files in a manifest."
+    return step
+
+
+_PACKAGE_FILLER = {"is", "are", "the", "and", "or", "package", "packages", "info", "information", "about",
+                   "for", "installed", "show", "me", "version", "versions", "of", "search", "which", "what"}
+
+
+def _handle_packages(scan: TokenScan) -> Dict:
+    if scan.has("search"):
+        start = scan.first_after("for", scan.first("search"))
+        term = scan.rest(start + 1) if start is not None else " ".join(
+            w for w in scan.words if w not in _PACKAGE_FILLER)
+        return {"cmd": "package_search", "args": [term], "why": "To search the repositories for packages."}
+    names = [w.strip(",'\"?") for w in scan.words if w.strip(",'\"?") not in _PACKAGE_FILLER]
+    names = [name for name in names if name]
+    if not names:
+        return None
+    return {"cmd": "package_info", "args": names, "why": "To look up the installed and available package versions."}
+
+
+def _handle_search(scan: TokenScan) -> Dict:
+    content_start_index = scan.first("for") + 1
+    path = "."
+    content_end_index = len(scan.words)
+    in_index = scan.first_after("in", content_start_index)
+    if in_index is not None:
+        content_end_index = in_index
+        if in_index + 1 < len(scan.words):
+            path = scan.rest(in_index + 1)
+    content_pattern = " ".join(scan.words[content_start_index:content_end_index]).strip("'\"")
+    return {"cmd": "search_in_files", "args": [content_pattern, path], "why": "To search for content in files."}
+
+
+def _first_verb(scan: TokenScan, verbs: List[str]) -> int:
+    """Position of the first of `verbs` (in the given preference order) that occurs."""
+    positions = scan.positions
+    for verb in verbs:
+        if verb in positions:
+            return positions[verb]
+    raise ValueError("None of the command verbs are in the command")
+
+
+def _source_and_destination(scan: TokenScan, verbs: List[str]):
+    to_index = scan.first("to")
+    verb_index = _first_verb(scan, verbs)
+    src = " ".join(scan.words[verb_index + 1:to_index]).strip("'\"")
+    dest = scan.rest(to_index + 1)
+    return _resolve_pronoun(src), dest
+
+
+def _handle_cp(scan: TokenScan) -> Dict:
+    src, dest = _source_and_destination(scan, ["copy", "cp"])
+    return {"cmd": "cp", "args": [src, dest], "why": "To copy files or directories."}
+
+
+def _handle_mv(scan: TokenScan) -> Dict:
+    src, dest = _source_and_destination(scan, ["move", "mv"])
+    return {"cmd": "mv", "args": [src, dest], "why": "To move files or directories."}
+
+
+def _handle_rm(scan: TokenScan) -> Dict:
+    path = _resolve_pronoun(scan.rest(_first_verb(scan, ["remove", "delete", "rm"]) + 1))
+    return {"cmd": "rm", "args": [path], "why": "To remove files or directories."}
+
+
+def _path_after(scan: TokenScan, keyword: str) -> str:
+    """The words after the first `keyword`, or '' if nothing follows it."""
+    index = scan.first(keyword) + 1
+    return scan.rest(index) if index < len(scan.words) else ""
+
+
+def _handle_mkdir(scan: TokenScan) -> Optional[Dict]:
+    if scan.has("mkdir"):
+        path = _path_after(scan, "mkdir")
+    elif scan.has("called"):
+        # Handle "make directory called 'name'"
+        path = _path_after(scan, "called")
+    else:
+        path = _path_after(scan, "directory")
+    if path:
+        return {"cmd": "mkdir", "args": [path], "why": "To create a directory."}
+    return None
+
+
+def _handle_cd(scan: TokenScan) -> Optional[Dict]:
+    if scan.has("cd"):
+        path = _path_after(scan, "cd")
+    elif "go to" in scan.text:
+        path = _path_after(scan, "to")
+    else:
+        path = _path_after(scan, "directory")
+    if path:
+        return {"cmd": "cd", "args": [path], "why": "To change the current directory."}
+    return None
+
+
+def _handle_touch(scan: TokenScan) -> Optional[Dict]:
+    if scan.has("touch"):
+        path = _path_after(scan, "touch")
+    elif scan.has("called"):
+        # Handle "create file called 'name'"
+        path = _path_after(scan, "called")
+    else:
+        path = _path_after(scan, "file")
+    if path:
+        return {"cmd": "touch", "args": [path], "why": "To create a file."}
     return None
 
 
+def _handle_ls(scan: TokenScan) -> Dict:
+    words = scan.words
+    path = "."
+    cmd_index = scan.first("ls") if scan.has("ls") else scan.first("list")
+
+    # If 'in' is present, path is what follows
+    if scan.has("in"):
+        path_index = scan.first("in") + 1
+        if path_index < len(words):
+            path = scan.rest(path_index)
+    # else if there's text after the command itself
+    elif cmd_index + 1 < len(words):
+        # "list files" should not treat "files" as the path
+        if words[cmd_index + 1] == 'files':
+            if cmd_index + 2 < len(words):
+                path = scan.rest(cmd_index + 2)
+        else:
+            path = scan.rest(cmd_index + 1)
+
+    return {"cmd": "ls", "args": [path], "why": "To list files in a directory."}
+
+
+# Intents are tried in priority order (most specific first), like the original keyword chain.
+DEFAULT_PARSER = IntentParser()
+DEFAULT_PARSER.register("find_duplicates", ["duplicates", "duplicate"], _handle_duplicates, priority=5,
+                        condition=_yields_to(ORIGINAL_INTENTS))
+DEFAULT_PARSER.register("disk_usage", ["disk", "du"], _handle_disk_usage, priority=6,
+                        condition=_yields_to(ORIGINAL_INTENTS + LISTING_INTENTS))
+# "tree" is also a plausible folder name, so listing or searching one is left to ls and find_files.
+DEFAULT_PARSER.register("tree", ["tree"], _handle_tree, priority=7,
+                        condition=_yields_to(ORIGINAL_INTENTS + LISTING_INTENTS))
+DEFAULT_PARSER.register("checksum", ["checksum", "checksums", "verify"], _handle_checksum, priority=4,
+                        condition=_is_checksum_request)
+DEFAULT_PARSER.register("top_files", list(TOP_ORDERS), _handle_top_files, priority=8,
+                        condition=_yields_to(ORIGINAL_INTENTS))
+DEFAULT_PARSER.register("summarize_files", ["summarize", "summary", "statistics", "stats"],
+                        _handle_summarize_files, priority=9, condition=_yields_to(ORIGINAL_INTENTS + LISTING_INTENTS))
+DEFAULT_PARSER.register("find_files", ["find"], _handle_find, priority=10, condition=_is_find_query)
+DEFAULT_PARSER.register("search_in_files", ["search for"], _handle_search, priority=20)
+DEFAULT_PARSER.register("cp", ["copy", "cp"], _handle_cp, priority=30)
+DEFAULT_PARSER.register("mv", ["move", "mv"], _handle_mv, priority=40)
+DEFAULT_PARSER.register("rm", ["remove", "delete", "rm"], _handle_rm, priority=50)
+DEFAULT_PARSER.register("mkdir", ["mkdir", "make"], _handle_mkdir, priority=60,
+                        condition=lambda scan: scan.has("mkdir") or scan.has("directory"))
+DEFAULT_PARSER.register("cd", ["cd", "go to", "change directory"], _handle_cd, priority=70)
+DEFAULT_PARSER.register("touch", ["touch", "create"], _handle_touch, priority=80,
+                        condition=lambda scan: scan.has("touch") or scan.has("file"))
+DEFAULT_PARSER.register("ls", ["list", "ls"], _handle_ls, priority=90)
+# "package" is a common word in file content and names: tried only when no file command matches.
+DEFAULT_PARSER.register("packages", ["package", "packages", "installed", "installed?"], _handle_packages, priority=100)
+
+
+def register_intent(name: str, triggers: List[str], handler: Callable[[TokenScan], Optional[Dict]],
+                    priority: Optional[int] = None, condition: Optional[Callable[[TokenScan], bool]] = None) -> Intent:
+    """Registers a new intent with the mock planner's default parser."""
+    return DEFAULT_PARSER.register(name, triggers, handler, priority=priority, condition=condition)
+
+
+def _parse_single_command(user_intent: str) -> Optional[Dict]:
+    """
+    Parses a single command phrase into a plan step.
+    Handles pronoun resolution for commands like 'mv' and 'cp'.
+    """
+    return DEFAULT_PARSER.parse(user_intent)
+
+
 def create_mock_plan(user_intent: str) -> Dict:
     """
     Generates a mock plan based on simple keyword matching for testing purposes.
@@ -211,7 +543,7 @@ def create_mock_plan(user_intent: str) -> Dict:
     }
 
     # Split commands by 'then' for multi-step operations
-    commands = re.split(r'\s+then\s+', user_intent.lower())
+    commands = _THEN_RE.split(user_intent.lower())
 
     for command_phrase in commands:
         step = _parse_single_command(command_phrase)
@@ -226,4 +558,4 @@ def create_mock_plan(user_intent: str) -> Dict:
             "why": "To inform the user that the command was not understood."
         })
 
-    return plan
\ No newline at end of file
+    return plan
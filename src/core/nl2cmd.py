@@ -1,13 +1,19 @@
 import os
+import re
 import json
 import openai
-from typing import Dict, List
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
+from src.core import metrics, tracing
+
 MAX_RETRIES = 3
 
+# Model clients keep a connection pool, so reuse them across calls in long-running processes.
+_CLIENTS = {}
+
 
-class InvalidPlanError(Exception):
+class InvalidPlanError(ValueError):
     """Raised when the plan from the model is invalid."""
     pass
 
@@ -18,6 +24,7 @@ You are Samantha, a helpful AI assistant that converts natural language requests
 You are empathetic, knowledgeable, and prioritize safety. Your goal is to create a clear, step-by-step plan that the user can approve.
 
 You will be given the recent conversation history followed by the user's latest request. Use the history to understand context, resolve ambiguities, and handle follow-up questions.
+The request may be preceded by a description of the host (OS, kernels, memory, load and free disk space). Use it to fit the plan to the machine, e.g. to pick a filesystem with room to spare or to answer questions about the system without extra steps.
 
 The execution engine has the following Python functions available:
 - `ls(path: str)`: Lists files and directories.
@@ -28,8 +35,17 @@ The execution engine has the following Python functions available:
 - `cp(source: str, destination: str)`: Copies a file or directory.
 - `mv(source: str, destination: str)`: Moves or renames a file or directory.
 - `rm(path: str)`: Removes a file or directory (this is destructive and will require user confirmation).
-- `find_files(name_pattern: str, path: str = '.')`: Finds files matching a pattern (e.g., '*.pdf').
-- `search_in_files(content_pattern: str, path: str = '.')`: Searches for text content inside files.
+- `find_files(name_pattern: str, path: str = '.', query: str = None)`: Finds files matching a pattern (e.g., '*.pdf'). For any other condition pass `"kwargs": {"query": "..."}` in the find-files query language: terms `name:GLOB`, `ext:pdf,docx`, `type:images` (images, documents, spreadsheets, archives, audio, video, logs), `path:"REGEX"`, `size:1MB..10MB` (also `>1MB`, `<=500KB`), `modified:2024-01-01..2024-03-31` (also `>=2024-05-01`, or ages: `>7d` older than 7 days, `<2w` newer than 2 weeks), combined with AND, OR, NOT and parentheses, e.g. `(type:images OR ext:pdf) AND size:>1MB AND NOT path:"/tmp/"`.
+- `search_in_files(content_pattern: str, path: str = '.')`: Searches for text content inside files, including the text of PDFs, compressed logs (.gz, .bz2, .xz) and the members of .zip and .tar archives.
+- `find_duplicates(path: str = '.', size: str = None)`: Finds files with identical content and reports the reclaimable space. A following step can use "$results.last" for the redundant copies (the kept originals are excluded).
+- `checksum(path: str = '.', algorithm: str = 'sha256', manifest: str = None, verify: str = None)`: Computes file checksums (files or whole directories). With `manifest`, writes them to that sha256sum-style file instead; with `verify` (and no path), checks the files listed in that manifest and reports FAILED and missing ones. Prefer it over `sha256sum` in `execute_bash`.
+- `disk_usage(path: str = '.', depth: int = 2, top: int = 10)`: Shows what takes up disk space under a directory: largest subdirectories, totals per file type and a size tree.
+- `top_files(path: str = '.', n: int = 10, order: str = 'largest', pattern: str = None, file_type: str = None)`: Lists the `n` largest, smallest, newest or oldest files (`order`); `file_type` is one of images, documents, spreadsheets, archives, audio, video, logs. A following step can use "$results.last" for the listed files. Prefer it over `find_files` plus sorting in `execute_bash`.
+- `summarize_files(path: str = '.', pattern: str = None, file_type: str = None)`: Counts files by type with their total size and size percentiles.
+- `tree(path: str = '.', depth: int = 3, max_entries: int = 50, ignore: list = None, hidden: bool = False)`: Shows a directory as a tree; `ignore` takes glob patterns.
+- `ln(target: str, link_path: str, force: bool = False)`: Creates a hard link; pass `"kwargs": {"force": true}` to replace an existing file at `link_path`.
+- `package_info(name: str, ...)`: For one or more package names, whether each is installed, its installed version and the latest version in the enabled repositories. Use it instead of `rpm -q` or `dnf info` in `execute_bash`.
+- `package_search(term: str)`: Searches the repositories for packages by name or summary. Use it instead of `dnf search` in `execute_bash`.
 - `execute_bash(command: str)`: Executes a shell command. Use this for tasks not covered by other functions, like installing packages or running scripts.
 
 Based on the user's request, provide a plan in the following JSON format.
@@ -123,11 +139,8 @@ def _validate_plan_structure(plan: Dict) -> bool:
     return True
 
 
-def nl_to_plan(text: str, history: List[Dict[str, str]] = None) -> Dict:
-    """
-    Converts a natural language string to a structured plan using an AI model,
-    considering the conversation history for context.
-    """
+def _get_model_config():
+    """Reads and validates the model endpoint settings from the environment."""
     load_dotenv()
     base_url = os.environ.get("CODER_BASE_URL")
     model_name = os.environ.get("CODER_MODEL_NAME")
@@ -140,79 +153,164 @@ def nl_to_plan(text: str, history: List[Dict[str, str]] = None) -> Dict:
     if not api_key:
         raise ValueError(
             "OPENAI_API_KEY environment variable not set (can be 'EMPTY').")
+    return base_url, model_name, api_key
 
-    client = openai.OpenAI(base_url=base_url, api_key=api_key)
 
-    # Format the history and the current request
+def _get_client(base_url: str, api_key: str):
+    """Returns a cached synchronous client for the endpoint."""
+    key = (openai.OpenAI, base_url, api_key)
+    client = _CLIENTS.get(key)
+    if client is None:
+        client = _CLIENTS[key] = openai.OpenAI(base_url=base_url, api_key=api_key)
+    return client
+
+
+def _build_messages(text: str, history: List[Dict[str, str]] = None, host: str = None) -> List[Dict[str, str]]:
+    """Formats the host description, the history and the current request into chat messages."""
     history_text = "\n".join(
         [f"{item['role'].capitalize()}: {item['content']}" for item in (history or [])])
     full_prompt = f"--- Conversation History ---\n{history_text}\n\n--- Current Request ---\n{text}"
+    if host:
+        full_prompt = f"--- Host ---\n{host}\n\n{full_prompt}"
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": full_prompt}
+    ]
+
+
+def _extract_typo_correction(assumptions):
+    # Looks for patterns like: "likely a typo for 'budget'" or "probably meant 'budget'"
+    for a in assumptions:
+        # Common pattern: "likely a typo for 'budget'"
+        m = re.search(r"likely a typo for '([^']+)'", a, re.IGNORECASE)
+        if m:
+            return m.group(1)
+        # Alternative: "probably meant 'budget'"
+        m = re.search(r"probably meant '([^']+)'", a, re.IGNORECASE)
+        if m:
+            return m.group(1)
+    return None
 
-    import re
-
-    def extract_typo_correction(assumptions):
-        # Looks for patterns like: "likely a typo for 'budget'" or "probably meant 'budget'"
-        for a in assumptions:
-            # Common pattern: "likely a typo for 'budget'"
-            m = re.search(r"likely a typo for '([^']+)'", a, re.IGNORECASE)
-            if m:
-                return m.group(1)
-            # Alternative: "probably meant 'budget'"
-            m = re.search(r"probably meant '([^']+)'", a, re.IGNORECASE)
-            if m:
-                return m.group(1)
+
+def _parse_plan(content: str) -> Optional[Dict]:
+    """
+    Parses the model's response into a plan.
+    Returns None if the structure is invalid; raises json.JSONDecodeError on invalid JSON.
+    """
+    plan = json.loads(content)
+    if not _validate_plan_structure(plan):
         return None
 
+    # --- Correction logic: if typo correction is mentioned in assumptions, update steps ---
+    correction = _extract_typo_correction(plan["assumptions"])
+    if correction:
+        # Replace the typo in the args of relevant steps
+        for step in plan["steps"]:
+            # Only update if the step is a search or similar
+            if step["cmd"] in ["search_in_files", "find_files"] and step["args"]:
+                # If the arg is not the correction, replace it
+                if correction not in step["args"][0]:
+                    step["args"][0] = correction
+    return plan
+
+
+def _report_api_exception(e: Exception):
+    import traceback
+    print("--- Exception occurred while calling the model API ---")
+    print(f"Type: {type(e)}")
+    print(f"Error: {e}")
+    traceback.print_exc()
+    # Try to print response content if available
+    if hasattr(e, 'response') and e.response is not None:
+        try:
+            print("Response status:", e.response.status_code)
+            print("Response content:", e.response.text)
+        except Exception:
+            pass
+    print("Retrying due to error above.")
+
+
+@metrics.timed("samantha_plan_seconds", "Time to get a valid plan from the model, retries included.")
+def nl_to_plan(text: str, history: List[Dict[str, str]] = None, host: str = None) -> Dict:
+    """
+    Converts a natural language string to a structured plan using an AI model,
+    considering the conversation history and, if given, a description of the host for context.
+    """
+    base_url, model_name, api_key = _get_model_config()
+    client = _get_client(base_url, api_key)
+    with tracing.span("prompt assembly", "planning", history_items=len(history or []), host=bool(host)):
+        messages = _build_messages(text, history, host)
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        with tracing.span("model attempt", "planning", attempt=attempt) as span:
+            try:
+                response = client.chat.completions.create(
+                    model=model_name,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    temperature=0.0,  # Make the output deterministic
+                )
+                content = response.choices[0].message.content
+                if content is None:
+                    span.set(outcome="empty")
+                    continue
+
+                plan = _parse_plan(content)
+                if plan is not None:
+                    span.set(outcome="plan", steps=len(plan["steps"]))
+                    return plan
+                # Invalid structure, retry
+                span.set(outcome="invalid_plan")
+                metrics.inc("samantha_plan_failed_attempts_total", "Model calls that gave no usable plan.", reason="invalid_plan")
+
+            except Exception as e:
+                span.set(outcome="error", error=f"{type(e).__name__}: {e}")
+                _report_api_exception(e)
+                metrics.inc("samantha_plan_failed_attempts_total", "Model calls that gave no usable plan.", reason="error")
+                continue
+
+    raise InvalidPlanError(
+        f"Failed to get a valid plan from the model after {MAX_RETRIES} retries.")
+
+
+def create_async_client():
+    """Creates an async model client from the environment settings, for use with `nl_to_plan_async`."""
+    base_url, _, api_key = _get_model_config()
+    return openai.AsyncOpenAI(base_url=base_url, api_key=api_key)
+
+
+@metrics.timed("samantha_plan_seconds", "Time to get a valid plan from the model, retries included.")
+async def nl_to_plan_async(text: str, history: List[Dict[str, str]] = None, client=None,
+                           host: str = None) -> Dict:
+    """
+    Async variant of `nl_to_plan`, so many prompts can be planned concurrently.
+    Pass a shared `client` from `create_async_client()` to reuse connections across calls.
+    """
+    _, model_name, _ = _get_model_config()
+    if client is None:
+        client = create_async_client()
+    messages = _build_messages(text, history, host)
+
     for _ in range(MAX_RETRIES):
         try:
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model=model_name,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": full_prompt}
-                ],
+                messages=messages,
                 response_format={"type": "json_object"},
-                temperature=0.0,  # Make the output deterministic
+                temperature=0.0,
             )
             content = response.choices[0].message.content
             if content is None:
                 continue
 
-            plan = json.loads(content)
-
-            # --- Correction logic: if typo correction is mentioned in assumptions, update steps ---
-            if _validate_plan_structure(plan):
-                correction = extract_typo_correction(plan["assumptions"])
-                if correction:
-                    # Replace the typo in the args of relevant steps
-                    for step in plan["steps"]:
-                        # Only update if the step is a search or similar
-                        if step["cmd"] in ["search_in_files", "find_files"] and step["args"]:
-                            # Replace the first arg if it matches the typo (i.e., not the correction)
-                            typo = text
-                            # Try to extract the typo from the step arg (if it's not the correction)
-                            # For now, if the arg is not the correction, replace it
-                            if correction not in step["args"][0]:
-                                step["args"][0] = correction
+            plan = _parse_plan(content)
+            if plan is not None:
                 return plan
-            else:
-                # Invalid structure, retry
-                continue
+            metrics.inc("samantha_plan_failed_attempts_total", "Model calls that gave no usable plan.", reason="invalid_plan")
 
         except Exception as e:
-            import traceback
-            print("--- Exception occurred while calling the model API ---")
-            print(f"Type: {type(e)}")
-            print(f"Error: {e}")
-            traceback.print_exc()
-            # Try to print response content if available
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    print("Response status:", e.response.status_code)
-                    print("Response content:", e.response.text)
-                except Exception:
-                    pass
-            print("Retrying due to error above.")
+            _report_api_exception(e)
+            metrics.inc("samantha_plan_failed_attempts_total", "Model calls that gave no usable plan.", reason="error")
             continue
 
     raise InvalidPlanError(
@@ -0,0 +1,191 @@
+"""
+Bounded, buffered terminal output for command results.
+
+A `find_files` that matches half a million paths used to be printed in full, twice:
+once as its step ran and again in the summary. An `OutputSink` shows long outputs as
+their first and last lines around a count of what it left out ("…and 499,980 more").
+With a spill file (`--full [FILE]`) every output is also written there completely; with
+a pager (`--pager`), long outputs open in $PAGER instead, when stdout is a terminal.
+
+Text for stdout is buffered rather than written a line at a time: it goes out in blocks
+of up to BUFFER_CHARS, at most FLUSH_INTERVAL seconds late (a timer writes whatever a
+slow command left in the buffer), and whenever Samantha is about to wait (before
+planning, before each step runs and before the user is asked a question). Summaries
+refer back to long outputs (`summary_line`) instead of repeating them.
+"""
+import os
+import sys
+import threading
+import time
+from itertools import chain
+
+from src.core.pathset import FOUND_FILES_HEADER, FileListing
+
+DEFAULT_HEAD_LINES = 20
+DEFAULT_TAIL_LINES = 5
+# Buffered stdout text is written once there is this much of it, or at most this many seconds after it was written.
+BUFFER_CHARS = 64 * 1024
+FLUSH_INTERVAL = 0.1
+DEFAULT_SPILL_FILE = os.path.expanduser("~/.samantha/output.txt")
+DEFAULT_PAGER = "less -FRX"
+# Outputs up to this long, on one line, are repeated as they are in the summary.
+SUMMARY_CHARS = 160
+
+
+def _head(text: str, lines: int) -> str:
+    end = -1
+    for _ in range(lines):
+        end = text.find("\n", end + 1)
+        if end == -1:
+            return text
+    return text[:end]
+
+
+def _tail(text: str, lines: int) -> str:
+    start = len(text)
+    for _ in range(lines):
+        start = text.rfind("\n", 0, start)
+        if start == -1:
+            return text
+    return text[start + 1:]
+
+
+def line_count(output) -> int:
+    if isinstance(output, FileListing):
+        return len(output.paths) + 1
+    text = str(output).rstrip("\n")
+    return text.count("\n") + 1
+
+
+def iter_lines(output):
+    """The lines of an output, without building the whole text of a FileListing."""
+    if isinstance(output, FileListing):
+        return chain((FOUND_FILES_HEADER.rstrip("\n"),), output.paths)
+    return iter(str(output).rstrip("\n").split("\n"))
+
+
+class OutputSink:
+    """Where a session's text goes: the `write` callback, or when it is None, a buffer in front of sys.stdout."""
+
+    def __init__(self, write=None, head: int = DEFAULT_HEAD_LINES, tail: int = DEFAULT_TAIL_LINES,
+                 spill_path: str = None, pager: str = None):
+        self._write = write
+        self.head = head
+        self.tail = tail
+        # With a spill path, every output shown is also written there in full.
+        self.spill_path = spill_path
+        # A pager command, used only for the local terminal.
+        self.pager = pager
+        self._buffer = []
+        self._buffered = 0
+        self._flushed_at = time.monotonic()
+        # Flushes the buffer FLUSH_INTERVAL after a write left text in it; the buffer is shared with it.
+        self._timer = None
+        self._lock = threading.Lock()
+        self._spill = None
+
+    def write(self, text: str):
+        if self._write is not None:
+            # A callback (a daemon client, a test) gets text as it comes; it does its own batching.
+            self._write(text)
+            return
+        with self._lock:
+            self._buffer.append(text)
+            self._buffered += len(text)
+            due = self._buffered >= BUFFER_CHARS or time.monotonic() - self._flushed_at >= FLUSH_INTERVAL
+            if not due and self._timer is None:
+                self._timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._flushed_at = time.monotonic()
+            if not self._buffer:
+                return
+            text = "".join(self._buffer)
+            self._buffer.clear()
+            self._buffered = 0
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+    def show(self, output, label: str = "output"):
+        """Writes an output, bounded to its head and tail lines unless a pager takes it."""
+        if self.spill_path:
+            self._spill_output(output, label)
+        count = line_count(output)
+        if count <= self.head + self.tail + 1:
+            self.write(f"{output}\n")
+            return
+        if self.pager and self._write is None and sys.stdout.isatty() and self._page(output):
+            return
+        if isinstance(output, FileListing):
+            paths = output.paths
+            head = [FOUND_FILES_HEADER.rstrip("\n"), *paths[:self.head - 1]]
+            tail = paths[len(paths) - self.tail:] if self.tail else []
+            what = "files"
+        else:
+            text = str(output).rstrip("\n")
+            head = [_head(text, self.head)]
+            tail = [_tail(text, self.tail)] if self.tail else []
+            what = "lines"
+        hidden = count - self.head - self.tail
+        where = f"full output in {self.spill_path}" if self.spill_path else "--full saves everything to a file"
+        self.write("\n".join(head + [f"…and {hidden:,} more {what} ({where})"] + tail) + "\n")
+
+    def _page(self, output) -> bool:
+        """Shows the whole output in the pager; False if the pager can't be started."""
+        import shlex
+        import subprocess
+
+        self.flush()
+        try:
+            process = subprocess.Popen(shlex.split(self.pager), stdin=subprocess.PIPE, text=True, errors="replace")
+        except (OSError, ValueError):
+            return False
+        try:
+            for line in iter_lines(output):
+                process.stdin.write(line + "\n")
+            process.stdin.close()
+        except BrokenPipeError:
+            pass  # the pager was closed before reading everything
+        process.wait()
+        return True
+
+    def _spill_output(self, output, label: str):
+        try:
+            if self._spill is None:
+                directory = os.path.dirname(self.spill_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._spill = open(self.spill_path, "w", encoding="utf-8", errors="replace")
+            self._spill.write(f"=== {label} ===\n")
+            self._spill.writelines(line + "\n" for line in iter_lines(output))
+            self._spill.flush()
+        except OSError as e:
+            self.spill_path = None
+            self.write(f"Error: Couldn't write the full output: {e}\n")
+
+    def summary_line(self, output, step_no: int) -> str:
+        """What the summary says about a step's output: the output itself if short, else a pointer to it."""
+        if isinstance(output, FileListing):
+            gist = f"Found {len(output.paths):,} file(s)"
+        else:
+            text = str(output)
+            if "\n" not in text.rstrip("\n") and len(text) <= SUMMARY_CHARS:
+                return text
+            first = _head(text, 1)
+            gist = first if len(first) <= SUMMARY_CHARS else first[:SUMMARY_CHARS] + "…"
+            gist += f" ({line_count(output):,} lines)"
+        return f"{gist}, see step {step_no} above"
+
+    def close(self):
+        self.flush()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
@@ -0,0 +1,218 @@
+"""
+Compact storage for long lists of file paths.
+
+A `find_files` over a big tree can match millions of files. As a list of str every path
+costs a pointer, an object header of about 50 bytes and its full text, with the same
+directory prefix repeated for each file in a directory. `PathSet` stores every distinct
+directory once, and the file names joined into one string per CHUNK_SIZE paths, indexed
+by an array of end offsets and an array of directory numbers: for ASCII names a little
+over len(name) + 8 bytes a path. It is a Sequence of str (len, indexing, slicing,
+iteration, ==) that only grows by `append` and `extend`, so code written for a list
+of paths keeps working unchanged.
+
+A plan hands results from step to step by reference: `PathArgs` is a step's argument
+list, its literal arguments followed by the sequences '$results.last' and
+{result_of_step_N} expand to, without copying them. `FileListing` is the output of
+find_files, holding its PathSet and rendering the "Found files:" text only when printed;
+`FileReport` is a report that names files, carrying those files alongside its text.
+"""
+import os
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from itertools import chain
+
+FOUND_FILES_HEADER = "Found files:\n"
+TRUNCATED_MARKER = "... [truncated"
+# File names are joined into one string per this many paths.
+CHUNK_SIZE = 4096
+
+
+def _sequence_eq(left, right) -> bool:
+    if not isinstance(right, Sequence) or isinstance(right, (str, bytes)):
+        return NotImplemented
+    return len(left) == len(right) and all(a == b for a, b in zip(left, right))
+
+
+def _slice(sequence, index: slice) -> list:
+    return [sequence[i] for i in range(*index.indices(len(sequence)))]
+
+
+class PathSet(Sequence):
+    """An append-only sequence of paths with shared directories stored once."""
+
+    def __init__(self, paths=()):
+        self._directories = []
+        self._directory_index = {}
+        self._chunks = []  # the names of each full chunk, joined
+        self._pending = []  # names of the chunk being filled
+        self._pending_chars = 0
+        self._ends = array("I")  # where each name ends in its chunk
+        self._directory_of = array("I")
+        self.extend(paths)
+
+    def append(self, path: str):
+        self.extend((path,))
+
+    def extend(self, paths):
+        directories, directory_index = self._directories, self._directory_index
+        pending, ends, directory_of = self._pending, self._ends, self._directory_of
+        chars = self._pending_chars
+        last_directory, number = None, 0
+        for path in paths:
+            # The directory keeps its trailing separator, so joining the parts gives back the exact path.
+            cut = path.rfind(os.sep) + 1
+            directory = path[:cut]
+            if directory != last_directory:
+                number = directory_index.get(directory)
+                if number is None:
+                    number = directory_index[directory] = len(directories)
+                    directories.append(directory)
+                last_directory = directory
+            name = path[cut:]
+            pending.append(name)
+            chars += len(name)
+            ends.append(chars)
+            directory_of.append(number)
+            if len(pending) == CHUNK_SIZE:
+                self._chunks.append("".join(pending))
+                pending.clear()
+                chars = 0
+        self._pending_chars = chars
+
+    def __len__(self) -> int:
+        return len(self._directory_of)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return _slice(self, index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PathSet index out of range")
+        chunk, position = divmod(index, CHUNK_SIZE)
+        if chunk < len(self._chunks):
+            start = self._ends[index - 1] if position else 0
+            name = self._chunks[chunk][start:self._ends[index]]
+        else:
+            name = self._pending[position]
+        return self._directories[self._directory_of[index]] + name
+
+    def __iter__(self):
+        directories, ends, directory_of = self._directories, self._ends, self._directory_of
+        for chunk_index, chunk in enumerate(self._chunks):
+            first = chunk_index * CHUNK_SIZE
+            start = 0
+            for index in range(first, first + CHUNK_SIZE):
+                end = ends[index]
+                yield directories[directory_of[index]] + chunk[start:end]
+                start = end
+        first = len(self._chunks) * CHUNK_SIZE
+        for offset, name in enumerate(self._pending):
+            yield directories[directory_of[first + offset]] + name
+
+    def __eq__(self, other):
+        return _sequence_eq(self, other)
+
+    __hash__ = None
+
+    @property
+    def directory_count(self) -> int:
+        return len(self._directories)
+
+    def __repr__(self) -> str:
+        shown = ", ".join(repr(path) for path in self[:3])
+        return f"PathSet([{shown}{', ...' if len(self) > 3 else ''}], {len(self)} paths)"
+
+
+class PathArgs(Sequence):
+    """A step's arguments: literal values and whole sequences of paths, concatenated by reference."""
+
+    def __init__(self, args=()):
+        self._parts = []
+        self._ends = []
+        # The list literal arguments are appended to, or None right after an extend.
+        self._literals = None
+        for arg in args:
+            self.append(arg)
+
+    def append(self, arg):
+        if self._literals is None:
+            self._literals = []
+            self._add(self._literals)
+        self._literals.append(arg)
+        self._ends[-1] += 1
+
+    def extend(self, sequence):
+        """Adds the items of `sequence` by reference, so it must not change while these args are in use."""
+        self._add(sequence)
+        self._literals = None
+
+    def _add(self, part):
+        self._parts.append(part)
+        self._ends.append((self._ends[-1] if self._ends else 0) + len(part))
+
+    def __len__(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return _slice(self, index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PathArgs index out of range")
+        part = bisect_right(self._ends, index)
+        return self._parts[part][index - (self._ends[part - 1] if part else 0)]
+
+    def __iter__(self):
+        return chain.from_iterable(self._parts)
+
+    def __eq__(self, other):
+        return _sequence_eq(self, other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PathArgs({len(self)} args in {len(self._parts)} parts)"
+
+
+class FileListing:
+    """The output of find_files: "Found files:" and one path per line, kept as a PathSet until printed."""
+
+    def __init__(self, paths: Sequence):
+        self.paths = paths
+
+    def __str__(self) -> str:
+        return FOUND_FILES_HEADER + "\n".join(self.paths)
+
+    def text(self, limit: int) -> str:
+        """The listing cut after the last whole line that fits in `limit` characters."""
+        lines = [FOUND_FILES_HEADER.rstrip("\n")]
+        size = len(FOUND_FILES_HEADER)
+        for shown, path in enumerate(self.paths):
+            size += len(path) + 1
+            if size > limit:
+                lines.append(f"{TRUNCATED_MARKER} {len(self.paths) - shown} more paths]")
+                break
+            lines.append(path)
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return f"FileListing({len(self.paths)} paths)"
+
+
+class FileReport(str):
+    """
+    A command's report text with the files it refers to as `paths`, which a following
+    'them' means: the redundant copies find_duplicates lists, or the files top_files ranks.
+    It is a str, so it is printed, stored and checked for "Error:" like any other output.
+    """
+
+    def __new__(cls, text: str, paths: Sequence):
+        report = super().__new__(cls, text)
+        report.paths = paths
+        return report
+
+    def __repr__(self) -> str:
+        return f"FileReport({len(self.paths)} paths)"
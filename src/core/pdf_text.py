@@ -0,0 +1,663 @@
+"""
+Text extraction from PDF files, for content search.
+
+A small pure-Python reader: it finds the file's objects (including those packed in object
+streams), inflates FlateDecode streams, walks the page tree in order and interprets the
+text operators of each page's content streams (Tj, TJ, ' and "), and of the form XObjects
+they draw. Character codes go through the font's ToUnicode CMap when it has one, and are
+read as WinAnsi (cp1252) otherwise. Layout is approximated: a line break when the text
+moves to a new line, a space for a wide gap in a TJ array. Encrypted PDFs and scanned
+pages (images only) give no text.
+
+Parsing a PDF reads the whole file and is slow next to reading a text file, so extracted
+text is kept in a SQLite cache keyed by (device, inode) and checked against the file's
+size and mtime: each PDF is parsed once, until it changes.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+from typing import List, Optional
+
+from .metrics import REGISTRY as METRICS, record_file_read
+
+PDF_TEXT_DB_PATH = os.path.expanduser("~/.samantha/pdf_text.db")
+# Form XObjects drawn from form XObjects are followed this deep.
+MAX_FORM_DEPTH = 8
+# A gap in a TJ array wider than this (in thousandths of an em) is taken as a space.
+TJ_SPACE_GAP = 200
+# So is a gap of this many ems between a run of text and the next one on the same line.
+SPACE_GAP = 0.15
+# The width assumed for a glyph whose font gives none, in thousandths of an em.
+DEFAULT_GLYPH_WIDTH = 500
+
+Ref = namedtuple("Ref", "number generation")
+
+
+class Name(str):
+    """A PDF name (/Font), kept apart from keywords and operators."""
+
+
+class Keyword(str):
+    """A bare PDF token: an operator, true/false/null, or a delimiter like [ or <<."""
+
+
+_TOKEN = re.compile(rb"""
+    (?P<space>[\x00\t\n\x0c\r ]+|%[^\r\n]*)
+  | (?P<number>[+-]?(?:\d+\.?\d*|\.\d+))(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])
+  | (?P<name>/[^\x00\t\n\x0c\r ()<>\[\]{}/%]*)
+  | (?P<dict><<|>>)
+  | (?P<hex><[0-9A-Fa-f\x00\t\n\x0c\r ]*>)
+  | (?P<literal>\()
+  | (?P<delimiter>[\[\]{}])
+  | (?P<keyword>[^\x00\t\n\x0c\r ()<>\[\]{}/%]+)
+""", re.VERBOSE)
+_NAME_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f",
+            ord("("): b"(", ord(")"): b")", ord("\\"): b"\\"}
+_OBJECT = re.compile(rb"(?<![0-9])(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+obj\b")
+_STREAM_START = re.compile(rb"[\x00\t\n\x0c\r ]*stream(?:\r\n|\n|\r)")
+
+
+def _literal(data: bytes, pos: int):
+    """The bytes of a literal string whose '(' is just before `pos`, and the position after its ')'."""
+    out = bytearray()
+    depth = 1
+    end = len(data)
+    while pos < end:
+        c = data[pos]
+        pos += 1
+        if c == 0x5C:  # backslash
+            if pos >= end:
+                break
+            c = data[pos]
+            pos += 1
+            if c in _ESCAPES:
+                out += _ESCAPES[c]
+            elif 0x30 <= c <= 0x37:
+                digits = bytes([c])
+                while len(digits) < 3 and pos < end and 0x30 <= data[pos] <= 0x37:
+                    digits += data[pos:pos + 1]
+                    pos += 1
+                out.append(int(digits, 8) & 0xFF)
+            elif c == 0x0D:
+                if pos < end and data[pos] == 0x0A:
+                    pos += 1
+            elif c != 0x0A:
+                out.append(c)
+        elif c == 0x28:
+            depth += 1
+            out.append(c)
+        elif c == 0x29:
+            depth -= 1
+            if depth == 0:
+                break
+            out.append(c)
+        else:
+            out.append(c)
+    return bytes(out), pos
+
+
+class _Tokens:
+    """Iterates the tokens of `data` from `pos`: numbers, Name, bytes for strings, Keyword for the rest."""
+
+    def __init__(self, data: bytes, pos: int = 0):
+        self.data = data
+        self.pos = pos  # just after the last token returned
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        data = self.data
+        while self.pos < len(data):
+            match = _TOKEN.match(data, self.pos)
+            if match is None:
+                self.pos += 1
+                continue
+            kind = match.lastgroup
+            self.pos = match.end()
+            text = match.group()
+            if kind == "space":
+                continue
+            if kind == "number":
+                return float(text) if b"." in text else int(text)
+            if kind == "name":
+                return Name(_NAME_ESCAPE.sub(lambda m: bytes([int(m.group(1), 16)]), text[1:]).decode("latin-1"))
+            if kind == "hex":
+                digits = re.sub(rb"[^0-9A-Fa-f]", b"", text)
+                return bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode("ascii"))
+            if kind == "literal":
+                value, self.pos = _literal(data, self.pos)
+                return value
+            return Keyword(text.decode("latin-1"))
+        raise StopIteration
+
+
+def _parse(tokens: _Tokens, first):
+    """Builds the object starting with token `first`; arrays and dictionaries take more tokens."""
+    if first == "[" and isinstance(first, Keyword):
+        items = []
+        for token in tokens:
+            if token == "]" and isinstance(token, Keyword):
+                break
+            items.append(_parse(tokens, token))
+        return _refs(items)
+    if first == "<<" and isinstance(first, Keyword):
+        items = []
+        for token in tokens:
+            if token == ">>" and isinstance(token, Keyword):
+                break
+            items.append(_parse(tokens, token))
+        items = _refs(items)
+        return {items[i]: items[i + 1] for i in range(0, len(items) - 1, 2) if isinstance(items[i], Name)}
+    return first
+
+
+def _refs(items: list) -> list:
+    """Folds each `number generation R` in a parsed list into a Ref."""
+    out = []
+    for item in items:
+        if (isinstance(item, Keyword) and item == "R" and len(out) >= 2
+                and type(out[-1]) is int and type(out[-2]) is int):
+            generation = out.pop()
+            out[-1] = Ref(out[-1], generation)
+        else:
+            out.append(item)
+    return out
+
+
+def _parse_at(data: bytes, pos: int):
+    """The object at `pos` and the position just after it."""
+    tokens = _Tokens(data, pos)
+    value = _parse(tokens, next(tokens))
+    end = tokens.pos
+    if type(value) is int:
+        # The start of a reference, if the next two tokens are a number and R.
+        ahead = [token for _, token in zip(range(2), tokens)]
+        if len(ahead) == 2 and type(ahead[0]) is int and ahead[1] == "R" and isinstance(ahead[1], Keyword):
+            return Ref(value, ahead[0]), tokens.pos
+    return value, end
+
+
+def _decode_stream(dictionary: dict, raw: bytes) -> Optional[bytes]:
+    """The decoded data of a stream, or None for filters other than Flate, ASCIIHex and ASCII85."""
+    import base64
+
+    filters = dictionary.get("Filter", [])
+    if not isinstance(filters, list):
+        filters = [filters]
+    data = raw
+    for name in filters:
+        if name in ("FlateDecode", "Fl"):
+            inflater = zlib.decompressobj()
+            try:
+                data = inflater.decompress(data)
+            except zlib.error:
+                return None
+        elif name in ("ASCIIHexDecode", "AHx"):
+            digits = re.sub(rb"[^0-9A-Fa-f]", b"", data.split(b">")[0])
+            data = bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode("ascii"))
+        elif name in ("ASCII85Decode", "A85"):
+            body = data.strip()
+            body = body[2:] if body.startswith(b"<~") else body
+            try:
+                data = base64.a85decode(body.split(b"~>")[0] + b"~>", adobe=False, ignorechars=b" \t\n\r\x0c\x00~>")
+            except ValueError:
+                return None
+        else:
+            return None
+    return data
+
+
+class _Document:
+    """The objects of a PDF by number; a later definition (an incremental update) replaces an earlier one."""
+
+    def __init__(self, data: bytes):
+        self.objects = {}
+        self.streams = {}
+        for match in _OBJECT.finditer(data):
+            try:
+                value, end = _parse_at(data, match.end())
+            except (StopIteration, ValueError, UnicodeDecodeError):
+                continue
+            number = int(match.group(1))
+            self.objects[number] = value
+            self.streams.pop(number, None)
+            start = _STREAM_START.match(data, end) if isinstance(value, dict) else None
+            if start:
+                length = value.get("Length")
+                stop = start.end() + length if type(length) is int else -1
+                if not 0 <= stop <= len(data) or b"endstream" not in data[stop:stop + 32]:
+                    stop = data.find(b"endstream", start.end())
+                    stop = len(data) if stop == -1 else stop
+                self.streams[number] = data[start.end():stop]
+        for number, value in list(self.objects.items()):
+            if isinstance(value, dict) and value.get("Type") == "ObjStm":
+                self._unpack(number, value)
+
+    def _unpack(self, number: int, dictionary: dict):
+        """Adds the objects packed in an object stream (unless they are defined outside it)."""
+        data = self.stream(number)
+        first = dictionary.get("First")
+        if data is None or type(first) is not int:
+            return
+        header = list(_Tokens(data[:first]))
+        for i in range(0, len(header) - 1, 2):
+            packed, offset = header[i], header[i + 1]
+            if type(packed) is int and type(offset) is int and packed not in self.objects:
+                try:
+                    self.objects[packed] = _parse_at(data, first + offset)[0]
+                except (StopIteration, ValueError, UnicodeDecodeError):
+                    continue
+
+    def resolve(self, value, depth: int = 0):
+        while isinstance(value, Ref) and depth < 32:
+            value = self.objects.get(value.number)
+            depth += 1
+        return value
+
+    def stream(self, ref) -> Optional[bytes]:
+        number = ref.number if isinstance(ref, Ref) else ref
+        raw = self.streams.get(number)
+        dictionary = self.objects.get(number)
+        if raw is None or not isinstance(dictionary, dict):
+            return None
+        return _decode_stream({key: self.resolve(value) for key, value in dictionary.items()
+                               if key in ("Filter", "DecodeParms")}, raw)
+
+    def pages(self) -> List[dict]:
+        """The page dictionaries in reading order: the page tree from the catalog, else every page object."""
+        catalogs = [value for value in self.objects.values() if isinstance(value, dict) and value.get("Type") == "Catalog"]
+        pages, seen = [], set()
+        stack = [catalogs[-1].get("Pages")] if catalogs else []
+        while stack:
+            ref = stack.pop()
+            if isinstance(ref, Ref):
+                if ref.number in seen:
+                    continue
+                seen.add(ref.number)
+            node = self.resolve(ref)
+            if not isinstance(node, dict):
+                continue
+            if node.get("Type") == "Page" or ("Kids" not in node and "Contents" in node):
+                pages.append(node)
+            else:
+                stack.extend(reversed(self.resolve(node.get("Kids")) or []))
+        if not pages:
+            pages = [value for _, value in sorted(self.objects.items())
+                     if isinstance(value, dict) and value.get("Type") == "Page"]
+        return pages
+
+    def inherited(self, page: dict, key: str):
+        """A page attribute, looked up through its /Parent chain."""
+        node, depth = page, 0
+        while isinstance(node, dict) and depth < 32:
+            if key in node:
+                return self.resolve(node[key])
+            node = self.resolve(node.get("Parent"))
+            depth += 1
+        return None
+
+
+class _Font:
+    """Turns a font's character codes into text, and measures how far they advance."""
+
+    def __init__(self, document: _Document, font: dict):
+        self.code_bytes = 1
+        self.chars = {}
+        self.ranges = []
+        # Glyph widths in thousandths of an em, by code.
+        self.widths = {}
+        self.default_width = DEFAULT_GLYPH_WIDTH
+        cmap = document.stream(font.get("ToUnicode")) if isinstance(font.get("ToUnicode"), Ref) else None
+        if font.get("Subtype") == "Type0":
+            self.code_bytes = 2  # CIDs; with no ToUnicode map there is no reliable text to give
+            self._read_cid_widths(document, font)
+        else:
+            self._read_widths(document, font)
+        if cmap:
+            self._read_cmap(cmap)
+
+    def _read_widths(self, document: _Document, font: dict):
+        first = document.resolve(font.get("FirstChar"))
+        widths = document.resolve(font.get("Widths"))
+        if type(first) is int and isinstance(widths, list):
+            for offset, width in enumerate(widths):
+                width = document.resolve(width)
+                if isinstance(width, (int, float)):
+                    self.widths[first + offset] = width
+
+    def _read_cid_widths(self, document: _Document, font: dict):
+        descendants = document.resolve(font.get("DescendantFonts"))
+        descendant = document.resolve(descendants[0]) if isinstance(descendants, list) and descendants else None
+        if not isinstance(descendant, dict):
+            return
+        default = document.resolve(descendant.get("DW"))
+        self.default_width = default if isinstance(default, (int, float)) else 1000
+        spec = document.resolve(descendant.get("W"))
+        spec = [document.resolve(item) for item in spec] if isinstance(spec, list) else []
+        i = 0
+        while i + 1 < len(spec):
+            # Either `first [w1 w2 ...]` or `first last w`.
+            if type(spec[i]) is int and isinstance(spec[i + 1], list):
+                for offset, width in enumerate(spec[i + 1]):
+                    if isinstance(width, (int, float)):
+                        self.widths[spec[i] + offset] = width
+                i += 2
+            elif i + 2 < len(spec) and type(spec[i]) is int and type(spec[i + 1]) is int:
+                if spec[i + 1] - spec[i] <= 0xFFFF and isinstance(spec[i + 2], (int, float)):
+                    for code in range(spec[i], spec[i + 1] + 1):
+                        self.widths[code] = spec[i + 2]
+                i += 3
+            else:
+                break
+
+    def _read_cmap(self, data: bytes):
+        tokens = list(_Tokens(data))
+        for i, token in enumerate(tokens):
+            if token == "begincodespacerange" and i + 1 < len(tokens) and isinstance(tokens[i + 1], bytes):
+                self.code_bytes = max(1, len(tokens[i + 1]))
+            elif token == "beginbfchar":
+                j = i + 1
+                while j + 1 < len(tokens) and isinstance(tokens[j], bytes):
+                    self.chars[int.from_bytes(tokens[j], "big")] = _utf16(tokens[j + 1])
+                    j += 2
+            elif token == "beginbfrange":
+                j = i + 1
+                while j + 2 < len(tokens) and isinstance(tokens[j], bytes):
+                    low, high = int.from_bytes(tokens[j], "big"), int.from_bytes(tokens[j + 1], "big")
+                    if tokens[j + 2] == "[":
+                        k = j + 3
+                        code = low
+                        while k < len(tokens) and tokens[k] != "]":
+                            self.chars[code] = _utf16(tokens[k]) if isinstance(tokens[k], bytes) else ""
+                            code += 1
+                            k += 1
+                        j = k + 1
+                    else:
+                        if isinstance(tokens[j + 2], bytes):
+                            self.ranges.append((low, high, tokens[j + 2]))
+                        j += 3
+
+    def _codes(self, data: bytes):
+        step = self.code_bytes
+        return [int.from_bytes(data[i:i + step], "big") for i in range(0, len(data) - step + 1, step)]
+
+    def decode(self, data: bytes) -> str:
+        if not self.chars and not self.ranges:
+            if self.code_bytes == 2:
+                return ""
+            if data.startswith(b"\xfe\xff"):
+                return data[2:].decode("utf-16-be", errors="ignore")
+            return data.decode("cp1252", errors="ignore")
+        out = []
+        for code in self._codes(data):
+            text = self.chars.get(code)
+            if text is None:
+                text = ""
+                for low, high, start in self.ranges:
+                    if low <= code <= high:
+                        last = int.from_bytes(start[-2:], "big") + code - low
+                        text = _utf16(start[:-2] + last.to_bytes(2, "big"))
+                        break
+            out.append(text)
+        return "".join(out)
+
+    def advance(self, data: bytes) -> float:
+        """How far showing `data` moves the text position, in ems."""
+        widths, default = self.widths, self.default_width
+        return sum(widths.get(code, default) for code in self._codes(data)) / 1000
+
+
+def _utf16(data) -> str:
+    return data.decode("utf-16-be", errors="ignore") if isinstance(data, bytes) else ""
+
+
+class _TextWriter:
+    """Interprets content stream operators into lines of text."""
+
+    def __init__(self, document: _Document):
+        self.document = document
+        self.parts = []
+        self.fonts = {}  # font object number (or id) -> _Font
+        self.reset()
+
+    def reset(self):
+        """Forgets the text position, as at the start of a page."""
+        self.font = None
+        self.size = 0
+        self.leading = 0
+        self.scale = 1
+        self.line = (0, 0)  # where the current line starts, in user space
+        self.position = None  # where the last text shown started
+        self.advance = 0  # how far the text shown since then moved, in user space
+
+    def _font(self, resources: dict, name) -> Optional[_Font]:
+        fonts = self.document.resolve((resources or {}).get("Font")) or {}
+        ref = fonts.get(name) if isinstance(fonts, dict) else None
+        font = self.document.resolve(ref)
+        if not isinstance(font, dict):
+            return None
+        key = ref.number if isinstance(ref, Ref) else id(font)
+        if key not in self.fonts:
+            self.fonts[key] = _Font(self.document, font)
+        return self.fonts[key]
+
+    def newline(self):
+        if self.parts and self.parts[-1] != "\n":
+            self.parts.append("\n")
+
+    def _space(self):
+        if self.parts and not self.parts[-1].endswith((" ", "\n")):
+            self.parts.append(" ")
+
+    def move(self, x: float, y: float):
+        """Starts a line at (x, y); text on the same line becomes a space if there is a gap before it."""
+        self.line = (x, y)
+        if self.position is not None:
+            last_x, last_y = self.position
+            em = abs(self.size * self.scale) or 1
+            if abs(y - last_y) > em / 2:
+                self.newline()
+            elif x - (last_x + self.advance) > em * SPACE_GAP:
+                self._space()
+        self.position = (x, y)
+        self.advance = 0
+
+    def show(self, data: bytes):
+        font = self.font
+        self.parts.append(font.decode(data) if font else data.decode("cp1252", errors="ignore"))
+        ems = font.advance(data) if font else len(data) * DEFAULT_GLYPH_WIDTH / 1000
+        self.advance += ems * self.size * self.scale
+        if self.position is None:
+            self.position = self.line
+
+    def run(self, content: bytes, resources: dict, depth: int = 0):
+        operands = []
+        tokens = _Tokens(content)
+        for token in tokens:
+            if not isinstance(token, Keyword) or token in ("[", "<<"):
+                operands.append(_parse(tokens, token))
+                continue
+            numbers = [value for value in operands if isinstance(value, (int, float))]
+            if token == "Tf" and len(operands) >= 2:
+                self.font = self._font(resources, operands[-2])
+                self.size = operands[-1] if isinstance(operands[-1], (int, float)) else 0
+            elif token == "Tj" and operands and isinstance(operands[-1], bytes):
+                self.show(operands[-1])
+            elif token == "TJ" and operands and isinstance(operands[-1], list):
+                for item in operands[-1]:
+                    if isinstance(item, bytes):
+                        self.show(item)
+                    elif isinstance(item, (int, float)):
+                        self.advance -= item / 1000 * self.size * self.scale
+                        if item < -TJ_SPACE_GAP:
+                            self._space()
+            elif token in ("'", '"') and operands and isinstance(operands[-1], bytes):
+                self.move(self.line[0], self.line[1] - self.leading * self.scale)
+                self.newline()
+                self.show(operands[-1])
+            elif token in ("Td", "TD") and len(numbers) >= 2:
+                tx, ty = numbers[-2:]
+                if token == "TD":
+                    self.leading = -ty
+                self.move(self.line[0] + tx * self.scale, self.line[1] + ty * self.scale)
+            elif token == "Tm" and len(numbers) >= 6:
+                a, b, c, d, e, f = numbers[-6:]
+                self.scale = (a * a + b * b) ** 0.5 or 1
+                self.move(e, f)
+            elif token == "TL" and numbers:
+                self.leading = numbers[-1]
+            elif token == "T*":
+                self.move(self.line[0], self.line[1] - self.leading * self.scale)
+                self.newline()
+            elif token == "BT":
+                self.line = (0, 0)
+                self.scale = 1
+            elif token == "Do" and operands and depth < MAX_FORM_DEPTH:
+                self._form(resources, operands[-1], depth)
+            elif token == "BI":
+                # Inline image data is binary: skip to its end.
+                for skipped in tokens:
+                    if skipped == "EI":
+                        break
+            operands = []
+
+    def _form(self, resources: dict, name, depth: int):
+        xobjects = self.document.resolve((resources or {}).get("XObject")) or {}
+        ref = xobjects.get(name) if isinstance(xobjects, dict) else None
+        form = self.document.resolve(ref)
+        if isinstance(ref, Ref) and isinstance(form, dict) and form.get("Subtype") == "Form":
+            content = self.document.stream(ref)
+            if content:
+                self.run(content, self.document.resolve(form.get("Resources")) or resources, depth + 1)
+
+
+def extract_text(data: bytes) -> str:
+    """The text of a PDF given as bytes, one line per line of text; '' if it has none that can be read."""
+    if re.search(rb"/Encrypt\b", data):
+        return ""
+    document = _Document(data)
+    writer = _TextWriter(document)
+    for page in document.pages():
+        contents = document.resolve(page.get("Contents"))
+        refs = contents if isinstance(contents, list) else [page.get("Contents")]
+        streams = [document.stream(ref) for ref in refs if isinstance(ref, Ref)]
+        content = b"\n".join(stream for stream in streams if stream)
+        if content:
+            writer.run(content, document.inherited(page, "Resources") or {})
+            writer.newline()
+            writer.reset()
+    lines = (line.strip() for line in "".join(writer.parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def is_pdf(path: str) -> bool:
+    """Whether the file starts like a PDF (the header may follow up to 1KB of junk)."""
+    try:
+        with open(path, "rb") as f:
+            return b"%PDF-" in f.read(1024)
+    except OSError:
+        return False
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_text (
+    dev INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    text BLOB NOT NULL,
+    PRIMARY KEY (dev, inode)
+);
+"""
+
+
+class PdfTextCache:
+    """Extracted PDF text keyed by (device, inode), valid while size and mtime are unchanged; stored compressed."""
+
+    def __init__(self, db_path: str = PDF_TEXT_DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def get(self, st: os.stat_result) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT text FROM pdf_text WHERE dev = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+                (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def put(self, st: os.stat_result, text: str):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO pdf_text (dev, inode, size, mtime_ns, text) VALUES (?, ?, ?, ?, ?)",
+                    (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, zlib.compress(text.encode("utf-8"))))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_DEFAULT_CACHE = None
+
+
+def default_pdf_text_cache() -> Optional[PdfTextCache]:
+    """The user's persistent PDF text cache, or None if it can't be opened (PDFs are then parsed every time)."""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        try:
+            cache = PdfTextCache()
+            cache._connect()
+            _DEFAULT_CACHE = cache
+        except (sqlite3.Error, OSError):
+            return None
+    return _DEFAULT_CACHE
+
+
+def pdf_text(path: str, cache: Optional[PdfTextCache] = None) -> Optional[str]:
+    """The text of the PDF at `path`, from the cache when the file is unchanged; None if it isn't a PDF."""
+    st = os.stat(path)
+    if cache is not None:
+        try:
+            text = cache.get(st)
+        except sqlite3.Error:
+            text = None
+        if text is not None:
+            return text
+    if not is_pdf(path):
+        return None
+    started = time.perf_counter() if METRICS.enabled else 0
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        text = extract_text(data)
+    except Exception:
+        text = ""  # a damaged or unusual PDF: cached as having no text, so it isn't parsed again
+    if started:
+        record_file_read("pdf_text", started, len(data))
+    if cache is not None:
+        try:
+            cache.put(st, text)
+        except sqlite3.Error:
+            pass
+    return text
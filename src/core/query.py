@@ -0,0 +1,408 @@
+"""
+A small query language for find_files, compiled into a predicate tree.
+
+    type:images OR ext:pdf,docx
+    name:report* AND size:1MB..10MB AND NOT path:"/(tmp|cache)/"
+    (ext:log OR ext:txt) modified:2024-01-01..2024-03-31
+
+Terms (values may be "quoted"; a comma-separated value means any of them):
+
+    name:GLOB[,GLOB]     file name glob, case-insensitive
+    ext:EXT[,EXT]        extension, with or without the dot
+    type:CATEGORY        a FILE_TYPE_MAPPINGS category, e.g. images or logs
+    path:REGEX           regular expression searched in the full path
+    size:RANGE           1MB..10MB, ..1MB, 1MB.., >1MB, >=1MB, <1KB, <=1KB, =0B or 4KB
+    modified:RANGE       absolute dates (2024-05-01, 2024-05-01T13:30), inclusive ranges
+                         of them (2024-01-01..2024-03-31) or >/</= a date; or ages like
+                         find_files' `modified` filter: >7d is older than 7 days, <2w
+                         newer than 2 weeks, 7d..30d between the two ages
+    WORD                 a bare word is a name glob; without wildcards it matches
+                         names containing it
+
+Terms next to each other are ANDed. NOT binds tighter than AND, which binds tighter than OR.
+
+Every node knows its evaluation cost. AND and OR evaluate their children cheapest first,
+so name and extension checks (no I/O) decide before size and date checks need a stat,
+and a file the name checks reject is never stat'ed.
+"""
+import fnmatch
+import re
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from .utils import FILE_TYPE_MAPPINGS
+
+# Relative evaluation costs: checks on the name are free, a regex a bit less so, a stat is I/O.
+NAME_COST = 1
+PATH_COST = 3
+STAT_COST = 20
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|((?:[^\s()"]|"[^"]*")+))')
+_SIZE_RE = re.compile(r'^(\d+\.?\d*)\s*([KMGT]?B?)$', re.IGNORECASE)
+_AGE_RE = re.compile(r'^(\d+)\s*([dwmy])$', re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "KB": 1024, "M": 1024 ** 2, "MB": 1024 ** 2,
+               "G": 1024 ** 3, "GB": 1024 ** 3, "T": 1024 ** 4, "TB": 1024 ** 4}
+_AGE_DAYS = {"d": 1, "w": 7, "m": 30, "y": 365}
+_DATE_FORMATS = (("%Y-%m-%d", timedelta(days=1)), ("%Y-%m-%dT%H:%M", timedelta(minutes=1)),
+                 ("%Y-%m-%d %H:%M", timedelta(minutes=1)))
+
+
+class QuerySyntaxError(ValueError):
+    """Raised when a query can't be parsed; the message says where."""
+
+
+# --- Predicate tree ---
+# Nodes are called with an os.DirEntry-like object (`name`, `path`, `stat()`); DirEntry
+# caches its stat, so several size and date checks on one file cost a single stat.
+
+class Node:
+    __slots__ = ()
+    cost = NAME_COST
+
+    def matches(self, entry) -> bool:
+        raise NotImplementedError
+
+
+class NameGlob(Node):
+    __slots__ = ("globs", "_match")
+
+    def __init__(self, globs: List[str], case_sensitive: bool = False):
+        self.globs = globs
+        pattern = "|".join(fnmatch.translate(g) for g in globs)
+        self._match = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE).match
+
+    def matches(self, entry) -> bool:
+        return self._match(entry.name) is not None
+
+    def __repr__(self):
+        return f"name:{','.join(self.globs)}"
+
+
+class Extensions(Node):
+    __slots__ = ("extensions",)
+
+    def __init__(self, extensions):
+        self.extensions = tuple(sorted({e.lower() if e.startswith(".") else "." + e.lower() for e in extensions}))
+
+    def matches(self, entry) -> bool:
+        return entry.name.lower().endswith(self.extensions)
+
+    def __repr__(self):
+        return f"ext:{','.join(e[1:] for e in self.extensions)}"
+
+
+class PathRegex(Node):
+    __slots__ = ("pattern", "_search")
+    cost = PATH_COST
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self._search = re.compile(pattern).search
+
+    def matches(self, entry) -> bool:
+        return self._search(entry.path) is not None
+
+    def __repr__(self):
+        return f'path:"{self.pattern}"'
+
+
+class _StatRange(Node):
+    """lo <= value < hi on one stat field; either bound may be None."""
+
+    __slots__ = ("lo", "hi")
+    cost = STAT_COST
+    field = ""
+
+    def __init__(self, lo=None, hi=None):
+        self.lo = lo
+        self.hi = hi
+
+    def matches(self, entry) -> bool:
+        value = getattr(entry.stat(), self.field)
+        return (self.lo is None or value >= self.lo) and (self.hi is None or value < self.hi)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.lo}..{self.hi})"
+
+
+class SizeRange(_StatRange):
+    __slots__ = ()
+    field = "st_size"
+
+
+class MtimeRange(_StatRange):
+    __slots__ = ()
+    field = "st_mtime"
+
+
+class Not(Node):
+    __slots__ = ("child", "cost")
+
+    def __init__(self, child: Node):
+        self.child = child
+        self.cost = child.cost
+
+    def matches(self, entry) -> bool:
+        return not self.child.matches(entry)
+
+    def __repr__(self):
+        return f"NOT {self.child!r}"
+
+
+class And(Node):
+    __slots__ = ("children", "cost")
+
+    def __init__(self, children: List[Node]):
+        # Stable sort: among equally cheap checks the written order is kept.
+        self.children = sorted(children, key=lambda c: c.cost)
+        self.cost = sum(c.cost for c in self.children)
+
+    def matches(self, entry) -> bool:
+        for child in self.children:
+            if not child.matches(entry):
+                return False
+        return True
+
+    def __repr__(self):
+        return "(" + " AND ".join(map(repr, self.children)) + ")"
+
+
+class Or(Node):
+    __slots__ = ("children", "cost")
+
+    def __init__(self, children: List[Node]):
+        self.children = sorted(children, key=lambda c: c.cost)
+        self.cost = sum(c.cost for c in self.children)
+
+    def matches(self, entry) -> bool:
+        for child in self.children:
+            if child.matches(entry):
+                return True
+        return False
+
+    def __repr__(self):
+        return "(" + " OR ".join(map(repr, self.children)) + ")"
+
+
+class MatchAll(Node):
+    __slots__ = ()
+    cost = 0
+
+    def matches(self, entry) -> bool:
+        return True
+
+    def __repr__(self):
+        return "*"
+
+
+def all_of(nodes: List[Node]) -> Node:
+    """AND of `nodes`, flattening nested ANDs and dropping match-alls."""
+    flat = []
+    for node in nodes:
+        if isinstance(node, And):
+            flat.extend(node.children)
+        elif not isinstance(node, MatchAll):
+            flat.append(node)
+    if not flat:
+        return MatchAll()
+    return flat[0] if len(flat) == 1 else And(flat)
+
+
+def any_of(nodes: List[Node]) -> Node:
+    """OR of `nodes`, flattening nested ORs and merging extension checks into one."""
+    flat = []
+    extensions = []
+    for node in nodes:
+        for child in (node.children if isinstance(node, Or) else [node]):
+            if isinstance(child, Extensions):
+                extensions.extend(child.extensions)
+            else:
+                flat.append(child)
+    if extensions:
+        flat.append(Extensions(extensions))
+    return flat[0] if len(flat) == 1 else Or(flat)
+
+
+# --- Values ---
+
+def parse_bytes(text: str) -> int:
+    match = _SIZE_RE.match(text.strip())
+    if not match:
+        raise QuerySyntaxError(f"Invalid size '{text}'. Use e.g. 500B, 10KB or 1.5MB.")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.upper()])
+
+
+def _parse_range(value: str, parse, field: str) -> Tuple[str, Optional[object], Optional[object]]:
+    """Splits 'a..b', '>a', '>=a', '<a', '<=a', '=a' or 'a' into (op, a, b) with parsed values."""
+    if ".." in value:
+        low, high = value.split("..", 1)
+        if not low and not high:
+            raise QuerySyntaxError(f"Empty range in '{field}:{value}'.")
+        return "..", parse(low) if low else None, parse(high) if high else None
+    for op in (">=", "<=", ">", "<", "="):
+        if value.startswith(op):
+            return op, parse(value[len(op):]), None
+    return "=", parse(value), None
+
+
+def _size_term(value: str) -> Node:
+    op, a, b = _parse_range(value, parse_bytes, "size")
+    if op == "..":
+        return SizeRange(a, None if b is None else b + 1)
+    return {">": SizeRange(a + 1, None), ">=": SizeRange(a, None), "<": SizeRange(None, a),
+            "<=": SizeRange(None, a + 1), "=": SizeRange(a, a + 1)}[op]
+
+
+def _parse_moment(text: str, now: float) -> Tuple[float, float, bool]:
+    """(start, end, is_age): the period a date names, or the instant an age like '7d' points to."""
+    text = text.strip()
+    age = _AGE_RE.match(text)
+    if age:
+        instant = now - int(age.group(1)) * _AGE_DAYS[age.group(2).lower()] * 86400
+        return instant, instant, True
+    for fmt, length in _DATE_FORMATS:
+        try:
+            start = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return start.timestamp(), (start + length).timestamp(), False
+    raise QuerySyntaxError(f"Invalid date '{text}'. Use YYYY-MM-DD, YYYY-MM-DDTHH:MM or an age like 7d.")
+
+
+def _modified_term(value: str, now: float) -> Node:
+    op, a, b = _parse_range(value, lambda text: _parse_moment(text, now), "modified")
+    if op == "..":
+        # Two ages or two dates, either way round: the range covers both periods.
+        if a is not None and b is not None:
+            return MtimeRange(min(a[0], b[0]), max(a[1], b[1]))
+        start, end, is_age = a or b
+        if is_age:
+            # 'ages up to 7d' / 'ages from 7d' read like ranges of age.
+            return MtimeRange(start, None) if a is None else MtimeRange(None, start)
+        return MtimeRange(start, None) if b is None else MtimeRange(None, end)
+    start, end, is_age = a
+    if is_age:
+        # Ages compare the other way round: older than 7 days is an mtime before that instant.
+        if op in (">", ">="):
+            return MtimeRange(None, start)
+        if op in ("<", "<="):
+            return MtimeRange(start, None)
+        day = datetime.fromtimestamp(start).replace(hour=0, minute=0, second=0, microsecond=0)
+        return MtimeRange(day.timestamp(), (day + timedelta(days=1)).timestamp())
+    return {">": MtimeRange(end, None), ">=": MtimeRange(start, None), "<": MtimeRange(None, start),
+            "<=": MtimeRange(None, end), "=": MtimeRange(start, end)}[op]
+
+
+def _glob_term(word: str) -> Node:
+    if not any(c in word for c in "*?["):
+        word = f"*{word}*"
+    return NameGlob([word])
+
+
+def _term(token: str, now: float) -> Node:
+    field, sep, value = token.partition(":")
+    field = field.lower()
+    if not sep or field not in ("name", "ext", "type", "path", "size", "modified", "mtime"):
+        return _glob_term(token.replace('"', ""))
+    value = value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+    if not value:
+        raise QuerySyntaxError(f"Missing value after '{field}:'.")
+    if field == "name":
+        return NameGlob(value.split(","))
+    if field == "ext":
+        return Extensions(value.split(","))
+    if field == "type":
+        extensions = []
+        for category in value.lower().split(","):
+            if category not in FILE_TYPE_MAPPINGS:
+                raise QuerySyntaxError(
+                    f"Unknown file type '{category}'. Use one of: {', '.join(FILE_TYPE_MAPPINGS)}.")
+            extensions.extend(FILE_TYPE_MAPPINGS[category])
+        return Extensions(extensions)
+    if field == "path":
+        try:
+            return PathRegex(value)
+        except re.error as e:
+            raise QuerySyntaxError(f"Invalid path regex '{value}': {e}")
+    if field == "size":
+        return _size_term(value)
+    return _modified_term(value, now)
+
+
+# --- Parser ---
+
+def _tokenize(text: str) -> List[str]:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise QuerySyntaxError(f"Unexpected character at position {pos} in '{text}'.")
+        tokens.append(match.group(1) or match.group(2) or match.group(3))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: List[str], now: float):
+        self.tokens = tokens
+        self.pos = 0
+        self.now = now
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _keyword(self, word: str) -> bool:
+        token = self.peek()
+        if token is not None and token.upper() == word:
+            self.pos += 1
+            return True
+        return False
+
+    def parse_or(self) -> Node:
+        nodes = [self.parse_and()]
+        while self._keyword("OR"):
+            nodes.append(self.parse_and())
+        return any_of(nodes)
+
+    def parse_and(self) -> Node:
+        nodes = [self.parse_not()]
+        while True:
+            if self._keyword("AND"):
+                nodes.append(self.parse_not())
+            elif self.peek() not in (None, ")") and self.peek().upper() != "OR":
+                nodes.append(self.parse_not())
+            else:
+                return all_of(nodes)
+
+    def parse_not(self) -> Node:
+        if self._keyword("NOT"):
+            return Not(self.parse_not())
+        token = self.peek()
+        if token is None:
+            raise QuerySyntaxError("Query ends where a term was expected.")
+        self.pos += 1
+        if token == "(":
+            node = self.parse_or()
+            if self.peek() != ")":
+                raise QuerySyntaxError("Missing ')'.")
+            self.pos += 1
+            return node
+        if token == ")" or token.upper() in ("AND", "OR"):
+            raise QuerySyntaxError(f"Unexpected '{token}'.")
+        return _term(token, self.now)
+
+
+def compile_query(text: str, now: Optional[float] = None) -> Node:
+    """Compiles a query into a predicate tree; raises QuerySyntaxError if it is malformed."""
+    tokens = _tokenize(text)
+    if not tokens:
+        return MatchAll()
+    parser = _Parser(tokens, time.time() if now is None else now)
+    node = parser.parse_or()
+    if parser.peek() is not None:
+        raise QuerySyntaxError(f"Unexpected '{parser.peek()}'.")
+    return node
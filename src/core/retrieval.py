@@ -0,0 +1,119 @@
+"""
+Relevance ranking for conversation history.
+
+A small BM25 index over history turns, updated incrementally as turns are added and
+evicted, and a selector that picks the most relevant turns for a new request within a
+prompt token budget.
+"""
+import math
+import re
+from collections import Counter
+from itertools import chain
+from typing import Dict, List
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Rough size of a token for the budget; good enough for English text and paths.
+CHARS_PER_TOKEN = 4
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases and splits text into words; paths split into their components."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class BM25Index:
+    """Okapi BM25 over a changing set of documents, with corpus statistics kept up to date on every add/remove."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts: Dict[int, Counter] = {}
+        self.lengths: Dict[int, int] = {}
+        self.doc_freq: Counter = Counter()
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.term_counts)
+
+    def add(self, doc_id: int, text: str):
+        if doc_id in self.term_counts:
+            self.remove(doc_id)
+        counts = Counter(tokenize(text))
+        self.term_counts[doc_id] = counts
+        length = sum(counts.values())
+        self.lengths[doc_id] = length
+        self.total_length += length
+        self.doc_freq.update(counts.keys())
+
+    def remove(self, doc_id: int):
+        counts = self.term_counts.pop(doc_id, None)
+        if counts is None:
+            return
+        self.total_length -= self.lengths.pop(doc_id)
+        self.doc_freq.subtract(counts.keys())
+        for term in counts:
+            if self.doc_freq[term] <= 0:
+                del self.doc_freq[term]
+
+    def idf(self, term: str) -> float:
+        n = len(self.term_counts)
+        df = self.doc_freq.get(term, 0)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """BM25 score of every document that shares at least one term with the query."""
+        if not self.term_counts:
+            return {}
+        terms = set(tokenize(query))
+        avg_length = self.total_length / len(self.term_counts) or 1
+        k1, b = self.k1, self.b
+        results: Dict[int, float] = {}
+        for term in terms:
+            if term not in self.doc_freq:
+                continue
+            idf = self.idf(term)
+            for doc_id, counts in self.term_counts.items():
+                tf = counts.get(term)
+                if not tf:
+                    continue
+                norm = k1 * (1 - b + b * self.lengths[doc_id] / avg_length)
+                results[doc_id] = results.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return results
+
+
+def select_turns(doc_ids: List[int], texts: Dict[int, str], scores: Dict[int, float],
+                 k: int, token_budget: int, keep_recent: int = 2,
+                 recency_weight: float = 0.1) -> List[int]:
+    """
+    Chooses which turns to send with a request and returns their ids in chronological order.
+
+    The `keep_recent` newest turns are always considered first, so follow-ups like "copy them"
+    keep their immediate context. The rest are ranked by relevance plus a small recency bonus.
+    Turns are taken in that order until `k` turns or `token_budget` tokens are used.
+    """
+    count = len(doc_ids)
+    recent = list(reversed(doc_ids[max(0, count - keep_recent):]))
+
+    def rank(position_and_id):
+        position, doc_id = position_and_id
+        return scores.get(doc_id, 0.0) + recency_weight * (position + 1) / count
+
+    older = [doc_id for _, doc_id in sorted(
+        enumerate(doc_ids[:max(0, count - keep_recent)]), key=rank, reverse=True)
+        if scores.get(doc_id, 0.0) > 0]
+
+    chosen, used = set(), 0
+    for doc_id in chain(recent, older):
+        if len(chosen) >= k:
+            break
+        cost = estimate_tokens(texts[doc_id])
+        if used + cost > token_budget:
+            continue
+        chosen.add(doc_id)
+        used += cost
+    return [doc_id for doc_id in doc_ids if doc_id in chosen]
+
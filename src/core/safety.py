@@ -1,59 +1,314 @@
+import itertools
+import json
 import os
-import re
+import shlex
 
-DANGEROUS_PATHS = ['/', '/etc', '/boot', '/usr']
-DESTRUCTIVE_COMMANDS = ['rm', 'mv', 'chmod', 'chown']
+from .pathset import PathArgs
 
-def is_dangerous_path(path):
-    """Checks if a path is in the list of dangerous paths."""
-    return os.path.abspath(path) in DANGEROUS_PATHS
+# Words that make a shell command modify the paths on its command line.
+DESTRUCTIVE_COMMANDS = ['rm', 'mv', 'cp', 'ln', 'mkdir', 'touch', 'chmod', 'chown', 'dd', 'truncate', 'tee',
+                        'shred', '>', '>>']
 
 def resolve_path(path):
     """Resolves symbolic links and returns the absolute path."""
     return os.path.abspath(os.path.realpath(path))
 
-def get_command_paths(command):
-    """Extracts all file paths from a command string."""
-    # This regex is a simple approach and might not cover all edge cases.
-    # It looks for sequences of characters that are likely to be file paths.
-    # It avoids matching options (like -r) by not starting with a hyphen.
-    path_pattern = re.compile(r'(?:\s|/|^)([a-zA-Z0-9_./-]+)')
-    potential_paths = path_pattern.findall(command)
+def shell_words(command):
+    """The words of a shell command, with redirections and separators like '>' and ';' as words of their own."""
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        return list(lexer)
+    except ValueError:  # unbalanced quotes
+        return command.split()
 
-    # Filter out things that are probably not paths
+def get_command_paths(command, cwd="."):
+    """Extracts the words of a command string that look like file paths, with ~ and $VARS expanded."""
     paths = []
-    for p in potential_paths:
-        # A very basic filter: if it contains a slash or a dot, it's probably a path.
-        # This is to avoid matching simple arguments or parts of commands.
-        if '/' in p or '.' in p or os.path.exists(p):
-            paths.append(p.strip())
-
+    for word in shell_words(command):
+        if word.startswith("-"):
+            continue
+        word = os.path.expandvars(os.path.expanduser(word))
+        # A very basic filter: a slash, a leading dot or an existing file make a word a path.
+        if "/" in word or word.startswith(".") or os.path.lexists(os.path.join(cwd, word)):
+            paths.append(word)
     return paths
 
-def confirm_destructive_command(command):
-    """Asks for user confirmation for destructive commands."""
-    command_parts = command.strip().split()
-    if not command_parts:
-        return True
-
-    cmd = command_parts[0]
-    if cmd in DESTRUCTIVE_COMMANDS:
-        print(f"You are about to run a potentially destructive command: '{command}'")
-        response = input("Are you sure you want to continue? (y/n): ").lower().strip()
-        return response == 'y'
-    return True
-
-def validate_command(command):
-    """Validates a command against all safety checks."""
-    paths = get_command_paths(command)
-    for path in paths:
-        resolved_path = resolve_path(path)
-        if is_dangerous_path(resolved_path):
-            print(f"Error: Operation on dangerous path '{resolved_path}' is not allowed.")
-            return False
-
-    if not confirm_destructive_command(command):
-        print("Operation cancelled by user.")
-        return False
-
-    return True
\ No newline at end of file
+def modifies_paths(command):
+    """Whether a shell command runs one of DESTRUCTIVE_COMMANDS or redirects output into a file."""
+    return any(os.path.basename(word) in DESTRUCTIVE_COMMANDS for word in shell_words(command))
+
+
+# --- Plan policy ---
+#
+# Before a plan is confirmed, every path a step would modify is looked up in a trie of
+# protected path prefixes. Each protected entry has a tier ("system", "sensitive", or
+# None for an exemption carved out of a protected subtree); the deepest entry on a path
+# decides its tier, and the command's rule for that tier decides the verdict.
+
+ALLOW, CONFIRM, DENY = "allow", "confirm", "deny"
+_SEVERITY = {ALLOW: 0, CONFIRM: 1, DENY: 2}
+POLICY_FILE = os.path.expanduser("~/.samantha/policy.json")
+
+# Entries protect their whole subtree; "=path" protects only the path itself.
+DEFAULT_PROTECTED = {
+    "=/": "system", "=~": "system",
+    "/etc": "system", "/boot": "system", "/usr": "system", "/bin": "system", "/sbin": "system",
+    "/lib": "system", "/lib64": "system", "/var": "system", "/sys": "system", "/proc": "system",
+    "/dev": "system",
+    "/var/tmp": None,
+    "~/.ssh": "sensitive", "~/.gnupg": "sensitive", "~/.config": "sensitive", "~/.samantha": "sensitive",
+}
+# Which arguments of a command it modifies: "all" of them or only the "last" (a destination).
+MODIFIED_ARGS = {"rm": "all", "mv": "all", "cp": "last", "ln": "last", "mkdir": "all", "touch": "all"}
+# Keyword arguments naming a file the command writes.
+MODIFIED_KWARGS = {"checksum": ("manifest",)}
+# Verdict per command and tier; commands and tiers not listed are allowed. execute_bash is
+# checked on the paths in its command line when it modifies them, and its "shell" tier
+# applies to every shell command.
+DEFAULT_RULES = {cmd: {"system": DENY, "sensitive": CONFIRM} for cmd in (*MODIFIED_ARGS, *MODIFIED_KWARGS)}
+DEFAULT_RULES["execute_bash"] = {"system": DENY, "sensitive": CONFIRM, "shell": CONFIRM}
+
+class PathTrie:
+    """Path prefixes split into components; a lookup walks a path once and returns the deepest entry's tier."""
+
+    _SUBTREE, _EXACT = object(), object()
+
+    def __init__(self, entries=None):
+        self._root = {}
+        for path, tier in (entries or {}).items():
+            self.add(path, tier)
+
+    def add(self, path, tier):
+        exact = path.startswith("=")
+        path = os.path.abspath(os.path.expanduser(path[1:] if exact else path))
+        node = self._root
+        for part in _components(path):
+            node = node.setdefault(part, {})
+        node[self._EXACT if exact else self._SUBTREE] = tier
+
+    def lookup(self, path):
+        """(matched prefix, tier) for an absolute, normalized path, or (None, None)."""
+        directory, name = os.path.split(path)
+        return self.lookup_entry(self.walk(directory), name)
+
+    def walk(self, directory):
+        """
+        The state after walking an absolute directory's components: (node or None, depth
+        of the deepest subtree entry on the way, its tier, the components). Lookups of many
+        names in one directory share it.
+        """
+        node = self._root
+        found_depth, found_tier = None, None
+        parts = _components(directory)
+        for depth, part in enumerate(parts):
+            if self._SUBTREE in node:
+                found_depth, found_tier = depth, node[self._SUBTREE]
+            node = node.get(part)
+            if node is None:
+                break
+        else:
+            if self._SUBTREE in node:
+                found_depth, found_tier = len(parts), node[self._SUBTREE]
+        return node, found_depth, found_tier, parts
+
+    def lookup_entry(self, state, name):
+        """lookup() of `name` inside the directory `state` came from."""
+        node, found_depth, found_tier, parts = state
+        child = node.get(name) if node is not None and name else None
+        if child is not None:
+            if self._EXACT in child:
+                return "/" + "/".join(parts + [name]), child[self._EXACT]
+            if self._SUBTREE in child:
+                return "/" + "/".join(parts + [name]), child[self._SUBTREE]
+        if not name and node is not None and self._EXACT in node:
+            return "/" + "/".join(parts), node[self._EXACT]
+        if found_depth is None:
+            return None, None
+        return "/" + "/".join(parts[:found_depth]), found_tier
+
+def _components(path):
+    return [part for part in path.split(os.sep) if part]
+
+class Finding:
+    __slots__ = ("step", "command", "path", "prefix", "tier", "verdict")
+
+    def __init__(self, step, command, path, prefix, tier, verdict):
+        self.step = step
+        self.command = command
+        self.path = path
+        self.prefix = prefix
+        self.tier = tier
+        self.verdict = verdict
+
+    def __str__(self):
+        if self.tier == "shell":
+            return f"step {self.step} runs a shell command: {self.path}"
+        return f"step {self.step} ({self.command}) would modify '{self.path}' under protected '{self.prefix}' ({self.tier})"
+
+class PolicyReport:
+    """What checking a plan found: findings to deny or confirm, and the steps that can only be checked when they run."""
+
+    def __init__(self):
+        self.findings = []
+        self.dynamic_steps = set()
+
+    @property
+    def denied(self):
+        return [f for f in self.findings if f.verdict == DENY]
+
+    @property
+    def to_confirm(self):
+        return [f for f in self.findings if f.verdict == CONFIRM]
+
+    def describe(self, verdict, limit=10):
+        findings = [f for f in self.findings if f.verdict == verdict]
+        if verdict == DENY:
+            title = "Blocked by the safety policy:"
+        elif any(f.tier == "shell" for f in findings):
+            title = "Warning: this plan modifies protected paths or runs shell commands:"
+        else:
+            title = "Warning: this plan modifies protected paths:"
+        lines = [title] + [f"  - {f}" for f in findings[:limit]]
+        if len(findings) > limit:
+            lines.append(f"  ... and {len(findings) - limit} more.")
+        return "\n".join(lines)
+
+class Policy:
+    """Protected paths and per-command rules; checks resolved plan steps against them."""
+
+    def __init__(self, protected=None, rules=None, warning=None):
+        # Why this policy is not the one the user configured, for the session to show; None if it is.
+        self.warning = warning
+        self.trie = PathTrie(DEFAULT_PROTECTED if protected is None else protected)
+        self.rules = {cmd: dict(tiers) for cmd, tiers in (DEFAULT_RULES if rules is None else rules).items()}
+
+    def check_step(self, step_no, command, args, cwd, realdirs=None, kwargs=None):
+        """
+        Findings for one step whose arguments are already expanded. `realdirs` memoizes, per
+        directory, its realpath and trie walks, so many paths in one directory cost little more than one.
+        """
+        tiers = self.rules.get(command)
+        if not tiers:
+            return []
+        if command == "execute_bash":
+            return self._check_shell(step_no, " ".join(arg for arg in args if isinstance(arg, str)), cwd, realdirs)
+        which = MODIFIED_ARGS.get(command)
+        paths = (args if which == "all" else args[-1:]) if which and args else []
+        named = [(kwargs or {}).get(name) for name in MODIFIED_KWARGS.get(command, ())]
+        return self._check_paths(step_no, command, itertools.chain(paths, named), tiers, cwd, realdirs)
+
+    def _check_shell(self, step_no, command, cwd, realdirs):
+        tiers = self.rules["execute_bash"]
+        findings = []
+        if modifies_paths(command):
+            findings = self._check_paths(step_no, "execute_bash", get_command_paths(command, cwd), tiers, cwd, realdirs)
+        verdict = tiers.get("shell", ALLOW)
+        if not findings and verdict != ALLOW and command:
+            findings.append(Finding(step_no, "execute_bash", command, None, "shell", verdict))
+        return findings
+
+    def _check_paths(self, step_no, command, paths, tiers, cwd, realdirs):
+        realdirs = {} if realdirs is None else realdirs
+        findings = []
+        for arg in paths:
+            if not isinstance(arg, str):
+                continue
+            path = os.path.abspath(os.path.join(cwd, os.path.expanduser(arg)))
+            directory, name = os.path.split(path)
+            states = realdirs.get(directory)
+            if states is None:
+                real_dir = os.path.realpath(directory)
+                states = [self.trie.walk(directory)]
+                if real_dir != directory:
+                    states.append(self.trie.walk(real_dir))
+                realdirs[directory] = states
+            # The last component is checked as named: rm and mv act on a symlink, not its target.
+            worst = None
+            for state in states:
+                prefix, tier = self.trie.lookup_entry(state, name)
+                verdict = tiers.get(tier, ALLOW) if tier else ALLOW
+                if verdict != ALLOW and (worst is None or _SEVERITY[verdict] > _SEVERITY[worst.verdict]):
+                    worst = Finding(step_no, command, path, prefix, tier, verdict)
+            if worst:
+                findings.append(worst)
+        return findings
+
+    def check_plan(self, plan, cwd, last_files=None):
+        """
+        Checks every step whose paths are known before it runs: literal arguments and kwargs,
+        '$results.last' in the first step, and {result_of_step_N} of mv and cp steps.
+        Paths are resolved against `cwd` as moved by the plan's own cd steps; once a cd
+        goes somewhere not known in advance, every later step is dynamic. Other steps are
+        listed in `dynamic_steps`, to be checked with check_step as they run.
+        """
+        report = PolicyReport()
+        realdirs = {}
+        static_outputs = []
+        cwd_known = True
+        for step_no, step in enumerate(plan.get("steps", []), 1):
+            command = step.get("cmd")
+            args = PathArgs()
+            dynamic = False
+            for arg in step.get("args", []):
+                if isinstance(arg, str) and arg.startswith("{result_of_step_") and arg.endswith("}"):
+                    try:
+                        ref = static_outputs[int(arg[len("{result_of_step_"):-1]) - 1]
+                    except (ValueError, IndexError):
+                        ref = None
+                    if ref is None:
+                        dynamic = True
+                    else:
+                        args.extend(ref)
+                elif arg == "$results.last":
+                    if step_no == 1 and last_files:
+                        args.extend(last_files)
+                    else:
+                        dynamic = True
+                else:
+                    args.append(arg)
+            static_outputs.append(args if command in ("mv", "cp") and not dynamic else None)
+            if dynamic or not cwd_known:
+                report.dynamic_steps.add(step_no)
+            else:
+                report.findings.extend(self.check_step(step_no, command, args, cwd, realdirs, step.get("kwargs")))
+            if command == "cd" and cwd_known:
+                if dynamic or not args or not isinstance(args[0], str):
+                    cwd_known = False
+                else:
+                    cwd = os.path.realpath(os.path.join(cwd, os.path.expanduser(args[0])))
+        return report
+
+def load_policy(path=POLICY_FILE):
+    """
+    The policy in `path`, a JSON object like {"protected": {"/srv/www": "system",
+    "=/data": "system", "/usr/local/src": null}, "rules": {"rm": {"sensitive": "deny"}}}.
+    Its entries are added to (or override) the defaults. Without the file, the defaults.
+    """
+    protected = dict(DEFAULT_PROTECTED)
+    rules = {cmd: dict(tiers) for cmd, tiers in DEFAULT_RULES.items()}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        protected.update(config.get("protected", {}))
+        for cmd, tiers in config.get("rules", {}).items():
+            for tier, verdict in tiers.items():
+                if verdict not in _SEVERITY:
+                    raise ValueError(f"Invalid verdict '{verdict}' for '{cmd}' in {path}; use allow, confirm or deny.")
+            rules.setdefault(cmd, {}).update(tiers)
+    return Policy(protected, rules)
+
+_DEFAULT_POLICY = None
+
+def default_policy():
+    """
+    The user's policy, loaded once. A broken policy file falls back to the defaults, never
+    to no policy, with a `warning` saying so.
+    """
+    global _DEFAULT_POLICY
+    if _DEFAULT_POLICY is None:
+        try:
+            _DEFAULT_POLICY = load_policy(POLICY_FILE)
+        except (OSError, ValueError) as e:
+            _DEFAULT_POLICY = Policy(warning=f"Warning: ignoring {POLICY_FILE}: {e}")
+    return _DEFAULT_POLICY
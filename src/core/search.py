@@ -1,80 +1,170 @@
 import os
-import fnmatch
 import difflib
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+from .archives import ARCHIVE_SUFFIXES, ArchiveSearch
+from .metrics import REGISTRY as METRICS, record_directory_read, record_file_read
+from .pathset import PathSet
+from .tracing import span
+from .query import Extensions, MtimeRange, NameGlob, QuerySyntaxError, SizeRange, all_of, compile_query
 from .utils import parse_size_filter, parse_date_filter, FILE_TYPE_MAPPINGS
 
-def find_files(name_pattern, path='.', size=None, modified=None, file_type=None):
-    """
-    Finds files by name using a cross-platform implementation, with optional filters for size, modification date, and file type.
-    """
-    matches = []
+def _legacy_filters(size=None, modified=None, file_type=None):
+    """find_files' single-value filters as predicate nodes, with the same meaning as always."""
+    nodes = []
     size_op, size_val = parse_size_filter(size)
+    if size_op and size_val is not None:
+        nodes.append({'>': SizeRange(size_val + 1, None), '<': SizeRange(None, size_val),
+                      '=': SizeRange(size_val, size_val + 1)}[size_op])
     date_op, date_val = parse_date_filter(modified)
-
-    type_extensions = None
+    if date_op and date_val:
+        # '>' means older than, so mtime should be before the calculated date; '<' newer than.
+        if date_op == '>':
+            nodes.append(MtimeRange(None, date_val.timestamp()))
+        elif date_op == '<':
+            nodes.append(MtimeRange(date_val.timestamp(), None))
+        else:
+            day = datetime.combine(date_val.date(), datetime.min.time())
+            nodes.append(MtimeRange(day.timestamp(), (day + timedelta(days=1)).timestamp()))
     if file_type and file_type in FILE_TYPE_MAPPINGS:
-        type_extensions = FILE_TYPE_MAPPINGS[file_type]
-
-    for root, dirnames, filenames in os.walk(path):
-        for filename in fnmatch.filter(filenames, name_pattern):
-            filepath = os.path.join(root, filename)
+        nodes.append(Extensions(FILE_TYPE_MAPPINGS[file_type]))
+    return nodes
 
+def _iter_entries(path):
+    """Non-directory entries under `path` in os.walk order; like os.walk, symlinked directories are neither listed nor entered."""
+    stack = [path]
+    while stack:
+        directory = stack.pop()
+        subdirs = []
+        started = time.perf_counter() if METRICS.enabled else 0
+        try:
+            # Listed in full before yielding, so the directory is closed (and timed) before any caller work.
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        if started:
+            record_directory_read("find_files", started, len(entries))
+        for entry in entries:
             try:
-                # Size filter
-                if size_op and size_val is not None:
-                    file_size = os.path.getsize(filepath)
-                    if size_op == '>' and not file_size > size_val:
-                        continue
-                    if size_op == '<' and not file_size < size_val:
-                        continue
-                    if size_op == '=' and not file_size == size_val:
-                        continue
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                yield entry
+            elif not entry.is_symlink():
+                subdirs.append(entry.path)
+        stack.extend(reversed(subdirs))
 
-                # Date filter
-                if date_op and date_val:
-                    file_mtime = datetime.fromtimestamp(os.path.getmtime(filepath))
-                    # '>' means older than, so mtime should be less than the calculated date
-                    if date_op == '>' and not file_mtime < date_val:
-                        continue
-                    # '<' means newer than, so mtime should be greater than the calculated date
-                    if date_op == '<' and not file_mtime > date_val:
-                        continue
-                    if date_op == '=' and not file_mtime.date() == date_val.date():
-                        continue
+def find_files(name_pattern, path='.', size=None, modified=None, file_type=None, query=None):
+    """
+    Finds files by name using a cross-platform implementation, with optional filters for size, modification date, and file type.
+    `query` is an expression in the find-files query language (see core/query.py) that must match as well.
 
-                # File type filter
-                if type_extensions:
-                    if not any(filename.lower().endswith(ext) for ext in type_extensions):
-                        continue
+    All conditions are compiled into one predicate tree that checks names before it needs a
+    file's stat, so a file rejected by its name or type is never stat'ed. The matches come
+    back as a PathSet, which holds millions of paths in a fraction of a list's memory.
+    """
+    with span("compile filters", "search"):
+        nodes = [] if name_pattern in (None, '', '*') else [NameGlob([name_pattern], case_sensitive=True)]
+        nodes.extend(_legacy_filters(size, modified, file_type))
+        if query:
+            nodes.append(compile_query(query))
+        predicate = all_of(nodes)
 
-                matches.append(filepath)
+    matches = PathSet()
+    with span("walk and match", "search", path=path) as walk:
+        for entry in _iter_entries(path):
+            try:
+                if predicate.matches(entry):
+                    matches.append(entry.path)
             except FileNotFoundError:
                 # File might have been deleted during the walk, so we skip it
                 continue
-
+        walk.set(matches=len(matches))
     return matches
 
-def search_in_files(content_pattern, path='.'):
+def iter_files(roots):
+    """Yields (path, stat) for every regular file under the roots, without following symlinks."""
+    stack = list(roots)
+    while stack:
+        directory = stack.pop()
+        started = time.perf_counter() if METRICS.enabled else 0
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        if started:
+            record_directory_read("iter_files", started, len(entries))
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path, entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+
+def search_in_files(content_pattern, path='.', pdf_cache=None):
     """
     Searches for files containing all space-separated keywords in the content_pattern (case-insensitive).
     Returns a list of matching file paths and the first line that contains one of the keywords.
+    Members of compressed files and archives are searched too, and reported as 'archive!member:line:text'.
+    PDFs are searched by their extracted text, kept in `pdf_cache` (a PdfTextCache) when one is given.
     """
     search_terms = content_pattern.lower().split()
     if not search_terms:
         return []
 
+    with span("read and match", "search", path=path) as scan:
+        matches = _match_files(search_terms, path, pdf_cache)
+        scan.set(matches=len(matches))
+    return matches
+
+def _match_text(filepath, text, search_terms):
+    """'path:line:text' for the first line with any of the terms, if the text contains them all."""
+    content = text.lower()
+    if all(term in content for term in search_terms):
+        for i, line in enumerate(text.splitlines(), 1):
+            if any(term in line.lower() for term in search_terms):
+                return f"{filepath}:{i}:{line.strip()}"
+    return None
+
+def _match_files(search_terms, path, pdf_cache=None):
     matches = []
+    archives = None
     for root, dirnames, filenames in os.walk(path):
-        # Exclude common binary file extensions to speed up search
-        filenames = [f for f in filenames if not f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.pdf', '.zip', '.gz', '.tar', '.rar', '.exe', '.dll', '.so', '.pyc'))]
-
         for filename in filenames:
+            lowered = filename.lower()
+            if lowered.endswith(ARCHIVE_SUFFIXES):
+                # Compressed files and archives are searched member by member on worker threads.
+                if archives is None:
+                    archives = ArchiveSearch(search_terms)
+                archives.submit(len(matches), os.path.join(root, filename))
+                continue
+            # Exclude common binary file extensions to speed up search
+            if lowered.endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.rar', '.exe', '.dll', '.so', '.pyc')):
+                continue
+
             filepath = os.path.join(root, filename)
             try:
+                if lowered.endswith('.pdf'):
+                    from .pdf_text import pdf_text
+                    # Searched by its extracted text; a .pdf that isn't really one is read as text below.
+                    text = pdf_text(filepath, pdf_cache)
+                    if text is not None:
+                        match = _match_text(filepath, text, search_terms)
+                        if match:
+                            matches.append(match)
+                        continue
+
+                started = time.perf_counter() if METRICS.enabled else 0
                 # Read the whole file content to check for all keywords.
                 with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read().lower()
+                if started:
+                    record_file_read("search_in_files", started, len(content))
 
                 # If all keywords are present in the file content
                 if all(term in content for term in search_terms):
@@ -87,6 +177,9 @@ def search_in_files(content_pattern, path='.'):
             except (IOError, OSError):
                 # Ignore files that can't be opened or read
                 continue
+    if archives is not None:
+        with span("search archives", "search"):
+            matches = archives.merge(matches)
     return matches
 
 def find_best_match(query, candidates):
@@ -0,0 +1,177 @@
+"""
+Persistent, bounded storage for conversation memory across Samantha invocations.
+
+Each session keeps a ring buffer of its most recent turns plus its last plan and
+structured results in a small SQLite database under ~/.samantha/. Loading reads only
+the newest turns through an index, and every write trims the session's buffer and the
+number of sessions, so the file stays small no matter how long Samantha is used.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.core.pathset import FileListing
+
+DEFAULT_DB_PATH = os.path.expanduser("~/.samantha/sessions.db")
+MAX_TURNS_PER_SESSION = 50
+MAX_SESSIONS = 20
+# Outputs are truncated before being stored, so one huge `find_files` can't bloat the file.
+MAX_OUTPUT_CHARS = 8000
+MAX_STORED_FILES = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    last_plan TEXT,
+    last_results TEXT,
+    last_files TEXT,
+    cwd TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_age ON sessions (updated_at);
+"""
+
+
+def default_session_id() -> str:
+    """
+    The session to use when none is given: $SAMANTHA_SESSION if set, otherwise one per
+    parent shell, so commands typed in the same terminal share their context.
+    """
+    return os.environ.get("SAMANTHA_SESSION") or f"shell-{os.getppid()}"
+
+
+def _truncate(text: str, limit: int = MAX_OUTPUT_CHARS) -> str:
+    if isinstance(text, FileListing):
+        return text.text(limit)
+    if not isinstance(text, str) or len(text) <= limit:
+        return text
+    return text[:limit] + f"\n... [truncated {len(text) - limit} characters]"
+
+
+def compact_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copies step results with their outputs truncated for storage."""
+    return [{"status": r.get("status"), "output": _truncate(r.get("output"))} for r in results or []]
+
+
+class SessionStore:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_turns: int = MAX_TURNS_PER_SESSION,
+                 max_sessions: int = MAX_SESSIONS):
+        self.db_path = db_path
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self._conn = None
+        # One connection shared by every thread of a long-running process, one operation at a time.
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def load_history(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Returns the session's newest turns, oldest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT role, content FROM turns WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, limit or self.max_turns)).fetchall()
+            return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def load_state(self, session_id: str) -> Dict[str, Any]:
+        """Returns the session's last plan, results, result files and working directory."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT last_plan, last_results, last_files, cwd FROM sessions WHERE session_id = ?",
+                (session_id,)).fetchone()
+            if not row:
+                return {"last_plan": None, "last_results": [], "last_files": [], "cwd": None}
+            last_plan, last_results, last_files, cwd = row
+            return {
+                "last_plan": json.loads(last_plan) if last_plan else None,
+                "last_results": json.loads(last_results) if last_results else [],
+                "last_files": json.loads(last_files) if last_files else [],
+                "cwd": cwd,
+            }
+
+    def append_turns(self, session_id: str, turns: List[Dict[str, str]]):
+        """Appends turns to the session's ring buffer, dropping the oldest beyond `max_turns`."""
+        if not turns:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                (last_seq,) = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM turns WHERE session_id = ?", (session_id,)).fetchone()
+                now = time.time()
+                conn.executemany(
+                    "INSERT INTO turns (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(session_id, last_seq + i, t["role"], _truncate(t["content"]), now)
+                     for i, t in enumerate(turns, 1)])
+                conn.execute("DELETE FROM turns WHERE session_id = ? AND seq <= ?",
+                             (session_id, last_seq + len(turns) - self.max_turns))
+                self._touch(conn, session_id, now)
+
+    def save_state(self, session_id: str, last_plan: Optional[Dict[str, Any]] = None,
+                   last_results: Optional[List[Dict[str, Any]]] = None,
+                   last_files: Optional[Sequence[str]] = None, cwd: Optional[str] = None):
+        """Stores the structured outcome of the session's latest command."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                now = time.time()
+                self._touch(conn, session_id, now)
+                conn.execute(
+                    "UPDATE sessions SET last_plan = ?, last_results = ?, last_files = ?, cwd = ? WHERE session_id = ?",
+                    (json.dumps(last_plan) if last_plan is not None else None,
+                     json.dumps(compact_results(last_results)),
+                     json.dumps(list(islice(last_files or [], MAX_STORED_FILES))),
+                     cwd, session_id))
+
+    def _touch(self, conn: sqlite3.Connection, session_id: str, now: float):
+        conn.execute(
+            "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (session_id, now))
+        # Keep only the most recently used sessions.
+        stale = [row[0] for row in conn.execute(
+            "SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+            (self.max_sessions,))]
+        if stale:
+            marks = ",".join("?" * len(stale))
+            conn.execute(f"DELETE FROM turns WHERE session_id IN ({marks})", stale)
+            conn.execute(f"DELETE FROM sessions WHERE session_id IN ({marks})", stale)
+
+    def clear(self, session_id: str):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+                conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def list_sessions(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._connect().execute(
+                "SELECT session_id FROM sessions ORDER BY updated_at DESC")]
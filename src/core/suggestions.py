@@ -1,5 +1,23 @@
+"""
+Proactive suggestions.
+
+Suggestions come from analyzers: small checks such as "are there lots of screenshots on
+the Desktop?". The engine runs each analyzer in a background thread while the user's
+command is being handled and only shows results that are already available, so a slow
+scan never delays a command. Results are cached in ~/.samantha/ for the analyzer's TTL
+and are thrown away early as soon as one of the directories it watches changes (mtime).
+"""
+import json
 import os
-import glob
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.samantha/suggestions.json")
+DEFAULT_TTL = 600.0
+
+SCREENSHOT_PREFIXES = ("Screen Shot ", "Screenshot_")
+
 
 def suggest_desktop_cleanup(desktop_path="~/Desktop", threshold=5):
     """
@@ -10,15 +28,14 @@ def suggest_desktop_cleanup(desktop_path="~/Desktop", threshold=5):
     if not os.path.isdir(desktop_path):
         return None
 
-    # Common screenshot patterns for macOS and other systems
-    screenshot_patterns = [
-        os.path.join(desktop_path, "Screen Shot *.png"),
-        os.path.join(desktop_path, "Screenshot_*.png")
-    ]
-
-    screenshot_files = []
-    for pattern in screenshot_patterns:
-        screenshot_files.extend(glob.glob(pattern))
+    # Common screenshot names for macOS and other systems, found in a single directory listing
+    try:
+        with os.scandir(desktop_path) as entries:
+            screenshot_files = sorted(
+                entry.path for entry in entries
+                if entry.name.startswith(SCREENSHOT_PREFIXES) and entry.name.endswith(".png"))
+    except OSError:
+        return None
 
     if len(screenshot_files) >= threshold:
         suggestion = {
@@ -46,4 +63,193 @@ def suggest_desktop_cleanup(desktop_path="~/Desktop", threshold=5):
         }
         return suggestion
 
-    return None
\ No newline at end of file
+    return None
+
+
+def suggest_duplicate_cleanup(folder_path="~/Downloads", min_reclaimable=10 * 1024 * 1024):
+    """
+    Looks for files with identical content in a folder and, if they waste enough space,
+    suggests replacing the redundant copies with hard links.
+    """
+    from src.core import duplicates
+    from src.core.utils import format_size
+
+    folder_path = os.path.expanduser(folder_path)
+    if not os.path.isdir(folder_path):
+        return None
+    groups = duplicates.find_duplicates([folder_path], cache=duplicates.default_digest_cache())
+    reclaimable = sum(g["reclaimable"] for g in groups)
+    if reclaimable < min_reclaimable:
+        return None
+    copies = sum(len(g["paths"]) - 1 for g in groups)
+    return {
+        "type": "storage",
+        "title": "Duplicate Files Suggestion",
+        "message": f"{copies} files in '{folder_path}' are exact copies of other files there, wasting "
+                   f"{format_size(reclaimable)}. Would you like me to replace the copies with hard links?",
+        "actionable_plan": duplicates.dedupe_plan(groups, action="hardlink"),
+    }
+
+
+class Analyzer:
+    """
+    One proactive check. `run()` returns a suggestion dict or None. Its result is reused
+    for `ttl` seconds unless the modification time of one of the `watch` directories changes,
+    or `validate(result)` says it no longer holds.
+    """
+
+    def __init__(self, name: str, run: Callable[[], Optional[dict]], watch: List[str] = (),
+                 ttl: float = DEFAULT_TTL, validate: Optional[Callable[[dict], bool]] = None):
+        self.name = name
+        self.run = run
+        self.watch = list(watch)
+        self.ttl = ttl
+        # Checks a cached result is still safe to offer; the watched mtimes only see top-level changes.
+        self.validate = validate
+
+    def watched_mtimes(self) -> Dict[str, Optional[int]]:
+        mtimes = {}
+        for path in self.watch:
+            try:
+                mtimes[path] = os.stat(os.path.expanduser(path)).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+
+class SuggestionCache:
+    """Analyzer results on disk, shared by every Samantha process of the user."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, analyzer: Analyzer):
+        """Returns (True, result) for a fresh cached result, (False, None) otherwise."""
+        with self._lock:
+            entry = self._load().get(analyzer.name)
+        if not entry or time.time() - entry.get("computed_at", 0) > analyzer.ttl:
+            return False, None
+        if entry.get("mtimes") != analyzer.watched_mtimes():
+            return False, None
+        result = entry.get("result")
+        if result and analyzer.validate is not None and not analyzer.validate(result):
+            return False, None
+        return True, result
+
+    def put(self, analyzer: Analyzer, result: Optional[dict], mtimes: Dict[str, Optional[int]]):
+        with self._lock:
+            data = self._load()
+            data[analyzer.name] = {"computed_at": time.time(), "mtimes": mtimes, "result": result}
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # Write then rename, so a process killed mid-write never leaves a broken file.
+                tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
+
+
+ANALYZERS: List[Analyzer] = []
+
+
+def register_analyzer(analyzer: Analyzer):
+    """Adds an analyzer to the default set, replacing any analyzer with the same name."""
+    ANALYZERS[:] = [a for a in ANALYZERS if a.name != analyzer.name] + [analyzer]
+
+
+register_analyzer(Analyzer("desktop_cleanup", suggest_desktop_cleanup, watch=["~/Desktop"]))
+
+
+def _duplicate_plan_is_current(suggestion: dict) -> bool:
+    from src.core import duplicates
+    return duplicates.plan_is_current(suggestion.get("actionable_plan"))
+
+
+register_analyzer(Analyzer("duplicate_files", suggest_duplicate_cleanup, watch=["~/Downloads"], ttl=3600.0,
+                           validate=_duplicate_plan_is_current))
+
+
+class SuggestionEngine:
+    def __init__(self, analyzers: Optional[List[Analyzer]] = None, cache: Optional[SuggestionCache] = None):
+        self.analyzers = list(ANALYZERS if analyzers is None else analyzers)
+        self.cache = cache or SuggestionCache()
+        self._ready: Dict[str, Optional[dict]] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Starts a background run of every analyzer whose cached result is stale. Fresh cached
+        results become ready immediately, without a thread. Never waits for an analyzer.
+        """
+        for analyzer in self.analyzers:
+            with self._lock:
+                running = self._threads.get(analyzer.name)
+                if running and running.is_alive():
+                    continue
+            hit, result = self.cache.get(analyzer)
+            with self._lock:
+                if hit:
+                    self._ready[analyzer.name] = result
+                    continue
+                running = self._threads.get(analyzer.name)
+                if running and running.is_alive():
+                    continue
+                thread = threading.Thread(target=self._run, args=(analyzer,), daemon=True,
+                                          name=f"suggestion-{analyzer.name}")
+                self._threads[analyzer.name] = thread
+            thread.start()
+
+    def _run(self, analyzer: Analyzer):
+        hit, result = self.cache.get(analyzer)
+        if not hit:
+            # Take the mtimes first, so changes made during the scan invalidate its result.
+            mtimes = analyzer.watched_mtimes()
+            try:
+                result = analyzer.run()
+            except Exception:
+                # A broken analyzer must never get in the way of the user's command.
+                result = None
+            self.cache.put(analyzer, result, mtimes)
+        with self._lock:
+            self._ready[analyzer.name] = result
+
+    def ready(self) -> List[dict]:
+        """Takes the suggestions that are available now; analyzers still running are skipped."""
+        with self._lock:
+            results = [result for result in self._ready.values() if result]
+            self._ready.clear()
+        return results
+
+    def wait(self, timeout: Optional[float] = None):
+        """Waits for the analyzers that are running (for tests and benchmarks)."""
+        with self._lock:
+            threads = list(self._threads.values())
+        for thread in threads:
+            thread.join(timeout)
+
+
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def default_engine() -> SuggestionEngine:
+    """The process-wide engine, so a long-running process keeps one scan per analyzer in flight."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = SuggestionEngine()
+        return _ENGINE
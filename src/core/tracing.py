@@ -0,0 +1,217 @@
+"""
+Per-request timelines in the Chrome trace-event format (chrome://tracing, ui.perfetto.dev).
+
+`span()` marks a phase of handling a request: planning, each model attempt, the preview,
+the wait for the user's confirmation, every plan step and the search and copy work
+inside them. Spans nest by time on the thread that ran them and become complete ("X")
+events. Like metrics, tracing is off unless the CLI is given `--trace FILE`; until then
+`span()` returns a shared no-op.
+
+With a sample interval, a `sys.setprofile` hook also records the Python stack at most
+once per interval on every thread, at the next call or return after the interval has
+passed. The samples are folded into a flame chart on a separate "Python stack samples"
+track, so time inside a step can be attributed to the functions that used it.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+MAX_STACK_DEPTH = 64
+# Sample tracks get their own process id, beyond Linux's pid_max so it can't be a real process.
+_SAMPLE_PID_OFFSET = 1 << 22
+
+
+class Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0
+
+    def set(self, **args):
+        """Adds details known only once the work is done, e.g. how many files were found."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer._complete(self, time.perf_counter_ns())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class StackSampler:
+    """Records (time_ns, thread id, stack) at most once per interval per thread, from a profile hook."""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval_ns = int(interval * 1e9)
+        self.samples = []
+        self._last = {}
+        self._labels = {}
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _hook(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        tid = threading.get_native_id()
+        if now - self._last.get(tid, 0) < self.interval_ns:
+            return
+        self._last[tid] = now
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        self.samples.append((now, tid, tuple(stack)))
+
+    def start(self):
+        threading.setprofile(self._hook)
+        sys.setprofile(self._hook)
+
+    def stop(self):
+        sys.setprofile(None)
+        threading.setprofile(None)
+
+
+def fold_samples(samples: List, end_ns: int, interval_ns: int) -> List:
+    """
+    Turns stack samples into nested (tid, depth, label, start_ns, end_ns) slices: a frame's
+    slice lasts from the first sample it appears in to the first one it doesn't.
+    """
+    slices = []
+    by_thread = {}
+    for ts, tid, stack in samples:
+        by_thread.setdefault(tid, []).append((ts, stack))
+    for tid, thread_samples in by_thread.items():
+        open_frames = []  # (label, start_ns)
+        last_ts = thread_samples[0][0]
+        for ts, stack in thread_samples:
+            common = 0
+            while common < min(len(open_frames), len(stack)) and open_frames[common][0] == stack[common]:
+                common += 1
+            while len(open_frames) > common:
+                label, start = open_frames.pop()
+                slices.append((tid, len(open_frames), label, start, ts))
+            open_frames.extend((label, ts) for label in stack[common:])
+            last_ts = ts
+        close_at = min(end_ns, last_ts + interval_ns)
+        while open_frames:
+            label, start = open_frames.pop()
+            slices.append((tid, len(open_frames), label, start, max(close_at, start)))
+    return slices
+
+
+class Tracer:
+    """Collects trace events for the current process while enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.origin_ns = 0
+        self.pid = os.getpid()
+        self.sampler: Optional[StackSampler] = None
+        self._thread_names = {}
+
+    def start(self, sample_interval: Optional[float] = None):
+        """Starts recording; with `sample_interval` (seconds), Python stacks are sampled too."""
+        self.events = []
+        self._thread_names = {}
+        self.origin_ns = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.enabled = True
+        if sample_interval:
+            self.sampler = StackSampler(sample_interval)
+            self.sampler.start()
+
+    def _us(self, ns: int) -> float:
+        return (ns - self.origin_ns) / 1000
+
+    def _tid(self) -> int:
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def _complete(self, span: Span, end_ns: int):
+        self.events.append({"name": span.name, "cat": span.cat, "ph": "X", "ts": self._us(span.start),
+                            "dur": (end_ns - span.start) / 1000, "pid": self.pid, "tid": self._tid(),
+                            "args": span.args})
+
+    def span(self, name: str, cat: str = "samantha", **args):
+        return Span(self, name, cat, args) if self.enabled else NULL_SPAN
+
+    def instant(self, name: str, cat: str = "samantha", **args):
+        if self.enabled:
+            self.events.append({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": self._us(time.perf_counter_ns()),
+                                "pid": self.pid, "tid": self._tid(), "args": args})
+
+    def stop(self) -> Dict:
+        """Stops recording and returns the trace as a JSON-ready dict."""
+        end_ns = time.perf_counter_ns()
+        self.enabled = False
+        events = list(self.events)
+        meta = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "samantha"}}]
+        meta += [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                 for tid, name in self._thread_names.items()]
+        if self.sampler is not None:
+            self.sampler.stop()
+            sample_pid = self.pid + _SAMPLE_PID_OFFSET
+            meta.append({"name": "process_name", "ph": "M", "pid": sample_pid, "args": {"name": "Python stack samples"}})
+            for tid, depth, label, start, end in fold_samples(self.sampler.samples, end_ns, self.sampler.interval_ns):
+                events.append({"name": label, "cat": "sample", "ph": "X", "ts": self._us(start),
+                               "dur": (end - start) / 1000, "pid": sample_pid, "tid": tid})
+            self.sampler = None
+        # Viewers nest same-thread slices best when parents come before their children.
+        events.sort(key=lambda e: (e["ts"], -e.get("dur", 0)))
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str) -> Dict:
+        """Stops recording and writes the trace to `path`."""
+        trace = self.stop()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        return trace
+
+
+TRACER = Tracer()
+
+
+def span(name: str, cat: str = "samantha", **args):
+    """A context manager timing one phase; a shared no-op while tracing is off."""
+    return TRACER.span(name, cat, **args) if TRACER.enabled else NULL_SPAN
+
+
+def instant(name: str, cat: str = "samantha", **args):
+    TRACER.instant(name, cat, **args)
@@ -97,4 +97,12 @@ FILE_TYPE_MAPPINGS = {
     "audio": [".mp3", ".wav", ".aac", ".flac", ".ogg"],
     "video": [".mp4", ".mkv", ".avi", ".mov", ".wmv"],
     "logs": [".log"],
-}
\ No newline at end of file
+}
+
+def format_size(num_bytes: int) -> str:
+    """Formats a byte count for people, e.g. 1536 -> '1.5 KB'."""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{int(size)} B" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
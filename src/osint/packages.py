@@ -0,0 +1,280 @@
+"""
+Structured, cached package metadata for openEuler (and other rpm/dnf systems).
+
+`dnf` takes seconds per call just to load repository metadata, so this layer:
+
+  - asks about many packages in one `rpm -q --queryformat` (installed) or one
+    `dnf repoquery --queryformat` (available) run, and parses the output into records;
+  - keeps the records in ~/.samantha/packages.db, stamped with the modification time of
+    the metadata they came from (the rpm database for installed packages, dnf's cached
+    repomd.xml files for available ones). A record is reused while that stamp is
+    unchanged and it is younger than MAX_AGE, so a `dnf makecache` or an install
+    invalidates exactly what it should.
+
+Commands run through an injectable `runner(argv) -> (returncode, stdout)`, so tests can
+stub the tools' output.
+"""
+import glob
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+PACKAGES_DB_PATH = os.path.expanduser("~/.samantha/packages.db")
+MAX_AGE = 24 * 3600
+BATCH_SIZE = 200
+RPMDB_FILES = ["/var/lib/rpm/rpmdb.sqlite", "/var/lib/rpm/Packages", "/usr/lib/sysimage/rpm/rpmdb.sqlite"]
+REPO_METADATA_GLOBS = ["/var/cache/dnf/*/repodata/repomd.xml", "/var/cache/dnf/*.solv"]
+
+FIELDS = ["name", "epoch", "version", "release", "arch", "size", "license", "url", "repo", "summary"]
+# The summary is last: it is the only field that may contain anything, even tabs.
+_RPM_FORMAT = "\t".join(["%{NAME}", "%{EPOCH}", "%{VERSION}", "%{RELEASE}", "%{ARCH}", "%{SIZE}",
+                         "%{LICENSE}", "%{URL}", "installed", "%{SUMMARY}"]) + "\n"
+_DNF_FORMAT = "\t".join(["%{name}", "%{epoch}", "%{version}", "%{release}", "%{arch}", "%{size}",
+                         "%{license}", "%{url}", "%{reponame}", "%{summary}"]) + "\n"
+_NOT_INSTALLED_RE = re.compile(r"^package (\S+) is not installed$")
+_SEARCH_LINE_RE = re.compile(r"^(\S+)\.(\S+)\s+:\s+(.*)$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    stamp REAL,
+    fetched REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+"""
+
+
+class PackageQueryError(RuntimeError):
+    """Raised when rpm or dnf can't be run or fails without telling anything about the packages."""
+
+
+def run_command(argv: List[str]) -> Tuple[int, str]:
+    try:
+        result = subprocess.run(argv, capture_output=True, text=True)
+    except FileNotFoundError:
+        raise PackageQueryError(f"Command not found: {argv[0]}")
+    return result.returncode, result.stdout
+
+
+def _latest_mtime(paths: Iterable[str]) -> Optional[float]:
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime)
+        except OSError:
+            continue
+    return max(mtimes) if mtimes else None
+
+
+def rpmdb_stamp() -> Optional[float]:
+    return _latest_mtime(RPMDB_FILES)
+
+
+def repo_stamp() -> Optional[float]:
+    return _latest_mtime(path for pattern in REPO_METADATA_GLOBS for path in glob.glob(pattern))
+
+
+def parse_query_output(output: str) -> List[Dict]:
+    """Records from tab-separated FIELDS lines; lines of any other shape are skipped."""
+    records = []
+    for line in output.splitlines():
+        parts = line.split("\t", len(FIELDS) - 1)
+        if len(parts) != len(FIELDS):
+            continue
+        record = dict(zip(FIELDS, parts))
+        record["epoch"] = "" if record["epoch"] in ("(none)", "0") else record["epoch"]
+        record["size"] = int(record["size"]) if record["size"].isdigit() else None
+        for field in ("license", "url"):
+            if record[field] == "(none)":
+                record[field] = ""
+        records.append(record)
+    return records
+
+
+def parse_search_output(output: str) -> List[Dict]:
+    """[{"name", "arch", "summary"}] from `dnf search` output ("name.arch : summary" lines)."""
+    results = []
+    for line in output.splitlines():
+        match = _SEARCH_LINE_RE.match(line.strip())
+        if match:
+            name, arch, summary = match.groups()
+            results.append({"name": name, "arch": arch, "summary": summary})
+    return results
+
+
+def full_version(record: Dict) -> str:
+    version = f"{record['version']}-{record['release']}"
+    return f"{record['epoch']}:{version}" if record.get("epoch") else version
+
+
+class PackageCache:
+    """Package query results by (kind, key), each stamped with its source metadata's mtime."""
+
+    def __init__(self, db_path: str = PACKAGES_DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def get_many(self, kind: str, keys: Iterable[str], stamp: Optional[float], max_age: float = MAX_AGE) -> Dict:
+        """{key: data} for the entries still valid for `stamp`."""
+        found = {}
+        oldest = time.time() - max_age
+        with self._lock:
+            conn = self._connect()
+            for key in keys:
+                row = conn.execute("SELECT stamp, fetched, data FROM packages WHERE kind = ? AND key = ?",
+                                   (kind, key)).fetchone()
+                if row and row[0] == stamp and row[1] >= oldest:
+                    found[key] = json.loads(row[2])
+        return found
+
+    def put_many(self, kind: str, entries: Dict, stamp: Optional[float]):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO packages (kind, key, stamp, fetched, data) VALUES (?, ?, ?, ?, ?)",
+                    [(kind, key, stamp, now, json.dumps(data)) for key, data in entries.items()])
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_DEFAULT_CACHE = None
+
+
+def default_package_cache() -> Optional[PackageCache]:
+    """The user's persistent package cache, or None if it can't be opened (every lookup then runs the tools)."""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        try:
+            cache = PackageCache()
+            cache._connect()
+            _DEFAULT_CACHE = cache
+        except (sqlite3.Error, OSError):
+            return None
+    return _DEFAULT_CACHE
+
+
+class PackageInfo:
+    """Batched, cached package lookups. `runner`, `rpmdb_stamp` and `repo_stamp` are replaceable for tests."""
+
+    def __init__(self, cache: Optional[PackageCache] = None, runner: Callable[[List[str]], Tuple[int, str]] = run_command,
+                 rpmdb_stamp: Callable[[], Optional[float]] = rpmdb_stamp,
+                 repo_stamp: Callable[[], Optional[float]] = repo_stamp):
+        self.cache = cache
+        self.runner = runner
+        self.rpmdb_stamp = rpmdb_stamp
+        self.repo_stamp = repo_stamp
+
+    def _cached(self, kind: str, keys: List[str], stamp, fetch: Callable[[List[str]], Dict]) -> Dict:
+        found = self.cache.get_many(kind, keys, stamp) if self.cache else {}
+        missing = [key for key in keys if key not in found]
+        for start in range(0, len(missing), BATCH_SIZE):
+            fetched = fetch(missing[start:start + BATCH_SIZE])
+            if self.cache:
+                self.cache.put_many(kind, fetched, stamp)
+            found.update(fetched)
+        return found
+
+    def _dnf(self, args: List[str]) -> str:
+        # Cached metadata first (-C): loading it is what makes dnf slow, refreshing it even more so.
+        code, output = self.runner(["dnf", "-C", "--quiet"] + args)
+        if code != 0 and not output.strip():
+            code, output = self.runner(["dnf", "--quiet"] + args)
+            if code != 0 and not output.strip():
+                raise PackageQueryError(f"'dnf {args[0]}' failed with exit code {code}.")
+        return output
+
+    def _fetch_installed(self, names: List[str]) -> Dict:
+        # rpm exits non-zero when some packages aren't installed, and says so on stdout.
+        code, output = self.runner(["rpm", "-q", "--queryformat", _RPM_FORMAT] + names)
+        result = {name: None for name in names}
+        for record in parse_query_output(output):
+            if record["name"] in result:
+                result[record["name"]] = (result[record["name"]] or []) + [record]
+        if code != 0 and not any(result.values()) and not any(
+                _NOT_INSTALLED_RE.match(line.strip()) for line in output.splitlines()):
+            raise PackageQueryError(f"'rpm -q' failed with exit code {code}.")
+        return result
+
+    def _fetch_available(self, names: List[str]) -> Dict:
+        output = self._dnf(["repoquery", "--latest-limit", "1", "--queryformat", _DNF_FORMAT] + names)
+        result = {name: [] for name in names}
+        for record in parse_query_output(output):
+            if record["name"] in result:
+                result[record["name"]].append(record)
+        return result
+
+    def installed(self, names: List[str]) -> Dict[str, Optional[List[Dict]]]:
+        """{name: [installed records] or None}, one rpm run for all the names not cached."""
+        return self._cached("installed", list(dict.fromkeys(names)), self.rpmdb_stamp(), self._fetch_installed)
+
+    def available(self, names: List[str]) -> Dict[str, List[Dict]]:
+        """{name: [latest record per arch in the enabled repos]}, one dnf run for all the names not cached."""
+        return self._cached("available", list(dict.fromkeys(names)), self.repo_stamp(), self._fetch_available)
+
+    def info(self, names: List[str]) -> Dict[str, Dict]:
+        installed = self.installed(names)
+        available = self.available(names)
+        return {name: {"installed": installed.get(name), "available": available.get(name, [])}
+                for name in dict.fromkeys(names)}
+
+    def search(self, term: str) -> List[Dict]:
+        """Packages whose name or summary mentions `term`."""
+        term = term.strip()
+        return self._cached("search", [term], self.repo_stamp(),
+                            lambda terms: {terms[0]: parse_search_output(self._dnf(["search", terms[0]]))})[term]
+
+
+def format_info(info: Dict[str, Dict]) -> str:
+    lines = []
+    for name, entry in info.items():
+        installed, available = entry["installed"], entry["available"]
+        if not installed and not available:
+            lines.append(f"{name}: not installed, and not found in the enabled repositories.")
+            continue
+        summary = (installed or available)[0]["summary"]
+        lines.append(f"{name}: {summary}")
+        for record in installed or []:
+            lines.append(f"  installed: {full_version(record)} ({record['arch']})")
+        if not installed:
+            lines.append("  installed: no")
+        installed_versions = {(r["arch"], full_version(r)) for r in installed or []}
+        for record in available:
+            note = "" if (record["arch"], full_version(record)) in installed_versions else (
+                " - update available" if installed else "")
+            lines.append(f"  available: {full_version(record)} ({record['arch']}) from {record['repo']}{note}")
+    return "\n".join(lines)
+
+
+def format_search(term: str, results: List[Dict], limit: int = 50) -> str:
+    if not results:
+        return f"No packages found for '{term}'."
+    lines = [f"{len(results)} package(s) found for '{term}':"]
+    lines += [f"  {r['name']}.{r['arch']}: {r['summary']}" for r in results[:limit]]
+    if len(results) > limit:
+        lines.append(f"  ... and {len(results) - limit} more.")
+    return "\n".join(lines)
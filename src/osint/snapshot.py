@@ -0,0 +1,268 @@
+"""
+A quick snapshot of the host for the planner: OS, kernel, installed kernels, disks, memory and load.
+
+All probes run at once under asyncio. Files under /proc are read in worker threads,
+commands run through `asyncio.create_subprocess_exec`, and every probe has its own
+timeout, so a snapshot takes as long as its slowest probe rather than the sum of them.
+A probe that fails or times out (a `df` stuck on a dead NFS mount, say) is recorded
+under "errors" and the rest of the snapshot is still used.
+
+Snapshots are kept in memory and in ~/.samantha/snapshot.json for MAX_AGE seconds, so
+back-to-back commands don't collect them again. `SnapshotCollector` takes the /proc
+root, the os-release file and the PATH to find commands on, so tests can point it at
+a fake /proc and stub binaries.
+"""
+import asyncio
+import json
+import os
+import shutil
+import signal
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.core.utils import format_size
+
+SNAPSHOT_CACHE_PATH = os.path.expanduser("~/.samantha/snapshot.json")
+MAX_AGE = 60
+PROBE_TIMEOUT = 2.0
+PROBES = ["os", "kernel", "installed_kernels", "disks", "memory", "load"]
+
+# Mounts that say nothing about where files can go.
+_PSEUDO_FILESYSTEMS = {"tmpfs", "devtmpfs", "none", "shm", "udev", "proc", "sysfs", "cgroup", "cgroup2"}
+_PSEUDO_MOUNT_ROOTS = ("/proc", "/sys", "/dev", "/run")
+
+
+class ProbeError(RuntimeError):
+    """Raised by a probe that couldn't find out what it was asked."""
+
+
+def _parse_key_values(text: str, separator: str) -> Dict[str, str]:
+    values = {}
+    for line in text.splitlines():
+        key, found, value = line.partition(separator)
+        if found:
+            values[key.strip()] = value.strip()
+    return values
+
+
+def parse_meminfo(text: str) -> Dict[str, int]:
+    """Total/available memory and swap in bytes, from /proc/meminfo."""
+    values = _parse_key_values(text, ":")
+
+    def kib(key):
+        try:
+            return int(values[key].split()[0]) * 1024
+        except (KeyError, ValueError, IndexError):
+            raise ProbeError(f"/proc/meminfo has no usable '{key}' entry")
+
+    memory = {"total": kib("MemTotal"), "available": kib("MemAvailable")}
+    if "SwapTotal" in values:
+        memory["swap_total"] = kib("SwapTotal")
+        memory["swap_free"] = kib("SwapFree")
+    return memory
+
+
+def parse_df_output(output: str) -> List[Dict]:
+    """Real filesystems from `df -P -k` output, sizes in bytes."""
+    disks = []
+    for line in output.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) < 6 or not parts[1].isdigit():
+            continue
+        filesystem, mount = parts[0], " ".join(parts[5:])
+        if filesystem in _PSEUDO_FILESYSTEMS or mount.startswith(_PSEUDO_MOUNT_ROOTS) or parts[1] == "0":
+            continue
+        disks.append({"mount": mount, "filesystem": filesystem, "size": int(parts[1]) * 1024,
+                      "used": int(parts[2]) * 1024, "available": int(parts[3]) * 1024,
+                      "percent": int(parts[4].rstrip("%") or 0)})
+    return disks
+
+
+class SnapshotCollector:
+    """Runs the probes concurrently, each under `timeout` seconds."""
+
+    def __init__(self, proc_root: str = "/proc", os_release: str = "/etc/os-release",
+                 path: Optional[str] = None, timeout: float = PROBE_TIMEOUT):
+        self.proc_root = proc_root
+        self.os_release = os_release
+        self.path = path
+        self.timeout = timeout
+
+    async def _read(self, path: str) -> str:
+        def read():
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return f.read()
+        try:
+            return await asyncio.to_thread(read)
+        except OSError as e:
+            raise ProbeError(f"can't read {path}: {e.strerror}")
+
+    async def _read_proc(self, name: str) -> str:
+        return await self._read(os.path.join(self.proc_root, name))
+
+    async def _run(self, argv: List[str]) -> tuple:
+        executable = shutil.which(argv[0], path=self.path)
+        if executable is None:
+            raise ProbeError(f"command not found: {argv[0]}")
+        process = await asyncio.create_subprocess_exec(
+            executable, *argv[1:], stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+            env=dict(os.environ, LC_ALL="C"), start_new_session=True)
+        try:
+            stdout, _ = await process.communicate()
+        except asyncio.CancelledError:
+            # Timed out: don't leave the command, or anything it started, running behind us.
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            raise
+        return process.returncode, stdout.decode("utf-8", errors="replace")
+
+    async def probe_os(self) -> str:
+        values = _parse_key_values(await self._read(self.os_release), "=")
+        name = values.get("PRETTY_NAME") or " ".join(filter(None, [values.get("NAME"), values.get("VERSION")]))
+        if not name:
+            raise ProbeError(f"{self.os_release} doesn't name the system")
+        return name.strip("\"'")
+
+    async def probe_kernel(self) -> str:
+        try:
+            return (await self._read_proc("sys/kernel/osrelease")).strip()
+        except ProbeError:
+            code, output = await self._run(["uname", "-r"])
+            if code != 0 or not output.strip():
+                raise ProbeError(f"'uname -r' failed with exit code {code}")
+            return output.strip()
+
+    async def probe_installed_kernels(self) -> List[str]:
+        code, output = await self._run(["rpm", "-q", "kernel", "--queryformat", "%{VERSION}-%{RELEASE}.%{ARCH}\n"])
+        lines = [line.strip() for line in output.splitlines() if line.strip()]
+        if code != 0:
+            if any("not installed" in line for line in lines):
+                return []
+            raise ProbeError(f"'rpm -q kernel' failed with exit code {code}")
+        return lines
+
+    async def probe_disks(self) -> List[Dict]:
+        code, output = await self._run(["df", "-P", "-k"])
+        disks = parse_df_output(output)
+        # df exits non-zero when some mount can't be read, after reporting the others.
+        if code != 0 and not disks:
+            raise ProbeError(f"'df' failed with exit code {code}")
+        return disks
+
+    async def probe_memory(self) -> Dict[str, int]:
+        return parse_meminfo(await self._read_proc("meminfo"))
+
+    async def probe_load(self) -> Dict:
+        fields = (await self._read_proc("loadavg")).split()
+        try:
+            load = {"1m": float(fields[0]), "5m": float(fields[1]), "15m": float(fields[2])}
+        except (IndexError, ValueError):
+            raise ProbeError("/proc/loadavg is malformed")
+        try:
+            cpuinfo = await self._read_proc("cpuinfo")
+            cpus = sum(1 for line in cpuinfo.splitlines() if line.startswith("processor"))
+        except ProbeError:
+            cpus = 0
+        load["cpus"] = cpus or os.cpu_count() or 1
+        return load
+
+    async def _probe(self, name: str):
+        try:
+            return name, await asyncio.wait_for(getattr(self, f"probe_{name}")(), self.timeout), None
+        except asyncio.TimeoutError:
+            return name, None, f"timed out after {self.timeout:g}s"
+        except ProbeError as e:
+            return name, None, str(e)
+        except Exception as e:
+            return name, None, f"{type(e).__name__}: {e}"
+
+    async def collect_async(self) -> Dict:
+        snapshot = {"collected": time.time(), "errors": {}}
+        for name, value, error in await asyncio.gather(*(self._probe(name) for name in PROBES)):
+            snapshot[name] = value
+            if error:
+                snapshot["errors"][name] = error
+        return snapshot
+
+    def collect(self) -> Dict:
+        return asyncio.run(self.collect_async())
+
+
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _load_cached(cache_path: str, max_age: float) -> Optional[Dict]:
+    snapshot = _CACHE.get(cache_path)
+    if snapshot is None and cache_path:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+    if isinstance(snapshot, dict) and 0 <= time.time() - snapshot.get("collected", 0) <= max_age:
+        return snapshot
+    return None
+
+
+def _store(cache_path: str, snapshot: Dict):
+    _CACHE[cache_path] = snapshot
+    if not cache_path:
+        return
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+
+
+def system_snapshot(max_age: float = MAX_AGE, collector: Optional[SnapshotCollector] = None,
+                    cache_path: str = SNAPSHOT_CACHE_PATH) -> Dict:
+    """The host snapshot, collected at most once every `max_age` seconds."""
+    with _CACHE_LOCK:
+        snapshot = _load_cached(cache_path, max_age)
+        if snapshot is None:
+            snapshot = (collector or SnapshotCollector()).collect()
+            _store(cache_path, snapshot)
+        return snapshot
+
+
+def format_snapshot(snapshot: Dict) -> str:
+    """A few compact lines describing the host, for the planner's prompt."""
+    lines = []
+    if snapshot.get("os") or snapshot.get("kernel"):
+        host = ", ".join(filter(None, [snapshot.get("os"), snapshot.get("kernel") and f"kernel {snapshot['kernel']}"]))
+        kernels = snapshot.get("installed_kernels")
+        if kernels:
+            host += f" ({len(kernels)} kernel package(s) installed: {', '.join(kernels)})"
+        lines.append(f"System: {host}")
+    memory = snapshot.get("memory")
+    if memory:
+        text = f"Memory: {format_size(memory['available'])} available of {format_size(memory['total'])}"
+        if memory.get("swap_total"):
+            text += f"; swap {format_size(memory['swap_free'])} free of {format_size(memory['swap_total'])}"
+        lines.append(text)
+    load = snapshot.get("load")
+    if load:
+        lines.append(f"Load: {load['1m']:.2f} {load['5m']:.2f} {load['15m']:.2f} on {load['cpus']} CPU(s)")
+    disks = snapshot.get("disks")
+    if disks:
+        lines.append("Disks: " + "; ".join(
+            f"{d['mount']} {d['percent']}% used, {format_size(d['available'])} free of {format_size(d['size'])}"
+            for d in disks))
+    return "\n".join(lines)
+
+
+def host_context() -> str:
+    """The formatted snapshot, or '' when it can't be collected; planning never fails because of it."""
+    try:
+        return format_snapshot(system_snapshot())
+    except Exception:
+        return ""
@@ -1,6 +1,10 @@
 """
 This module provides functions for generating ASCII art, such as directory trees and bar charts.
 """
+import fnmatch
+import heapq
+import os
+
 
 def draw_directory_tree(structure, prefix=""):
     """
@@ -8,20 +12,122 @@ def draw_directory_tree(structure, prefix=""):
     'structure' should be a dictionary where keys are directory or file names
     and values are sub-dictionaries for directories or None for files.
     """
-    lines = []
+    return "\n".join(_structure_lines(structure, prefix))
+
+def _structure_lines(structure, prefix):
+    # Yields lines instead of joining and re-splitting them at every level.
     items = sorted(structure.items())
     for i, (name, content) in enumerate(items):
         connector = "├── " if i < len(items) - 1 else "└── "
-        lines.append(f"{prefix}{connector}{name}")
+        yield f"{prefix}{connector}{name}"
         if isinstance(content, dict):
             extension = "│   " if i < len(items) - 1 else "    "
-            lines.extend(draw_directory_tree(content, prefix + extension).splitlines())
-    return "\n".join(lines)
+            yield from _structure_lines(content, prefix + extension)
+
+def _is_ignored(name, rel_path, ignore, show_hidden):
+    if not show_hidden and name.startswith("."):
+        return True
+    # Patterns with a '/' match the path relative to the tree's root, others just the name.
+    return any(fnmatch.fnmatch(rel_path if "/" in pattern else name, pattern) for pattern in ignore)
+
+def _directory_entries(path, rel_path, max_entries, ignore, show_hidden, sort):
+    """
+    Yields (name, is_dir) for the entries of one directory, then (elision_text, None) if
+    entries were left out. With `sort`, only the first `max_entries` names are kept in
+    memory (a bounded heap); without it, entries stream in directory order.
+    """
+    state = {"total": 0}
+
+    def visible():
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    rel = f"{rel_path}/{entry.name}" if rel_path else entry.name
+                    if _is_ignored(entry.name, rel, ignore, show_hidden):
+                        continue
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    state["total"] += 1
+                    yield entry.name, is_dir
+        except OSError:
+            return
+
+    shown = 0
+    if sort:
+        entries = visible()
+        chosen = heapq.nsmallest(max_entries, entries) if max_entries is not None else sorted(entries)
+        for item in chosen:
+            shown += 1
+            yield item
+    else:
+        entries = visible()
+        for item in entries:
+            if max_entries is not None and shown >= max_entries:
+                state["total"] += sum(1 for _ in entries)
+                break
+            shown += 1
+            yield item
+    if state["total"] > shown:
+        yield f"… {state['total'] - shown} more", None
+
+def _with_last(iterable):
+    """Yields (item, is_last) with a single item of lookahead."""
+    iterator = iter(iterable)
+    try:
+        previous = next(iterator)
+    except StopIteration:
+        return
+    for item in iterator:
+        yield previous, False
+        previous = item
+    yield previous, True
+
+def iter_directory_tree(root, max_depth=None, max_entries=None, ignore=(), show_hidden=False,
+                        sort=True, counts=None):
+    """
+    Walks the directory `root` and yields the lines of its tree as it goes, so the first
+    line is available immediately and only the open directories are held in memory
+    (at most `max_entries` names each when sorting). Directories deeper than `max_depth`
+    are not opened; a directory with more than `max_entries` visible entries ends with
+    "… N more". `ignore` holds glob patterns; hidden entries are skipped unless
+    `show_hidden`. If `counts` is a dict, the numbers of directories and files shown
+    are stored in it.
+    """
+    if counts is not None:
+        counts.update(directories=0, files=0)
+    yield root if root.endswith(os.sep) else root + os.sep
+
+    def open_dir(path, rel_path):
+        return _with_last(_directory_entries(path, rel_path, max_entries, ignore, show_hidden, sort))
+
+    # One frame per open directory: (entries, path, path relative to root, prefix, depth)
+    stack = [(open_dir(root, ""), root, "", "", 1)]
+    while stack:
+        entries, path, rel_path, prefix, depth = stack[-1]
+        try:
+            (name, is_dir), is_last = next(entries)
+        except StopIteration:
+            stack.pop()
+            continue
+        connector = "└── " if is_last else "├── "
+        if is_dir is None:
+            yield f"{prefix}{connector}{name}"
+            continue
+        yield f"{prefix}{connector}{name}/" if is_dir else f"{prefix}{connector}{name}"
+        if counts is not None:
+            counts["directories" if is_dir else "files"] += 1
+        if is_dir and (max_depth is None or depth < max_depth):
+            child_rel = f"{rel_path}/{name}" if rel_path else name
+            stack.append((open_dir(os.path.join(path, name), child_rel), os.path.join(path, name), child_rel,
+                          prefix + ("    " if is_last else "│   "), depth + 1))
 
-def draw_bar_chart(data, max_width=50):
+def draw_bar_chart(data, max_width=50, value_format=str):
     """
     Draws a simple horizontal bar chart.
     'data' should be a dictionary of labels and values.
+    'value_format' turns a value into the text shown after its bar (e.g. a byte formatter).
     """
     lines = []
     if not data:
@@ -32,7 +138,7 @@ def draw_bar_chart(data, max_width=50):
 
     if max_value == 0:
         for label, value in data.items():
-            lines.append(f"{label.ljust(max_label_length)} │ 0")
+            lines.append(f"{label.ljust(max_label_length)} │ {value_format(0)}")
         return "\n".join(lines)
 
     scale = max_width / max_value
@@ -40,6 +146,6 @@ def draw_bar_chart(data, max_width=50):
     for label, value in data.items():
         bar_length = int(value * scale)
         bar = '█' * bar_length
-        lines.append(f"{label.ljust(max_label_length)} │ {bar} {value}")
+        lines.append(f"{label.ljust(max_label_length)} │ {bar} {value_format(value)}")
 
     return "\n".join(lines)
\ No newline at end of file
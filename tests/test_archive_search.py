@@ -0,0 +1,83 @@
+import unittest
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import archives
+from src.core.search import search_in_files
+
+class TestArchiveSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.log = b"service started\nuser login ok\nERROR disk full on /var\nservice stopped\n"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def test_compressed_logs_are_searched(self):
+        with gzip.open(self._path("app.log.gz"), "wb") as f:
+            f.write(self.log)
+        with bz2.open(self._path("app.log.1.bz2"), "wb") as f:
+            f.write(self.log)
+        with lzma.open(self._path("app.log.2.xz"), "wb") as f:
+            f.write(b"nothing to see\n")
+        results = sorted(search_in_files("error DISK", self.test_dir))
+        self.assertEqual(results, [f"{self._path('app.log.1.bz2')}!app.log.1:3:ERROR disk full on /var",
+                                   f"{self._path('app.log.gz')}!app.log:3:ERROR disk full on /var"])
+
+    def test_zip_and_tar_members(self):
+        with zipfile.ZipFile(self._path("reports.zip"), "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("q1/summary.txt", "revenue up\nerror budget spent\n")
+            archive.writestr("q2/summary.txt", "revenue flat\n")
+            archive.writestr("logo.png", "error budget")
+        with tarfile.open(self._path("logs.tar.gz"), "w:gz") as archive:
+            for name, data in (("a.log", self.log), ("b.log", b"quiet\n")):
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        with open(self._path("plain.txt"), "w") as f:
+            f.write("no errors here\n")
+        results = search_in_files("error", self.test_dir)
+        self.assertIn(f"{self._path('reports.zip')}!q1/summary.txt:2:error budget spent", results)
+        self.assertIn(f"{self._path('logs.tar.gz')}!a.log:3:ERROR disk full on /var", results)
+        self.assertIn(f"{self._path('plain.txt')}:1:no errors here", results)
+        self.assertEqual(len(results), 3)
+
+    def test_big_zip_is_split_across_workers(self):
+        path = self._path("bundle.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            for i in range(6):
+                archive.writestr(f"part{i}.txt", f"chunk {i}\n" + ("filler\n" * 100) + ("needle\n" if i % 2 else ""))
+        with patch.object(archives, "UNIT_BYTES", 500):
+            self.assertEqual(len(archives.plan_units(path, "zip")), 6)
+            results = search_in_files("needle", self.test_dir)
+        self.assertEqual(results, [f"{path}!part{i}.txt:102:needle" for i in (1, 3, 5)])
+
+    def test_streams_in_blocks_and_skips_damaged_archives(self):
+        lines = [f"line {i}" for i in range(50000)] + ["the needle line", "and the haystack"]
+        with gzip.open(self._path("big.txt.gz"), "wt") as f:
+            f.write("\n".join(lines))
+        with open(self._path("broken.zip"), "wb") as f:
+            f.write(b"PK\x03\x04 not really a zip")
+        with open(self._path("broken.gz"), "wb") as f:
+            f.write(b"\x1f\x8b garbage")
+        with patch.object(archives, "SCAN_BYTES", 4096):
+            results = search_in_files("needle haystack", self.test_dir)
+        self.assertEqual(results, [f"{self._path('big.txt.gz')}!big.txt:50001:the needle line"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import json
+import os
+import shutil
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fake_openai_server import FakeOpenAIServer, FakeServerConfig
+from src.core import batch
+from src.core.mock_planner import create_mock_plan
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "test_batch_dir"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.output_path = os.path.join(self.test_dir, "out.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _read_output(self):
+        with open(self.output_path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_read_prompts_skips_blanks_and_comments(self):
+        path = os.path.join(self.test_dir, "prompts.txt")
+        with open(path, "w") as f:
+            f.write("list files\n\n# a comment\n  find pdf files  \n")
+        self.assertEqual(batch.read_prompts(path), ["list files", "find pdf files"])
+
+    def test_plan_prompts_concurrently_dedupes(self):
+        prompts = ["list files in demo_data", "find pdf files in demo_data", "list files in demo_data"]
+        with FakeOpenAIServer(FakeServerConfig(latency=0.05)) as server:
+            env = {"CODER_BASE_URL": server.base_url, "CODER_MODEL_NAME": "fake", "OPENAI_API_KEY": "EMPTY"}
+            with patch.dict(os.environ, env):
+                outcomes = batch.plan_prompts(prompts, concurrency=4, host="")
+        self.assertEqual(set(outcomes), set(prompts))
+        self.assertEqual(server.stats.as_dict()["completions"], 2)
+        self.assertEqual(outcomes["list files in demo_data"]["plan"]["steps"][0]["cmd"], "ls")
+
+    def test_run_batch_plan_only(self):
+        prompts = ["list files in demo_data", "list files in demo_data"]
+        with patch('src.core.executor.run') as mock_run:
+            records = batch.run_batch(prompts, self.output_path, planner=create_mock_plan, execute=False)
+        mock_run.assert_not_called()
+        self.assertEqual([r["status"] for r in records], ["planned", "duplicate"])
+        self.assertEqual(self._read_output()[1]["duplicate_of"], 0)
+
+    def test_run_batch_executes_serially_through_executor(self):
+        prompts = ["list files in demo_data", "find pdf files in demo_data"]
+        executed = []
+
+        def fake_run(plan, **kwargs):
+            executed.append(plan["steps"][0]["cmd"])
+            return {"summary": "Plan execution finished.", "results": [{"status": "success", "output": "ok"}]}
+
+        with patch('src.core.executor.run', side_effect=fake_run), patch('builtins.print'):
+            records = batch.run_batch(prompts, self.output_path, planner=create_mock_plan)
+        self.assertEqual(executed, ["ls", "find_files"])
+        self.assertEqual([r["status"] for r in self._read_output()], ["executed", "executed"])
+        self.assertEqual(records[0]["results"][0]["output"], "ok")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_fs import compare_results
+from benchmarks.synthetic_tree import NEEDLE, TreeSpec, ensure_tree, generate_tree, load_manifest
+from src.core import search
+
+class TestSyntheticTree(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.spec = TreeSpec(files=300, depth=3, files_per_dir=20, text_ratio=0.5, median_size=512,
+                             max_size=4096, needle_ratio=0.2, seed=7)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _files(self, root):
+        found = {}
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                with open(path, "rb") as f:
+                    found[os.path.relpath(path, root)] = (f.read(), os.stat(path).st_mtime)
+        return found
+
+    def test_same_spec_same_tree(self):
+        first = generate_tree(os.path.join(self.test_dir, "one"), self.spec)
+        second = generate_tree(os.path.join(self.test_dir, "two"), self.spec)
+        self.assertEqual(first["digest"], second["digest"])
+        self.assertEqual(self._files(os.path.join(self.test_dir, "one")), self._files(os.path.join(self.test_dir, "two")))
+        self.spec.seed = 8
+        self.assertNotEqual(generate_tree(os.path.join(self.test_dir, "three"), self.spec)["digest"], first["digest"])
+
+    def test_tree_follows_spec(self):
+        root = os.path.join(self.test_dir, "tree")
+        summary = generate_tree(root, self.spec)["summary"]
+        files = self._files(root)
+        self.assertEqual((summary["files"], len(files)), (300, 300))
+        self.assertEqual(summary["text_files"] + summary["binary_files"], 300)
+        self.assertTrue(100 < summary["text_files"] < 200)
+        self.assertTrue(max(path.count(os.sep) for path in files) <= 3)
+        self.assertTrue(all(len(data) <= 4096 + len(NEEDLE) + 2 for data, _ in files.values()))
+        self.assertEqual(len(search.search_in_files(NEEDLE, root)), summary["needle_files"])
+        self.assertGreater(summary["needle_files"], 0)
+
+    def test_matching_tree_is_reused(self):
+        root = os.path.join(self.test_dir, "tree")
+        ensure_tree(root, self.spec)
+        marker = os.path.join(root, "marker")
+        open(marker, "w").close()
+        ensure_tree(root, self.spec)
+        self.assertTrue(os.path.exists(marker))
+        self.spec.files = 50
+        self.assertEqual(ensure_tree(root, self.spec)["summary"]["files"], 50)
+        self.assertFalse(os.path.exists(marker))
+        self.assertEqual(load_manifest(root)["spec"]["files"], 50)
+
+class TestCompare(unittest.TestCase):
+
+    def test_regressions_are_flagged(self):
+        baseline = {"scenarios": {"walk": {"p50_ms": 100.0}, "copy": {"p50_ms": 100.0},
+                                  "tiny": {"p50_ms": 0.1}, "gone": {"p50_ms": 5.0}}}
+        current = {"scenarios": {"walk": {"p50_ms": 125.0}, "copy": {"p50_ms": 80.0},
+                                 "tiny": {"p50_ms": 0.3}, "added": {"p50_ms": 1.0}}}
+        rows = {row["scenario"]: (row["status"], row["change_pct"]) for row in compare_results(baseline, current, 10)}
+        self.assertEqual(rows, {"walk": ("regression", 25.0), "copy": ("improved", -20.0), "tiny": ("ok", 200.0),
+                                "gone": ("missing", None), "added": ("new", None)})
+        self.assertEqual(compare_results(baseline, current, 30)[0]["status"], "ok")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import checksum, duplicates, executor
+from src.core.checksum import checksum_files, read_manifest, verify_manifest, write_manifest
+from src.core.duplicates import DigestCache
+from src.core.mock_planner import create_mock_plan
+
+class TestChecksum(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = DigestCache(os.path.join(self.test_dir, "digests.db"))
+        self.tree = os.path.join(self.test_dir, "tree")
+        self.contents = {"a.txt": b"alpha", "sub/b.bin": os.urandom(3 * checksum.CHUNK_BYTES // 2), "sub/c d.txt": b""}
+        for name, data in self.contents.items():
+            path = os.path.join(self.tree, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        self.manifest = os.path.join(self.tree, "SHA256SUMS")
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_digests_match_hashlib(self):
+        result = checksum_files([self.tree], cache=self.cache)
+        expected = sorted((os.path.join(self.tree, name), hashlib.sha256(data).hexdigest())
+                          for name, data in self.contents.items())
+        self.assertEqual(result["digests"], expected)
+        self.assertEqual((result["hashed"], result["cached"]), (3, 0))
+        md5 = checksum_files([os.path.join(self.tree, "a.txt")], algorithm="md5")["digests"]
+        self.assertEqual(md5[0][1], hashlib.md5(b"alpha").hexdigest())
+        with self.assertRaises(ValueError):
+            checksum_files([self.tree], algorithm="crc-nope")
+
+    def test_unchanged_files_are_only_stated(self):
+        write_manifest(self.manifest, [self.tree], cache=self.cache)
+        with patch.object(checksum, "file_digest", side_effect=AssertionError("re-hashed")):
+            report = verify_manifest(self.manifest, cache=self.cache)
+        self.assertEqual((len(report["ok"]), report["hashed"], report["cached"]), (3, 0, 3))
+
+    def test_verify_reports_changed_and_missing_files(self):
+        write_manifest(self.manifest, [self.tree], cache=self.cache)
+        with open(os.path.join(self.tree, "a.txt"), "ab") as f:
+            f.write(b"!")
+        os.remove(os.path.join(self.tree, "sub/c d.txt"))
+        report = verify_manifest(self.manifest, cache=self.cache)
+        self.assertEqual(report["failed"], [os.path.join(self.tree, "a.txt")])
+        self.assertEqual(report["missing"], [os.path.join(self.tree, "sub/c d.txt")])
+        self.assertEqual(report["hashed"], 1)
+
+    def test_manifest_is_sha256sum_compatible(self):
+        write_manifest(self.manifest, [self.tree])
+        with open(self.manifest) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], f"{hashlib.sha256(b'alpha').hexdigest()}  a.txt")
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(len(read_manifest(self.manifest)), 3)
+        if shutil.which("sha256sum"):
+            check = subprocess.run(["sha256sum", "--quiet", "-c", "SHA256SUMS"], cwd=self.tree, capture_output=True)
+            self.assertEqual(check.returncode, 0, check.stdout + check.stderr)
+
+    def test_command(self):
+        ctx = executor.ExecutionContext(cwd=self.test_dir, output=lambda text: None)
+        with patch.object(duplicates, "default_digest_cache", return_value=self.cache):
+            output = executor._execute_checksum(["tree/a.txt"], {}, ctx)
+            self.assertEqual(output, f"{hashlib.sha256(b'alpha').hexdigest()}  {os.path.join(self.tree, 'a.txt')}")
+            written = executor._execute_checksum(["tree"], {"manifest": "tree/SHA256SUMS"}, ctx)
+            self.assertTrue(written.startswith("Wrote 3 sha256 checksum(s)"), written)
+            verified = executor._execute_checksum([], {"verify": "tree/SHA256SUMS"}, ctx)
+            self.assertIn("3 OK, 0 FAILED, 0 missing", verified)
+            self.assertTrue(executor._execute_checksum([], {"verify": "nope.sha256"}, ctx).startswith("Error:"))
+            self.assertTrue(executor._execute_checksum(["nope"], {}, ctx).startswith("Error:"))
+
+    def test_mock_planner(self):
+        self.assertEqual(create_mock_plan("verify backup.sha256")["steps"][0]["kwargs"], {"verify": "backup.sha256"})
+        step = create_mock_plan("write checksums of demo_data to demo.sha256")["steps"][0]
+        self.assertEqual((step["args"], step["kwargs"]), (["demo_data"], {"manifest": "demo.sha256"}))
+        steps = create_mock_plan("find files in demo_data then checksum them")["steps"]
+        self.assertEqual([(s["cmd"], s["args"]) for s in steps],
+                         [("find_files", ["*", "demo_data"]), ("checksum", ["$results.last"])])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import io
+import os
+import shutil
+import tempfile
+import threading
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cli.daemon import SamanthaDaemon
+from src.cli.samantha_client import DaemonUnavailable, run_remote
+from src.core import executor, suggestions
+from src.core.session_store import SessionStore
+
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        # Unix socket paths are length-limited, so keep them short.
+        self.test_dir = tempfile.mkdtemp(prefix="sam")
+        self.socket_path = os.path.join(self.test_dir, "s.sock")
+        # Sessions journal into the test dir and run no suggestion scans of the real home.
+        engine = suggestions.SuggestionEngine([], cache=suggestions.SuggestionCache(os.path.join(self.test_dir, "sg.json")))
+        for patcher in (patch.object(executor, "UNDO_LOG_FILE", os.path.join(self.test_dir, "undo.log")),
+                        patch.object(suggestions, "default_engine", return_value=engine)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.daemon = SamanthaDaemon(self.socket_path, store=SessionStore(os.path.join(self.test_dir, "s.db")))
+        self.thread = threading.Thread(target=self.daemon.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.daemon.shutdown()
+        self.daemon.server_close()
+        self.thread.join()
+        shutil.rmtree(self.test_dir)
+
+    def _ask(self, prompt, answer):
+        out = io.StringIO()
+        questions = []
+
+        def ask(question):
+            questions.append(question)
+            return answer
+
+        status = run_remote(prompt, self.socket_path, mock=True, session="t", out=out, ask=ask)
+        return status, out.getvalue(), questions
+
+    def test_streams_preview_confirmation_and_output(self):
+        status, output, questions = self._ask("list files in demo_data", "y")
+        self.assertEqual(status, "ok")
+        self.assertIn('1. ls "demo_data"', output)
+        self.assertIn("Contents of", output)
+        self.assertEqual(len(questions), 1)
+        self.assertIn("proceed", questions[0])
+
+    def test_cancel_and_session_memory(self):
+        status, output, _ = self._ask("list files in demo_data", "n")
+        self.assertEqual(status, "ok")
+        self.assertIn("Execution cancelled by user.", output)
+        history = self.daemon.memory_for("t").get_history()
+        self.assertEqual(history[0]["content"], "list files in demo_data")
+
+    def test_only_an_unreachable_daemon_is_unavailable(self):
+        with self.assertRaises(DaemonUnavailable):
+            run_remote("list files", os.path.join(self.test_dir, "missing.sock"), mock=True, out=io.StringIO())
+
+        def ask(question):
+            raise BrokenPipeError("connection reset")
+
+        with self.assertRaises(OSError) as raised:
+            run_remote("list files in demo_data", self.socket_path, mock=True, session="t", out=io.StringIO(), ask=ask)
+        self.assertNotIsInstance(raised.exception, DaemonUnavailable)
+
+    def test_refuses_second_daemon_on_same_socket(self):
+        with self.assertRaises(RuntimeError):
+            SamanthaDaemon(self.socket_path, store=SessionStore(os.path.join(self.test_dir, "other.db")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import disk_usage, executor
+from src.core.disk_usage import UsageCache, analyze, render
+from src.vision.ascii_art import draw_bar_chart
+
+class TestDiskUsage(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = UsageCache(os.path.join(self.test_dir, "usage.db"))
+        self.tree = os.path.join(self.test_dir, "tree")
+        self._write("notes.txt", 100)
+        self._write("photos/a.jpg", 1000)
+        self._write("photos/b.png", 2000)
+        self._write("photos/old/c.jpg", 500)
+        self._write("music/song.mp3", 3000)
+        for i in range(4):
+            self._write(f"misc/d{i}/x.bin", 10)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, name, size):
+        path = os.path.join(self.tree, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+
+    def test_totals_per_directory_and_type(self):
+        result = analyze(self.tree, cache=self.cache)
+        root = result["root"]
+        self.assertEqual(root.total_bytes, 6640)
+        self.assertEqual(root.total_files, 9)
+        self.assertEqual([os.path.basename(c.path) for c in root.children], ["photos", "music", "misc"])
+        self.assertEqual(root.children[0].total_bytes, 3500)
+        self.assertEqual(result["by_type"], {"documents": 100, "images": 3500, "audio": 3000, "other": 40})
+        self.assertEqual(result["directories"], 9)
+
+    def test_only_changed_directories_are_rescanned(self):
+        self.assertEqual(analyze(self.tree, cache=self.cache)["rescanned"], 9)
+        self.assertEqual(analyze(self.tree, cache=self.cache)["rescanned"], 0)
+        self._write("photos/old/d.jpg", 50)
+        result = analyze(self.tree, cache=self.cache)
+        self.assertEqual(result["rescanned"], 1)
+        self.assertEqual(result["root"].total_bytes, 6690)
+
+    def test_removed_directories_leave_the_cache(self):
+        analyze(self.tree, cache=self.cache)
+        shutil.rmtree(os.path.join(self.tree, "misc"))
+        result = analyze(self.tree, cache=self.cache)
+        self.assertEqual(result["root"].total_bytes, 6600)
+        self.assertEqual(len(self.cache.load_tree(os.path.abspath(self.tree))), 4)
+
+    def test_render_respects_depth_and_top(self):
+        output = render(analyze(self.tree, cache=self.cache), depth=1, top=2)
+        self.assertIn("6.5 KB in 9 files", output)
+        self.assertIn("music/ (2.9 KB)", output)
+        self.assertIn("… 1 more", output)
+        self.assertNotIn("old/", output)
+        deeper = render(analyze(self.tree, cache=self.cache), depth=2, top=10)
+        self.assertIn("old/ (500 B)", deeper)
+
+    def test_bar_chart_value_format(self):
+        chart = draw_bar_chart({"a": 2048}, max_width=10, value_format=lambda v: f"{v // 1024} KB")
+        self.assertIn("2 KB", chart)
+
+    def test_command(self):
+        with patch.object(disk_usage, "default_usage_cache", return_value=self.cache):
+            output = executor._execute_disk_usage([self.tree], {"depth": 1})
+            self.assertIn("Largest items:", output)
+            self.assertIn("By file type:", output)
+            self.assertTrue(executor._execute_disk_usage([os.path.join(self.tree, "nope")]).startswith("Error:"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import duplicates, executor
+from src.core.duplicates import DigestCache, EDGE_BYTES, dedupe_plan, find_duplicates, redundant_copies
+
+class TestDuplicates(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = DigestCache(os.path.join(self.test_dir, "digests.db"))
+        self.tree = os.path.join(self.test_dir, "tree")
+        os.makedirs(os.path.join(self.tree, "backup"))
+        self._write("a.txt", b"same content")
+        self._write("backup/a.txt", b"same content")
+        self._write("b.txt", b"same length!")  # same size as a.txt, different content
+        # Large files that only differ in the middle: the partial hash can't tell them apart.
+        edge = b"x" * EDGE_BYTES
+        self._write("big1.bin", edge + b"1" * 1000 + edge)
+        self._write("big2.bin", edge + b"2" * 1000 + edge)
+        self._write("backup/big1.bin", edge + b"1" * 1000 + edge)
+        self._write("empty1", b"")
+        self._write("empty2", b"")
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, name, data):
+        with open(os.path.join(self.tree, name), "wb") as f:
+            f.write(data)
+
+    def _path(self, name):
+        return os.path.join(self.tree, name)
+
+    def test_finds_groups_through_all_stages(self):
+        groups = find_duplicates([self.tree], cache=self.cache)
+        self.assertEqual([g["paths"] for g in groups], [
+            [self._path("big1.bin"), self._path("backup/big1.bin")],
+            [self._path("a.txt"), self._path("backup/a.txt")],
+        ])
+        self.assertEqual(groups[0]["reclaimable"], 2 * EDGE_BYTES + 1000)
+
+    def test_hard_links_are_one_file(self):
+        os.link(self._path("b.txt"), self._path("backup/b-link.txt"))
+        groups = find_duplicates([self.tree], cache=self.cache)
+        self.assertNotIn(self._path("b.txt"), [p for g in groups for p in g["paths"]])
+
+    def test_repeat_scan_uses_cached_digests(self):
+        find_duplicates([self.tree], cache=self.cache)
+        with patch.object(duplicates, "partial_digest", side_effect=AssertionError("rehashed")), \
+                patch.object(duplicates, "full_digest", side_effect=AssertionError("rehashed")):
+            groups = find_duplicates([self.tree], cache=self.cache)
+        self.assertEqual(len(groups), 2)
+
+    def test_changed_file_is_rehashed(self):
+        find_duplicates([self.tree], cache=self.cache)
+        self._write("backup/a.txt", b"now differs")
+        groups = find_duplicates([self.tree], cache=self.cache)
+        self.assertEqual(len(groups), 1)
+
+    def test_hardlink_plan_runs_through_executor(self):
+        groups = find_duplicates([self.tree], cache=self.cache)
+        plan = dedupe_plan(groups, action="hardlink")
+        with patch('src.core.executor.confirm', return_value=True), patch('src.core.executor.preview'), \
+                patch.object(executor, "UNDO_LOG_FILE", os.path.join(self.test_dir, "undo.log")), \
+                patch('builtins.print'):
+            results = executor.run(plan)
+        self.assertTrue(all(r["status"] == "success" for r in results["results"]))
+        self.assertTrue(os.path.samefile(self._path("a.txt"), self._path("backup/a.txt")))
+        self.assertEqual(find_duplicates([self.tree], cache=self.cache), [])
+
+    def test_copy_edited_after_the_scan_is_kept(self):
+        groups = find_duplicates([self.tree], cache=self.cache)
+        plan = dedupe_plan(groups, action="hardlink")
+        self.assertTrue(duplicates.plan_is_current(plan))
+        self._write("backup/a.txt", b"edited copy!")  # same size, new content and mtime
+        stat = os.stat(self._path("backup/a.txt"))
+        os.utime(self._path("backup/a.txt"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertFalse(duplicates.plan_is_current(plan))
+        with patch('src.core.executor.confirm', return_value=True), patch('src.core.executor.preview'), \
+                patch.object(executor, "UNDO_LOG_FILE", os.path.join(self.test_dir, "undo.log")), \
+                patch('builtins.print'):
+            results = executor.run(plan)["results"]
+        self.assertIn("changed since the duplicate scan", results[-1]["output"])
+        with open(self._path("backup/a.txt"), "rb") as f:
+            self.assertEqual(f.read(), b"edited copy!")
+        self.assertTrue(os.path.samefile(self._path("big1.bin"), self._path("backup/big1.bin")))
+
+    def test_remove_plan_and_report(self):
+        groups = find_duplicates([self.tree], cache=self.cache)
+        plan = dedupe_plan(groups, action="remove")
+        self.assertEqual(plan["steps"][0]["cmd"], "rm")
+        self.assertEqual(redundant_copies(groups), plan["steps"][0]["args"])
+        with self.assertRaises(ValueError):
+            dedupe_plan(groups, action="shred")
+
+    def test_them_refers_to_the_copies(self):
+        plan = {"steps": [
+            {"cmd": "find_duplicates", "args": [self.tree]},
+            {"cmd": "rm", "args": ["$results.last"]},
+        ]}
+        with patch('src.core.executor.confirm', return_value=True), patch('src.core.executor.preview'), \
+                patch.object(executor, "UNDO_LOG_FILE", os.path.join(self.test_dir, "undo.log")), \
+                patch.object(duplicates, "default_digest_cache", return_value=self.cache), \
+                patch('builtins.input', return_value='y'), patch('builtins.print'):
+            results = executor.run(plan)
+        self.assertEqual([r["status"] for r in results["results"]], ["success", "success"])
+        self.assertTrue(os.path.exists(self._path("a.txt")))
+        self.assertFalse(os.path.exists(self._path("backup/a.txt")))
+        self.assertFalse(os.path.exists(self._path("backup/big1.bin")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import executor
+
+class TestExecutionContext(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.process_cwd = os.getcwd()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _context(self, name, answer="y"):
+        root = os.path.join(self.test_dir, name)
+        os.makedirs(root)
+        lines = []
+        ctx = executor.ExecutionContext(cwd=root, output=lines.append, ask=lambda prompt: answer,
+                                        undo_log_file=os.path.join(self.test_dir, "undo.log"))
+        return ctx, lines
+
+    def test_cd_moves_only_the_session(self):
+        ctx, _ = self._context("a")
+        os.makedirs(os.path.join(ctx.cwd, "sub"))
+        result = executor._execute_cd(["sub"], {}, ctx)
+        self.assertEqual(ctx.cwd, os.path.realpath(os.path.join(self.test_dir, "a", "sub")))
+        self.assertIn(ctx.cwd, result)
+        self.assertEqual(os.getcwd(), self.process_cwd)
+        self.assertNotEqual(executor.SESSION_CWD, ctx.cwd)
+
+    def test_rm_asks_through_the_context(self):
+        ctx, _ = self._context("a", answer="n")
+        open(os.path.join(ctx.cwd, "keep.txt"), "w").close()
+        result = executor._execute_rm(["keep.txt"], {}, ctx)
+        self.assertIn("cancelled", result)
+        self.assertTrue(os.path.exists(os.path.join(ctx.cwd, "keep.txt")))
+
+    def test_run_writes_through_the_context(self):
+        ctx, lines = self._context("a")
+        plan = {"steps": [{"cmd": "mkdir", "args": ["made"], "why": "test"}]}
+        results = executor.run(plan, ctx=ctx)
+        ctx.close()
+        self.assertEqual(results["results"][0]["status"], "success")
+        self.assertTrue(os.path.isdir(os.path.join(ctx.cwd, "made")))
+        self.assertIn(results["results"][0]["output"] + "\n", lines)
+        with open(ctx.undo_log_file, encoding="utf-8") as f:
+            self.assertIn("mkdir made", f.read())
+
+    def test_concurrent_sessions_stay_isolated(self):
+        sessions = 16
+        rounds = 10
+        errors = []
+        contexts = [self._context(f"s{i}") for i in range(sessions)]
+        start = threading.Barrier(sessions)
+
+        def work(index, ctx, lines):
+            try:
+                start.wait()
+                for r in range(rounds):
+                    plan = {"steps": [
+                        {"cmd": "mkdir", "args": [f"d{r}"]},
+                        {"cmd": "cd", "args": [f"d{r}"]},
+                        {"cmd": "touch", "args": [f"file{index}.txt"]},
+                        {"cmd": "cp", "args": [f"file{index}.txt", "copy.txt"]},
+                        {"cmd": "pwd", "args": []},
+                        {"cmd": "rm", "args": [f"file{index}.txt"]},
+                        {"cmd": "cd", "args": [".."]},
+                    ]}
+                    results = executor.run(plan, ctx=ctx)
+                    statuses = [step["status"] for step in results["results"]]
+                    if statuses != ["success"] * 7:
+                        errors.append((index, r, results["results"]))
+                    pwd_output = results["results"][4]["output"]
+                    if not pwd_output.endswith(os.path.join(f"s{index}", f"d{r}")):
+                        errors.append((index, r, pwd_output))
+            except Exception as e:
+                errors.append((index, repr(e)))
+
+        threads = [threading.Thread(target=work, args=(i, ctx, lines)) for i, (ctx, lines) in enumerate(contexts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for ctx, _ in contexts:
+            ctx.close()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(os.getcwd(), self.process_cwd)
+        for i, (ctx, _) in enumerate(contexts):
+            self.assertEqual(ctx.cwd, os.path.realpath(os.path.join(self.test_dir, f"s{i}")))
+            for r in range(rounds):
+                directory = os.path.join(ctx.cwd, f"d{r}")
+                self.assertEqual(sorted(os.listdir(directory)), ["copy.txt"])
+        # Every successful step of every session is journaled as a whole line.
+        with open(os.path.join(self.test_dir, "undo.log"), encoding="utf-8") as f:
+            entries = f.read().splitlines()
+        self.assertEqual(len(entries), sessions * rounds * 7)
+        self.assertTrue(all(" - " in entry for entry in entries))
+
+if __name__ == '__main__':
+    unittest.main()
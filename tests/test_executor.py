@@ -58,7 +58,7 @@ class TestExecutor(unittest.TestCase):
                 with patch('src.core.executor.preview'):
                     results = executor.run(plan)
 
-        mock_ls.assert_called_once_with(['.'], {})
+        mock_ls.assert_called_once_with(['.'], {}, executor.DEFAULT_CONTEXT)
         self.assertEqual(results["results"][0]["status"], "success")
         self.assertEqual(results["results"][0]["output"], "ls success")
 
@@ -69,7 +69,7 @@ class TestExecutor(unittest.TestCase):
         with patch.dict(executor.COMMAND_MAP, {'ls': MagicMock()}) as mock_map:
             executor.run(plan)
             mock_map['ls'].assert_not_called()
-        mock_preview.assert_called_once_with(plan)
+        mock_preview.assert_called_once_with(plan, executor.DEFAULT_CONTEXT)
         mock_confirm.assert_called_once()
 
     def test_execute_mkdir_and_ls(self):
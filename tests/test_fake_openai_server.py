@@ -0,0 +1,65 @@
+import unittest
+import json
+import os
+import urllib.request
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fake_openai_server import FakeOpenAIServer, FakeServerConfig
+from src.core import nl2cmd
+
+class TestFakeOpenAIServer(unittest.TestCase):
+
+    CANNED_PLAN = {
+        "assumptions": ["Served by the fake endpoint."],
+        "steps": [{"cmd": "ls", "args": ["demo_data"], "why": "To list files."}]
+    }
+
+    def _env(self, server):
+        return {
+            "CODER_BASE_URL": server.base_url,
+            "CODER_MODEL_NAME": "fake-coder",
+            "OPENAI_API_KEY": "EMPTY"
+        }
+
+    def test_nl_to_plan_uses_canned_plan(self):
+        config = FakeServerConfig(canned_plans={"list files": self.CANNED_PLAN})
+        with FakeOpenAIServer(config) as server, patch.dict(os.environ, self._env(server)):
+            plan = nl2cmd.nl_to_plan("please list files in demo_data")
+        self.assertEqual(plan, self.CANNED_PLAN)
+        self.assertEqual(server.stats.as_dict()["completions"], 1)
+
+    def test_nl_to_plan_falls_back_to_mock_planner(self):
+        with FakeOpenAIServer() as server, patch.dict(os.environ, self._env(server)):
+            plan = nl2cmd.nl_to_plan("find pdf files in demo_data")
+        self.assertEqual(plan["steps"][0]["cmd"], "find_files")
+
+    def test_malformed_completions_exhaust_retries(self):
+        config = FakeServerConfig(malformed_rate=1.0, seed=1)
+        with FakeOpenAIServer(config) as server, patch.dict(os.environ, self._env(server)):
+            with patch('sys.stdout'), patch('sys.stderr'):
+                with self.assertRaises(nl2cmd.InvalidPlanError):
+                    nl2cmd.nl_to_plan("list files")
+        self.assertEqual(server.stats.as_dict()["malformed"], nl2cmd.MAX_RETRIES)
+
+    def test_streaming_response(self):
+        with FakeOpenAIServer(FakeServerConfig(canned_plans={"ls": self.CANNED_PLAN})) as server:
+            body = json.dumps({
+                "model": "fake-coder",
+                "stream": True,
+                "messages": [{"role": "user", "content": "ls"}]
+            }).encode("utf-8")
+            request = urllib.request.Request(server.base_url + "/chat/completions", data=body,
+                                             headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(request) as response:
+                raw = response.read().decode("utf-8")
+
+        events = [line[len("data: "):] for line in raw.splitlines() if line.startswith("data: ")]
+        self.assertEqual(events[-1], "[DONE]")
+        content = "".join(json.loads(e)["choices"][0]["delta"].get("content", "") for e in events[:-1])
+        self.assertEqual(json.loads(content), self.CANNED_PLAN)
+
+if __name__ == '__main__':
+    unittest.main()
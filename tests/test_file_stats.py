@@ -0,0 +1,100 @@
+import unittest
+import os
+import random
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import executor, file_stats
+from src.core.file_stats import SizeHistogram, summarize_files, top_files
+from src.core.mock_planner import create_mock_plan
+
+class TestFileStats(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.files = {"a.log": 300, "b.log": 100, "pics/c.jpg": 5000, "pics/d.png": 50, "docs/e.txt": 700, "f.bin": 0}
+        for i, (name, size) in enumerate(sorted(self.files.items())):
+            path = os.path.join(self.test_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"x" * size)
+            os.utime(path, (1_000_000 + i * 100, 1_000_000 + i * 100))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _names(self, entries):
+        return [os.path.relpath(path, self.test_dir) for path, _, _ in entries]
+
+    def test_top_files_by_size_and_mtime(self):
+        self.assertEqual(self._names(top_files(self.test_dir, n=3)), ["pics/c.jpg", "docs/e.txt", "a.log"])
+        self.assertEqual(self._names(top_files(self.test_dir, n=2, order="smallest")), ["f.bin", "pics/d.png"])
+        self.assertEqual(self._names(top_files(self.test_dir, n=2, order="newest")), ["pics/d.png", "pics/c.jpg"])
+        self.assertEqual(self._names(top_files(self.test_dir, n=1, order="oldest", file_type="logs")), ["a.log"])
+        self.assertEqual(self._names(top_files(self.test_dir, n=10, pattern="*.log")), ["a.log", "b.log"])
+        with self.assertRaises(ValueError):
+            top_files(self.test_dir, order="heaviest")
+
+    def test_top_files_heap_stays_bounded(self):
+        sizes = [(f"/f{i}", os.stat_result((0, i, 0, 1, 0, 0, random.randrange(10**6), 0, 0, 0)))
+                 for i in range(5000)]
+        pushes = []
+        real_push = file_stats.heapq.heappush
+        with patch.object(file_stats, "iter_files", return_value=iter(sizes)), \
+                patch.object(file_stats.heapq, "heappush", side_effect=lambda h, x: (pushes.append(len(h)), real_push(h, x))):
+            entries = top_files("/", n=5)
+        self.assertEqual(max(pushes), 4)
+        self.assertEqual([size for _, size, _ in entries], sorted((st.st_size for _, st in sizes), reverse=True)[:5])
+
+    def test_summary_per_category(self):
+        stats = summarize_files(self.test_dir)
+        self.assertEqual(set(stats), {"logs", "images", "documents", "other"})
+        self.assertEqual((stats["logs"].count, stats["logs"].total), (2, 400))
+        self.assertEqual((stats["images"].min, stats["images"].max), (50, 5000))
+        self.assertEqual(set(summarize_files(self.test_dir, file_type="images")), {"images"})
+
+    def test_histogram_percentiles_are_close(self):
+        histogram = SizeHistogram()
+        rng = random.Random(7)
+        values = [rng.randrange(1, 10**7) for _ in range(5000)] + list(range(1, 5001))
+        for value in values:
+            histogram.add(value)
+        ordered = sorted(values)
+        for pct in (50, 90, 99):
+            exact = ordered[int(pct / 100 * len(ordered)) - 1]
+            self.assertLess(abs(histogram.percentile(pct) - exact) / exact, 0.07)
+        self.assertLessEqual(histogram.percentile(100), max(values))
+        self.assertEqual(SizeHistogram().percentile(50), 0)
+
+    def test_commands_and_pronouns(self):
+        ctx = executor.ExecutionContext(cwd=self.test_dir, output=lambda text: None, ask=lambda prompt: "y",
+                                        undo_log_file=os.path.join(self.test_dir, "undo.log"))
+        output = executor._execute_top_files(["."], {"n": 2}, ctx)
+        self.assertEqual(output.paths,
+                         [os.path.join(self.test_dir, "pics/c.jpg"), os.path.join(self.test_dir, "docs/e.txt")])
+        summary = executor._execute_summarize_files(["."], {}, ctx)
+        self.assertIn("6 file(s), 6.0 KB", summary)
+        self.assertIn("logs", summary)
+        self.assertTrue(executor._execute_top_files(["."], {"order": "heaviest"}, ctx).startswith("Error:"))
+        self.assertTrue(executor._execute_summarize_files(["nope"], {}, ctx).startswith("Error:"))
+
+        plan = {"steps": [{"cmd": "top_files", "args": ["."], "kwargs": {"n": 1, "file_type": "logs"}},
+                          {"cmd": "rm", "args": ["$results.last"]}]}
+        with patch.object(executor, "confirm", return_value=True):
+            results = executor.run(plan, ctx=ctx)["results"]
+        self.assertEqual([r["status"] for r in results], ["success", "success"])
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "a.log")))
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, "b.log")))
+
+    def test_mock_planner_intents(self):
+        step = create_mock_plan("show the 5 oldest logs in var")["steps"][0]
+        self.assertEqual(step, {"cmd": "top_files", "args": ["var"], "kwargs": {"file_type": "logs", "order": "oldest", "n": 5},
+                                "why": "To list the oldest files."})
+        self.assertEqual(create_mock_plan("summarize files in src")["steps"][0]["cmd"], "summarize_files")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import os
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import retrieval
+from src.core.memory import Memory
+from src.core.pathset import FileListing, FileReport
+
+class TestMemoryRetrieval(unittest.TestCase):
+
+    def test_bm25_ranks_matching_documents(self):
+        index = retrieval.BM25Index()
+        index.add(1, "find pdf files in demo_data")
+        index.add(2, "make directory called reports")
+        index.add(3, "copy the budget pdf to backup")
+        scores = index.scores("budget pdf")
+        self.assertGreater(scores[3], scores[1])
+        self.assertNotIn(2, scores)
+        index.remove(3)
+        self.assertNotIn("budget", index.doc_freq)
+        self.assertEqual(len(index), 2)
+
+    def test_relevant_older_turn_is_kept(self):
+        memory = Memory(max_history_size=3)
+        memory.add_to_history("user", "search for budget in demo_data")
+        for i in range(10):
+            memory.add_to_history("user", f"make directory called folder{i}")
+        history = memory.get_history(query="copy the budget notes to backup")
+        contents = [turn["content"] for turn in history]
+        self.assertEqual(contents[0], "search for budget in demo_data")
+        # The newest exchange is always included, in chronological order.
+        self.assertEqual(contents[-2:], ["make directory called folder8", "make directory called folder9"])
+
+    def test_history_respects_token_budget(self):
+        memory = Memory(max_history_size=10, history_token_budget=50)
+        for i in range(10):
+            memory.add_to_history("user", f"budget request {i} " + "x" * 80)
+        history = memory.get_history(query="budget")
+        total = sum(retrieval.estimate_tokens(turn["content"]) for turn in history)
+        self.assertLessEqual(total, 50)
+        self.assertTrue(history)
+
+    def test_without_query_returns_newest_turns(self):
+        memory = Memory(max_history_size=2)
+        for i in range(5):
+            memory.add_to_history("user", f"request {i}")
+        self.assertEqual([t["content"] for t in memory.get_history()], ["request 3", "request 4"])
+
+    def test_retained_pool_is_bounded(self):
+        memory = Memory(max_history_size=2, max_stored_history=4)
+        for i in range(10):
+            memory.add_to_history("user", f"request {i}")
+        self.assertEqual(len(memory.conversation_history), 4)
+        self.assertEqual(len(memory._index), 4)
+
+class TestMemoryUpdate(unittest.TestCase):
+
+    def test_last_files_follow_the_latest_results(self):
+        memory = Memory()
+        found = FileListing(["/data/a.txt", "/data/b.txt"])
+        memory.update({"steps": [{"cmd": "find_files", "args": ["*.txt"]}]},
+                      [{"status": "success", "output": found}], "find text files")
+        self.assertEqual(list(memory.last_files), ["/data/a.txt", "/data/b.txt"])
+        memory.update({"steps": [{"cmd": "pwd", "args": []}]},
+                      [{"status": "success", "output": "Current directory: /data"}], "where am I")
+        self.assertEqual(list(memory.last_files), [])
+        self.assertIsNone(memory.resolve_pronoun("them"))
+        report = FileReport("Found 1 group(s) of duplicate files...", ["/data/copy.txt"])
+        memory.update({"steps": [{"cmd": "find_duplicates", "args": ["/data"]}]},
+                      [{"status": "success", "output": report}], "find duplicates")
+        self.assertEqual(memory.resolve_pronoun("them"), ["/data/copy.txt"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import executor, metrics, pdf_text, search
+from src.core.metrics import Histogram, Registry
+
+class TestRegistry(unittest.TestCase):
+
+    def test_histogram_quantiles(self):
+        histogram = Histogram(buckets=(1, 2, 4, 8))
+        for value in [0.5] * 50 + [3] * 45 + [7] * 5:
+            histogram.observe(value)
+        self.assertEqual((histogram.count, histogram.counts), (100, [50, 0, 45, 5, 0]))
+        self.assertAlmostEqual(histogram.quantile(0.5), 1.0)
+        self.assertTrue(2 <= histogram.quantile(0.9) <= 4)
+        self.assertEqual(histogram.quantile(1.0), 7)
+
+    def test_prometheus_text(self):
+        registry = Registry()
+        registry.counter("samantha_things_total", "Things.", kind='a "b"').inc(3)
+        registry.histogram("samantha_wait_seconds", "Waits.", buckets=(0.1, 1)).observe(0.5)
+        self.assertEqual(registry.to_prometheus(), "\n".join([
+            "# HELP samantha_things_total Things.",
+            "# TYPE samantha_things_total counter",
+            'samantha_things_total{kind="a \\"b\\""} 3',
+            "# HELP samantha_wait_seconds Waits.",
+            "# TYPE samantha_wait_seconds histogram",
+            'samantha_wait_seconds_bucket{le="0.1"} 0',
+            'samantha_wait_seconds_bucket{le="1"} 1',
+            'samantha_wait_seconds_bucket{le="+Inf"} 1',
+            "samantha_wait_seconds_sum 0.5",
+            "samantha_wait_seconds_count 1",
+        ]) + "\n")
+        with self.assertRaises(ValueError):
+            registry.histogram("samantha_things_total")
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for name in ("a/one.txt", "a/b/two.txt", "three.txt"):
+            path = os.path.join(self.test_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("hello metrics\n")
+        metrics.REGISTRY.reset()
+        metrics.enable()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.REGISTRY.reset()
+        shutil.rmtree(self.test_dir)
+
+    def _counters(self):
+        return {(c["name"], tuple(sorted(c["labels"].items()))): c["value"]
+                for c in metrics.REGISTRY.summary()["counters"]}
+
+    def test_walks_reads_and_commands_are_recorded(self):
+        ctx = executor.ExecutionContext(cwd=self.test_dir, output=lambda text: None)
+        executor.execute_with_recovery("find_files", ["*.txt", "."], {}, ctx)
+        cache = pdf_text.PdfTextCache(os.path.join(self.test_dir, "pdf_text.db"))
+        with patch.object(pdf_text, "default_pdf_text_cache", return_value=cache):
+            executor.execute_with_recovery("search_in_files", ["hello", "."], {}, ctx)
+        cache.close()
+        executor.execute_with_recovery("ls", ["missing"], {}, ctx)
+        counters = self._counters()
+        self.assertEqual(counters[("samantha_directory_entries_total", (("walker", "find_files"),))], 5)
+        self.assertEqual(counters[("samantha_file_read_bytes_total", (("reader", "search_in_files"),))], 42)
+        self.assertEqual(counters[("samantha_commands_total", (("command", "ls"), ("status", "error")))], 1)
+        histograms = {(h["name"], tuple(h["labels"].values())): h for h in metrics.REGISTRY.summary()["histograms"]}
+        self.assertEqual(histograms[("samantha_directory_read_seconds", ("find_files",))]["count"], 3)
+        self.assertEqual(histograms[("samantha_command_seconds", ("find_files",))]["count"], 1)
+
+    def test_timed_decorator(self):
+        @metrics.timed("samantha_sync_seconds")
+        def work(x):
+            return x * 2
+
+        @metrics.timed("samantha_async_seconds")
+        async def async_work(x):
+            return x + 1
+
+        self.assertEqual((work(2), asyncio.run(async_work(2))), (4, 3))
+        metrics.disable()
+        work(3)
+        self.assertIs(metrics.timer("samantha_sync_seconds"), metrics.NULL_TIMER)
+        counts = {h["name"]: h["count"] for h in metrics.REGISTRY.summary()["histograms"]}
+        self.assertEqual(counts, {"samantha_sync_seconds": 1, "samantha_async_seconds": 1})
+
+    def test_disabled_records_nothing(self):
+        metrics.disable()
+        search.find_files("*.txt", self.test_dir)
+        executor.execute_with_recovery("pwd", [], {}, executor.ExecutionContext(cwd=self.test_dir))
+        self.assertEqual(metrics.REGISTRY.to_prometheus(), "")
+
+    def test_reports_are_written(self):
+        search.find_files("*.txt", self.test_dir)
+        prom_path, json_path = metrics.write_reports(os.path.join(self.test_dir, "out"))
+        with open(prom_path) as f:
+            self.assertIn('samantha_directory_entries_total{walker="find_files"} 5', f.read())
+        with open(json_path) as f:
+            summary = json.load(f)
+        self.assertEqual(summary["histograms"][0]["name"], "samantha_directory_read_seconds")
+
+    def test_cli_flag_writes_reports_at_exit(self):
+        from src.cli import samantha
+        out = os.path.join(self.test_dir, "metrics")
+        metrics.disable()
+        with patch.object(sys, "argv", ["samantha", "--mock", "--metrics", out, "show current directory"]), \
+                patch.object(samantha, "process_prompt"), patch.object(samantha, "open_memory"):
+            samantha.main()
+        self.assertTrue(os.path.exists(os.path.join(out, "metrics.prom")))
+        self.assertTrue(metrics.is_enabled())
+
+if __name__ == '__main__':
+    unittest.main()
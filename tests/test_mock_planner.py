@@ -0,0 +1,107 @@
+import unittest
+import os
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import mock_planner
+from src.core.mock_planner import IntentParser, create_mock_plan, _parse_single_command
+
+class TestMockPlanner(unittest.TestCase):
+
+    def test_find_with_filters(self):
+        step = _parse_single_command("find pdf files larger than 1 mb in demo_data")
+        self.assertEqual(step["cmd"], "find_files")
+        self.assertEqual(step["args"], ["*", "demo_data"])
+        self.assertEqual(step["kwargs"], {"size": ">1mb"})
+
+    def test_multi_step_with_pronoun(self):
+        plan = create_mock_plan("find pdf files in demo_data then copy them to backup")
+        self.assertEqual([s["cmd"] for s in plan["steps"]], ["find_files", "cp"])
+        self.assertEqual(plan["steps"][1]["args"], ["$results.last", "backup"])
+
+    def test_phrase_triggers(self):
+        self.assertEqual(_parse_single_command("search for budget in demo_data")["args"], ["budget", "demo_data"])
+        self.assertEqual(_parse_single_command("go to demo_data")["args"], ["demo_data"])
+        self.assertEqual(_parse_single_command("change directory backup")["args"], ["backup"])
+
+    def test_first_matching_intent_decides(self):
+        # 'copy' matches but has no destination, so no later intent (e.g. 'list') is tried.
+        self.assertIsNone(_parse_single_command("copy the list"))
+        # 'make' without 'directory' falls through to the next candidate.
+        self.assertEqual(_parse_single_command("make a list")["cmd"], "ls")
+
+    def test_unknown_command_falls_back_to_echo(self):
+        plan = create_mock_plan("what is the weather")
+        self.assertEqual(plan["steps"][0]["cmd"], "echo")
+
+    def test_register_intent(self):
+        parser = IntentParser()
+        parser.register("pwd", ["where am i", "pwd"], lambda scan: {"cmd": "pwd", "args": [], "why": "w"})
+        parser.register("ls", ["list"], lambda scan: {"cmd": "ls", "args": ["."], "why": "w"}, priority=1)
+        self.assertEqual(parser.parse("where am i")["cmd"], "pwd")
+        self.assertIsNone(parser.parse("where is it"))
+        # Lower priority values win when several intents match.
+        self.assertEqual(parser.parse("pwd and list")["cmd"], "ls")
+        parser.unregister("ls")
+        self.assertEqual(parser.parse("pwd and list")["cmd"], "pwd")
+
+    def test_default_parser_is_extensible(self):
+        mock_planner.register_intent("pwd", ["pwd"], lambda scan: {"cmd": "pwd", "args": [], "why": "w"})
+        try:
+            self.assertEqual(create_mock_plan("pwd")["steps"][0]["cmd"], "pwd")
+        finally:
+            mock_planner.DEFAULT_PARSER.unregister("pwd")
+        self.assertEqual(create_mock_plan("pwd")["steps"][0]["cmd"], "echo")
+
+# Prompts and the steps the original planner gave them, which newer intents must not take over.
+BASELINE_PLANS = {
+    "search for duplicate entries in logs": ("search_in_files", ["duplicate entries", "logs"]),
+    "delete duplicate": ("rm", ["duplicate"]),
+    "search for disk quota in docs": ("search_in_files", ["disk quota", "docs"]),
+    "go to disk": ("cd", ["disk"]),
+    "rm du": ("rm", ["du"]),
+    "find files on my disk larger than 1mb": ("find_files", ["*", "."]),
+    "list files in disk": ("ls", ["disk"]),
+    "make directory called tree": ("mkdir", ["tree"]),
+    "cd tree": ("cd", ["tree"]),
+    "list files in tree": ("ls", ["tree"]),
+    "find log files in tree": ("find_files", ["*", "tree"]),
+    "search for tree in docs": ("search_in_files", ["tree", "docs"]),
+    "remove the oldest backup": ("rm", ["the oldest backup"]),
+    "move the largest file to archive": ("mv", ["the largest file", "archive"]),
+    "copy the newest report to backup": ("cp", ["the newest report", "backup"]),
+    "search for the largest value in data": ("search_in_files", ["the largest value", "data"]),
+    "create file called summary": ("touch", ["summary"]),
+    "delete stats": ("rm", ["stats"]),
+    "mkdir stats": ("mkdir", ["stats"]),
+    "ls stats": ("ls", ["stats"]),
+    "list statistics": ("ls", ["statistics"]),
+    "search for summary in reports": ("search_in_files", ["summary", "reports"]),
+    "search for verify in logs": ("search_in_files", ["verify", "logs"]),
+    "search for checksum in logs": ("search_in_files", ["checksum", "logs"]),
+    "touch checksum.txt": ("touch", ["checksum.txt"]),
+    "search for package names in notes": ("search_in_files", ["package names", "notes"]),
+    "copy packages to backup": ("cp", ["packages", "backup"]),
+    "change directory packages": ("cd", ["packages"]),
+}
+
+class TestBaselinePrompts(unittest.TestCase):
+
+    def test_original_commands_still_win(self):
+        for prompt, (cmd, args) in BASELINE_PLANS.items():
+            with self.subTest(prompt=prompt):
+                step = _parse_single_command(prompt)
+                self.assertEqual((step["cmd"], step["args"]), (cmd, args))
+        self.assertEqual(_parse_single_command("find files on my disk larger than 1mb")["kwargs"], {"size": ">1mb"})
+
+    def test_new_intents_still_match(self):
+        self.assertEqual(_parse_single_command("find duplicate files in downloads")["cmd"], "find_duplicates")
+        self.assertEqual(_parse_single_command("show disk usage of demo_data")["args"], ["demo_data"])
+        self.assertEqual(_parse_single_command("show the tree of src")["cmd"], "tree")
+        self.assertEqual(_parse_single_command("summarize files in demo_data")["cmd"], "summarize_files")
+        self.assertEqual(_parse_single_command("verify backup.sha256")["cmd"], "checksum")
+        self.assertIsNone(_parse_single_command("verify the settings"))
+
+if __name__ == '__main__':
+    unittest.main()
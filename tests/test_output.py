@@ -0,0 +1,115 @@
+import unittest
+import io
+import os
+import shlex
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import executor, output
+from src.core.output import OutputSink
+from src.core.pathset import FileListing, PathSet
+
+class TestOutputSink(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.written = []
+        self.listing = FileListing(PathSet(f"/data/file{i}.txt" for i in range(500)))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _lines(self):
+        return "".join(self.written).splitlines()
+
+    def test_long_outputs_keep_head_and_tail(self):
+        sink = OutputSink(self.written.append, head=3, tail=2)
+        sink.show(self.listing)
+        self.assertEqual(self._lines(), ["Found files:", "/data/file0.txt", "/data/file1.txt",
+                                         "…and 496 more files (--full saves everything to a file)",
+                                         "/data/file498.txt", "/data/file499.txt"])
+        self.written.clear()
+        sink.show("\n".join(f"line {i}" for i in range(10)) + "\n")
+        self.assertEqual(self._lines(), ["line 0", "line 1", "line 2", "…and 5 more lines (--full saves everything to a file)",
+                                         "line 8", "line 9"])
+        self.written.clear()
+        sink.show("a\nb\nc\nd\ne\nf")
+        self.assertEqual(self._lines(), ["a", "b", "c", "d", "e", "f"])
+
+    def test_full_output_spills_to_file(self):
+        path = os.path.join(self.test_dir, "out", "full.txt")
+        sink = OutputSink(self.written.append, head=3, tail=2, spill_path=path)
+        sink.show(self.listing, "step 1: find_files")
+        sink.show("Copied.", "step 2: cp")
+        sink.close()
+        self.assertIn(f"…and 496 more files (full output in {path})", self._lines())
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[:2], ["=== step 1: find_files ===", "Found files:"])
+        self.assertEqual(len(lines), 1 + 501 + 2)
+        self.assertEqual(lines[-2:], ["=== step 2: cp ===", "Copied."])
+
+    def test_pager_gets_everything(self):
+        path = os.path.join(self.test_dir, "paged.txt")
+        pager = f"{shlex.quote(sys.executable)} -c 'import sys; open(sys.argv[1], \"w\").write(sys.stdin.read())' {shlex.quote(path)}"
+        with patch.object(sys.stdout, "isatty", return_value=True):
+            OutputSink(pager=pager, head=3, tail=2).show(self.listing)
+        with open(path) as f:
+            self.assertEqual(len(f.read().splitlines()), 501)
+
+    def test_stdout_is_buffered(self):
+        with patch("sys.stdout", new=io.StringIO()) as fake_out, patch.object(output, "FLUSH_INTERVAL", 60):
+            ctx = executor.ExecutionContext(cwd=self.test_dir)
+            ctx.print("first")
+            ctx.print("second")
+            self.assertEqual(fake_out.getvalue(), "")
+            with patch("builtins.input", return_value="n"):
+                ctx.ask("Proceed? ")
+            self.assertEqual(fake_out.getvalue(), "first\nsecond\n")
+
+    def test_slow_output_is_flushed_by_a_timer(self):
+        with patch("sys.stdout", new=io.StringIO()) as fake_out, patch.object(output, "FLUSH_INTERVAL", 0.05):
+            sink = OutputSink()
+            sink.flush()
+            sink.write("first line of a slow command\n")
+            self.assertEqual(fake_out.getvalue(), "")
+            deadline = time.monotonic() + 5
+            while not fake_out.getvalue() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(fake_out.getvalue(), "first line of a slow command\n")
+
+    def test_flushed_before_planning(self):
+        from src.cli import samantha
+        from src.core.memory import Memory
+
+        seen = []
+        with patch("sys.stdout", new=io.StringIO()) as fake_out, patch.object(output, "FLUSH_INTERVAL", 60):
+            ctx = executor.ExecutionContext(cwd=self.test_dir)
+            ctx.print("greeting")
+            with patch.object(samantha, "create_mock_plan", side_effect=lambda intent: seen.append(fake_out.getvalue())):
+                samantha.plan_and_run("anything", Memory(), True, ctx)
+        self.assertIn("greeting", seen[0])
+        self.assertIn("Running in mock mode.", seen[0])
+
+    def test_summary_points_back_to_long_outputs(self):
+        for i in range(40):
+            open(os.path.join(self.test_dir, f"f{i}.txt"), "w").close()
+        ctx = executor.ExecutionContext(cwd=self.test_dir, output=self.written.append, ask=lambda prompt: "y",
+                                        undo_log_file=os.path.join(self.test_dir, "undo.log"))
+        results = executor.run({"steps": [{"cmd": "find_files", "args": ["*.txt", "."]},
+                                          {"cmd": "pwd", "args": []}]}, ctx=ctx)
+        executor.summarize(results, ctx)
+        text = "".join(self.written)
+        self.assertIn("…and 16 more files", text)
+        self.assertIn("Step 1 [SUCCESS]: Found 40 file(s), see step 1 above", text)
+        self.assertIn(f"Step 2 [SUCCESS]: Current directory: {self.test_dir}", text)
+        shown = [line for line in text.splitlines() if line.endswith(".txt")]
+        self.assertEqual(len(shown), output.DEFAULT_HEAD_LINES - 1 + output.DEFAULT_TAIL_LINES)
+
+if __name__ == '__main__':
+    unittest.main()
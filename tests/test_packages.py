@@ -0,0 +1,120 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import executor
+from src.core.mock_planner import create_mock_plan
+from src.osint import packages
+from src.osint.packages import PackageCache, PackageInfo, PackageQueryError, format_info
+
+RPM_OUTPUT = (
+    "bash\t(none)\t5.1.8\t6.oe2203\tx86_64\t7340032\tGPLv3+\thttps://www.gnu.org/software/bash\tinstalled\tThe GNU Bourne Again shell\n"
+    "package nginx is not installed\n"
+)
+DNF_OUTPUT = (
+    "bash\t0\t5.1.8\t7.oe2203\tx86_64\t7340100\tGPLv3+\thttps://www.gnu.org/software/bash\tupdate\tThe GNU Bourne Again shell\n"
+    "nginx\t1\t1.21.5\t2.oe2203\tx86_64\t1200000\tBSD\thttp://nginx.org\tEPOL\tA high performance web server\n"
+)
+SEARCH_OUTPUT = (
+    "=========== Name Matched: nginx ===========\n"
+    "nginx.x86_64 : A high performance web server and reverse proxy server\n"
+    "nginx-filesystem.noarch : The basic directory layout for the Nginx server\n"
+)
+
+class FakeTools:
+    """Stands in for rpm and dnf: records every command line and answers with canned output."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, argv):
+        self.calls.append(argv)
+        if argv[0] == "rpm":
+            return 1, RPM_OUTPUT
+        if "repoquery" in argv:
+            return 0, DNF_OUTPUT
+        if "search" in argv:
+            return 0, SEARCH_OUTPUT
+        return 1, ""
+
+class TestPackages(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = PackageCache(os.path.join(self.test_dir, "packages.db"))
+        self.tools = FakeTools()
+        self.stamps = {"rpmdb": 100.0, "repo": 200.0}
+        self.info = PackageInfo(cache=self.cache, runner=self.tools,
+                                rpmdb_stamp=lambda: self.stamps["rpmdb"], repo_stamp=lambda: self.stamps["repo"])
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_records_are_parsed(self):
+        info = self.info.info(["bash", "nginx"])
+        bash = info["bash"]["installed"][0]
+        self.assertEqual((bash["version"], bash["release"], bash["epoch"], bash["size"], bash["repo"]),
+                         ("5.1.8", "6.oe2203", "", 7340032, "installed"))
+        self.assertIsNone(info["nginx"]["installed"])
+        self.assertEqual(packages.full_version(info["nginx"]["available"][0]), "1:1.21.5-2.oe2203")
+        text = format_info(info)
+        self.assertIn("installed: 5.1.8-6.oe2203 (x86_64)", text)
+        self.assertIn("available: 5.1.8-7.oe2203 (x86_64) from update - update available", text)
+        self.assertIn("nginx: A high performance web server\n  installed: no", text)
+
+    def test_lookups_are_batched_and_cached(self):
+        self.info.info(["bash", "nginx", "bash"])
+        self.assertEqual([argv[0] for argv in self.tools.calls], ["rpm", "dnf"])
+        self.assertEqual(self.tools.calls[0][-2:], ["bash", "nginx"])
+        self.assertIn("-C", self.tools.calls[1])
+        self.info.info(["nginx", "bash"])
+        self.assertEqual(len(self.tools.calls), 2)
+
+    def test_cache_follows_the_metadata_stamps(self):
+        self.info.info(["bash"])
+        self.stamps["rpmdb"] = 101.0
+        self.info.info(["bash"])
+        self.assertEqual([argv[0] for argv in self.tools.calls], ["rpm", "dnf", "rpm"])
+        self.stamps["repo"] = 201.0
+        self.info.info(["bash"])
+        self.assertEqual([argv[0] for argv in self.tools.calls], ["rpm", "dnf", "rpm", "dnf"])
+        with patch.object(packages.time, "time", return_value=packages.time.time() + packages.MAX_AGE + 1):
+            self.info.info(["bash"])
+        self.assertEqual(len(self.tools.calls), 6)
+
+    def test_search_and_failures(self):
+        results = self.info.search("nginx")
+        self.assertEqual([r["name"] for r in results], ["nginx", "nginx-filesystem"])
+        self.assertEqual(self.info.search("nginx"), results)
+        self.assertEqual(len(self.tools.calls), 1)
+        broken = PackageInfo(runner=lambda argv: (1, ""), rpmdb_stamp=lambda: None, repo_stamp=lambda: None)
+        with self.assertRaises(PackageQueryError):
+            broken.available(["bash"])
+        with self.assertRaises(PackageQueryError):
+            broken.installed(["bash"])
+
+    def test_commands(self):
+        stubbed = lambda cache=None: PackageInfo(cache=self.cache, runner=self.tools,
+                                                 rpmdb_stamp=lambda: 1.0, repo_stamp=lambda: 2.0)
+        with patch.object(packages, "PackageInfo", side_effect=stubbed), \
+                patch.object(packages, "default_package_cache", return_value=self.cache):
+            self.assertIn("bash: The GNU Bourne Again shell", executor._execute_package_info(["bash"]))
+            self.assertIn("2 package(s) found for 'nginx'", executor._execute_package_search(["nginx"]))
+        with patch.object(packages.subprocess, "run", side_effect=FileNotFoundError), \
+                patch.object(packages, "default_package_cache", return_value=None):
+            self.assertEqual(executor._execute_package_info(["bash"]), "Error: Command not found: rpm")
+        self.assertTrue(executor._execute_package_info([]).startswith("Error:"))
+
+    def test_mock_planner(self):
+        self.assertEqual(create_mock_plan("are vim and git installed?")["steps"][0]["args"], ["vim", "git"])
+        self.assertEqual(create_mock_plan("search packages for web server")["steps"][0],
+                         {"cmd": "package_search", "args": ["web server"], "why": "To search the repositories for packages."})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import executor, memory, session_store
+from src.core.pathset import FileListing, PathArgs, PathSet
+
+class TestPathSet(unittest.TestCase):
+
+    def test_behaves_like_a_list_of_paths(self):
+        paths = [os.path.join("/data", "a", "one.txt"), os.path.join("/data", "a", "two.txt"), "loose.txt",
+                 os.path.join("/data", "b", "café ☃.md"), os.path.join("/data", "b", "raw\udcff.bin"), os.sep]
+        path_set = PathSet(paths)
+        self.assertEqual(path_set, paths)
+        self.assertEqual(paths, path_set)
+        self.assertEqual(list(path_set), paths)
+        self.assertEqual((len(path_set), path_set[0], path_set[-1], path_set[1:3]), (6, paths[0], paths[-1], paths[1:3]))
+        self.assertIn(paths[3], path_set)
+        self.assertEqual(path_set.directory_count, 4)
+        with self.assertRaises(IndexError):
+            path_set[6]
+        self.assertNotEqual(path_set, paths[:-1])
+        self.assertFalse(PathSet())
+
+    def test_args_reference_their_sequences(self):
+        found = PathSet(["/x/a", "/x/b"])
+        args = PathArgs(["cp"])
+        args.extend(found)
+        args.append("dest")
+        args.append("more")
+        self.assertEqual(args, ["cp", "/x/a", "/x/b", "dest", "more"])
+        self.assertEqual((args[1], args[-1], args[:-1], len(args)), ("/x/a", "more", ["cp", "/x/a", "/x/b", "dest"], 5))
+        self.assertIs(args._parts[1], found)
+
+    def test_listing_text_is_cut_at_whole_lines(self):
+        listing = FileListing(PathSet([f"/d/file{i}.txt" for i in range(100)]))
+        self.assertEqual(str(listing).splitlines()[:2], ["Found files:", "/d/file0.txt"])
+        text = listing.text(60)
+        self.assertEqual(text.splitlines(), ["Found files:", "/d/file0.txt", "/d/file1.txt", "/d/file2.txt",
+                                             "... [truncated 97 more paths]"])
+        results = [{"status": "success", "output": text}]
+        self.assertEqual(memory.files_from_results(results), ["/d/file0.txt", "/d/file1.txt", "/d/file2.txt"])
+
+class TestResultsByReference(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, "out"))
+        for name in ("a.txt", "b.txt"):
+            with open(os.path.join(self.test_dir, name), "w") as f:
+                f.write(name)
+        self.ctx = executor.ExecutionContext(cwd=self.test_dir, output=lambda text: None, ask=lambda prompt: "y",
+                                             undo_log_file=os.path.join(self.test_dir, "undo.log"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_found_files_flow_to_later_steps_and_memory(self):
+        plan = {"steps": [{"cmd": "find_files", "args": ["*.txt", "."]},
+                          {"cmd": "cp", "args": ["$results.last", "out"]},
+                          {"cmd": "ls", "args": ["{result_of_step_1}"]}]}
+        seen = []
+        with patch.dict(executor.COMMAND_MAP, ls=lambda args, kwargs, ctx: seen.append(args) or "listed"):
+            results = executor.run(plan, ctx=self.ctx)["results"]
+        found = results[0]["output"]
+        self.assertIsInstance(found.paths, PathSet)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.test_dir, "out"))), ["a.txt", "b.txt"])
+        self.assertIsInstance(seen[0], PathArgs)
+        self.assertIs(seen[0]._parts[0], found.paths)
+
+        session = memory.Memory()
+        session.update(plan, results, "copy the text files")
+        self.assertIs(session.last_files, found.paths)
+        self.assertIn("Found 2 file(s)", session.conversation_history[-1]["content"])
+
+    def test_store_keeps_a_bounded_copy(self):
+        store = session_store.SessionStore(os.path.join(self.test_dir, "sessions.db"))
+        paths = PathSet(os.path.join(self.test_dir, f"f{i}") for i in range(2000))
+        store.save_state("s", last_plan={}, last_results=[{"status": "success", "output": FileListing(paths)}],
+                         last_files=paths)
+        state = store.load_state("s")
+        self.assertEqual(len(state["last_files"]), session_store.MAX_STORED_FILES)
+        self.assertLess(len(state["last_results"][0]["output"]), session_store.MAX_OUTPUT_CHARS + 50)
+        self.assertTrue(state["last_results"][0]["output"].endswith("more paths]"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import shutil
+import tempfile
+import zlib
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import pdf_text
+from src.core.pdf_text import PdfTextCache, extract_text
+from src.core.search import search_in_files
+
+CMAP = b"""/CIDInit /ProcSet findresource begin 12 dict begin begincmap
+1 begincodespacerange <0000> <FFFF> endcodespacerange
+2 beginbfchar <0001> <0051> <0002> <00E9> endbfchar
+1 beginbfrange <0010> <0012> <0061> endbfrange
+endcmap CMapName currentdict /CMap defineresource pop end end"""
+
+def build_pdf(pages, fonts):
+    """A PDF with one Flate-compressed content stream per page; `fonts` are extra objects 3.. as bytes."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None]
+    page_numbers = []
+    font_refs = " ".join(f"/F{i + 1} {3 + i} 0 R" for i in range(len(fonts)))
+    objects.extend(fonts)
+    for content in pages:
+        data = zlib.compress(content)
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(data) + data + b"\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /Contents {len(objects)} 0 R >>".encode())
+        page_numbers.append(len(objects))
+    kids = " ".join(f"{n} 0 R" for n in page_numbers)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} /Resources << /Font << {font_refs} >> >> >>".encode()
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+FONTS = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+         b"<< /Type /Font /Subtype /Type0 /BaseFont /Subset /Encoding /Identity-H /ToUnicode 5 0 R >>",
+         b"<< /Length %d >>\nstream\n" % len(CMAP) + CMAP + b"\nendstream"]
+PAGE_ONE = (b"BT /F1 12 Tf 72 720 Td (Quarterly Report 2024) Tj 0 -14 Td [(Budget) -300 (approved \\(final\\))] TJ "
+            b"14 TL T* (Caf\\351 meeting notes) Tj ET")
+PAGE_TWO = b"BT /F2 10 Tf 1 0 0 1 72 700 Tm <0001001000110012> Tj 1 0 0 1 72 680 Tm <0002> Tj ET"
+
+class TestPdfText(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.pdf = os.path.join(self.test_dir, "report-2024-final.pdf")
+        with open(self.pdf, "wb") as f:
+            f.write(build_pdf([PAGE_ONE, PAGE_TWO], FONTS))
+        self.cache = PdfTextCache(os.path.join(self.test_dir, "pdf_text.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_extracts_text_operators_in_page_order(self):
+        with open(self.pdf, "rb") as f:
+            text = extract_text(f.read())
+        self.assertEqual(text.splitlines(), ["Quarterly Report 2024", "Budget approved (final)", "Café meeting notes",
+                                             "Qabc", "é"])
+
+    def test_text_is_parsed_once_until_the_file_changes(self):
+        with patch.object(pdf_text, "extract_text", wraps=extract_text) as extract:
+            first = pdf_text.pdf_text(self.pdf, self.cache)
+            self.assertEqual(pdf_text.pdf_text(self.pdf, self.cache), first)
+            self.assertEqual(extract.call_count, 1)
+            with open(self.pdf, "wb") as f:
+                f.write(build_pdf([b"BT /F1 12 Tf (Revised) Tj ET"], FONTS))
+            self.assertEqual(pdf_text.pdf_text(self.pdf, self.cache), "Revised")
+            self.assertEqual(extract.call_count, 2)
+
+    def test_search_finds_text_in_pdfs(self):
+        with open(os.path.join(self.test_dir, "notes.pdf"), "w") as f:
+            f.write("not really a pdf, just budget notes\n")
+        with open(os.path.join(self.test_dir, "broken.pdf"), "wb") as f:
+            f.write(b"%PDF-1.7\n1 0 obj << /Type /Catalog /Pages 9 0 R")
+        results = sorted(search_in_files("budget approved", self.test_dir, pdf_cache=self.cache))
+        self.assertEqual(results, [f"{self.pdf}:2:Budget approved (final)"])
+        results = sorted(search_in_files("budget", self.test_dir, pdf_cache=self.cache))
+        self.assertEqual(results, [os.path.join(self.test_dir, "notes.pdf") + ":1:not really a pdf, just budget notes",
+                                   f"{self.pdf}:2:Budget approved (final)"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import executor
+from src.core.mock_planner import create_mock_plan
+from src.core.query import And, Extensions, QuerySyntaxError, compile_query
+from src.core.search import find_files
+
+NOW = datetime(2024, 6, 1, 12, 0).timestamp()
+
+class FakeEntry:
+    """A DirEntry stand-in that counts how often it is stat'ed."""
+
+    def __init__(self, path, size=0, mtime=NOW):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.stats = 0
+        self._stat = os.stat_result((0, 0, 0, 1, 0, 0, size, mtime, mtime, mtime))
+
+    def stat(self):
+        self.stats += 1
+        return self._stat
+
+class TestQueryLanguage(unittest.TestCase):
+
+    def _matches(self, query, entry):
+        return compile_query(query, now=NOW).matches(entry)
+
+    def test_boolean_operators_and_precedence(self):
+        photo = FakeEntry("/home/u/Photo.JPG")
+        report = FakeEntry("/home/u/report.pdf")
+        self.assertTrue(self._matches("type:images OR ext:pdf", photo))
+        self.assertTrue(self._matches("type:images OR ext:pdf", report))
+        self.assertFalse(self._matches("NOT type:images", photo))
+        # NOT binds tighter than AND, AND tighter than OR.
+        self.assertTrue(self._matches("ext:pdf AND NOT name:x* OR ext:png", report))
+        self.assertFalse(self._matches("ext:pdf AND (NOT name:r* OR ext:png)", report))
+        self.assertTrue(self._matches("report ext:pdf", report))
+        self.assertTrue(self._matches('path:"/home/(u|v)/"', report))
+
+    def test_size_and_date_ranges(self):
+        entry = FakeEntry("/f.bin", size=2 * 1024 ** 2, mtime=datetime(2024, 2, 10, 9, 30).timestamp())
+        self.assertTrue(self._matches("size:1MB..10MB", entry))
+        self.assertTrue(self._matches("size:..2MB", entry))
+        self.assertFalse(self._matches("size:>2MB", entry))
+        self.assertTrue(self._matches("size:>=2MB", entry))
+        self.assertTrue(self._matches("modified:2024-01-01..2024-02-10", entry))
+        self.assertTrue(self._matches("modified:2024-02-10", entry))
+        self.assertFalse(self._matches("modified:>2024-02-10", entry))
+        self.assertTrue(self._matches("modified:<2024-02-10T10:00", entry))
+        # Ages read like find_files' `modified` filter: >7d is older than 7 days.
+        self.assertTrue(self._matches("modified:>7d", entry))
+        self.assertFalse(self._matches("modified:<2w", entry))
+        self.assertTrue(self._matches("modified:30d..200d", entry))
+
+    def test_cheap_checks_run_before_stat(self):
+        tree = compile_query("size:>1KB AND modified:<7d AND ext:txt", now=NOW)
+        self.assertIsInstance(tree, And)
+        self.assertIsInstance(tree.children[0], Extensions)
+        entry = FakeEntry("/a.jpg", size=4096)
+        self.assertFalse(tree.matches(entry))
+        self.assertEqual(entry.stats, 0)
+        # Extension checks under one OR are merged into a single check.
+        self.assertIsInstance(compile_query("ext:log OR type:logs OR ext:TXT"), Extensions)
+
+    def test_syntax_errors(self):
+        for bad in ["size:abc", "(ext:log", "type:pictures", "AND ext:log", "ext:log)", "name:", 'path:"("']:
+            with self.assertRaises(QuerySyntaxError, msg=bad):
+                compile_query(bad)
+
+class TestFindFilesQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for name, size in {"a.txt": 10, "b.log": 2048, "pics/c.png": 5000, "cache/d.txt": 3000}.items():
+            path = os.path.join(self.test_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"x" * size)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _found(self, *args, **kwargs):
+        return sorted(os.path.relpath(p, self.test_dir) for p in find_files(*args, **kwargs))
+
+    def test_query_combines_with_legacy_filters(self):
+        self.assertEqual(self._found("*", self.test_dir, query='ext:txt,png AND NOT path:"/cache/"'), ["a.txt", "pics/c.png"])
+        self.assertEqual(self._found("*.txt", self.test_dir, query="size:1KB.."), ["cache/d.txt"])
+        self.assertEqual(self._found("*", self.test_dir, size=">1KB", query="type:logs OR type:images"),
+                         ["b.log", "pics/c.png"])
+
+    def test_command_reports_invalid_queries(self):
+        ctx = executor.ExecutionContext(cwd=self.test_dir, output=lambda text: None)
+        self.assertTrue(str(executor._execute_find_files([], {"query": "type:logs"}, ctx)).startswith("Found files:\n"))
+        self.assertTrue(executor._execute_find_files(["*"], {"query": "size:huge"}, ctx).startswith("Error: Invalid query:"))
+
+    def test_mock_planner_emits_queries(self):
+        step = create_mock_plan("find images or videos between 1 mb and 10 mb in demo_data")["steps"][0]
+        self.assertEqual(step["kwargs"], {"query": "(type:images OR type:video) AND size:1MB..10MB"})
+        step = create_mock_plan("find documents modified after 2024-01-01")["steps"][0]
+        self.assertEqual(step["kwargs"], {"file_type": "documents", "query": "modified:>=2024-01-01"})
+        compile_query(step["kwargs"]["query"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import executor, safety
+from src.core.safety import CONFIRM, DENY, PathTrie, Policy, load_policy
+
+class TestPathTrie(unittest.TestCase):
+
+    def test_deepest_entry_decides(self):
+        trie = PathTrie({"/usr": "system", "/usr/local/src": None, "=/": "system", "/home/u/.ssh": "sensitive"})
+        self.assertEqual(trie.lookup("/usr/bin/python"), ("/usr", "system"))
+        self.assertEqual(trie.lookup("/usr"), ("/usr", "system"))
+        self.assertEqual(trie.lookup("/usr/local/src/app"), ("/usr/local/src", None))
+        self.assertEqual(trie.lookup("/"), ("/", "system"))
+        self.assertEqual(trie.lookup("/srv/data"), (None, None))
+        self.assertEqual(trie.lookup("/usrlocal"), (None, None))
+        self.assertEqual(trie.lookup("/home/u/.ssh/id_rsa"), ("/home/u/.ssh", "sensitive"))
+
+class TestPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = os.path.realpath(tempfile.mkdtemp())
+        self.system = os.path.join(self.test_dir, "system")
+        self.secrets = os.path.join(self.test_dir, "secrets")
+        self.work = os.path.join(self.test_dir, "work")
+        for directory in (self.system, self.secrets, self.work):
+            os.makedirs(directory)
+        with open(os.path.join(self.system, "config"), "w") as f:
+            f.write("x")
+        self.policy = Policy({self.system: "system", self.secrets: "sensitive", "=" + self.work: "system"})
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _check(self, steps, last_files=None):
+        return self.policy.check_plan({"steps": steps}, self.test_dir, last_files)
+
+    def test_verdicts_per_command_and_tier(self):
+        report = self._check([{"cmd": "rm", "args": ["system/config"]},
+                              {"cmd": "cp", "args": ["system/config", "work/copy"]},
+                              {"cmd": "touch", "args": ["secrets/new"]},
+                              {"cmd": "ls", "args": ["system"]},
+                              {"cmd": "rm", "args": ["work"]}])
+        self.assertEqual([(f.step, f.verdict) for f in report.findings], [(1, DENY), (3, CONFIRM), (5, DENY)])
+        self.assertIn("step 1 (rm) would modify", report.describe(DENY))
+        # Copying out of a protected tree is fine; copying into it is not.
+        self.assertTrue(self._check([{"cmd": "cp", "args": ["work/a", "system/a"]}]).denied)
+
+    def test_symlinks_into_protected_trees(self):
+        os.symlink(self.system, os.path.join(self.work, "link"))
+        self.assertTrue(self._check([{"cmd": "rm", "args": ["work/link/config"]}]).denied)
+        # The link itself lives in work/, so removing it is allowed.
+        self.assertFalse(self._check([{"cmd": "rm", "args": ["work/link"]}]).findings)
+
+    def test_expansions(self):
+        report = self._check([{"cmd": "mv", "args": ["work/a", "system/a"]},
+                              {"cmd": "rm", "args": ["{result_of_step_1}"]}])
+        self.assertEqual([(f.step, f.path) for f in report.denied],
+                         [(1, os.path.join(self.system, "a")), (2, os.path.join(self.system, "a"))])
+        report = self._check([{"cmd": "rm", "args": ["$results.last"]}], last_files=[self.system])
+        self.assertTrue(report.denied)
+        report = self._check([{"cmd": "find_files", "args": ["*", "system"]}, {"cmd": "rm", "args": ["$results.last"]}])
+        self.assertEqual((report.findings, report.dynamic_steps), ([], {2}))
+
+    def test_cd_steps_move_the_checked_cwd(self):
+        report = self._check([{"cmd": "cd", "args": ["work"]}, {"cmd": "cd", "args": ["../system"]},
+                              {"cmd": "rm", "args": ["config"]}])
+        self.assertEqual([(f.step, f.path) for f in report.denied], [(3, os.path.join(self.system, "config"))])
+        report = self._check([{"cmd": "find_files", "args": ["*", "work"]}, {"cmd": "cd", "args": ["$results.last"]},
+                              {"cmd": "rm", "args": ["config"]}])
+        self.assertEqual((report.findings, report.dynamic_steps), ([], {2, 3}))
+
+    def test_shell_commands_and_path_kwargs(self):
+        report = self._check([{"cmd": "execute_bash", "args": [f"rm -rf {self.system}"]},
+                              {"cmd": "execute_bash", "args": ["echo hi > secrets/out.txt"]},
+                              {"cmd": "execute_bash", "args": [f"cat {self.system}/config"]},
+                              {"cmd": "checksum", "args": ["work"], "kwargs": {"manifest": "system/sums.sha256"}},
+                              {"cmd": "checksum", "args": [], "kwargs": {"verify": "system/sums.sha256"}}])
+        self.assertEqual([(f.step, f.tier, f.verdict) for f in report.findings],
+                         [(1, "system", DENY), (2, "sensitive", CONFIRM), (3, "shell", CONFIRM), (4, "system", DENY)])
+        self.assertIn("step 3 runs a shell command: cat", report.describe(CONFIRM))
+        policy = Policy({self.system: "system"}, {"execute_bash": {"system": DENY}})
+        self.assertEqual(policy.check_plan({"steps": [{"cmd": "execute_bash", "args": ["ls -l"]}]}, self.test_dir).findings, [])
+
+    def test_run_blocks_before_confirmation_and_at_runtime(self):
+        ctx = executor.ExecutionContext(cwd=self.test_dir, output=lambda text: None, ask=lambda prompt: "y",
+                                        undo_log_file=os.path.join(self.test_dir, "undo.log"))
+        with patch.object(safety, "default_policy", return_value=self.policy), \
+                patch.object(executor, "confirm", side_effect=AssertionError("asked to confirm")):
+            result = executor.run({"steps": [{"cmd": "rm", "args": ["system/config"]}]}, ctx=ctx)
+        self.assertEqual(result["summary"], "Blocked by the safety policy.")
+
+        plan = {"steps": [{"cmd": "find_files", "args": ["config", "system"]}, {"cmd": "rm", "args": ["$results.last"]}]}
+        with patch.object(safety, "default_policy", return_value=self.policy), \
+                patch.object(executor, "confirm", return_value=True):
+            results = executor.run(plan, ctx=ctx)["results"]
+        self.assertEqual([r["status"] for r in results], ["success", "error"])
+        self.assertTrue(os.path.exists(os.path.join(self.system, "config")))
+
+    def test_large_plans_are_fast(self):
+        paths = [f"/tmp/project/dir{i % 50}/file{i}.txt" for i in range(100_000)]
+        policy = Policy()
+        start = time.perf_counter()
+        report = policy.check_plan({"steps": [{"cmd": "rm", "args": paths}]}, "/")
+        elapsed = time.perf_counter() - start
+        self.assertEqual(report.findings, [])
+        self.assertLess(elapsed, 1.0)
+
+    def test_load_policy(self):
+        path = os.path.join(self.test_dir, "policy.json")
+        with open(path, "w") as f:
+            json.dump({"protected": {self.work: "sensitive"}, "rules": {"touch": {"sensitive": "deny"}}}, f)
+        policy = load_policy(path)
+        report = policy.check_plan({"steps": [{"cmd": "touch", "args": ["work/a"]}, {"cmd": "mkdir", "args": ["work/b"]},
+                                              {"cmd": "rm", "args": ["/etc/passwd"]}]}, self.test_dir)
+        self.assertEqual([(f.step, f.verdict) for f in report.findings], [(1, DENY), (2, CONFIRM), (3, DENY)])
+        with open(path, "w") as f:
+            json.dump({"rules": {"rm": {"system": "maybe"}}}, f)
+        with self.assertRaises(ValueError):
+            load_policy(path)
+
+    def test_broken_policy_file_warns_through_the_session(self):
+        printed = []
+        ctx = executor.ExecutionContext(cwd=self.test_dir, output=printed.append, ask=lambda prompt: "n",
+                                        undo_log_file=os.path.join(self.test_dir, "undo.log"))
+        path = os.path.join(self.test_dir, "policy.json")
+        with open(path, "w") as f:
+            f.write("{not json")
+        with patch.object(safety, "POLICY_FILE", path), patch.object(safety, "_DEFAULT_POLICY", None), \
+                patch("builtins.print", side_effect=AssertionError("printed outside the session")):
+            policy = safety.default_policy()
+            executor.run({"steps": [{"cmd": "ls", "args": []}]}, ctx=ctx)
+        self.assertEqual(policy.rules, Policy().rules)
+        self.assertTrue(any(f"Warning: ignoring {path}" in text for text in printed))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import os
+import shutil
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import memory
+from src.core.session_store import SessionStore
+
+class TestSessionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "test_session_store_dir"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.store = SessionStore(os.path.join(self.test_dir, "sessions.db"), max_turns=4, max_sessions=2)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_history_is_a_ring_buffer(self):
+        for i in range(6):
+            self.store.append_turns("s", [{"role": "user", "content": f"request {i}"}])
+        history = self.store.load_history("s")
+        self.assertEqual([t["content"] for t in history], ["request 2", "request 3", "request 4", "request 5"])
+        self.assertEqual(len(self.store.load_history("s", limit=2)), 2)
+
+    def test_oldest_sessions_are_evicted(self):
+        for name in ["a", "b", "c"]:
+            self.store.append_turns(name, [{"role": "user", "content": name}])
+        self.assertEqual(self.store.list_sessions(), ["c", "b"])
+        self.assertEqual(self.store.load_history("a"), [])
+
+    def test_memory_persists_across_instances(self):
+        plan = {"steps": [{"cmd": "find_files", "args": ["*.pdf", "docs"], "why": "w"}]}
+        results = [{"status": "success", "output": "Found files:\n/docs/a.pdf\n/docs/b.pdf"}]
+        first = memory.Memory(store=self.store, session_id="s")
+        first.update(plan=plan, results=results, user_request="find pdfs in docs")
+
+        second = memory.Memory(store=self.store, session_id="s")
+        self.assertEqual(second.get_history()[0], {"role": "user", "content": "find pdfs in docs"})
+        self.assertIn("/docs/a.pdf", second.get_history()[1]["content"])
+        self.assertEqual(second.resolve_pronoun("them"), ["/docs/a.pdf", "/docs/b.pdf"])
+        self.assertEqual(second.get_last_plan(), plan)
+
+    def test_large_outputs_are_truncated(self):
+        results = [{"status": "success", "output": "x" * 100000}]
+        self.store.save_state("s", last_results=results)
+        stored = self.store.load_state("s")["last_results"][0]["output"]
+        self.assertLess(len(stored), 10000)
+        self.assertIn("truncated", stored)
+
+if __name__ == '__main__':
+    unittest.main()
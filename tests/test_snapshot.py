@@ -0,0 +1,112 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import nl2cmd
+from src.osint import snapshot
+from src.osint.snapshot import SnapshotCollector, format_snapshot, system_snapshot
+
+DF_OUTPUT = """Filesystem     1024-blocks     Used Available Capacity Mounted on
+/dev/vda2         41152736 20576368  18462880      53% /
+devtmpfs           1965020        0   1965020       0% /dev
+tmpfs              1991832        0   1991832       0% /dev/shm
+/dev/vdb1        103081248  5242880  92580520       6% /data disk
+"""
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.proc = os.path.join(self.test_dir, "proc")
+        self.bin = os.path.join(self.test_dir, "bin")
+        os.makedirs(os.path.join(self.proc, "sys", "kernel"))
+        os.makedirs(self.bin)
+        self._write(os.path.join(self.proc, "sys", "kernel", "osrelease"), "5.10.0-153.12.0.92.oe2203sp2.x86_64\n")
+        self._write(os.path.join(self.proc, "meminfo"),
+                    "MemTotal:        8000000 kB\nMemFree:  100 kB\nMemAvailable:    2000000 kB\n"
+                    "SwapTotal:       1000000 kB\nSwapFree:         500000 kB\n")
+        self._write(os.path.join(self.proc, "loadavg"), "0.52 0.40 0.33 2/345 6789\n")
+        self._write(os.path.join(self.proc, "cpuinfo"), "processor\t: 0\nmodel name\t: x\n\nprocessor\t: 1\n")
+        self.os_release = os.path.join(self.test_dir, "os-release")
+        self._write(self.os_release, 'NAME="openEuler"\nVERSION="22.03 (LTS-SP2)"\nPRETTY_NAME="openEuler 22.03 (LTS-SP2)"\n')
+        self._stub("rpm", "printf '5.10.0-136.12.0.86.oe2203sp2.x86_64\\n5.10.0-153.12.0.92.oe2203sp2.x86_64\\n'")
+        self._stub("df", f"cat <<'EOF'\n{DF_OUTPUT}EOF")
+        self.collector = SnapshotCollector(proc_root=self.proc, os_release=self.os_release, path=self.bin, timeout=1.0)
+
+    def tearDown(self):
+        snapshot._CACHE.clear()
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def _stub(self, name, script):
+        path = os.path.join(self.bin, name)
+        self._write(path, f"#!/bin/sh\n{script}\n")
+        os.chmod(path, 0o755)
+
+    def test_collects_every_probe(self):
+        result = self.collector.collect()
+        self.assertEqual(result["errors"], {})
+        self.assertEqual(result["os"], "openEuler 22.03 (LTS-SP2)")
+        self.assertEqual(result["kernel"], "5.10.0-153.12.0.92.oe2203sp2.x86_64")
+        self.assertEqual(len(result["installed_kernels"]), 2)
+        self.assertEqual([d["mount"] for d in result["disks"]], ["/", "/data disk"])
+        self.assertEqual(result["disks"][0]["available"], 18462880 * 1024)
+        self.assertEqual(result["memory"], {"total": 8000000 * 1024, "available": 2000000 * 1024,
+                                            "swap_total": 1000000 * 1024, "swap_free": 500000 * 1024})
+        self.assertEqual(result["load"], {"1m": 0.52, "5m": 0.40, "15m": 0.33, "cpus": 2})
+        text = format_snapshot(result)
+        self.assertIn("System: openEuler 22.03 (LTS-SP2), kernel 5.10.0-153", text)
+        self.assertIn("Load: 0.52 0.40 0.33 on 2 CPU(s)", text)
+        self.assertIn("/ 53% used, 17.6 GB free of 39.2 GB", text)
+
+    def test_probes_fail_independently_and_run_concurrently(self):
+        self._stub("df", "sleep 5")
+        self._stub("rpm", "sleep 0.3; echo 'package kernel is not installed'; exit 1")
+        os.remove(os.path.join(self.proc, "meminfo"))
+        self.collector.timeout = 0.5
+        start = time.perf_counter()
+        result = self.collector.collect()
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertEqual(result["errors"]["disks"], "timed out after 0.5s")
+        self.assertIn("can't read", result["errors"]["memory"])
+        self.assertEqual(result["installed_kernels"], [])
+        self.assertEqual(result["load"]["cpus"], 2)
+
+    def test_kernel_falls_back_to_uname(self):
+        os.remove(os.path.join(self.proc, "sys", "kernel", "osrelease"))
+        self._stub("uname", "echo 6.6.0-test")
+        self.assertEqual(self.collector.collect()["kernel"], "6.6.0-test")
+        shutil.rmtree(self.bin)
+        result = self.collector.collect()
+        self.assertEqual(result["errors"]["kernel"], "command not found: uname")
+        self.assertEqual(result["errors"]["installed_kernels"], "command not found: rpm")
+
+    def test_snapshots_are_cached_briefly(self):
+        cache_path = os.path.join(self.test_dir, "snapshot.json")
+        first = system_snapshot(collector=self.collector, cache_path=cache_path)
+        snapshot._CACHE.clear()
+        with patch.object(self.collector, "collect", side_effect=AssertionError("collected again")):
+            self.assertEqual(system_snapshot(collector=self.collector, cache_path=cache_path), first)
+        with patch.object(snapshot.time, "time", return_value=first["collected"] + snapshot.MAX_AGE + 1), \
+                patch.object(self.collector, "collect", return_value={"collected": 0, "errors": {}}) as collect:
+            system_snapshot(collector=self.collector, cache_path=cache_path)
+        collect.assert_called_once()
+
+    def test_host_description_reaches_the_planner(self):
+        messages = nl2cmd._build_messages("free up some space", host="Disks: / 95% used")
+        self.assertTrue(messages[1]["content"].startswith("--- Host ---\nDisks: / 95% used\n\n--- Conversation History ---"))
+        self.assertNotIn("--- Host ---", nl2cmd._build_messages("hi")[1]["content"])
+        with patch.object(snapshot, "system_snapshot", side_effect=RuntimeError("no /proc")):
+            self.assertEqual(snapshot.host_context(), "")
+
+if __name__ == '__main__':
+    unittest.main()
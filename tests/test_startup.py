@@ -0,0 +1,29 @@
+import unittest
+import os
+import tempfile
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_startup import FORBIDDEN_MODULES, measure_once, parse_importtime
+
+class TestStartup(unittest.TestCase):
+
+    def test_parse_importtime(self):
+        report = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   json.decoder\n"
+            "import time:        50 |        150 | json\n")
+        self.assertEqual(report["top_level"], ["json"])
+        self.assertEqual(report["cumulative_us"]["json.decoder"], 100)
+
+    def test_mock_path_skips_model_dependencies(self):
+        with tempfile.TemporaryDirectory() as home:
+            result = measure_once("list files in demo_data", dict(os.environ, HOME=home, SAMANTHA_SESSION="test"))
+        self.assertEqual(result["returncode"], 0)
+        self.assertIn("src.core.executor", result["cumulative_us"])
+        imported = {name.split(".")[0] for name in result["cumulative_us"]} | set(result["cumulative_us"])
+        self.assertEqual([name for name in FORBIDDEN_MODULES if name in imported], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.suggestions import Analyzer, SuggestionCache, SuggestionEngine, suggest_desktop_cleanup
+
+class TestSuggestions(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.watched = os.path.join(self.test_dir, "watched")
+        os.makedirs(self.watched)
+        self.cache = SuggestionCache(os.path.join(self.test_dir, "cache", "suggestions.json"))
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _analyzer(self, ttl=600.0):
+        def run():
+            self.calls += 1
+            return {"title": "T", "message": f"call {self.calls}", "actionable_plan": {"steps": []}}
+        return Analyzer("counting", run, watch=[self.watched], ttl=ttl)
+
+    def _suggestions(self, analyzer):
+        engine = SuggestionEngine([analyzer], cache=self.cache)
+        engine.refresh()
+        engine.wait(5)
+        return engine.ready()
+
+    def test_result_is_cached_across_engines(self):
+        analyzer = self._analyzer()
+        first = self._suggestions(analyzer)
+        second = self._suggestions(analyzer)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first, second)
+        # A fresh cached result is ready as soon as refresh() returns, with no scan started.
+        engine = SuggestionEngine([analyzer], cache=self.cache)
+        engine.refresh()
+        self.assertEqual((engine.ready(), engine._threads), (first, {}))
+
+    def test_directory_change_invalidates_cache(self):
+        analyzer = self._analyzer()
+        self._suggestions(analyzer)
+        stat = os.stat(self.watched)
+        os.utime(self.watched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self._suggestions(analyzer)
+        self.assertEqual(self.calls, 2)
+
+    def test_invalid_cached_result_runs_again(self):
+        valid = [True]
+        analyzer = self._analyzer()
+        analyzer.validate = lambda result: valid[0]
+        self._suggestions(analyzer)
+        self._suggestions(analyzer)
+        self.assertEqual(self.calls, 1)
+        valid[0] = False
+        self._suggestions(analyzer)
+        self.assertEqual(self.calls, 2)
+
+    def test_expired_ttl_runs_again(self):
+        analyzer = self._analyzer(ttl=0.0)
+        self._suggestions(analyzer)
+        time.sleep(0.01)
+        self._suggestions(analyzer)
+        self.assertEqual(self.calls, 2)
+
+    def test_ready_never_waits_for_running_analyzers(self):
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return {"title": "slow"}
+
+        engine = SuggestionEngine([Analyzer("slow", slow)], cache=self.cache)
+        engine.refresh()
+        start = time.perf_counter()
+        self.assertEqual(engine.ready(), [])
+        self.assertLess(time.perf_counter() - start, 0.5)
+        release.set()
+        engine.wait(5)
+        self.assertEqual(engine.ready(), [{"title": "slow"}])
+        # Each result is handed out once.
+        self.assertEqual(engine.ready(), [])
+
+    def test_failing_analyzer_is_ignored(self):
+        def broken():
+            raise RuntimeError("boom")
+        self.assertEqual(self._suggestions(Analyzer("broken", broken)), [])
+
+    def test_desktop_cleanup_finds_screenshots(self):
+        for i in range(5):
+            open(os.path.join(self.watched, f"Screenshot_{i}.png"), "w").close()
+        open(os.path.join(self.watched, "notes.txt"), "w").close()
+        suggestion = suggest_desktop_cleanup(self.watched)
+        move = suggestion["actionable_plan"]["steps"][1]["args"]
+        self.assertEqual(len(move), 6)
+        self.assertEqual(move[-1], os.path.join(self.watched, "Screenshots"))
+        self.assertIsNone(suggest_desktop_cleanup(self.watched, threshold=6))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import executor, nl2cmd, suggestions, tracing
+from src.core.tracing import Tracer, fold_samples
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.test_dir, "a.txt"), "w") as f:
+            f.write("a")
+        tracing.TRACER.start()
+
+    def tearDown(self):
+        tracing.TRACER.stop()
+        shutil.rmtree(self.test_dir)
+
+    def _spans(self, trace):
+        return [e for e in trace["traceEvents"] if e["ph"] == "X"]
+
+    def test_spans_nest_and_record_details(self):
+        tracer = Tracer()
+        self.assertIs(tracer.span("off"), tracing.NULL_SPAN)
+        tracer.start()
+        with tracer.span("outer", "test", kind="x") as outer:
+            with tracer.span("inner"):
+                pass
+            outer.set(found=3)
+        with self.assertRaises(KeyError):
+            with tracer.span("failing"):
+                raise KeyError("k")
+        trace = tracer.stop()
+        spans = {e["name"]: e for e in self._spans(trace)}
+        self.assertEqual(spans["outer"]["args"], {"kind": "x", "found": 3})
+        self.assertLessEqual(spans["outer"]["ts"], spans["inner"]["ts"])
+        self.assertGreaterEqual(spans["outer"]["ts"] + spans["outer"]["dur"], spans["inner"]["ts"] + spans["inner"]["dur"])
+        self.assertEqual(spans["failing"]["args"]["error"], "KeyError: 'k'")
+        self.assertEqual([e["name"] for e in trace["traceEvents"][:2]], ["process_name", "thread_name"])
+
+    def test_fold_samples(self):
+        samples = [(0, 1, ("main", "run")), (10, 1, ("main", "run", "walk")), (20, 1, ("main", "copy"))]
+        self.assertEqual(sorted(fold_samples(samples, end_ns=100, interval_ns=10)), [
+            (1, 0, "main", 0, 30), (1, 1, "copy", 20, 30), (1, 1, "run", 0, 20), (1, 2, "walk", 10, 20)])
+
+    def test_executor_phases(self):
+        ctx = executor.ExecutionContext(cwd=self.test_dir, output=lambda text: None, ask=lambda prompt: "y",
+                                        undo_log_file=os.path.join(self.test_dir, "undo.log"))
+        plan = {"steps": [{"cmd": "find_files", "args": ["*.txt", "."]},
+                          {"cmd": "cp", "args": ["$results.last", "copy.txt"]}]}
+        executor.run(plan, ctx=ctx)
+        names = [e["name"] for e in self._spans(tracing.TRACER.stop())]
+        self.assertEqual(names, ["preview", "safety policy check", "confirmation", "step 1: find_files",
+                                 "compile filters", "walk and match", "step 2: cp", "copy"])
+
+    @patch.dict(os.environ, {"CODER_BASE_URL": "https://api.mock/v1", "CODER_MODEL_NAME": "m", "OPENAI_API_KEY": "EMPTY"})
+    @patch("src.core.nl2cmd.openai.OpenAI")
+    def test_model_attempts(self, mock_openai_class):
+        client = MagicMock()
+        mock_openai_class.return_value = client
+        plan = {"steps": [{"cmd": "ls", "args": [], "why": "List files."}], "assumptions": []}
+        client.chat.completions.create.side_effect = [
+            MagicMock(choices=[MagicMock(message=MagicMock(content="not json"))]),
+            MagicMock(choices=[MagicMock(message=MagicMock(content=json.dumps(plan)))])]
+        with patch.dict(nl2cmd._CLIENTS, clear=True), patch.object(nl2cmd, "_report_api_exception"):
+            nl2cmd.nl_to_plan("list files")
+        spans = self._spans(tracing.TRACER.stop())
+        self.assertEqual([(e["name"], e["args"].get("attempt"), e["args"].get("outcome")) for e in spans],
+                         [("prompt assembly", None, None), ("model attempt", 1, "error"), ("model attempt", 2, "plan")])
+
+    def test_cli_writes_trace_with_samples(self):
+        from src.cli import samantha
+        path = os.path.join(self.test_dir, "trace.json")
+        tracing.TRACER.stop()
+        ctx = executor.ExecutionContext(cwd=self.test_dir, output=lambda text: None, ask=lambda prompt: "y",
+                                        undo_log_file=os.path.join(self.test_dir, "undo.log"))
+        process_prompt = samantha.process_prompt
+
+        def handle(user_intent, memory_instance, mock=False):
+            process_prompt(user_intent, memory_instance, mock=mock, ctx=ctx)
+
+        with patch.object(sys, "argv", ["samantha", "--mock", "--trace", path, "--trace-sample", "0.1", "find txt files"]), \
+                patch.object(samantha, "process_prompt", side_effect=handle), \
+                patch.object(samantha, "open_memory", return_value=samantha.memory.Memory()), \
+                patch.object(suggestions, "default_engine", return_value=suggestions.SuggestionEngine([])):
+            samantha.main()
+        self.assertFalse(tracing.TRACER.enabled)
+        with open(path) as f:
+            events = json.load(f)["traceEvents"]
+        names = {e["name"] for e in events if e.get("cat") != "sample"}
+        self.assertTrue({"request", "plan (mock)", "step 1: find_files", "walk and match"} <= names)
+        self.assertTrue(any(e.get("cat") == "sample" for e in events))
+        self.assertIn("Python stack samples", [e["args"]["name"] for e in events if e["ph"] == "M"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import executor
+from src.vision import ascii_art
+from src.vision.ascii_art import draw_directory_tree, iter_directory_tree
+
+class TestTree(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, "root")
+        for name in ["a/b/c/deep.txt", "a/one.txt", "big/placeholder", "z.txt", ".hidden/h.txt", "cache/x.pyc"]:
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+        for i in range(20):
+            open(os.path.join(self.root, "big", f"f{i:02d}.txt"), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _lines(self, **kwargs):
+        return list(iter_directory_tree(self.root, **kwargs))
+
+    def test_matches_structure_renderer(self):
+        lines = self._lines(ignore=["big", "cache"])
+        structure = {"a/": {"b/": {"c/": {"deep.txt": None}}, "one.txt": None}, "z.txt": None}
+        self.assertEqual(lines[0], self.root + os.sep)
+        self.assertEqual("\n".join(lines[1:]), draw_directory_tree(structure))
+
+    def test_depth_limit(self):
+        lines = self._lines(max_depth=2)
+        self.assertIn("│   ├── b/", lines)
+        self.assertFalse(any("c/" in line for line in lines[1:]))
+
+    def test_entry_cap_elides_the_rest(self):
+        counts = {}
+        lines = self._lines(max_entries=3, counts=counts)
+        self.assertIn("│   ├── f00.txt", lines)
+        self.assertIn("│   └── … 18 more", lines)
+        self.assertNotIn("│   ├── f03.txt", lines)
+        self.assertEqual(lines[-1], "└── … 1 more")
+        self.assertEqual(counts, {"directories": 5, "files": 6})
+        # Directory order: which entries are shown varies, how many doesn't.
+        unsorted = self._lines(max_entries=5, sort=False)
+        self.assertTrue(any(line.endswith("└── … 16 more") for line in unsorted))
+
+    def test_ignore_rules_and_hidden(self):
+        lines = self._lines(ignore=["*.pyc", "a/b"])
+        self.assertIn("├── cache/", lines)
+        self.assertFalse(any("x.pyc" in line or "── b/" in line or ".hidden" in line for line in lines))
+        self.assertTrue(any(".hidden/" in line for line in self._lines(show_hidden=True)))
+
+    def test_first_line_before_any_walking(self):
+        with patch.object(ascii_art.os, "scandir", side_effect=AssertionError("walked too early")):
+            self.assertEqual(next(iter_directory_tree(self.root)), self.root + os.sep)
+
+    def test_command_streams_through_context(self):
+        lines = []
+        ctx = executor.ExecutionContext(cwd=self.test_dir, output=lines.append)
+        result = executor._execute_tree(["root"], {"depth": 1, "ignore": "big, cache"}, ctx)
+        self.assertEqual(lines[0], self.root + os.sep + "\n")
+        self.assertIn("├── a/\n", lines)
+        self.assertEqual(result, "1 directories, 1 files shown.")
+
+if __name__ == '__main__':
+    unittest.main()